@@ -0,0 +1,303 @@
+"""Benchmark: 仓库真实查询在旧 / 新索引集上的 EXPLAIN ANALYZE 对比.
+
+索引重整 (scripts/db/006_rework_price_indexes.sql) 的前后对比. 不手写 SQL:
+直接调用仓库代码 (StockRepository、列式加载、增量水位线、价格缓存、面板加载),
+通过引擎的 before_cursor_execute 事件与 copy_columns_from_query 截获实际发出的
+语句和参数, 然后在同一连接上:
+
+    1. 当前索引集: 每条语句执行 --repeat 次 EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+    2. 在事务中执行迁移脚本 (默认 006) → 同样测量 → ROLLBACK, 数据库保持原状
+    3. 当前索引集再测一轮, 与第 1 轮合并取中位数, 抵消缓存预热与机器负载的漂移
+
+报告每条语句的执行时间中位数、访问块数与计划节点 (分区上的索引归并为父表索引名,
+×N 为涉及的分区数), 以及目标市场各表的索引个数与总大小. 计时对小表噪声较大,
+块数与计划形状是更可靠的对比依据.
+迁移脚本在事务中会锁住相关表 — 请对开发库运行, 或在数据管道停止时运行.
+
+Usage:
+    python scripts/bench/bench_indexes.py
+    python scripts/bench/bench_indexes.py --market US --ticker AAPL --repeat 7 --json indexes.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event, func, select
+
+from stock_agent.data_pipeline import panel_engine, price_cache
+from stock_agent.data_pipeline.indicator_calculator import PRICE_MODELS, _load_indicator_watermarks
+from stock_agent.database import columnar
+from stock_agent.database.partitions import PARTITIONED_MODELS
+from stock_agent.database.repositories.stock import SIGNAL_MAPS, StockRepository
+from stock_agent.database.session import _get_engine, get_session
+
+DEFAULT_SCRIPT = Path(__file__).resolve().parents[1] / "db" / "006_rework_price_indexes.sql"
+
+# 场景名 → 调用仓库代码的协程 (参数: market, ticker, tickers, last_date)
+Scenario = Callable[[str, str, list[str], Any], Awaitable[Any]]
+
+
+async def _repo(call: Callable[[StockRepository], Awaitable[Any]]) -> Any:
+    async with get_session() as session:
+        return await call(StockRepository(session))
+
+
+async def _price_columns_many(market: str, tickers: list[str], **kwargs: Any) -> Any:
+    async with get_session() as session:
+        return await columnar.load_price_columns_many(session, PRICE_MODELS[market], tickers, **kwargs)
+
+
+SCENARIOS: dict[str, tuple[str, Scenario]] = {
+    "daily_latest_30": (
+        "StockRepository.get_daily_prices(limit=30)",
+        lambda m, t, ts, last: _repo(lambda r: r.get_daily_prices(t, m, limit=30)),
+    ),
+    "daily_range_1y": (
+        "StockRepository.get_daily_prices(近一年)",
+        lambda m, t, ts, last: _repo(
+            lambda r: r.get_daily_prices(t, m, start_date=last - timedelta(days=365), end_date=last)
+        ),
+    ),
+    "price_columns": (
+        "StockRepository.get_daily_price_columns (COPY)",
+        lambda m, t, ts, last: _repo(lambda r: r.get_daily_price_columns(t, m)),
+    ),
+    "tech_latest_30": (
+        "StockRepository.get_technical_indicators(limit=30)",
+        lambda m, t, ts, last: _repo(lambda r: r.get_technical_indicators(t, m, limit=30)),
+    ),
+    **{
+        f"signal_{kind}_latest_30": (
+            f"StockRepository.get_signal_indicators({kind!r}, limit=30)",
+            lambda m, t, ts, last, kind=kind: _repo(lambda r: r.get_signal_indicators(t, m, kind, limit=30)),
+        )
+        for kind in SIGNAL_MAPS
+    },
+    "incremental_load": (
+        "增量加载: 批量 ticker, 近 10 天 + 300 根预热 (COPY)",
+        lambda m, t, ts, last: _price_columns_many(
+            m, ts, since=dict.fromkeys(ts, last - timedelta(days=10)), warmup=300, with_name=False
+        ),
+    ),
+    "indicator_watermarks": (
+        "增量水位线: 六张指标表 max(trade_date) GROUP BY ticker",
+        lambda m, t, ts, last: _load_indicator_watermarks(ts, m),
+    ),
+    "cache_latest_dates": (
+        "价格缓存: 每只 ticker 最新交易日",
+        lambda m, t, ts, last: price_cache._latest_dates(m),
+    ),
+    "panel_1m": (
+        "面板加载: 全市场近一个月",
+        lambda m, t, ts, last: panel_engine.load_price_panel(m, start_date=last - timedelta(days=30)),
+    ),
+}
+
+
+async def capture(market: str, ticker: str, tickers: list[str], last: Any) -> list[dict[str, Any]]:
+    """运行各场景, 截获其发出的 SELECT 语句与参数."""
+    engine = _get_engine()
+    captured: list[tuple[str, tuple]] = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+        captured.append((statement, tuple(parameters or ())))
+
+    original_copy = columnar.copy_columns_from_query
+
+    async def copy_hook(session, query, args, fields):  # noqa: ANN001
+        captured.append((query, tuple(args)))
+        return await original_copy(session, query, args, fields)
+
+    queries: list[dict[str, Any]] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    columnar.copy_columns_from_query = copy_hook
+    try:
+        for name, (description, scenario) in SCENARIOS.items():
+            captured.clear()
+            await scenario(market, ticker, tickers, last)
+            selects = [(sql, args) for sql, args in captured if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+            for i, (sql, args) in enumerate(selects):
+                label = name if len(selects) == 1 else f"{name}[{i + 1}]"
+                queries.append({"name": label, "description": description, "sql": sql, "args": args})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+        columnar.copy_columns_from_query = original_copy
+    return queries
+
+
+def _plan_stats(plan: dict[str, Any], parents: dict[str, str]) -> dict[str, Any]:
+    node = plan["Plan"]
+    blocks = sum(node.get(f"Shared {k} Blocks", 0) for k in ("Hit", "Read"))
+    nodes: Counter[str] = Counter()
+
+    def walk(n: dict[str, Any]) -> None:
+        name = n["Node Type"]
+        if "Index Name" in n:
+            name += f" ({parents.get(n['Index Name'], n['Index Name'])})"
+        elif n["Node Type"] in ("Seq Scan", "Bitmap Heap Scan"):
+            name += " (table)"
+        nodes[name] += 1
+        for child in n.get("Plans", []):
+            walk(child)
+
+    walk(node)
+    plan_text = " → ".join(name if count == 1 else f"{name} ×{count}" for name, count in nodes.items())
+    return {"ms": plan["Execution Time"], "blocks": blocks, "plan": plan_text}
+
+
+async def _parent_indexes(driver: Any) -> dict[str, str]:
+    """分区索引名 → 分区父表上的索引名 (分区自动生成的索引名不便阅读)."""
+    rows = await driver.fetch(
+        "SELECT c.relname, r.relname AS root FROM pg_class c "
+        "JOIN pg_class r ON r.oid = pg_partition_root(c.oid) "
+        "WHERE c.relkind = 'i' AND c.relispartition"
+    )
+    return {r["relname"]: r["root"] for r in rows}
+
+
+async def explain_all(driver: Any, queries: list[dict[str, Any]], repeat: int) -> dict[str, dict[str, Any]]:
+    """每条语句执行 repeat 次 EXPLAIN ANALYZE, 返回全部耗时与最后一次的块数 / 计划."""
+    parents = await _parent_indexes(driver)
+    results = {}
+    for q in queries:
+        runs = []
+        for _ in range(repeat):
+            plan = await driver.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {q['sql']}", *q["args"])
+            runs.append(_plan_stats((json.loads(plan) if isinstance(plan, str) else plan)[0], parents))
+        results[q["name"]] = {"runs": [r["ms"] for r in runs], "blocks": runs[-1]["blocks"], "plan": runs[-1]["plan"]}
+    return results
+
+
+def _summarize(*passes: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """合并同一索引集的多轮测量: 耗时取全部执行的中位数."""
+    return {
+        name: {
+            "ms": statistics.median(ms for p in passes for ms in p[name]["runs"]),
+            "blocks": passes[-1][name]["blocks"],
+            "plan": passes[-1][name]["plan"],
+        }
+        for name in passes[0]
+    }
+
+
+async def index_sizes(driver: Any, tables: list[str]) -> dict[str, dict[str, int]]:
+    """每张表 (含全部分区) 的索引个数与总字节数."""
+    rows = await driver.fetch(
+        "SELECT t.name, count(i.indexrelid) AS indexes, "
+        "coalesce(sum((SELECT sum(pg_relation_size(p.relid)) FROM pg_partition_tree(i.indexrelid) p)), 0) AS bytes "
+        "FROM unnest($1::text[]) AS t(name) LEFT JOIN pg_index i ON i.indrelid = t.name::regclass "
+        "GROUP BY t.name ORDER BY t.name",
+        tables,
+    )
+    return {r["name"]: {"indexes": r["indexes"], "bytes": int(r["bytes"])} for r in rows}
+
+
+def _migration_body(path: Path) -> str:
+    """迁移脚本去掉自身的 BEGIN / COMMIT, 在调用方的事务中执行."""
+    lines = path.read_text().splitlines()
+    return "\n".join(line for line in lines if line.strip().upper() not in ("BEGIN;", "COMMIT;"))
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    model = PRICE_MODELS[args.market]
+    async with get_session() as session:
+        counts = (
+            await session.execute(
+                select(model.ticker, func.count(), func.max(model.trade_date))  # type: ignore[attr-defined]
+                .group_by(model.ticker)  # type: ignore[attr-defined]
+                .order_by(func.count().desc())
+            )
+        ).all()
+    if not counts:
+        raise SystemExit(f"{model.__tablename__} is empty")
+    ticker = args.ticker or counts[0][0]
+    last = max(row[2] for row in counts)
+    tickers = [row[0] for row in counts[: args.batch]]
+
+    queries = await capture(args.market, ticker, tickers, last)
+    tables = [m.__tablename__ for m in PARTITIONED_MODELS[args.market]]
+
+    engine = _get_engine()
+    async with engine.connect() as conn:
+        driver = (await conn.get_raw_connection()).driver_connection
+        first_pass = await explain_all(driver, queries, args.repeat)
+        sizes_before = await index_sizes(driver, tables)
+
+        tx = driver.transaction()
+        await tx.start()
+        try:
+            await driver.execute(_migration_body(Path(args.script)))
+            after = await explain_all(driver, queries, args.repeat)
+            sizes_after = await index_sizes(driver, tables)
+        finally:
+            await tx.rollback()
+        before = _summarize(first_pass, await explain_all(driver, queries, args.repeat))
+        after = _summarize(after)
+
+    return {
+        "market": args.market,
+        "ticker": ticker,
+        "batch": len(tickers),
+        "last_date": last.isoformat(),
+        "script": str(args.script),
+        "repeat": args.repeat,
+        "queries": {
+            q["name"]: {"description": q["description"], "before": before[q["name"]], "after": after[q["name"]]}
+            for q in queries
+        },
+        "sizes": {"before": sizes_before, "after": sizes_after},
+    }
+
+
+def _report(result: dict[str, Any]) -> None:
+    print(
+        f"market: {result['market']}  ticker: {result['ticker']}  batch: {result['batch']}  "
+        f"last: {result['last_date']}  repeat: {result['repeat']} (median; before = 迁移前后两轮)"
+    )
+    print(f"\n{'query':<32} {'before ms':>10} {'after ms':>9} {'speedup':>8} {'blocks b/a':>15}")
+    for name, q in result["queries"].items():
+        b, a = q["before"], q["after"]
+        speedup = b["ms"] / a["ms"] if a["ms"] else float("nan")
+        print(f"{name:<32} {b['ms']:>10.3f} {a['ms']:>9.3f} {speedup:>7.2f}× {b['blocks']:>7}/{a['blocks']:<7}")
+        print(f"{'':<32} before: {b['plan']}")
+        print(f"{'':<32} after:  {a['plan']}")
+
+    print(f"\n{'table':<54} {'indexes b/a':>11} {'before MB':>10} {'after MB':>9}")
+    before, after = result["sizes"]["before"], result["sizes"]["after"]
+    for table in before:
+        b, a = before[table], after[table]
+        print(
+            f"{table:<54} {b['indexes']:>5}/{a['indexes']:<5} {b['bytes'] / 2**20:>10.2f} {a['bytes'] / 2**20:>9.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="仓库真实查询: 旧 / 新索引集的 EXPLAIN ANALYZE 对比")
+    parser.add_argument("--market", choices=["CN", "HK", "US"], default="US", help="目标市场 (默认 US)")
+    parser.add_argument("--ticker", default=None, help="单只股票查询使用的 ticker (默认行数最多的)")
+    parser.add_argument("--batch", type=int, default=200, help="批量查询的 ticker 数 (默认 200)")
+    parser.add_argument("--repeat", type=int, default=5, help="每条语句执行次数, 取中位数 (默认 5)")
+    parser.add_argument("--script", default=str(DEFAULT_SCRIPT), help="在回滚的事务中试用的迁移脚本 (默认 006)")
+    parser.add_argument("--json", default=None, help="结果另存为 JSON")
+    args = parser.parse_args()
+    if args.batch < 1 or args.repeat < 1:
+        parser.error("--batch / --repeat must be >= 1")
+
+    result = asyncio.run(run(args))
+    _report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\nsaved → {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Benchmark: ORM add_all vs asyncpg COPY vs single-statement upsert for the six indicator tables.
+
+对合成行情计算六张指标表, 分别用旧的 ORM 路径 (iterrows + 逐格转换 +
+session.add_all)、逐表 COPY 路径 (frame_to_records + copy_records_to_table)
+以及当前的每 ticker 单语句 upsert (_save_indicator_frames) 写入数据库,
+报告 "仅转换" 与 "端到端写入" 两项的 rows/sec. upsert 另测一次重写
+(值未变化, 全部冲突行被跳过) 的耗时.
+
+写入使用 BENCH 前缀的 ticker, 运行前后都会清理, 不影响真实数据.
+数据库连接取自 Settings (SUPABASE_DB_URL).
+
+Usage:
+    python scripts/bench/bench_indicator_writes.py
+    python scripts/bench/bench_indicator_writes.py --market CN --tickers 50 --years 10
+"""
+
+import argparse
+import asyncio
+import math
+import time
+from typing import Any
+
+import pandas as pd
+from sqlalchemy import Boolean, Float, delete
+from synthetic import BARS_PER_YEAR, make_universe
+
+from stock_agent.data_pipeline.indicator_calculator import (
+    INDICATOR_MODELS,
+    _save_indicator_frames,
+    compute_basic_indicators,
+    compute_mean_reversion_signal,
+    compute_momentum_signal,
+    compute_stat_arb_signal,
+    compute_trend_signal,
+    compute_volatility_signal,
+)
+from stock_agent.database.bulk import copy_columns, copy_records, frame_to_records
+from stock_agent.database.session import get_session
+
+COMPUTE_FUNCS = {
+    "tech": compute_basic_indicators,
+    "trend": compute_trend_signal,
+    "mean_reversion": compute_mean_reversion_signal,
+    "momentum": compute_momentum_signal,
+    "volatility": compute_volatility_signal,
+    "stat_arb": compute_stat_arb_signal,
+}
+
+TICKER_PREFIX = "BENCH"
+
+
+# ---- Legacy ORM path (mirrors the pre-COPY _save_* functions) ----
+
+
+def _s(val: Any) -> float | None:
+    if val is None or (isinstance(val, float) and (math.isnan(val) or math.isinf(val))):
+        return None
+    try:
+        return round(float(val), 4)
+    except (TypeError, ValueError):
+        return None
+
+
+def _sb(val: Any) -> bool | None:
+    if val is None or (isinstance(val, float) and math.isnan(val)):
+        return None
+    return bool(val)
+
+
+def _orm_entities(df: pd.DataFrame, model: type, ticker: str) -> list:
+    columns = copy_columns(model)
+    entities = []
+    for _, row in df.iterrows():
+        values: dict[str, Any] = {}
+        for column in columns:
+            if column.name == "ticker":
+                values["ticker"] = ticker
+            elif isinstance(column.type, Float):
+                values[column.name] = _s(row.get(column.name))
+            elif isinstance(column.type, Boolean):
+                values[column.name] = _sb(row.get(column.name))
+            else:
+                values[column.name] = row.get(column.name)
+        entities.append(model(**values))
+    return entities
+
+
+async def _orm_write(df: pd.DataFrame, model: type, ticker: str) -> int:
+    entities = _orm_entities(df, model, ticker)
+    async with get_session() as session:
+        session.add_all(entities)
+    return len(entities)
+
+
+async def _copy_write(df: pd.DataFrame, model: type, ticker: str) -> int:
+    columns = copy_columns(model)
+    async with get_session() as session:
+        return await copy_records(session, model, columns, frame_to_records(df, columns, constants={"ticker": ticker}))
+
+
+# ---- Benchmark ----
+
+
+async def _cleanup(market: str) -> None:
+    async with get_session() as session:
+        for models in INDICATOR_MODELS.values():
+            model = models[market]
+            await session.execute(delete(model).where(model.ticker.like(f"{TICKER_PREFIX}%")))  # type: ignore[attr-defined]
+
+
+def _report(label: str, rows: int, seconds: float, baseline: float | None = None) -> float:
+    rate = rows / seconds if seconds > 0 else float("inf")
+    speedup = f"  ×{rate / baseline:.1f}" if baseline else ""
+    print(f"  {label:<28} {rows:>10,} rows  {seconds:>8.3f}s  {rate:>12,.0f} rows/s{speedup}")
+    return rate
+
+
+async def run_benchmark(market: str, n_tickers: int, years: int) -> None:
+    universe = make_universe(n_tickers, years * BARS_PER_YEAR, prefix=TICKER_PREFIX)
+    frames = {
+        ticker: {key: fn(df.copy()) for key, fn in COMPUTE_FUNCS.items()}
+        for ticker, df in universe.items()
+    }
+    total_rows = sum(len(f) for per_ticker in frames.values() for f in per_ticker.values())
+    print(f"market={market} tickers={n_tickers} years={years} → {total_rows:,} indicator rows (6 tables)")
+
+    # 1) Conversion only (no database)
+    start = time.perf_counter()
+    for ticker, per_ticker in frames.items():
+        for key, frame in per_ticker.items():
+            _orm_entities(frame, INDICATOR_MODELS[key][market], ticker)
+    orm_convert = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ticker, per_ticker in frames.items():
+        for key, frame in per_ticker.items():
+            model = INDICATOR_MODELS[key][market]
+            frame_to_records(frame, copy_columns(model), constants={"ticker": ticker})
+    copy_convert = time.perf_counter() - start
+
+    print("\nConversion only:")
+    base = _report("ORM entities (iterrows)", total_rows, orm_convert)
+    _report("COPY records (vectorized)", total_rows, copy_convert, base)
+
+    # 2) End-to-end writes
+    await _cleanup(market)
+    start = time.perf_counter()
+    for ticker, per_ticker in frames.items():
+        for key, frame in per_ticker.items():
+            await _orm_write(frame, INDICATOR_MODELS[key][market], ticker)
+    orm_write = time.perf_counter() - start
+    await _cleanup(market)
+
+    start = time.perf_counter()
+    for ticker, per_ticker in frames.items():
+        for key, frame in per_ticker.items():
+            await _copy_write(frame, INDICATOR_MODELS[key][market], ticker)
+    copy_write = time.perf_counter() - start
+    await _cleanup(market)
+
+    start = time.perf_counter()
+    for ticker, per_ticker in frames.items():
+        await _save_indicator_frames(per_ticker, ticker, market)
+    upsert_write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ticker, per_ticker in frames.items():
+        await _save_indicator_frames(per_ticker, ticker, market)
+    upsert_rewrite = time.perf_counter() - start
+    await _cleanup(market)
+
+    print("\nEnd-to-end write:")
+    base = _report("ORM add_all", total_rows, orm_write)
+    _report("asyncpg COPY (per table)", total_rows, copy_write, base)
+    _report("upsert (per ticker)", total_rows, upsert_write, base)
+    _report("upsert rewrite (unchanged)", total_rows, upsert_rewrite, base)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Indicator write-path benchmark (ORM vs COPY vs upsert)")
+    parser.add_argument("--market", choices=["CN", "HK", "US"], default="US")
+    parser.add_argument("--tickers", type=int, default=10, help="合成 ticker 数量")
+    parser.add_argument("--years", type=int, default=5, help="每只 ticker 的年数 (252 bars/年)")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.market, args.tickers, args.years))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Benchmark suite: indicator_calculator compute and save paths on synthetic OHLCV.
+
+对 1–5000 只合成 ticker × 1–20 年的行情, 分别计时:
+  - compute_basic_indicators 与 5 个 compute_*_signal
+  - _rolling_hurst_exponent (滚动 Hurst 指数)
+  - compute_indicator_columns (融合单遍计算)
+  - save.convert: 六张表 DataFrame → 按列数组 (frame_to_columns, 不连数据库)
+  - save.upsert: _save_indicator_frames 端到端写入 (需 --db)
+
+每项报告吞吐 (bars/s)、峰值 RSS 与单只 ticker 调用的峰值分配 (tracemalloc).
+默认每项在独立子进程中运行, 峰值 RSS 只反映该项自身. 行情逐只生成,
+计时不含生成与 df.copy().
+
+结果可保存为 JSON 基线; 与基线比较时任一跟踪指标退化超过阈值即以非 0 退出:
+bars_per_sec 下降, 或 peak_rss_mb / alloc_peak_mb 上升超过 --threshold.
+
+Usage:
+    python scripts/bench/bench_indicators.py
+    python scripts/bench/bench_indicators.py --tickers 1,100 --years 1,20 --save-baseline baselines/indicators.json
+    python scripts/bench/bench_indicators.py --tickers 1,100 --years 1,20 --baseline baselines/indicators.json
+    python scripts/bench/bench_indicators.py --metrics compute_trend_signal,save.upsert --db --market US
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import talib
+from sqlalchemy import delete
+from synthetic import BARS_PER_YEAR, make_ohlcv
+
+from stock_agent.data_pipeline.indicator_calculator import (
+    INDICATOR_MODELS,
+    _rolling_hurst_exponent,
+    _save_indicator_frames,
+    compute_basic_indicators,
+    compute_indicator_columns,
+    compute_indicator_frames,
+    compute_mean_reversion_signal,
+    compute_momentum_signal,
+    compute_stat_arb_signal,
+    compute_trend_signal,
+    compute_volatility_signal,
+)
+from stock_agent.database.bulk import copy_columns, frame_to_columns
+from stock_agent.database.session import get_session
+
+MAX_TICKERS = 5000
+MAX_YEARS = 20
+TICKER_PREFIX = "BENCH"
+
+# 跟踪的指标: 名称 → 退化方向 (True: 越大越好)
+TRACKED_FIELDS = {"bars_per_sec": True, "peak_rss_mb": False, "alloc_peak_mb": False}
+
+
+# ---- Metrics: 每项接收一只 ticker 的行情, 返回 (计时函数, 已准备好的参数) ----
+
+
+def _frame_metric(fn: Callable[[pd.DataFrame], pd.DataFrame]) -> Callable[[pd.DataFrame, str, str], tuple]:
+    return lambda df, ticker, market: (fn, (df.copy(),))
+
+
+def _hurst_metric(df: pd.DataFrame, ticker: str, market: str) -> tuple:
+    return _rolling_hurst_exponent, (df["close"].to_numpy(dtype=np.float64),)
+
+
+def _fused_metric(df: pd.DataFrame, ticker: str, market: str) -> tuple:
+    arrays = tuple(df[c].to_numpy(dtype=np.float64) for c in ("close", "high", "low", "volume"))
+    return compute_indicator_columns, arrays
+
+
+def _convert_all(frames: dict[str, pd.DataFrame], ticker: str, market: str) -> None:
+    for key, frame in frames.items():
+        columns = copy_columns(INDICATOR_MODELS[key][market])
+        frame_to_columns(frame, columns, constants={"ticker": ticker})
+
+
+def _convert_metric(df: pd.DataFrame, ticker: str, market: str) -> tuple:
+    return _convert_all, (compute_indicator_frames(df), ticker, market)
+
+
+def _upsert_metric(df: pd.DataFrame, ticker: str, market: str) -> tuple:
+    return _save_indicator_frames, (compute_indicator_frames(df), ticker, market)
+
+
+METRICS: dict[str, Callable[[pd.DataFrame, str, str], tuple]] = {
+    "compute_basic_indicators": _frame_metric(compute_basic_indicators),
+    "compute_trend_signal": _frame_metric(compute_trend_signal),
+    "compute_mean_reversion_signal": _frame_metric(compute_mean_reversion_signal),
+    "compute_momentum_signal": _frame_metric(compute_momentum_signal),
+    "compute_volatility_signal": _frame_metric(compute_volatility_signal),
+    "compute_stat_arb_signal": _frame_metric(compute_stat_arb_signal),
+    "rolling_hurst_exponent": _hurst_metric,
+    "compute_indicator_columns": _fused_metric,
+    "save.convert": _convert_metric,
+    "save.upsert": _upsert_metric,
+}
+
+# 需要数据库的项 (仅在 --db 时运行)
+DB_METRICS = frozenset({"save.upsert"})
+
+
+def _peak_rss_mb() -> float:
+    """Process peak RSS (ru_maxrss: Linux 为 KB, macOS 为字节)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def _cleanup(market: str) -> None:
+    async with get_session() as session:
+        for models in INDICATOR_MODELS.values():
+            model = models[market]
+            await session.execute(delete(model).where(model.ticker.like(f"{TICKER_PREFIX}%")))  # type: ignore[attr-defined]
+
+
+def run_metric(metric: str, n_tickers: int, years: int, market: str = "US", repeat: int = 3) -> dict[str, float]:
+    """Run one metric over the synthetic universe; 返回 bars_per_sec / seconds / peak_rss_mb / alloc_peak_mb."""
+    prepare = METRICS[metric]
+    n_bars = years * BARS_PER_YEAR
+    is_async = metric in DB_METRICS
+
+    async def _timed_async(fn: Callable, args: tuple) -> float:
+        start = time.perf_counter()
+        await fn(*args)
+        return time.perf_counter() - start
+
+    def _timed(fn: Callable, args: tuple) -> float:
+        start = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - start
+
+    async def _run_async() -> list[float]:
+        passes = []
+        try:
+            for _ in range(repeat):
+                # 每次都写入空表, 否则后续各次只测到 "值未变化" 的重写
+                await _cleanup(market)
+                passes.append(await _pass_async())
+        finally:
+            await _cleanup(market)
+        return passes
+
+    async def _pass_async() -> float:
+        elapsed = 0.0
+        for i in range(n_tickers):
+            ticker = f"{TICKER_PREFIX}{i:04d}"
+            elapsed += await _timed_async(*prepare(make_ohlcv(n_bars, seed=i, name=ticker), ticker, market))
+        return elapsed
+
+    def _pass() -> float:
+        elapsed = 0.0
+        for i in range(n_tickers):
+            ticker = f"{TICKER_PREFIX}{i:04d}"
+            elapsed += _timed(*prepare(make_ohlcv(n_bars, seed=i, name=ticker), ticker, market))
+        return elapsed
+
+    # 预热一次 (导入 / 首次调用开销不计入), 再计时: 取 repeat 次中的最快一次
+    if not is_async:
+        _timed(*prepare(make_ohlcv(n_bars, seed=n_tickers, name="WARMUP"), "WARMUP", market))
+    seconds = min(asyncio.run(_run_async()) if is_async else [_pass() for _ in range(repeat)])
+    peak_rss = _peak_rss_mb()
+
+    # 分配: 对第一只 ticker 单独跟踪一次 (tracemalloc 会显著拖慢计时, 不与计时混跑)
+    alloc_peak = 0.0
+    if not is_async:
+        fn, args = prepare(make_ohlcv(n_bars, seed=0, name=f"{TICKER_PREFIX}0000"), f"{TICKER_PREFIX}0000", market)
+        tracemalloc.start()
+        try:
+            base, _ = tracemalloc.get_traced_memory()
+            fn(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        alloc_peak = (peak - base) / (1024 * 1024)
+
+    return {
+        "bars_per_sec": n_tickers * n_bars / seconds if seconds > 0 else float("inf"),
+        "seconds": seconds,
+        "peak_rss_mb": peak_rss,
+        "alloc_peak_mb": alloc_peak,
+    }
+
+
+def _run_isolated(metric: str, n_tickers: int, years: int, market: str, repeat: int) -> dict[str, float]:
+    """在全新的 spawn 子进程中运行, 峰值 RSS 不受之前各项影响."""
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(run_metric, metric, n_tickers, years, market, repeat).result()
+
+
+# ---- Baselines ----
+
+
+def _case_key(n_tickers: int, years: int) -> str:
+    return f"{n_tickers}x{years}y"
+
+
+def _environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "talib": talib.__version__,
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+    }
+
+
+def save_baseline(path: Path, results: dict[str, dict[str, dict[str, float]]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"environment": _environment(), "results": results}, indent=2, sort_keys=True) + "\n")
+
+
+def compare_to_baseline(
+    results: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    threshold: float,
+) -> list[str]:
+    """Return one message per tracked metric that regressed by more than ``threshold`` (比例)."""
+    regressions = []
+    for case, metrics in results.items():
+        for metric, values in metrics.items():
+            base = baseline.get(case, {}).get(metric)
+            if not base:
+                continue
+            for field, higher_is_better in TRACKED_FIELDS.items():
+                old, new = base.get(field), values.get(field)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if (-change if higher_is_better else change) > threshold:
+                    regressions.append(f"{case} {metric} {field}: {old:,.2f} → {new:,.2f} ({change:+.1%})")
+    return regressions
+
+
+# ---- CLI ----
+
+
+def _int_list(value: str, upper: int) -> list[int]:
+    items = [int(v) for v in value.split(",")]
+    if any(not 1 <= v <= upper for v in items):
+        raise argparse.ArgumentTypeError(f"values must be in 1..{upper}: {value}")
+    return items
+
+
+def _report(case: str, metric: str, values: dict[str, float]) -> None:
+    print(
+        f"  {case:<10} {metric:<30} {values['bars_per_sec']:>14,.0f} bars/s  {values['seconds']:>8.3f}s"
+        f"  rss {values['peak_rss_mb']:>8.1f} MB  alloc {values['alloc_peak_mb']:>8.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Indicator compute / save benchmark suite (synthetic OHLCV)")
+    parser.add_argument(
+        "--tickers", type=lambda v: _int_list(v, MAX_TICKERS), default=[1, 100],
+        help=f"合成 ticker 数量, 逗号分隔多组 (1–{MAX_TICKERS}, 默认 1,100)",
+    )
+    parser.add_argument(
+        "--years", type=lambda v: _int_list(v, MAX_YEARS), default=[1, 10],
+        help=f"每只 ticker 的年数 (252 bars/年), 逗号分隔多组 (1–{MAX_YEARS}, 默认 1,10)",
+    )
+    parser.add_argument("--metrics", default=None, help=f"只运行这些项, 逗号分隔 (可选: {','.join(METRICS)})")
+    parser.add_argument("--market", choices=["CN", "HK", "US"], default="US", help="save 路径使用的市场表")
+    parser.add_argument("--db", action="store_true", help="包含需要数据库的项 (save.upsert, 连接取自 Settings)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数, 取最快一次 (默认 3)")
+    parser.add_argument("--no-isolate", action="store_true", help="在当前进程中运行 (更快, 但峰值 RSS 为累计值)")
+    parser.add_argument("--save-baseline", type=Path, default=None, help="将结果写入该 JSON 基线文件")
+    parser.add_argument("--baseline", type=Path, default=None, help="与该 JSON 基线比较, 退化超过阈值时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的退化比例 (默认 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    metrics = args.metrics.split(",") if args.metrics else [m for m in METRICS if args.db or m not in DB_METRICS]
+    unknown = set(metrics) - METRICS.keys()
+    if unknown:
+        parser.error(f"unknown metrics: {sorted(unknown)}")
+    if not args.db and DB_METRICS & set(metrics):
+        parser.error(f"{sorted(DB_METRICS & set(metrics))} require --db")
+
+    run = run_metric if args.no_isolate else _run_isolated
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    for n_tickers in args.tickers:
+        for years in args.years:
+            case = _case_key(n_tickers, years)
+            print(f"\n{case}: {n_tickers} tickers × {years * BARS_PER_YEAR} bars = {n_tickers * years * BARS_PER_YEAR:,} bars")
+            for metric in metrics:
+                values = run(metric, n_tickers, years, args.market, args.repeat)
+                results.setdefault(case, {})[metric] = values
+                _report(case, metric, values)
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"\n💾 基线已保存: {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 项退化超过 {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n✅ 与基线 {args.baseline} 相比无超过 {args.threshold:.0%} 的退化")
+
+
+if __name__ == "__main__":
+    main()
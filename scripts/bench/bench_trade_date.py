@@ -0,0 +1,226 @@
+"""Benchmark: trade_date as VARCHAR(10) vs native DATE — range scans and index size.
+
+迁移 (scripts/db/004_trade_date_to_date.sql) 的前后对比. 同一份行情写入两张
+临时 UNLOGGED 表, 仅 trade_date 类型不同, 索引与生产价格表相同:
+UNIQUE (ticker, trade_date)、(ticker)、(trade_date). VACUUM ANALYZE 后对每个
+查询执行 --repeat 次 EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON), 报告执行时间
+中位数、访问的块数与计划节点, 以及表和各索引的大小. 结束时删除两张表.
+
+数据来源: --from-table 复制已有价格表 (迁移前后均可), 否则按 --tickers × --years
+用 generate_series 生成合成行情 (工作日).
+
+Usage:
+    python scripts/bench/bench_trade_date.py
+    python scripts/bench/bench_trade_date.py --tickers 2000 --years 10 --repeat 7
+    python scripts/bench/bench_trade_date.py --from-table stock_daily_price_us --json trade_date.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from datetime import date, timedelta
+from typing import Any
+
+from sqlalchemy import text
+
+from stock_agent.database.session import _get_engine
+
+TABLE_PREFIX = "bench_trade_date"
+VARIANTS = {"varchar": "VARCHAR(10)", "date": "DATE"}
+
+# trade_date 取值表达式 (源列 / generate_series 的 d 均为 date 或 YYYY-MM-DD 文本)
+_DATE_EXPR = {"varchar": "{col}::date::text", "date": "{col}::date"}
+
+# 查询: 名称 → (说明, SQL). {table} 为表名, 日期为 YYYY-MM-DD 字面量 (对两种类型写法相同)
+QUERIES: dict[str, tuple[str, str]] = {
+    "ticker_range_1y": (
+        "单只股票一年 (StockRepository.get_daily_prices)",
+        "SELECT * FROM {table} WHERE ticker = '{ticker}' AND trade_date >= '{year_ago}' "
+        "AND trade_date <= '{last}' ORDER BY trade_date DESC LIMIT 500",
+    ),
+    "market_range_1m": (
+        "全市场一个月",
+        "SELECT ticker, trade_date, close FROM {table} WHERE trade_date >= '{month_ago}' AND trade_date <= '{last}'",
+    ),
+    "count_range_5y": (
+        "五年区间计数 (仅索引)",
+        "SELECT count(*) FROM {table} WHERE trade_date BETWEEN '{five_years_ago}' AND '{last}'",
+    ),
+    "latest_per_ticker": (
+        "每只股票最新交易日 (增量水位线)",
+        "SELECT ticker, max(trade_date) FROM {table} GROUP BY ticker",
+    ),
+}
+
+
+def _table(variant: str) -> str:
+    return f"{TABLE_PREFIX}_{variant}"
+
+
+def _ddl(variant: str) -> list[str]:
+    table = _table(variant)
+    return [
+        f"DROP TABLE IF EXISTS {table}",
+        f"CREATE UNLOGGED TABLE {table} ("
+        f"id SERIAL PRIMARY KEY, ticker VARCHAR(10) NOT NULL, name VARCHAR(50), trade_date {VARIANTS[variant]}, "
+        f"open DOUBLE PRECISION, high DOUBLE PRECISION, low DOUBLE PRECISION, close DOUBLE PRECISION, volume BIGINT)",
+    ]
+
+
+def _indexes(variant: str) -> list[str]:
+    table = _table(variant)
+    return [
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_ticker_date UNIQUE (ticker, trade_date)",
+        f"CREATE INDEX {table}_ticker ON {table} (ticker)",
+        f"CREATE INDEX {table}_trade_date ON {table} (trade_date)",
+    ]
+
+
+def _fill_sql(variant: str, source: str | None, tickers: int, years: int) -> str:
+    cols = "ticker, name, trade_date, open, high, low, close, volume"
+    if source:
+        value = _DATE_EXPR[variant].format(col="trade_date")
+        return (
+            f"INSERT INTO {_table(variant)} ({cols}) SELECT ticker, name, {value}, open, high, low, close, volume "
+            f"FROM {source} WHERE trade_date IS NOT NULL ORDER BY ticker, trade_date"
+        )
+    value = _DATE_EXPR[variant].format(col="d")
+    start = date.today() - timedelta(days=365 * years)
+    return (
+        f"INSERT INTO {_table(variant)} ({cols}) "
+        f"SELECT 'BENCH' || lpad(i::text, 4, '0'), 'BENCH' || lpad(i::text, 4, '0'), {value}, "
+        f"p, p * 1.01, p * 0.99, p, (1e5 + random() * 1e7)::bigint "
+        f"FROM generate_series(0, {tickers - 1}) AS i "
+        f"CROSS JOIN generate_series(DATE '{start}', current_date, interval '1 day') AS d "
+        f"CROSS JOIN LATERAL (SELECT 100 + 10 * sin(i + extract(epoch FROM d) / 86400 / 30) AS p) AS px "
+        f"WHERE extract(isodow FROM d) < 6 ORDER BY i, d"
+    )
+
+
+def _plan_stats(plan: dict[str, Any]) -> dict[str, Any]:
+    node = plan["Plan"]
+    blocks = sum(node.get(f"Shared {k} Blocks", 0) + node.get(f"Local {k} Blocks", 0) for k in ("Hit", "Read"))
+    nodes: list[str] = []
+
+    def walk(n: dict[str, Any]) -> None:
+        name = n["Node Type"]
+        if "Index Name" in n:
+            name += f" ({n['Index Name'].removeprefix(TABLE_PREFIX + '_')})"
+        nodes.append(name)
+        for child in n.get("Plans", []):
+            walk(child)
+
+    walk(node)
+    return {"ms": plan["Execution Time"], "blocks": blocks, "plan": " → ".join(nodes)}
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    engine = _get_engine()
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        async def scalar(sql: str) -> Any:
+            return (await conn.execute(text(sql))).scalar()
+
+        try:
+            for variant in VARIANTS:
+                for stmt in _ddl(variant):
+                    await conn.execute(text(stmt))
+                await conn.execute(text(_fill_sql(variant, args.from_table, args.tickers, args.years)))
+                for stmt in _indexes(variant):
+                    await conn.execute(text(stmt))
+                await conn.execute(text(f"VACUUM ANALYZE {_table(variant)}"))
+
+            base = _table("date")
+            rows = await scalar(f"SELECT count(*) FROM {base}")
+            if not rows:
+                raise SystemExit("no rows to benchmark (empty --from-table?)")
+            last: date = await scalar(f"SELECT max(trade_date) FROM {base}")
+            ticker = await scalar(f"SELECT ticker FROM {base} GROUP BY ticker ORDER BY count(*) DESC LIMIT 1")
+            params = {
+                "ticker": ticker,
+                "last": last.isoformat(),
+                "month_ago": (last - timedelta(days=30)).isoformat(),
+                "year_ago": (last - timedelta(days=365)).isoformat(),
+                "five_years_ago": (last - timedelta(days=5 * 365)).isoformat(),
+            }
+
+            queries: dict[str, Any] = {}
+            for name, (description, template) in QUERIES.items():
+                queries[name] = {"description": description}
+                for variant in VARIANTS:
+                    sql = template.format(table=_table(variant), **params)
+                    runs = []
+                    for _ in range(args.repeat):
+                        plan = await scalar(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+                        runs.append(_plan_stats((json.loads(plan) if isinstance(plan, str) else plan)[0]))
+                    queries[name][variant] = {
+                        "ms": statistics.median(r["ms"] for r in runs),
+                        "blocks": runs[-1]["blocks"],
+                        "plan": runs[-1]["plan"],
+                    }
+
+            sizes: dict[str, dict[str, int]] = {}
+            for variant in VARIANTS:
+                table = _table(variant)
+                result = await conn.execute(text(
+                    f"SELECT 'table' AS rel, pg_relation_size('{table}') AS bytes UNION ALL "
+                    f"SELECT replace(indexrelid::regclass::text, '{table}_', ''), pg_relation_size(indexrelid) "
+                    f"FROM pg_index WHERE indrelid = '{table}'::regclass ORDER BY 1"
+                ))
+                sizes[variant] = {row.rel: row.bytes for row in result}
+        finally:
+            for variant in VARIANTS:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {_table(variant)}"))
+
+    return {
+        "source": args.from_table or f"synthetic {args.tickers} tickers × {args.years} years",
+        "rows": rows,
+        "repeat": args.repeat,
+        "params": params,
+        "queries": queries,
+        "sizes": sizes,
+    }
+
+
+def _report(result: dict[str, Any]) -> None:
+    print(f"source: {result['source']}  rows: {result['rows']:,}  repeat: {result['repeat']} (median)")
+    print(f"\n{'query':<20} {'varchar ms':>11} {'date ms':>9} {'speedup':>8} {'blocks v/d':>13}")
+    for name, q in result["queries"].items():
+        v, d = q["varchar"], q["date"]
+        speedup = v["ms"] / d["ms"] if d["ms"] else float("nan")
+        print(f"{name:<20} {v['ms']:>11.3f} {d['ms']:>9.3f} {speedup:>7.2f}× {v['blocks']:>6}/{d['blocks']:<6}")
+        print(f"{'':<20} varchar: {v['plan']}")
+        print(f"{'':<20} date:    {d['plan']}")
+
+    print(f"\n{'relation':<20} {'varchar MB':>11} {'date MB':>9} {'ratio':>7}")
+    for rel in result["sizes"]["date"]:
+        v, d = result["sizes"]["varchar"].get(rel, 0), result["sizes"]["date"][rel]
+        print(f"{rel:<20} {v / 2**20:>11.2f} {d / 2**20:>9.2f} {d / v if v else float('nan'):>7.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="trade_date VARCHAR vs DATE: EXPLAIN ANALYZE 范围扫描与索引大小")
+    parser.add_argument("--from-table", default=None, help="复制该价格表的数据 (默认生成合成行情)")
+    parser.add_argument("--tickers", type=int, default=500, help="合成 ticker 数 (默认 500)")
+    parser.add_argument("--years", type=int, default=10, help="合成年数 (默认 10)")
+    parser.add_argument("--repeat", type=int, default=5, help="每个查询执行次数, 取中位数 (默认 5)")
+    parser.add_argument("--json", default=None, help="结果另存为 JSON")
+    args = parser.parse_args()
+    if args.tickers < 1 or args.years < 1 or args.repeat < 1:
+        parser.error("--tickers / --years / --repeat must be >= 1")
+    if args.from_table and not args.from_table.replace("_", "").replace(".", "").isalnum():
+        parser.error(f"invalid table name: {args.from_table!r}")
+
+    result = asyncio.run(run(args))
+    _report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\nsaved → {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
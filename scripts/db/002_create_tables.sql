@@ -80,7 +80,7 @@ CREATE TABLE IF NOT EXISTS stock_daily_price (
     ticker        VARCHAR(10)  NOT NULL,
     symbol        VARCHAR(20),
     name          VARCHAR(50),
-    trade_date    VARCHAR(10),
+    trade_date    DATE,
     open          DOUBLE PRECISION,
     high          DOUBLE PRECISION,
     low           DOUBLE PRECISION,
@@ -102,7 +102,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_indicators (
     ticker     VARCHAR(10) NOT NULL,
     symbol     VARCHAR(20),
     name       VARCHAR(50),
-    trade_date VARCHAR(10),
+    trade_date DATE,
     ma5        DOUBLE PRECISION,
     ma10       DOUBLE PRECISION,
     ma20       DOUBLE PRECISION,
@@ -132,7 +132,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_trend_signal_indicators (
     ticker           VARCHAR(10) NOT NULL,
     symbol           VARCHAR(20),
     name             VARCHAR(50),
-    trade_date       VARCHAR(10),
+    trade_date       DATE,
     ema_8            DOUBLE PRECISION,
     ema_21           DOUBLE PRECISION,
     ema_55           DOUBLE PRECISION,
@@ -156,7 +156,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_mean_reversion_signal_indicators (
     ticker                    VARCHAR(10) NOT NULL,
     symbol                    VARCHAR(20),
     name                      VARCHAR(50),
-    trade_date                VARCHAR(10),
+    trade_date                DATE,
     ma_50                     DOUBLE PRECISION,
     std_50                    DOUBLE PRECISION,
     z_score                   DOUBLE PRECISION,
@@ -180,7 +180,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_momentum_signal_indicators (
     ticker                VARCHAR(10) NOT NULL,
     symbol                VARCHAR(20),
     name                  VARCHAR(50),
-    trade_date            VARCHAR(10),
+    trade_date            DATE,
     returns               DOUBLE PRECISION,
     mom_1m                DOUBLE PRECISION,
     mom_3m                DOUBLE PRECISION,
@@ -203,7 +203,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_volatility_signal_indicators (
     ticker                VARCHAR(10) NOT NULL,
     symbol                VARCHAR(20),
     name                  VARCHAR(50),
-    trade_date            VARCHAR(10),
+    trade_date            DATE,
     returns               DOUBLE PRECISION,
     hist_vol_21           DOUBLE PRECISION,
     vol_ma_63             DOUBLE PRECISION,
@@ -226,7 +226,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_stat_arb_signal_indicators (
     ticker              VARCHAR(10) NOT NULL,
     symbol              VARCHAR(20),
     name                VARCHAR(50),
-    trade_date          VARCHAR(10),
+    trade_date          DATE,
     returns             DOUBLE PRECISION,
     skew_63             DOUBLE PRECISION,
     kurt_63             DOUBLE PRECISION,
@@ -301,7 +301,7 @@ CREATE TABLE IF NOT EXISTS stock_daily_price_hk (
     id            SERIAL PRIMARY KEY,
     ticker        VARCHAR NOT NULL,
     name          VARCHAR,
-    trade_date    VARCHAR,
+    trade_date    DATE,
     open          DOUBLE PRECISION,
     high          DOUBLE PRECISION,
     low           DOUBLE PRECISION,
@@ -323,7 +323,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_indicators_hk (
     id          SERIAL PRIMARY KEY,
     ticker      VARCHAR NOT NULL,
     name        VARCHAR,
-    trade_date  VARCHAR,
+    trade_date  DATE,
     ma5         DOUBLE PRECISION,
     ma10        DOUBLE PRECISION,
     ma20        DOUBLE PRECISION,
@@ -352,7 +352,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_trend_signal_indicators_hk (
     id               SERIAL PRIMARY KEY,
     ticker           VARCHAR NOT NULL,
     name             VARCHAR,
-    trade_date       VARCHAR,
+    trade_date       DATE,
     ema_8            DOUBLE PRECISION,
     ema_21           DOUBLE PRECISION,
     ema_55           DOUBLE PRECISION,
@@ -375,7 +375,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_mean_reversion_signal_indicators_hk (
     id                        SERIAL PRIMARY KEY,
     ticker                    VARCHAR NOT NULL,
     name                      VARCHAR,
-    trade_date                VARCHAR,
+    trade_date                DATE,
     ma_50                     DOUBLE PRECISION,
     std_50                    DOUBLE PRECISION,
     z_score                   DOUBLE PRECISION,
@@ -398,7 +398,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_momentum_signal_indicators_hk (
     id                  SERIAL PRIMARY KEY,
     ticker              VARCHAR NOT NULL,
     name                VARCHAR,
-    trade_date          VARCHAR,
+    trade_date          DATE,
     returns             DOUBLE PRECISION,
     mom_1m              DOUBLE PRECISION,
     mom_3m              DOUBLE PRECISION,
@@ -420,7 +420,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_volatility_signal_indicators_hk (
     id                    SERIAL PRIMARY KEY,
     ticker                VARCHAR NOT NULL,
     name                  VARCHAR,
-    trade_date            VARCHAR,
+    trade_date            DATE,
     returns               DOUBLE PRECISION,
     hist_vol_21           DOUBLE PRECISION,
     vol_ma_63             DOUBLE PRECISION,
@@ -442,7 +442,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_stat_arb_signal_indicators_hk (
     id                  SERIAL PRIMARY KEY,
     ticker              VARCHAR NOT NULL,
     name                VARCHAR,
-    trade_date          VARCHAR,
+    trade_date          DATE,
     returns             DOUBLE PRECISION,
     skew_63             DOUBLE PRECISION,
     kurt_63             DOUBLE PRECISION,
@@ -587,7 +587,7 @@ CREATE TABLE IF NOT EXISTS stock_daily_price_us (
     id            SERIAL PRIMARY KEY,
     ticker        VARCHAR NOT NULL,
     name          VARCHAR,
-    trade_date    VARCHAR,
+    trade_date    DATE,
     open          DOUBLE PRECISION,
     high          DOUBLE PRECISION,
     low           DOUBLE PRECISION,
@@ -609,7 +609,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_indicators_us (
     id          SERIAL PRIMARY KEY,
     ticker      VARCHAR NOT NULL,
     name        VARCHAR,
-    trade_date  VARCHAR,
+    trade_date  DATE,
     ma5         DOUBLE PRECISION,
     ma10        DOUBLE PRECISION,
     ma20        DOUBLE PRECISION,
@@ -638,7 +638,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_trend_signal_indicators_us (
     id               SERIAL PRIMARY KEY,
     ticker           VARCHAR NOT NULL,
     name             VARCHAR,
-    trade_date       VARCHAR,
+    trade_date       DATE,
     ema_8            DOUBLE PRECISION,
     ema_21           DOUBLE PRECISION,
     ema_55           DOUBLE PRECISION,
@@ -661,7 +661,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_mean_reversion_signal_indicators_us (
     id                        SERIAL PRIMARY KEY,
     ticker                    VARCHAR NOT NULL,
     name                      VARCHAR,
-    trade_date                VARCHAR,
+    trade_date                DATE,
     ma_50                     DOUBLE PRECISION,
     std_50                    DOUBLE PRECISION,
     z_score                   DOUBLE PRECISION,
@@ -684,7 +684,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_momentum_signal_indicators_us (
     id                  SERIAL PRIMARY KEY,
     ticker              VARCHAR NOT NULL,
     name                VARCHAR,
-    trade_date          VARCHAR,
+    trade_date          DATE,
     returns             DOUBLE PRECISION,
     mom_1m              DOUBLE PRECISION,
     mom_3m              DOUBLE PRECISION,
@@ -706,7 +706,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_volatility_signal_indicators_us (
     id                    SERIAL PRIMARY KEY,
     ticker                VARCHAR NOT NULL,
     name                  VARCHAR,
-    trade_date            VARCHAR,
+    trade_date            DATE,
     returns               DOUBLE PRECISION,
     hist_vol_21           DOUBLE PRECISION,
     vol_ma_63             DOUBLE PRECISION,
@@ -728,7 +728,7 @@ CREATE TABLE IF NOT EXISTS stock_technical_stat_arb_signal_indicators_us (
     id                  SERIAL PRIMARY KEY,
     ticker              VARCHAR NOT NULL,
     name                VARCHAR,
-    trade_date          VARCHAR,
+    trade_date          DATE,
     returns             DOUBLE PRECISION,
     skew_63             DOUBLE PRECISION,
     kurt_63             DOUBLE PRECISION,
@@ -970,3 +970,23 @@ CREATE TABLE IF NOT EXISTS agent_execution_logs (
     completed_at    TIMESTAMPTZ
 );
 COMMENT ON TABLE agent_execution_logs IS 'Agent 执行日志表';
+
+
+-- ************************************************************
+-- 7. 流水线状态表 — 来源: indicator_state.py
+-- ************************************************************
+
+-- 7.1 流式指标状态 (online_indicators 的状态机快照, 每只股票一行)
+CREATE TABLE IF NOT EXISTS indicator_stream_state (
+    id         SERIAL PRIMARY KEY,
+    ticker     VARCHAR(50) NOT NULL,
+    market     VARCHAR(10) NOT NULL,
+    trade_date DATE        NOT NULL,
+    bars       INTEGER     NOT NULL DEFAULT 0,
+    version    INTEGER     NOT NULL DEFAULT 1,
+    state      JSONB       NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_indicator_stream_state_ticker_market UNIQUE (ticker, market)
+);
+COMMENT ON TABLE indicator_stream_state IS '流式指标状态表';
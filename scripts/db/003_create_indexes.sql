@@ -2,6 +2,11 @@
 -- 003_create_indexes.sql — 创建索引 & 向量索引
 -- 执行顺序: 第 3 步 (在建表之后)
 -- 所有语句使用 IF NOT EXISTS 确保幂等
+--
+-- 日K线与指标 / 信号表: (ticker, trade_date) 查询由唯一约束 (002) 承担, 不再为
+-- ticker / name 单独建索引; 价格表另建 (ticker, trade_date DESC) 覆盖索引并保留
+-- trade_date B-tree (全市场日期范围查询), 指标 / 信号表的 trade_date 改用 BRIN.
+-- 已有库的迁移见 006_rework_price_indexes.sql
 -- ============================================================
 
 
@@ -24,39 +29,26 @@ CREATE INDEX IF NOT EXISTS idx_stock_company_info_english_name ON stock_company_
 CREATE INDEX IF NOT EXISTS idx_stock_company_info_industry     ON stock_company_info (industry);
 
 -- stock_daily_price
-CREATE INDEX IF NOT EXISTS idx_stock_daily_price_ticker     ON stock_daily_price (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_daily_price_name       ON stock_daily_price (name);
+CREATE INDEX IF NOT EXISTS idx_stock_daily_price_ticker_date_desc ON stock_daily_price (ticker, trade_date DESC) INCLUDE (open, high, low, close, volume);
 CREATE INDEX IF NOT EXISTS idx_stock_daily_price_trade_date ON stock_daily_price (trade_date);
 
 -- stock_technical_indicators
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_ticker     ON stock_technical_indicators (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_name       ON stock_technical_indicators (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_trade_date ON stock_technical_indicators (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_trade_date_brin ON stock_technical_indicators USING brin (trade_date) WITH (pages_per_range = 32);
 
 -- stock_technical_trend_signal_indicators
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_ticker     ON stock_technical_trend_signal_indicators (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_name       ON stock_technical_trend_signal_indicators (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_trade_date ON stock_technical_trend_signal_indicators (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_trade_date_brin ON stock_technical_trend_signal_indicators USING brin (trade_date) WITH (pages_per_range = 32);
 
 -- stock_technical_mean_reversion_signal_indicators
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_ticker     ON stock_technical_mean_reversion_signal_indicators (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_name       ON stock_technical_mean_reversion_signal_indicators (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_trade_date ON stock_technical_mean_reversion_signal_indicators (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_trade_date_brin ON stock_technical_mean_reversion_signal_indicators USING brin (trade_date) WITH (pages_per_range = 32);
 
 -- stock_technical_momentum_signal_indicators
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_ticker     ON stock_technical_momentum_signal_indicators (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_name       ON stock_technical_momentum_signal_indicators (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_trade_date ON stock_technical_momentum_signal_indicators (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_trade_date_brin ON stock_technical_momentum_signal_indicators USING brin (trade_date) WITH (pages_per_range = 32);
 
 -- stock_technical_volatility_signal_indicators
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_ticker     ON stock_technical_volatility_signal_indicators (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_name       ON stock_technical_volatility_signal_indicators (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_trade_date ON stock_technical_volatility_signal_indicators (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_trade_date_brin ON stock_technical_volatility_signal_indicators USING brin (trade_date) WITH (pages_per_range = 32);
 
 -- stock_technical_stat_arb_signal_indicators
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_ticker     ON stock_technical_stat_arb_signal_indicators (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_name       ON stock_technical_stat_arb_signal_indicators (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_trade_date ON stock_technical_stat_arb_signal_indicators (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_trade_date_brin ON stock_technical_stat_arb_signal_indicators USING brin (trade_date) WITH (pages_per_range = 32);
 
 -- financial_metrics
 CREATE INDEX IF NOT EXISTS idx_financial_metrics_ticker               ON financial_metrics (ticker);
@@ -67,33 +59,20 @@ CREATE INDEX IF NOT EXISTS idx_financial_metrics_ticker_report_period ON financi
 -- 2. 港股 (HK) 索引
 -- ************************************************************
 
-CREATE INDEX IF NOT EXISTS idx_stock_daily_price_hk_ticker     ON stock_daily_price_hk (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_daily_price_hk_name       ON stock_daily_price_hk (name);
+CREATE INDEX IF NOT EXISTS idx_stock_daily_price_hk_ticker_date_desc ON stock_daily_price_hk (ticker, trade_date DESC) INCLUDE (open, high, low, close, volume);
 CREATE INDEX IF NOT EXISTS idx_stock_daily_price_hk_trade_date ON stock_daily_price_hk (trade_date);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_hk_ticker     ON stock_technical_indicators_hk (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_hk_name       ON stock_technical_indicators_hk (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_hk_trade_date ON stock_technical_indicators_hk (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_hk_trade_date_brin ON stock_technical_indicators_hk USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_hk_ticker     ON stock_technical_trend_signal_indicators_hk (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_hk_name       ON stock_technical_trend_signal_indicators_hk (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_hk_trade_date ON stock_technical_trend_signal_indicators_hk (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_hk_trade_date_brin ON stock_technical_trend_signal_indicators_hk USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_hk_ticker     ON stock_technical_mean_reversion_signal_indicators_hk (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_hk_name       ON stock_technical_mean_reversion_signal_indicators_hk (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_hk_trade_date ON stock_technical_mean_reversion_signal_indicators_hk (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_hk_trade_date_brin ON stock_technical_mean_reversion_signal_indicators_hk USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_hk_ticker     ON stock_technical_momentum_signal_indicators_hk (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_hk_name       ON stock_technical_momentum_signal_indicators_hk (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_hk_trade_date ON stock_technical_momentum_signal_indicators_hk (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_hk_trade_date_brin ON stock_technical_momentum_signal_indicators_hk USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_hk_ticker     ON stock_technical_volatility_signal_indicators_hk (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_hk_name       ON stock_technical_volatility_signal_indicators_hk (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_hk_trade_date ON stock_technical_volatility_signal_indicators_hk (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_hk_trade_date_brin ON stock_technical_volatility_signal_indicators_hk USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_hk_ticker     ON stock_technical_stat_arb_signal_indicators_hk (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_hk_name       ON stock_technical_stat_arb_signal_indicators_hk (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_hk_trade_date ON stock_technical_stat_arb_signal_indicators_hk (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_hk_trade_date_brin ON stock_technical_stat_arb_signal_indicators_hk USING brin (trade_date) WITH (pages_per_range = 32);
 
 CREATE INDEX IF NOT EXISTS idx_stock_index_basic_hk_ticker ON stock_index_basic_hk (ticker);
 CREATE INDEX IF NOT EXISTS idx_stock_index_basic_hk_symbol ON stock_index_basic_hk (symbol);
@@ -109,33 +88,20 @@ CREATE INDEX IF NOT EXISTS idx_stock_basic_hk_ticker ON stock_basic_hk (ticker);
 -- 3. 美股 (US) 索引
 -- ************************************************************
 
-CREATE INDEX IF NOT EXISTS idx_stock_daily_price_us_ticker     ON stock_daily_price_us (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_daily_price_us_name       ON stock_daily_price_us (name);
+CREATE INDEX IF NOT EXISTS idx_stock_daily_price_us_ticker_date_desc ON stock_daily_price_us (ticker, trade_date DESC) INCLUDE (open, high, low, close, volume);
 CREATE INDEX IF NOT EXISTS idx_stock_daily_price_us_trade_date ON stock_daily_price_us (trade_date);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_us_ticker     ON stock_technical_indicators_us (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_us_name       ON stock_technical_indicators_us (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_us_trade_date ON stock_technical_indicators_us (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_ind_us_trade_date_brin ON stock_technical_indicators_us USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_us_ticker     ON stock_technical_trend_signal_indicators_us (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_us_name       ON stock_technical_trend_signal_indicators_us (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_us_trade_date ON stock_technical_trend_signal_indicators_us (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_trend_us_trade_date_brin ON stock_technical_trend_signal_indicators_us USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_us_ticker     ON stock_technical_mean_reversion_signal_indicators_us (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_us_name       ON stock_technical_mean_reversion_signal_indicators_us (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_us_trade_date ON stock_technical_mean_reversion_signal_indicators_us (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_mean_rev_us_trade_date_brin ON stock_technical_mean_reversion_signal_indicators_us USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_us_ticker     ON stock_technical_momentum_signal_indicators_us (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_us_name       ON stock_technical_momentum_signal_indicators_us (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_us_trade_date ON stock_technical_momentum_signal_indicators_us (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_momentum_us_trade_date_brin ON stock_technical_momentum_signal_indicators_us USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_us_ticker     ON stock_technical_volatility_signal_indicators_us (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_us_name       ON stock_technical_volatility_signal_indicators_us (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_us_trade_date ON stock_technical_volatility_signal_indicators_us (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_volatility_us_trade_date_brin ON stock_technical_volatility_signal_indicators_us USING brin (trade_date) WITH (pages_per_range = 32);
 
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_us_ticker     ON stock_technical_stat_arb_signal_indicators_us (ticker);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_us_name       ON stock_technical_stat_arb_signal_indicators_us (name);
-CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_us_trade_date ON stock_technical_stat_arb_signal_indicators_us (trade_date);
+CREATE INDEX IF NOT EXISTS idx_stock_tech_stat_arb_us_trade_date_brin ON stock_technical_stat_arb_signal_indicators_us USING brin (trade_date) WITH (pages_per_range = 32);
 
 CREATE INDEX IF NOT EXISTS idx_stock_index_basic_us_ticker ON stock_index_basic_us (ticker);
 CREATE INDEX IF NOT EXISTS idx_stock_index_basic_us_symbol ON stock_index_basic_us (symbol);
@@ -0,0 +1,72 @@
+-- ============================================================
+-- 004_trade_date_to_date.sql — trade_date 由 VARCHAR 迁移为原生 DATE
+-- 执行顺序: 已有库在 003 之后执行一次; 新库的 002 已直接建为 DATE, 无需执行
+-- 幂等: 只处理 trade_date 仍不是 date 类型的表
+--
+-- ⚠ ALTER COLUMN ... TYPE 会重写整张表并重建其全部索引 (含唯一约束),
+--   期间持有 ACCESS EXCLUSIVE 锁 — 请在数据管道停止时执行.
+--   全部表在同一事务中迁移, 任一行无法转换为日期即整体回滚.
+--
+-- 迁移前可先检查无法转换的值 (每张表):
+--   SELECT ticker, trade_date FROM stock_daily_price_us
+--   WHERE trade_date !~ '^\d{4}-\d{2}-\d{2}$';
+--
+-- 前后对比 (范围扫描 EXPLAIN ANALYZE 与索引大小):
+--   python scripts/bench/bench_trade_date.py --from-table stock_daily_price_us
+-- ============================================================
+
+BEGIN;
+
+SET LOCAL lock_timeout = '10s';
+
+DO $$
+DECLARE
+    tbl text;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        -- 1. A 股
+        'stock_daily_price',
+        'stock_technical_indicators',
+        'stock_technical_trend_signal_indicators',
+        'stock_technical_mean_reversion_signal_indicators',
+        'stock_technical_momentum_signal_indicators',
+        'stock_technical_volatility_signal_indicators',
+        'stock_technical_stat_arb_signal_indicators',
+        -- 2. 港股
+        'stock_daily_price_hk',
+        'stock_technical_indicators_hk',
+        'stock_technical_trend_signal_indicators_hk',
+        'stock_technical_mean_reversion_signal_indicators_hk',
+        'stock_technical_momentum_signal_indicators_hk',
+        'stock_technical_volatility_signal_indicators_hk',
+        'stock_technical_stat_arb_signal_indicators_hk',
+        -- 3. 美股
+        'stock_daily_price_us',
+        'stock_technical_indicators_us',
+        'stock_technical_trend_signal_indicators_us',
+        'stock_technical_mean_reversion_signal_indicators_us',
+        'stock_technical_momentum_signal_indicators_us',
+        'stock_technical_volatility_signal_indicators_us',
+        'stock_technical_stat_arb_signal_indicators_us',
+        -- 4. 流水线状态
+        'indicator_stream_state'
+    ]
+    LOOP
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = tbl
+              AND column_name = 'trade_date' AND data_type <> 'date'
+        ) THEN
+            -- 空字符串按 NULL 处理; 其余须为 YYYY-MM-DD
+            EXECUTE format(
+                'ALTER TABLE %I ALTER COLUMN trade_date TYPE DATE USING NULLIF(trim(trade_date), '''')::date',
+                tbl
+            );
+            -- 类型变化后该列统计信息失效, 立即重新收集
+            EXECUTE format('ANALYZE %I', tbl);
+            RAISE NOTICE '%.trade_date → DATE', tbl;
+        END IF;
+    END LOOP;
+END $$;
+
+COMMIT;
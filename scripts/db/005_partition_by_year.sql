@@ -0,0 +1,192 @@
+-- ============================================================
+-- 005_partition_by_year.sql — 日K线与指标 / 信号表按 trade_date 年度 RANGE 分区
+-- 执行顺序: 004 之后执行一次 (新库在 002/003 之后同样执行, 空表转换很快)
+-- 幂等: 已是分区表 (relkind = 'p') 的表跳过; 函数使用 CREATE OR REPLACE
+--
+-- 每张表转换为 PARTITION BY RANGE (trade_date) 的父表, 每年一个分区 {table}_y{year},
+-- 覆盖已有数据的最早年份至明年. 分区表的主键 / 唯一约束必须包含分区键:
+-- 主键改为 (id, trade_date), 唯一约束 (ticker, trade_date) 与二级索引原名保留.
+-- trade_date 为 NULL 的行无法放入任何分区, 迁移时丢弃 (数量见 NOTICE).
+--
+-- ⚠ 每张表的数据整体复制一次, 期间持有原表的 ACCESS EXCLUSIVE 锁 —
+--   请在数据管道停止时执行. 全部表在同一事务中迁移, 任一步失败即整体回滚.
+--
+-- 之后:
+--   * 新分区: 写入前由 stock_agent.database.partitions.ensure_year_partitions 按需创建,
+--     也可定期执行 python -m stock_agent.database.partitions (默认补建到明年),
+--     或 (启用 pg_cron 时) 调度 SELECT ensure_trade_date_partitions(...).
+--   * 归档: SELECT archive_trade_date_partitions('stock_daily_price_us', 2015);
+--     把 2015 年之前的分区 DETACH 并移入 archive schema, 代替逐行 DELETE.
+--   * 范围查询 (WHERE trade_date >= ... AND trade_date <= ...) 只扫描相关年份的分区:
+--     EXPLAIN SELECT * FROM stock_daily_price_us WHERE trade_date >= DATE '2024-01-01';
+-- ============================================================
+
+BEGIN;
+
+SET LOCAL lock_timeout = '10s';
+
+CREATE SCHEMA IF NOT EXISTS archive;
+
+-- 为分区父表创建 [first_year, last_year] 中缺失的年度分区, 返回新建的分区数.
+-- 父表未分区时不做任何操作 (返回 0); 并发创建同一分区时忽略 duplicate_table.
+CREATE OR REPLACE FUNCTION ensure_trade_date_partitions(parent regclass, first_year int, last_year int)
+RETURNS int
+LANGUAGE plpgsql AS $$
+DECLARE
+    nsp  text;
+    rel  text;
+    kind "char";
+    yr   int;
+    part text;
+    created int := 0;
+BEGIN
+    SELECT n.nspname, c.relname, c.relkind INTO nsp, rel, kind
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = parent;
+    IF kind <> 'p' THEN
+        RETURN 0;
+    END IF;
+
+    FOR yr IN first_year .. last_year LOOP
+        part := format('%s_y%s', rel, yr);
+        CONTINUE WHEN to_regclass(format('%I.%I', nsp, part)) IS NOT NULL;
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE %I.%I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                nsp, part, parent, make_date(yr, 1, 1), make_date(yr + 1, 1, 1)
+            );
+            created := created + 1;
+        EXCEPTION WHEN duplicate_table THEN
+            NULL;
+        END;
+    END LOOP;
+    RETURN created;
+END $$;
+
+-- 把上界不晚于 before_year-01-01 的年度分区从父表 DETACH 并移入 archive schema,
+-- 返回归档后的表名. 归档表仍可直接查询, 不再需要时 DROP 即可.
+-- 注: DETACH 在函数内不能使用 CONCURRENTLY, 会短暂锁住父表.
+CREATE OR REPLACE FUNCTION archive_trade_date_partitions(parent regclass, before_year int)
+RETURNS SETOF text
+LANGUAGE plpgsql AS $$
+DECLARE
+    part record;
+BEGIN
+    FOR part IN
+        SELECT c.oid::regclass AS rel, c.relname
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent
+          AND substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''(\d{4}-\d{2}-\d{2})''\)')::date
+              <= make_date(before_year, 1, 1)
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %s DETACH PARTITION %s', parent, part.rel);
+        EXECUTE format('ALTER TABLE %s SET SCHEMA archive', part.rel);
+        RETURN NEXT format('archive.%I', part.relname);
+    END LOOP;
+END $$;
+
+-- 已有表转换为分区表
+DO $$
+DECLARE
+    tbl        text;
+    old        text;
+    seq        text;
+    uq         text;
+    tbl_comment text;
+    index_defs text[];
+    def        text;
+    first_year int;
+    last_year  int;
+    this_year  int := extract(year FROM current_date)::int;
+    moved      bigint;
+    skipped    bigint;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        -- 1. A 股
+        'stock_daily_price',
+        'stock_technical_indicators',
+        'stock_technical_trend_signal_indicators',
+        'stock_technical_mean_reversion_signal_indicators',
+        'stock_technical_momentum_signal_indicators',
+        'stock_technical_volatility_signal_indicators',
+        'stock_technical_stat_arb_signal_indicators',
+        -- 2. 港股
+        'stock_daily_price_hk',
+        'stock_technical_indicators_hk',
+        'stock_technical_trend_signal_indicators_hk',
+        'stock_technical_mean_reversion_signal_indicators_hk',
+        'stock_technical_momentum_signal_indicators_hk',
+        'stock_technical_volatility_signal_indicators_hk',
+        'stock_technical_stat_arb_signal_indicators_hk',
+        -- 3. 美股
+        'stock_daily_price_us',
+        'stock_technical_indicators_us',
+        'stock_technical_trend_signal_indicators_us',
+        'stock_technical_mean_reversion_signal_indicators_us',
+        'stock_technical_momentum_signal_indicators_us',
+        'stock_technical_volatility_signal_indicators_us',
+        'stock_technical_stat_arb_signal_indicators_us'
+    ]
+    LOOP
+        CONTINUE WHEN to_regclass(tbl) IS NULL;
+        CONTINUE WHEN (SELECT relkind FROM pg_class WHERE oid = tbl::regclass) = 'p';
+        old := tbl || '_unpartitioned';
+
+        -- 1) 记录原表的唯一约束名、二级索引定义、id 序列与表注释
+        SELECT conname INTO uq FROM pg_constraint
+        WHERE conrelid = tbl::regclass AND contype = 'u'
+        ORDER BY conname LIMIT 1;
+        SELECT array_agg(indexdef ORDER BY indexname) INTO index_defs FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = tbl
+          AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = tbl::regclass);
+        seq := pg_get_serial_sequence(tbl, 'id');
+        tbl_comment := obj_description(tbl::regclass, 'pg_class');
+
+        -- 2) 原表改名, 以相同列 / 默认值 / 列注释建分区父表
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, old);
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING COMMENTS INCLUDING STORAGE) '
+            'PARTITION BY RANGE (trade_date)',
+            tbl, old
+        );
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN trade_date SET NOT NULL', tbl);
+        IF tbl_comment IS NOT NULL THEN
+            EXECUTE format('COMMENT ON TABLE %I IS %L', tbl, tbl_comment);
+        END IF;
+
+        -- 3) 年度分区: 已有数据的最早年份 .. 明年
+        EXECUTE format(
+            'SELECT extract(year FROM min(trade_date))::int, extract(year FROM max(trade_date))::int FROM %I', old
+        ) INTO first_year, last_year;
+        PERFORM ensure_trade_date_partitions(
+            tbl::regclass, coalesce(first_year, this_year), greatest(coalesce(last_year, this_year), this_year) + 1
+        );
+
+        -- 4) 复制数据 (先于约束 / 索引, 批量构建更快), id 序列改归新表所有后删除原表
+        EXECUTE format('INSERT INTO %I SELECT * FROM %I WHERE trade_date IS NOT NULL', tbl, old);
+        GET DIAGNOSTICS moved = ROW_COUNT;
+        EXECUTE format('SELECT count(*) FROM %I WHERE trade_date IS NULL', old) INTO skipped;
+        IF seq IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.id', seq, tbl);
+        END IF;
+        EXECUTE format('DROP TABLE %I', old);
+
+        -- 5) 主键 (id, trade_date)、原名唯一约束与二级索引 (自动下推到每个分区)
+        EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, trade_date)', tbl);
+        EXECUTE format(
+            'ALTER TABLE %I ADD CONSTRAINT %I UNIQUE (ticker, trade_date)',
+            tbl, coalesce(uq, tbl || '_ticker_trade_date_key')
+        );
+        FOREACH def IN ARRAY coalesce(index_defs, '{}') LOOP
+            EXECUTE def;
+        END LOOP;
+        EXECUTE format('ANALYZE %I', tbl);
+
+        RAISE NOTICE '% → 按年分区 %..%: % 行, 丢弃 trade_date 为空的 % 行',
+            tbl, coalesce(first_year, this_year), greatest(coalesce(last_year, this_year), this_year) + 1,
+            moved, skipped;
+    END LOOP;
+END $$;
+
+COMMIT;
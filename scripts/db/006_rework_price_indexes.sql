@@ -0,0 +1,105 @@
+-- ============================================================
+-- 006_rework_price_indexes.sql — 日K线与指标 / 信号表的索引重整
+-- 执行顺序: 已有库在 005 之后执行一次; 新库的 003 已直接建为新索引, 再执行为空操作
+-- 幂等: 只删除仍存在的单列索引, 新索引使用 IF NOT EXISTS
+--
+-- 原索引: 每张表 ticker / name / trade_date 各一个单列 B-tree.
+--   * ticker: 与唯一约束 (ticker, trade_date) 的前缀重复;
+--   * name:   没有任何查询按 name 过滤, 只拖慢写入;
+--   * trade_date: 指标 / 信号表没有跨 ticker 的日期查询, 改用体积很小的 BRIN;
+--     价格表保留 B-tree — 面板加载 (全市场近 N 天) 依赖它. 历史数据按 ticker 逐只回填,
+--     分区内 trade_date 与物理顺序几乎无关, BRIN 无法排除页 (bench_indexes 中 panel_1m
+--     会退化为整分区顺序扫描).
+-- 新索引:
+--   * 价格表 (ticker, trade_date DESC) INCLUDE (open, high, low, close, volume):
+--     StockRepository 的 "WHERE ticker = ? ORDER BY trade_date DESC LIMIT n" 与
+--     列式加载 (日期 + OHLCV) 可走 Index Only Scan, 不回表; 代价是体积约为原 ticker
+--     单列索引的 3 倍;
+--   * 指标 / 信号表查询返回整行, 覆盖索引无益, 由唯一约束的反向扫描承担;
+--   * 指标 / 信号表 trade_date BRIN (pages_per_range = 32).
+--
+-- ⚠ 在分区父表上建索引会逐分区构建并锁表 (分区表不支持 CONCURRENTLY) —
+--   请在数据管道停止时执行.
+--
+-- 前后对比 (仓库真实查询的 EXPLAIN ANALYZE 与索引大小, 在回滚的事务中试用本脚本):
+--   python scripts/bench/bench_indexes.py --market US
+-- ============================================================
+
+BEGIN;
+
+SET LOCAL lock_timeout = '10s';
+
+DO $$
+DECLARE
+    spec text[];
+    idx  regclass;
+BEGIN
+    -- 表, 索引名前缀 (与 003 一致), 是否建覆盖索引
+    FOREACH spec SLICE 1 IN ARRAY ARRAY[
+        -- 1. A 股
+        ['stock_daily_price',                                   'idx_stock_daily_price',       'covering'],
+        ['stock_technical_indicators',                          'idx_stock_tech_ind',          ''],
+        ['stock_technical_trend_signal_indicators',             'idx_stock_tech_trend',        ''],
+        ['stock_technical_mean_reversion_signal_indicators',    'idx_stock_tech_mean_rev',     ''],
+        ['stock_technical_momentum_signal_indicators',          'idx_stock_tech_momentum',     ''],
+        ['stock_technical_volatility_signal_indicators',        'idx_stock_tech_volatility',   ''],
+        ['stock_technical_stat_arb_signal_indicators',          'idx_stock_tech_stat_arb',     ''],
+        -- 2. 港股
+        ['stock_daily_price_hk',                                'idx_stock_daily_price_hk',    'covering'],
+        ['stock_technical_indicators_hk',                       'idx_stock_tech_ind_hk',       ''],
+        ['stock_technical_trend_signal_indicators_hk',          'idx_stock_tech_trend_hk',     ''],
+        ['stock_technical_mean_reversion_signal_indicators_hk', 'idx_stock_tech_mean_rev_hk',  ''],
+        ['stock_technical_momentum_signal_indicators_hk',       'idx_stock_tech_momentum_hk',  ''],
+        ['stock_technical_volatility_signal_indicators_hk',     'idx_stock_tech_volatility_hk', ''],
+        ['stock_technical_stat_arb_signal_indicators_hk',       'idx_stock_tech_stat_arb_hk',  ''],
+        -- 3. 美股
+        ['stock_daily_price_us',                                'idx_stock_daily_price_us',    'covering'],
+        ['stock_technical_indicators_us',                       'idx_stock_tech_ind_us',       ''],
+        ['stock_technical_trend_signal_indicators_us',          'idx_stock_tech_trend_us',     ''],
+        ['stock_technical_mean_reversion_signal_indicators_us', 'idx_stock_tech_mean_rev_us',  ''],
+        ['stock_technical_momentum_signal_indicators_us',       'idx_stock_tech_momentum_us',  ''],
+        ['stock_technical_volatility_signal_indicators_us',     'idx_stock_tech_volatility_us', ''],
+        ['stock_technical_stat_arb_signal_indicators_us',       'idx_stock_tech_stat_arb_us',  '']
+    ]
+    LOOP
+        CONTINUE WHEN to_regclass(spec[1]) IS NULL;
+
+        -- 1) 删除 ticker / name 单列 B-tree, 指标 / 信号表另删 trade_date (不论由 003 还是 ORM 创建, 不含约束索引)
+        FOR idx IN
+            SELECT i.indexrelid::regclass
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = ic.relam
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = spec[1]::regclass
+              AND i.indnatts = 1 AND NOT i.indisunique AND NOT i.indisprimary
+              AND am.amname = 'btree'
+              AND (a.attname IN ('ticker', 'name') OR (a.attname = 'trade_date' AND spec[3] <> 'covering'))
+        LOOP
+            EXECUTE format('DROP INDEX %s', idx);
+            RAISE NOTICE '%: drop %', spec[1], idx;
+        END LOOP;
+
+        -- 2) 新索引 (分区表上自动下推到每个分区)
+        IF spec[3] = 'covering' THEN
+            EXECUTE format(
+                'CREATE INDEX IF NOT EXISTS %I ON %I (ticker, trade_date DESC) INCLUDE (open, high, low, close, volume)',
+                spec[2] || '_ticker_date_desc', spec[1]
+            );
+            -- trade_date B-tree 保留原有的 (ORM 建表时名为 ix_*), 缺失时补建
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_index i JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                WHERE i.indrelid = spec[1]::regclass AND i.indnatts = 1 AND a.attname = 'trade_date'
+            ) THEN
+                EXECUTE format('CREATE INDEX %I ON %I (trade_date)', spec[2] || '_trade_date', spec[1]);
+            END IF;
+        ELSE
+            EXECUTE format(
+                'CREATE INDEX IF NOT EXISTS %I ON %I USING brin (trade_date) WITH (pages_per_range = 32)',
+                spec[2] || '_trade_date_brin', spec[1]
+            );
+        END IF;
+    END LOOP;
+END $$;
+
+COMMIT;
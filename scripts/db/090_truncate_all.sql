@@ -9,8 +9,9 @@
 
 BEGIN;
 
--- 1. Agent 日志
-TRUNCATE TABLE agent_execution_logs RESTART IDENTITY CASCADE;
+-- 1. Agent 日志 / 流水线状态
+TRUNCATE TABLE agent_execution_logs   RESTART IDENTITY CASCADE;
+TRUNCATE TABLE indicator_stream_state RESTART IDENTITY CASCADE;
 
 -- 2. 对话相关 (子→父)
 TRUNCATE TABLE chat_messages       RESTART IDENTITY CASCADE;
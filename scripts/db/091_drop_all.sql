@@ -11,8 +11,9 @@ DROP TABLE IF EXISTS chat_messages            CASCADE;
 DROP TABLE IF EXISTS chat_sessions            CASCADE;
 DROP TABLE IF EXISTS users                    CASCADE;
 
--- 2. Agent 日志
+-- 2. Agent 日志 / 流水线状态
 DROP TABLE IF EXISTS agent_execution_logs     CASCADE;
+DROP TABLE IF EXISTS indicator_stream_state   CASCADE;
 
 -- 3. 向量嵌入
 DROP TABLE IF EXISTS conversation_embeddings  CASCADE;
@@ -56,4 +57,9 @@ DROP TABLE IF EXISTS financial_metrics_us                                CASCADE
 DROP TABLE IF EXISTS stock_index_basic_us                                CASCADE;
 DROP TABLE IF EXISTS stock_basic_us                                      CASCADE;
 
+-- 7. 年度分区函数与已归档的分区 (005)
+DROP FUNCTION IF EXISTS ensure_trade_date_partitions(regclass, int, int);
+DROP FUNCTION IF EXISTS archive_trade_date_partitions(regclass, int);
+DROP SCHEMA IF EXISTS archive CASCADE;
+
 COMMIT;
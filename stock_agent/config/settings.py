@@ -31,12 +31,31 @@ class Settings(BaseSettings):
     # ---- Application ----
     APP_ENV: str = "development"
     LOG_LEVEL: str = "INFO"
-    MAX_RETRIES: int = 3
+    MAX_RETRIES: int = 3  # LLM 调用与上游数据源调用 (data_pipeline.provider_calls) 的最大重试次数
     TOOL_TIMEOUT_SECONDS: int = 30
     MAX_SUB_TASKS: int = 10
     RAG_TOP_K: int = 10
     SQL_MAX_ROWS: int = 500
 
+    # ---- Local Price Cache ----
+    PRICE_CACHE_DIR: str = ".cache/prices"  # 本地列式价格缓存目录 (data_pipeline.price_cache)
+
+    # ---- Data Providers ----
+    # 每个数据源同时在途的上游调用数 (data_pipeline.provider_calls), 环境变量以 JSON 覆盖
+    PROVIDER_CONCURRENCY: dict[str, int] = {"akshare": 4, "yfinance": 8}
+    # 每秒发往上游的请求数 (令牌桶, data_pipeline.provider_limits); 键为数据源或 "数据源.函数名"
+    PROVIDER_RATE_LIMITS: dict[str, float] = {"akshare": 5.0, "yfinance": 2.0}
+    PROVIDER_RETRY_DEFER_SECONDS: float = 30.0  # 失败的调用在本轮其余调用完成后冷却多久再重试一轮
+    YF_DOWNLOAD_CHUNK_SIZE: int = 50  # 港股 / 美股日K线每次 yf.download 请求的 ticker 数
+    # 上游原始返回值的录制 / 回放 (data_pipeline.provider_recorder): off | record | replay
+    PROVIDER_RECORD_MODE: str = "off"
+    PROVIDER_RECORD_DIR: str = ".cache/recordings"
+    # 日K线 下载 → 转换 → 写库 流水线 (data_pipeline.price_stream)
+    PRICE_STREAM_QUEUE_SIZE: int = 16  # 阶段间有界队列的容量 (下载结果 / 待写入的 ticker)
+    PRICE_STREAM_TRANSFORM_WORKERS: int = 2  # 转换线程数
+    PRICE_STREAM_WRITERS: int = 2  # 写库任务数 (各自占用一个数据库连接)
+    PRICE_STREAM_BATCH_ROWS: int = 5000  # 跨 ticker 攒批, 每条 upsert 语句的目标行数
+
     # ---- MVP Stock Universe ----
     MVP_STOCK_UNIVERSE: dict[str, list[str]] = {
         "US": ["AAPL", "MSFT", "NVDA", "GOOG", "AMZN", "META", "TSLA"],
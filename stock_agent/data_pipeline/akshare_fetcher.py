@@ -9,10 +9,19 @@ Usage:
     # 指定 ticker 和 period
     python -m stock_agent.data_pipeline.akshare_fetcher --tickers 601127 --period 1y
     python -m stock_agent.data_pipeline.akshare_fetcher --tickers 601127 688981 --period 3y
+
+    # 日K线默认增量 (只下载库中水位线之后的交易日, 见 price_watermarks); --full 全量重新下载
+    python -m stock_agent.data_pipeline.akshare_fetcher --tickers 601127 --full
+
+    # 录制上游返回值 / 离线回放 (见 provider_recorder)
+    python -m stock_agent.data_pipeline.akshare_fetcher --record
+    python -m stock_agent.data_pipeline.akshare_fetcher --replay --replay-date 2025-06-30
 """
 
 import argparse
 import asyncio
+import contextlib
+import functools
 import logging
 import re
 from datetime import datetime, timedelta
@@ -21,6 +30,22 @@ import akshare as ak
 import pandas as pd
 
 from stock_agent.config import get_settings
+from stock_agent.data_pipeline.price_stream import PriceRows, StreamStats, stream_daily_prices
+from stock_agent.data_pipeline.price_watermarks import (
+    close_series,
+    fetch_start,
+    load_price_tails,
+    tail_changed,
+    watermark,
+)
+from stock_agent.data_pipeline.provider_cache import cached_call, memoized, with_provider_run
+from stock_agent.data_pipeline.provider_calls import fetch_each
+from stock_agent.data_pipeline.provider_recorder import (
+    add_recording_args,
+    configure_from_args,
+    pipeline_today,
+    recorded_call,
+)
 from stock_agent.database.models.stock import (
     StockBasicInfoDB,
     StockCompanyInfoDB,
@@ -35,37 +60,33 @@ logger = logging.getLogger(__name__)
 # ---- Helper Functions ----
 
 
-def _akshare_daily_to_entities(
-    df: pd.DataFrame,
-    ticker: str,
-    stock_name: str = "",
-) -> list[StockDailyPriceDB]:
-    """Convert akshare stock_zh_a_hist DataFrame to ORM entities.
+# stock_zh_a_hist 列 → 日K线表列 (日期单独转换)
+_AKSHARE_DAILY_COLUMNS = {
+    "开盘": "open",
+    "收盘": "close",
+    "最高": "high",
+    "最低": "low",
+    "成交量": "volume",
+    "成交额": "amount",
+    "振幅": "amplitude",
+    "涨跌幅": "pct_change",
+    "涨跌额": "amount_change",
+    "换手率": "turnover_rate",
+}
+
+
+def _akshare_daily_to_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert akshare stock_zh_a_hist DataFrame to 日K线表列 (整列向量化, 不逐行构造 ORM 对象).
 
     akshare stock_zh_a_hist columns:
     日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 振幅, 涨跌幅, 涨跌额, 换手率
+
+    数值列统一 to_numeric (无法解析的值为空); 四舍五入与 NaN → NULL 由 bulk.frame_to_columns 按列完成.
     """
-    entities = []
-    for _, row in df.iterrows():
-        trade_date = str(row.get("日期", ""))[:10]
-
-        entity = StockDailyPriceDB(
-            ticker=ticker,
-            name=stock_name,
-            trade_date=trade_date,
-            open=_safe_float(row.get("开盘")),
-            high=_safe_float(row.get("最高")),
-            low=_safe_float(row.get("最低")),
-            close=_safe_float(row.get("收盘")),
-            volume=_safe_int(row.get("成交量")),
-            amount=_safe_float(row.get("成交额")),
-            amplitude=_safe_float(row.get("振幅")),
-            pct_change=_safe_float(row.get("涨跌幅")),
-            amount_change=_safe_float(row.get("涨跌额")),
-            turnover_rate=_safe_float(row.get("换手率")),
-        )
-        entities.append(entity)
-    return entities
+    present = [c for c in _AKSHARE_DAILY_COLUMNS if c in df.columns]
+    frame = df[present].apply(pd.to_numeric, errors="coerce").rename(columns=_AKSHARE_DAILY_COLUMNS)
+    frame.insert(0, "trade_date", pd.to_datetime(df["日期"].astype(str).str[:10], errors="coerce"))
+    return frame.dropna(subset=["trade_date"]).reset_index(drop=True)
 
 
 def _safe_float(val) -> float | None:
@@ -78,16 +99,6 @@ def _safe_float(val) -> float | None:
         return None
 
 
-def _safe_int(val) -> int | None:
-    """Safe int conversion."""
-    try:
-        if pd.isna(val):
-            return None
-        return int(val)
-    except (TypeError, ValueError):
-        return None
-
-
 # ---- Period Helpers ----
 
 _PERIOD_DAYS: dict[str, int] = {
@@ -100,8 +111,11 @@ _PERIOD_DAYS: dict[str, int] = {
 
 
 def _period_to_dates(period: str) -> tuple[str, str]:
-    """Convert period string like '5y' to (start_date, end_date) in 'YYYYMMDD' format."""
-    end = datetime.now()
+    """Convert period string like '5y' to (start_date, end_date) in 'YYYYMMDD' format.
+
+    "今天" 取 pipeline_today(): 回放时为回放日期, 请求区间与录制时一致.
+    """
+    end = datetime.combine(pipeline_today(), datetime.min.time())
     end_str = end.strftime("%Y%m%d")
 
     if period in _PERIOD_DAYS:
@@ -116,22 +130,93 @@ def _period_to_dates(period: str) -> tuple[str, str]:
     return start.strftime("%Y%m%d"), end_str
 
 
+# ---- Blocking downloads (run in the provider thread pool) ----
+
+
+def _individual_info(ticker: str) -> dict:
+    """ak.stock_individual_info_em 的 item/value 两列 → dict (空表为空 dict)."""
+    df = cached_call("akshare", ak.stock_individual_info_em, symbol=ticker)
+    return dict(zip(df["item"], df["value"], strict=False)) if not df.empty else {}
+
+
+def _a_share_spot() -> pd.DataFrame:
+    """ak.stock_zh_a_spot_em 全市场实时行情快照, 按代码建索引 (经 memoized 每次运行只下载 / 建索引一次)."""
+    spot_df = recorded_call("akshare", ak.stock_zh_a_spot_em)
+    return spot_df.drop_duplicates("代码").set_index("代码")
+
+
+def _download_daily(request: tuple[str, str], end_date: str) -> tuple[pd.DataFrame, str]:
+    """下载一只 A 股 (ticker, 起始日 YYYYMMDD) 至 end_date 的前复权日K线与简称 (阻塞, 经 fetch_each 在线程池中执行)."""
+    ticker, start_date = request
+    logger.info(f"  → 获取 {ticker} ({start_date} ~ {end_date}) ...")
+    # akshare: stock_zh_a_hist 获取个股日K线
+    df = recorded_call(
+        "akshare",
+        ak.stock_zh_a_hist,
+        symbol=ticker,
+        period="daily",
+        start_date=start_date,
+        end_date=end_date,
+        adjust="qfq",  # 前复权
+    )
+    if df.empty:
+        return df, ""
+
+    # Try to get stock name (网络错误 / 上游返回结构不符 / 回放缺录制时留空)
+    stock_name = ""
+    with contextlib.suppress(OSError, LookupError, ValueError, TypeError):
+        stock_name = str(_individual_info(ticker).get("股票简称", ""))
+    return df, stock_name
+
+
+def _download_basic_info(ticker: str) -> tuple[dict, pd.Series | None]:
+    """下载一只 A 股的个股信息与实时行情行 (阻塞, 经 fetch_each 在线程池中执行)."""
+    logger.info(f"  → 获取 {ticker} 基本信息 ...")
+    # akshare: stock_individual_info_em 获取个股基本信息
+    info_dict = _individual_info(ticker)
+    if not info_dict:
+        return info_dict, None
+
+    # Also get spot price data for market cap, etc. (全市场快照每次运行只下载一次)
+    try:
+        spot_df = memoized(_a_share_spot)
+        spot = spot_df.loc[ticker] if ticker in spot_df.index else None
+    except Exception:
+        spot = None
+    return info_dict, spot
+
+
+def _download_company_info(ticker: str) -> dict:
+    """下载一只 A 股的个股信息 (阻塞, 经 fetch_each 在线程池中执行)."""
+    logger.info(f"  → 获取 {ticker} 公司信息 ...")
+    return _individual_info(ticker)
+
+
 # ---- Main Fetch Functions ----
 
 
+@with_provider_run
 async def fetch_a_share_daily_prices(
     tickers: list[str] | None = None,
     period: str = "5y",
     start_date: str | None = None,
     end_date: str | None = None,
+    full: bool = False,
 ) -> None:
-    """Task 1.2.1: 获取A股日K线.
+    """Task 1.2.1: 获取A股日K线 (默认增量: 只下载库中水位线之后的交易日, 见 price_watermarks).
+
+    库中已有数据的 ticker 从尾部重叠区间的第一个交易日开始下载, 只写入水位线之后的行
+    (下载、转换与写库经 price_stream 流水线同时进行, 跨 ticker 攒批按 (ticker, trade_date) upsert,
+    重跑不报唯一约束冲突);
+    重叠区间收盘价变化 (前复权调整) 的 ticker 最后按完整区间重新下载, 替换已有行,
+    在替换写入的同一事务中清除其指标与在线状态, 并标记本地价格缓存 (见 price_watermarks.invalidate_revised_history).
 
     Args:
         tickers: A股 ticker 列表, 为空时使用 MVP 股票池.
         period: 数据周期, 如 '1y', '2y', '5y'. 当 start_date/end_date 未指定时生效.
         start_date: 起始日期, 格式 'YYYYMMDD'. 优先于 period.
         end_date: 结束日期, 格式 'YYYYMMDD'. 优先于 period.
+        full: 忽略库中水位线, 下载完整区间并替换已有行.
     """
     if not tickers:
         settings = get_settings()
@@ -142,51 +227,58 @@ async def fetch_a_share_daily_prices(
         start_date = start_date or computed_start
         end_date = end_date or computed_end
 
-    logger.info(f"📊 开始获取A股日K线: {tickers} ({start_date} ~ {end_date})")
+    logger.info(f"📊 开始获取A股日K线: {tickers} ({start_date} ~ {end_date})" + (" (全量)" if full else ""))
+    tails = {} if full else await load_price_tails(StockDailyPriceDB, tickers)
 
-    async with get_session() as session:
-        total_rows = 0
-        for ticker in tickers:
-            try:
-                logger.info(f"  → 获取 {ticker} ...")
-                # akshare: stock_zh_a_hist 获取个股日K线
-                df = ak.stock_zh_a_hist(
-                    symbol=ticker,
-                    period="daily",
-                    start_date=start_date,
-                    end_date=end_date,
-                    adjust="qfq",  # 前复权
-                )
+    def _start(ticker: str) -> str:
+        since = fetch_start(tails.get(ticker))
+        return max(since.strftime("%Y%m%d"), start_date) if since else start_date
 
-                if df.empty:
-                    logger.warning(f"  ⚠ {ticker} 无数据")
-                    continue
+    adjusted: list[str] = []  # 转换线程中追加 (list.append 线程安全)
 
-                # Try to get stock name
-                stock_name = ""
-                try:
-                    spot_df = ak.stock_individual_info_em(symbol=ticker)
-                    if not spot_df.empty:
-                        name_row = spot_df[spot_df["item"] == "股票简称"]
-                        if not name_row.empty:
-                            stock_name = str(name_row.iloc[0]["value"])
-                except Exception:
-                    pass
+    def _transform(ticker: str, download: tuple[pd.DataFrame, str], replace: bool) -> PriceRows | None:
+        df, stock_name = download
+        if df.empty:
+            logger.warning(f"  ⚠ {ticker} 无数据")
+            return None
 
-                entities = _akshare_daily_to_entities(df, ticker, stock_name)
+        tail = None if replace else tails.get(ticker)
+        if tail is not None and tail_changed(tail, close_series(df["日期"], df["收盘"])):
+            adjusted.append(ticker)
+            return None
 
-                session.add_all(entities)
-                await session.flush()
-                total_rows += len(entities)
-                logger.info(f"  ✅ {ticker} ({stock_name}): {len(entities)} 行写入")
+        frame = _akshare_daily_to_frame(df)
+        last = watermark(tail)
+        if last is not None:
+            frame = frame[frame["trade_date"] > pd.Timestamp(last)]
+        return PriceRows(ticker, frame, {"name": stock_name}, replace=replace)
+
+    async def _run(requests: list[tuple[str, str]], replace: bool) -> StreamStats:
+        # 下载 / 转换 / 写库三段并发, 跨 ticker 攒批 upsert (见 price_stream)
+        stats = await stream_daily_prices(
+            "akshare",
+            _download_daily,
+            requests,
+            StockDailyPriceDB,
+            functools.partial(_transform, replace=replace),
+            end_date,
+            split=lambda key, download: [(key[0], download)],
+            describe=lambda key: key[0],
+        )
+        stats.log_summary("A股")
+        return stats
 
-            except Exception as e:
-                logger.error(f"  ❌ {ticker} 获取失败: {e}")
-                continue
+    runs = [await _run([(ticker, _start(ticker)) for ticker in tickers], replace=full)]
+    if adjusted:
+        logger.info(f"  🔁 {len(adjusted)} 只重叠区间价格已变化 (前复权调整), 全量重新下载: {adjusted}")
+        runs.append(await _run([(ticker, start_date) for ticker in adjusted], replace=True))
 
-        logger.info(f"📊 A股日K线获取完成, 共 {total_rows} 行")
+    total_rows = sum(stats.rows_written for stats in runs)
+    up_to_date = sum(stats.up_to_date for stats in runs)
+    logger.info(f"📊 A股日K线获取完成, 共写入 {total_rows} 行" + (f", {up_to_date} 只已是最新" if up_to_date else ""))
 
 
+@with_provider_run
 async def fetch_a_share_basic_info(tickers: list[str] | None = None) -> None:
     """Task 1.2.4 (part 1): 获取A股基本信息 (akshare 个股信息).
 
@@ -199,32 +291,14 @@ async def fetch_a_share_basic_info(tickers: list[str] | None = None) -> None:
     logger.info(f"📋 开始获取A股基本信息: {tickers}")
 
     async with get_session() as session:
-        for ticker in tickers:
+        async for ticker, download in fetch_each("akshare", _download_basic_info, tickers):
             try:
-                logger.info(f"  → 获取 {ticker} 基本信息 ...")
-                # akshare: stock_individual_info_em 获取个股基本信息
-                df = ak.stock_individual_info_em(symbol=ticker)
+                info_dict, spot = download.result()
 
-                if df.empty:
+                if not info_dict:
                     logger.warning(f"  ⚠ {ticker} 无基本信息")
                     continue
 
-                # Convert to dict for easier access
-                info_dict = {}
-                for _, row in df.iterrows():
-                    info_dict[row["item"]] = row["value"]
-
-                # Also get spot price data for market cap, etc.
-                try:
-                    spot_df = ak.stock_zh_a_spot_em()
-                    spot_row = spot_df[spot_df["代码"] == ticker]
-                    if not spot_row.empty:
-                        spot = spot_row.iloc[0]
-                    else:
-                        spot = None
-                except Exception:
-                    spot = None
-
                 entity = StockBasicInfoDB(
                     ticker=ticker,
                     stock_name=str(info_dict.get("股票简称", "")),
@@ -247,6 +321,7 @@ async def fetch_a_share_basic_info(tickers: list[str] | None = None) -> None:
     logger.info("📋 A股基本信息获取完成")
 
 
+@with_provider_run
 async def fetch_a_share_company_info(tickers: list[str] | None = None) -> None:
     """Task 1.2.4 (part 2): 获取A股公司信息 (详细).
 
@@ -259,19 +334,14 @@ async def fetch_a_share_company_info(tickers: list[str] | None = None) -> None:
     logger.info(f"📋 开始获取A股公司详细信息: {tickers}")
 
     async with get_session() as session:
-        for ticker in tickers:
+        async for ticker, download in fetch_each("akshare", _download_company_info, tickers):
             try:
-                logger.info(f"  → 获取 {ticker} 公司信息 ...")
-                df = ak.stock_individual_info_em(symbol=ticker)
+                info_dict = download.result()
 
-                if df.empty:
+                if not info_dict:
                     logger.warning(f"  ⚠ {ticker} 无公司信息")
                     continue
 
-                info_dict = {}
-                for _, row in df.iterrows():
-                    info_dict[row["item"]] = row["value"]
-
                 entity = StockCompanyInfoDB(
                     ticker=ticker,
                     company_name=str(info_dict.get("股票简称", "")),
@@ -292,21 +362,24 @@ async def fetch_a_share_company_info(tickers: list[str] | None = None) -> None:
     logger.info("📋 A股公司信息获取完成")
 
 
+@with_provider_run
 async def fetch_all_akshare_data(
     tickers: list[str] | None = None,
     period: str = "5y",
+    full: bool = False,
 ) -> None:
     """运行所有 akshare 数据获取任务.
 
     Args:
         tickers: A股 ticker 列表. 为空时使用 MVP 股票池.
         period: 数据周期, 如 '1y', '2y', '5y'. 默认 '5y'.
+        full: 日K线忽略库中水位线, 下载完整区间并替换已有行.
     """
     logger.info("=" * 60)
     logger.info("🚀 开始 akshare 数据获取")
     logger.info("=" * 60)
 
-    await fetch_a_share_daily_prices(tickers=tickers, period=period)
+    await fetch_a_share_daily_prices(tickers=tickers, period=period, full=full)
     await fetch_a_share_basic_info(tickers=tickers)
     await fetch_a_share_company_info(tickers=tickers)
 
@@ -328,9 +401,16 @@ def _parse_args() -> argparse.Namespace:
         default="5y",
         help="数据周期, 如 1y/2y/5y (默认: 5y)",
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="日K线忽略库中水位线, 下载完整区间并替换已有行 (默认: 增量)",
+    )
+    add_recording_args(parser)
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = _parse_args()
-    asyncio.run(fetch_all_akshare_data(tickers=args.tickers, period=args.period))
+    configure_from_args(args)
+    asyncio.run(fetch_all_akshare_data(tickers=args.tickers, period=args.period, full=args.full))
@@ -16,6 +16,10 @@ import pandas as pd
 import yfinance as yf
 
 from stock_agent.config import get_settings
+from stock_agent.data_pipeline.provider_cache import with_provider_run
+from stock_agent.data_pipeline.provider_calls import fetch_each
+from stock_agent.data_pipeline.provider_recorder import add_recording_args, configure_from_args, recorded_call
+from stock_agent.data_pipeline.yfinance_fetcher import ticker_info
 from stock_agent.database.models.stock import FinancialMetricsDB
 from stock_agent.database.models.stock_hk import FinancialMetricsHKDB
 from stock_agent.database.models.stock_us import FinancialMetricsUSDB
@@ -38,15 +42,20 @@ def _sf(val) -> float | None:
         return None
 
 
+def _quarterly_income_stmt(ticker_str: str) -> pd.DataFrame:
+    return yf.Ticker(ticker_str).quarterly_income_stmt
+
+
 def _extract_financial_metrics_from_yfinance(ticker_str: str, model_class: type) -> list:
     """Extract financial metrics from yfinance for a single ticker.
 
     Uses ticker.info for valuation ratios and ticker.income_stmt / balance_sheet for deeper data.
+    Blocking — run through provider_calls.fetch_each.
     """
+    logger.info(f"  → 获取 {ticker_str} 财务数据 ...")
     entities = []
     try:
-        t = yf.Ticker(ticker_str)
-        info = t.info
+        info = ticker_info(ticker_str)  # 与基本信息共用本次运行内的 .info 请求
 
         if not info:
             return []
@@ -56,7 +65,7 @@ def _extract_financial_metrics_from_yfinance(ticker_str: str, model_class: type)
 
         # Try to get quarterly data for report periods
         try:
-            income_stmt = t.quarterly_income_stmt
+            income_stmt = recorded_call("yfinance", _quarterly_income_stmt, ticker_str)
             has_quarterly = income_stmt is not None and not income_stmt.empty
         except Exception:
             has_quarterly = False
@@ -165,6 +174,7 @@ def _extract_financial_metrics_from_yfinance(ticker_str: str, model_class: type)
     return entities
 
 
+@with_provider_run
 async def fetch_us_financial_metrics() -> None:
     """获取美股财务指标 (yfinance)."""
     settings = get_settings()
@@ -172,10 +182,11 @@ async def fetch_us_financial_metrics() -> None:
     logger.info(f"💰 开始获取美股财务数据: {us_tickers}")
 
     async with get_session() as session:
-        for ticker in us_tickers:
+        async for ticker, download in fetch_each(
+            "yfinance", _extract_financial_metrics_from_yfinance, us_tickers, FinancialMetricsUSDB
+        ):
             try:
-                logger.info(f"  → 获取 {ticker} 财务数据 ...")
-                entities = _extract_financial_metrics_from_yfinance(ticker, FinancialMetricsUSDB)
+                entities = download.result()
                 if entities:
                     session.add_all(entities)
                     await session.flush()
@@ -188,6 +199,7 @@ async def fetch_us_financial_metrics() -> None:
     logger.info("💰 美股财务数据获取完成")
 
 
+@with_provider_run
 async def fetch_hk_financial_metrics() -> None:
     """获取港股财务指标 (yfinance)."""
     settings = get_settings()
@@ -195,10 +207,11 @@ async def fetch_hk_financial_metrics() -> None:
     logger.info(f"💰 开始获取港股财务数据: {hk_tickers}")
 
     async with get_session() as session:
-        for ticker in hk_tickers:
+        async for ticker, download in fetch_each(
+            "yfinance", _extract_financial_metrics_from_yfinance, hk_tickers, FinancialMetricsHKDB
+        ):
             try:
-                logger.info(f"  → 获取 {ticker} 财务数据 ...")
-                entities = _extract_financial_metrics_from_yfinance(ticker, FinancialMetricsHKDB)
+                entities = download.result()
                 if entities:
                     session.add_all(entities)
                     await session.flush()
@@ -211,6 +224,7 @@ async def fetch_hk_financial_metrics() -> None:
     logger.info("💰 港股财务数据获取完成")
 
 
+@with_provider_run
 async def fetch_cn_financial_metrics() -> None:
     """获取A股财务指标 (akshare)."""
     try:
@@ -223,12 +237,15 @@ async def fetch_cn_financial_metrics() -> None:
     cn_tickers = settings.MVP_STOCK_UNIVERSE["CN"]
     logger.info(f"💰 开始获取A股财务数据: {cn_tickers}")
 
+    def _download(ticker: str) -> pd.DataFrame:
+        logger.info(f"  → 获取 {ticker} 财务数据 ...")
+        # akshare: stock_financial_analysis_indicator
+        return recorded_call("akshare", ak.stock_financial_analysis_indicator, symbol=ticker, start_year="2023")
+
     async with get_session() as session:
-        for ticker in cn_tickers:
+        async for ticker, download in fetch_each("akshare", _download, cn_tickers):
             try:
-                logger.info(f"  → 获取 {ticker} 财务数据 ...")
-                # akshare: stock_financial_analysis_indicator
-                df = ak.stock_financial_analysis_indicator(symbol=ticker, start_year="2023")
+                df = download.result()
 
                 if df.empty:
                     logger.warning(f"  ⚠ {ticker} 无财务数据")
@@ -260,6 +277,7 @@ async def fetch_cn_financial_metrics() -> None:
     logger.info("💰 A股财务数据获取完成")
 
 
+@with_provider_run
 async def fetch_all_financial_data(market: str | None = None) -> None:
     """获取所有市场的财务数据."""
     logger.info("=" * 60)
@@ -281,7 +299,9 @@ async def fetch_all_financial_data(market: str | None = None) -> None:
 def main() -> None:
     parser = argparse.ArgumentParser(description="Financial data fetcher")
     parser.add_argument("--market", choices=["CN", "HK", "US"], default=None)
+    add_recording_args(parser)
     args = parser.parse_args()
+    configure_from_args(args)
     asyncio.run(fetch_all_financial_data(args.market))
 
 
@@ -6,22 +6,33 @@ Computes:
   - 基础技术指标: MA, MACD, RSI, KDJ, Bollinger Bands
   - 5 类策略信号: 趋势, 均值回归, 动量, 波动率, 统计套利
 
+各结果集在 INDICATORS (indicator_registry) 中声明输入 / 预热长度 / 输出列 / 结果表,
+可只计算其中一部分 (--indicators), 共享中间量按依赖只计算一次.
+
 Usage:
     python -m stock_agent.data_pipeline.indicator_calculator
     python -m stock_agent.data_pipeline.indicator_calculator --market US --ticker AAPL
+    python -m stock_agent.data_pipeline.indicator_calculator --incremental   # 仅追加新交易日
+    python -m stock_agent.data_pipeline.indicator_calculator --workers 8     # 8 进程并行计算
+    python -m stock_agent.data_pipeline.indicator_calculator --market US --ticker AAPL,MSFT --indicators trend,momentum
+    python -m stock_agent.data_pipeline.indicator_calculator --price-cache   # 先同步本地价格缓存, 从缓存读取价格
 """
 
 import argparse
 import asyncio
 import logging
-import math
-from typing import Any
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date
+from typing import TYPE_CHECKING
 
 import numpy as np
 import pandas as pd
 import talib
 
 from stock_agent.config import get_settings
+from stock_agent.data_pipeline.indicator_registry import IndicatorRegistry, IndicatorSpec, Intermediate, rolling_std
+from stock_agent.database.bulk import copy_columns, frame_to_columns, upsert_columns
+from stock_agent.database.columnar import load_price_columns, load_price_columns_many, price_columns_to_frame
 from stock_agent.database.models.stock import (
     StockDailyPriceDB,
     StockTechnicalIndicatorsDB,
@@ -49,8 +60,12 @@ from stock_agent.database.models.stock_us import (
     StockTechnicalTrendSignalIndicatorsUSDB,
     StockTechnicalVolatilitySignalIndicatorsUSDB,
 )
+from stock_agent.database.partitions import ensure_year_partitions
 from stock_agent.database.session import get_session
 
+if TYPE_CHECKING:
+    from stock_agent.data_pipeline.price_cache import MarketPriceCache
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -66,21 +81,17 @@ VOLATILITY_MODELS = {"CN": StockTechnicalVolatilitySignalIndicatorsDB, "HK": Sto
 STAT_ARB_MODELS = {"CN": StockTechnicalStatArbSignalIndicatorsDB, "HK": StockTechnicalStatArbSignalIndicatorsHKDB, "US": StockTechnicalStatArbSignalIndicatorsUSDB}
 
 
-def _s(val: Any) -> float | None:
-    """Safe float: NaN → None, otherwise round to 4."""
-    if val is None or (isinstance(val, float) and (math.isnan(val) or math.isinf(val))):
-        return None
-    try:
-        return round(float(val), 4)
-    except (TypeError, ValueError):
-        return None
+# ---- Incremental warm-up windows ----
 
+# EMA / Wilder 平滑是递归的, 种子值的影响按 (1-α)^n 衰减而不会归零.
+# 取 10×period (EMA, α=2/(n+1)) 和 20×period (Wilder, α=1/n) 的预热长度,
+# 使种子权重降到 e^-20 以下, 4 位小数入库后与全量重算一致.
+# 有限窗口的 MA / BBANDS 逐窗口求和 (_window_sum), 只要预热覆盖窗口即与全量重算逐位相同.
+_EMA_WARMUP_FACTOR = 10
+_WILDER_WARMUP_FACTOR = 20
 
-def _sb(val: Any) -> bool | None:
-    """Safe bool."""
-    if val is None or (isinstance(val, float) and math.isnan(val)):
-        return None
-    return bool(val)
+# 滚动 Hurst 指数的窗口 (约半年交易日)
+HURST_WINDOW = 126
 
 
 def _to_f64(series: pd.Series) -> np.ndarray:
@@ -93,49 +104,112 @@ def _to_f64(series: pd.Series) -> np.ndarray:
 # =====================================
 
 
-def compute_basic_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    """计算基础技术指标 (MA / MACD / RSI / KDJ / Bollinger Bands).
+def _window_sum(x: np.ndarray, period: int) -> np.ndarray:
+    """逐窗口求和 (沿 axis 0): out[t] = x[t-period+1] + ... + x[t], 窗口内从左到右依次相加.
 
-    使用 talib C 级计算，对齐参考实现 calculate_basic_technical_indicators().
-    Input df must have columns: close, high, low, volume (lowercase).
+    TA-Lib SMA 的滑动累加和 (加新值 → 减旧值) 带着序列开头以来的舍入误差,
+    同一交易日的均值随起始 bar 不同在末位上不同; 价格为 4 位小数时均值常落在
+    第 4 位小数的舍入临界点上, 增量 (从预热窗口开始) 与全量重算的入库值会差 1e-4.
+    这里每个值只取决于窗口内的 period 个数, 与起始 bar 无关. 代价为 period 次向量加法.
     """
-    close = _to_f64(df["close"])
-    high = _to_f64(df["high"])
-    low = _to_f64(df["low"])
+    out = np.full(x.shape, np.nan)
+    n = len(x)
+    if n >= period:
+        total = out[period - 1:]
+        total[...] = x[: n - period + 1]
+        for i in range(1, period):
+            total += x[i : n - period + 1 + i]
+    return out
+
+
+def _window_mean(x: np.ndarray, period: int) -> np.ndarray:
+    """SMA, 由 _window_sum 逐窗口求和, 与起始 bar 无关."""
+    return _window_sum(x, period) / period
+
+
+def _bollinger_bands(close: np.ndarray, period: int, nbdev: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger Bands: _window_mean 中轨 ± nbdev × 总体标准差 (窗口内 Σ(x - 中轨)², 同样与起始 bar 无关)."""
+    middle = _window_mean(close, period)
+    ss = np.full(close.shape, np.nan)
+    n = len(close)
+    if n >= period:
+        mid = middle[period - 1:]
+        acc = ss[period - 1:]
+        acc[...] = 0.0
+        for i in range(period):
+            d = close[i : n - period + 1 + i] - mid
+            acc += d * d
+    dev = np.sqrt(ss / period) * nbdev
+    return middle + dev, middle, middle - dev
+
+
+def _bbands20(close: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger Bands (20, 2std) — 基础指标与均值回归信号共用."""
+    return _bollinger_bands(close, 20, 2.0)
+
+
+def _pct_change(close: np.ndarray) -> pd.Series:
+    """Daily returns, identical to ``Series.pct_change()`` (first row NaN)."""
+    returns = np.empty_like(close)
+    returns[0] = np.nan
+    returns[1:] = close[1:] / close[:-1] - 1
+    return pd.Series(returns, copy=False)
+
+
+def _basic_columns(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    bbands: tuple[np.ndarray, np.ndarray, np.ndarray],
+) -> dict[str, np.ndarray]:
+    """MA / MACD / RSI / KDJ / Bollinger Bands 列."""
+    cols: dict[str, np.ndarray] = {}
 
     # 移动平均线 (SMA)
-    df["ma5"] = talib.SMA(close, timeperiod=5)
-    df["ma10"] = talib.SMA(close, timeperiod=10)
-    df["ma20"] = talib.SMA(close, timeperiod=20)
-    df["ma30"] = talib.SMA(close, timeperiod=30)
-    df["ma60"] = talib.SMA(close, timeperiod=60)
+    cols["ma5"] = _window_mean(close, 5)
+    cols["ma10"] = _window_mean(close, 10)
+    cols["ma20"] = _window_mean(close, 20)
+    cols["ma30"] = _window_mean(close, 30)
+    cols["ma60"] = _window_mean(close, 60)
 
     # MACD (12, 26, 9)
     macd, macd_signal, macd_hist = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
-    df["macd_diff"] = macd
-    df["macd_dea"] = macd_signal
-    df["macd_hist"] = macd_hist
+    cols["macd_diff"] = macd
+    cols["macd_dea"] = macd_signal
+    cols["macd_hist"] = macd_hist
 
     # RSI (6, 12, 24)
-    df["rsi_6"] = talib.RSI(close, timeperiod=6)
-    df["rsi_12"] = talib.RSI(close, timeperiod=12)
-    df["rsi_24"] = talib.RSI(close, timeperiod=24)
+    cols["rsi_6"] = talib.RSI(close, timeperiod=6)
+    cols["rsi_12"] = talib.RSI(close, timeperiod=12)
+    cols["rsi_24"] = talib.RSI(close, timeperiod=24)
 
     # 布林带 (20, 2std)
-    upper, middle, lower = talib.BBANDS(close, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
-    df["boll_upper"] = upper
-    df["boll_middle"] = middle
-    df["boll_lower"] = lower
+    cols["boll_upper"], cols["boll_middle"], cols["boll_lower"] = bbands
 
     # KDJ (Stochastic: 9-day, 3-day smooth)
     k, d = talib.STOCH(
         high, low, close,
         fastk_period=9, slowk_period=3, slowk_matype=0,
         slowd_period=3, slowd_matype=0)
-    df["kdj_k"] = k
-    df["kdj_d"] = d
-    df["kdj_j"] = 3 * k - 2 * d
+    cols["kdj_k"] = k
+    cols["kdj_d"] = d
+    cols["kdj_j"] = 3 * k - 2 * d
 
+    return cols
+
+
+def compute_basic_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """计算基础技术指标 (MA / MACD / RSI / KDJ / Bollinger Bands).
+
+    使用 talib C 级计算，对齐参考实现 calculate_basic_technical_indicators().
+    Input df must have columns: close, high, low, volume (lowercase).
+    """
+    close = _to_f64(df["close"])
+    high = _to_f64(df["high"])
+    low = _to_f64(df["low"])
+
+    for col, values in _basic_columns(close, high, low, _bbands20(close)).items():
+        df[col] = values
     return df
 
 
@@ -144,6 +218,50 @@ def compute_basic_indicators(df: pd.DataFrame) -> pd.DataFrame:
 # =====================================
 
 
+def _trend_columns(close: np.ndarray, high: np.ndarray, low: np.ndarray) -> dict[str, np.ndarray]:
+    """趋势跟踪信号列 (EMA / ADX / DI / 信号)."""
+    cols: dict[str, np.ndarray] = {}
+
+    # EMA
+    cols["ema_8"] = talib.EMA(close, timeperiod=8)
+    cols["ema_21"] = talib.EMA(close, timeperiod=21)
+    cols["ema_55"] = talib.EMA(close, timeperiod=55)
+
+    # ADX / +DI / -DI
+    cols["adx"] = talib.ADX(high, low, close, timeperiod=14)
+    cols["plus_di"] = talib.PLUS_DI(high, low, close, timeperiod=14)
+    cols["minus_di"] = talib.MINUS_DI(high, low, close, timeperiod=14)
+
+    return derive_trend_signal(cols)
+
+
+def derive_trend_signal(cols: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """趋势信号派生列 — 输入 ema_8 / ema_21 / ema_55 / adx.
+
+    仅做逐元素运算, 1D (单只股票) 与 2D (面板, dates × tickers) 数组通用.
+    """
+    # Derived flags
+    cols["short_trend"] = cols["ema_8"] > cols["ema_21"]
+    cols["medium_trend"] = cols["ema_21"] > cols["ema_55"]
+    cols["trend_strength"] = cols["adx"] / 100.0
+
+    # Signal logic — aligned with reference (no ADX threshold gate)
+    cond_bullish = cols["short_trend"] & cols["medium_trend"]
+    cond_bearish = ~cols["short_trend"] & ~cols["medium_trend"]
+    cols["trend_signal"] = np.select(
+        [cond_bullish, cond_bearish],
+        ["bullish", "bearish"],
+        default="neutral",
+    )
+    cols["trend_confidence"] = np.select(
+        [cond_bullish, cond_bearish],
+        [cols["trend_strength"], cols["trend_strength"]],
+        default=0.5,
+    )
+
+    return cols
+
+
 def compute_trend_signal(df: pd.DataFrame) -> pd.DataFrame:
     """趋势跟踪策略信号.
 
@@ -158,36 +276,62 @@ def compute_trend_signal(df: pd.DataFrame) -> pd.DataFrame:
     high = _to_f64(df["high"])
     low = _to_f64(df["low"])
 
-    # EMA
-    df["ema_8"] = talib.EMA(close, timeperiod=8)
-    df["ema_21"] = talib.EMA(close, timeperiod=21)
-    df["ema_55"] = talib.EMA(close, timeperiod=55)
+    for col, values in _trend_columns(close, high, low).items():
+        df[col] = values
+    return df
 
-    # ADX / +DI / -DI
-    df["adx"] = talib.ADX(high, low, close, timeperiod=14)
-    df["plus_di"] = talib.PLUS_DI(high, low, close, timeperiod=14)
-    df["minus_di"] = talib.MINUS_DI(high, low, close, timeperiod=14)
 
-    # Derived flags
-    df["short_trend"] = df["ema_8"] > df["ema_21"]
-    df["medium_trend"] = df["ema_21"] > df["ema_55"]
-    df["trend_strength"] = df["adx"] / 100.0
+def _mean_reversion_columns(
+    close: np.ndarray,
+    bbands: tuple[np.ndarray, np.ndarray, np.ndarray],
+    std_50: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """均值回归信号列 (Z-Score / Bollinger / RSI / 信号)."""
+    cols: dict[str, np.ndarray] = {}
 
-    # Signal logic — aligned with reference (no ADX threshold gate)
-    cond_bullish = df["short_trend"] & df["medium_trend"]
-    cond_bearish = ~df["short_trend"] & ~df["medium_trend"]
-    df["trend_signal"] = np.select(
+    # Z-Score based on 50-day MA
+    cols["ma_50"] = _window_mean(close, 50)
+    # 50-day rolling std (ddof=1) — 共享中间量, 由 pandas 计算 (talib STDDEV 为 ddof=0)
+    cols["std_50"] = std_50
+
+    # Bollinger Bands — 20-day window (standard), NOT 50-day
+    cols["bb_upper"], cols["bb_middle"], cols["bb_lower"] = bbands
+
+    # RSI (kept for DB storage, not used in signal logic)
+    cols["rsi_14"] = talib.RSI(close, timeperiod=14)
+    cols["rsi_28"] = talib.RSI(close, timeperiod=28)
+
+    return derive_mean_reversion_signal(cols, close)
+
+
+def derive_mean_reversion_signal(cols: dict[str, np.ndarray], close: np.ndarray) -> dict[str, np.ndarray]:
+    """均值回归信号派生列 — 输入 ma_50 / std_50 / bb_upper / bb_lower (1D / 2D 通用)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols["z_score"] = (close - cols["ma_50"]) / cols["std_50"]
+
+    # Price position within Bollinger Bands
+    bb_range = cols["bb_upper"] - cols["bb_lower"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols["price_vs_bb"] = np.where(bb_range > 0, (close - cols["bb_lower"]) / bb_range, 0.5)
+
+    # Signal logic
+    cond_bullish = (cols["z_score"] < -2) & (cols["price_vs_bb"] < 0.2)
+    cond_bearish = (cols["z_score"] > 2) & (cols["price_vs_bb"] > 0.8)
+
+    cols["mean_reversion_signal"] = np.select(
         [cond_bullish, cond_bearish],
         ["bullish", "bearish"],
         default="neutral",
     )
-    df["trend_confidence"] = np.select(
+
+    confidence_values = np.minimum(np.abs(cols["z_score"]) / 4.0, 1.0)
+    cols["mean_reversion_confidence"] = np.select(
         [cond_bullish, cond_bearish],
-        [df["trend_strength"], df["trend_strength"]],
+        [confidence_values, confidence_values],
         default=0.5,
     )
 
-    return df
+    return cols
 
 
 def compute_mean_reversion_signal(df: pd.DataFrame) -> pd.DataFrame:
@@ -202,45 +346,64 @@ def compute_mean_reversion_signal(df: pd.DataFrame) -> pd.DataFrame:
     - confidence = abs(z_score) / 4, capped at 1.0
     """
     close = _to_f64(df["close"])
+    std_50 = pd.Series(close, copy=False).rolling(50).std().to_numpy()
 
-    # Z-Score based on 50-day MA
-    df["ma_50"] = talib.SMA(close, timeperiod=50)
-    # 50-day rolling std still uses pandas (talib has no direct STDDEV with ddof=1)
-    df["std_50"] = df["close"].astype(float).rolling(50).std()
-    df["z_score"] = (df["close"].astype(float) - df["ma_50"]) / df["std_50"]
+    for col, values in _mean_reversion_columns(close, _bbands20(close), std_50).items():
+        df[col] = values
+    return df
 
-    # Bollinger Bands — 20-day window (standard), NOT 50-day
-    bb_upper, bb_middle, bb_lower = talib.BBANDS(close, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
-    df["bb_upper"] = bb_upper
-    df["bb_middle"] = bb_middle
-    df["bb_lower"] = bb_lower
 
-    # RSI (kept for DB storage, not used in signal logic)
-    df["rsi_14"] = talib.RSI(close, timeperiod=14)
-    df["rsi_28"] = talib.RSI(close, timeperiod=28)
+def _momentum_columns(volume: np.ndarray, returns: pd.Series) -> dict[str, np.ndarray]:
+    """动量信号列 (累计收益 / 成交量动量 / 信号)."""
+    cols: dict[str, np.ndarray] = {}
 
-    # Price position within Bollinger Bands
-    bb_range = df["bb_upper"] - df["bb_lower"]
-    df["price_vs_bb"] = np.where(bb_range > 0, (df["close"].astype(float) - df["bb_lower"]) / bb_range, 0.5)
+    # Daily returns
+    cols["returns"] = returns.to_numpy()
+
+    # Cumulative momentum (rolling sum of returns)
+    cols["mom_1m"] = returns.rolling(21).sum().to_numpy()
+    cols["mom_3m"] = returns.rolling(63).sum().to_numpy()
+    cols["mom_6m"] = returns.rolling(126).sum().to_numpy()
+
+    # Volume momentum
+    cols["volume_ma_21"] = talib.SMA(volume, timeperiod=21)
+
+    return derive_momentum_signal(cols, volume)
+
+
+def derive_momentum_signal(cols: dict[str, np.ndarray], volume: np.ndarray) -> dict[str, np.ndarray]:
+    """动量信号派生列 — 输入 mom_1m / mom_3m / mom_6m / volume_ma_21 (1D / 2D 通用)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols["volume_momentum"] = np.where(cols["volume_ma_21"] > 0, volume / cols["volume_ma_21"], 1.0)
+
+    # Momentum score — weights: 0.4, 0.3, 0.3
+    cols["momentum_score"] = (
+        0.4 * np.where(np.isnan(cols["mom_1m"]), 0, cols["mom_1m"])
+        + 0.3 * np.where(np.isnan(cols["mom_3m"]), 0, cols["mom_3m"])
+        + 0.3 * np.where(np.isnan(cols["mom_6m"]), 0, cols["mom_6m"])
+    )
+
+    # Volume confirmation — threshold = 1.0
+    cols["volume_confirmation"] = cols["volume_momentum"] > 1.0
 
     # Signal logic
-    cond_bullish = (df["z_score"] < -2) & (df["price_vs_bb"] < 0.2)
-    cond_bearish = (df["z_score"] > 2) & (df["price_vs_bb"] > 0.8)
+    cond_bullish = (cols["momentum_score"] > 0.05) & cols["volume_confirmation"]
+    cond_bearish = (cols["momentum_score"] < -0.05) & cols["volume_confirmation"]
 
-    df["mean_reversion_signal"] = np.select(
+    cols["momentum_signal"] = np.select(
         [cond_bullish, cond_bearish],
         ["bullish", "bearish"],
         default="neutral",
     )
 
-    confidence_values = np.minimum(np.abs(df["z_score"]) / 4.0, 1.0)
-    df["mean_reversion_confidence"] = np.select(
+    confidence_values = np.minimum(np.abs(cols["momentum_score"]) * 5.0, 1.0)
+    cols["momentum_confidence"] = np.select(
         [cond_bullish, cond_bearish],
         [confidence_values, confidence_values],
         default=0.5,
     )
 
-    return df
+    return cols
 
 
 def compute_momentum_signal(df: pd.DataFrame) -> pd.DataFrame:
@@ -252,50 +415,67 @@ def compute_momentum_signal(df: pd.DataFrame) -> pd.DataFrame:
     - volume_confirmation = volume_momentum > 1.0
     - confidence = abs(momentum_score) * 5, capped at 1.0
     """
-    close = df["close"].astype(float)
-    volume = df["volume"].astype(float)
+    close = _to_f64(df["close"])
+    volume = _to_f64(df["volume"])
 
-    # Daily returns
-    df["returns"] = close.pct_change()
+    for col, values in _momentum_columns(volume, _pct_change(close)).items():
+        df[col] = values
+    return df
 
-    # Cumulative momentum (rolling sum of returns)
-    df["mom_1m"] = df["returns"].rolling(21).sum()
-    df["mom_3m"] = df["returns"].rolling(63).sum()
-    df["mom_6m"] = df["returns"].rolling(126).sum()
 
-    # Volume momentum
-    volume_arr = _to_f64(df["volume"])
-    df["volume_ma_21"] = talib.SMA(volume_arr, timeperiod=21)
-    df["volume_momentum"] = np.where(df["volume_ma_21"] > 0, volume / df["volume_ma_21"], 1.0)
+def _volatility_columns(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    returns: pd.Series,
+    returns_std_21: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """波动率信号列 (历史波动率 / 波动率状态 / ATR / 信号)."""
+    cols: dict[str, np.ndarray] = {}
 
-    # Momentum score — weights: 0.4, 0.3, 0.3
-    df["momentum_score"] = (
-        0.4 * df["mom_1m"].fillna(0)
-        + 0.3 * df["mom_3m"].fillna(0)
-        + 0.3 * df["mom_6m"].fillna(0)
-    )
+    hist_vol = pd.Series(returns_std_21 * np.sqrt(252), copy=False)
+    cols["returns"] = returns.to_numpy()
+    cols["hist_vol_21"] = hist_vol.to_numpy()
+    cols["vol_ma_63"] = hist_vol.rolling(63).mean().to_numpy()
+    cols["vol_std_63"] = hist_vol.rolling(63).std().to_numpy()
 
-    # Volume confirmation — threshold = 1.0
-    df["volume_confirmation"] = df["volume_momentum"] > 1.0
+    # ATR via talib
+    cols["atr_14"] = talib.ATR(high, low, close, timeperiod=14)
+
+    return derive_volatility_signal(cols, close)
+
+
+def derive_volatility_signal(cols: dict[str, np.ndarray], close: np.ndarray) -> dict[str, np.ndarray]:
+    """波动率信号派生列 — 输入 hist_vol_21 / vol_ma_63 / vol_std_63 / atr_14 (1D / 2D 通用)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols["vol_regime"] = np.where(cols["vol_ma_63"] > 0, cols["hist_vol_21"] / cols["vol_ma_63"], 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols["vol_z_score"] = np.where(
+            cols["vol_std_63"] > 0,
+            (cols["hist_vol_21"] - cols["vol_ma_63"]) / cols["vol_std_63"],
+            0,
+        )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols["atr_ratio"] = np.where(close > 0, cols["atr_14"] / close, 0)
 
     # Signal logic
-    cond_bullish = (df["momentum_score"] > 0.05) & df["volume_confirmation"]
-    cond_bearish = (df["momentum_score"] < -0.05) & df["volume_confirmation"]
+    cond_bullish = (cols["vol_regime"] < 0.8) & (cols["vol_z_score"] < -1)
+    cond_bearish = (cols["vol_regime"] > 1.2) & (cols["vol_z_score"] > 1)
 
-    df["momentum_signal"] = np.select(
+    cols["volatility_signal"] = np.select(
         [cond_bullish, cond_bearish],
         ["bullish", "bearish"],
         default="neutral",
     )
 
-    confidence_values = np.minimum(np.abs(df["momentum_score"]) * 5.0, 1.0)
-    df["momentum_confidence"] = np.select(
+    confidence_values = np.minimum(np.abs(cols["vol_z_score"]) / 3.0, 1.0)
+    cols["volatility_confidence"] = np.select(
         [cond_bullish, cond_bearish],
         [confidence_values, confidence_values],
         default=0.5,
     )
 
-    return df
+    return cols
 
 
 def compute_volatility_signal(df: pd.DataFrame) -> pd.DataFrame:
@@ -312,296 +492,383 @@ def compute_volatility_signal(df: pd.DataFrame) -> pd.DataFrame:
     high = _to_f64(df["high"])
     low = _to_f64(df["low"])
 
-    df["returns"] = df["close"].astype(float).pct_change()
-    df["hist_vol_21"] = df["returns"].rolling(21).std() * np.sqrt(252)
-    df["vol_ma_63"] = df["hist_vol_21"].rolling(63).mean()
-    df["vol_regime"] = np.where(df["vol_ma_63"] > 0, df["hist_vol_21"] / df["vol_ma_63"], 1.0)
-    df["vol_std_63"] = df["hist_vol_21"].rolling(63).std()
-    df["vol_z_score"] = np.where(
-        df["vol_std_63"] > 0,
-        (df["hist_vol_21"] - df["vol_ma_63"]) / df["vol_std_63"],
-        0,
-    )
+    returns = _pct_change(close)
+    returns_std_21 = returns.rolling(21).std().to_numpy()
 
-    # ATR via talib
-    df["atr_14"] = talib.ATR(high, low, close, timeperiod=14)
-    df["atr_ratio"] = np.where(df["close"].astype(float) > 0, df["atr_14"] / df["close"].astype(float), 0)
+    for col, values in _volatility_columns(close, high, low, returns, returns_std_21).items():
+        df[col] = values
+    return df
 
-    # Signal logic
-    cond_bullish = (df["vol_regime"] < 0.8) & (df["vol_z_score"] < -1)
-    cond_bearish = (df["vol_regime"] > 1.2) & (df["vol_z_score"] > 1)
 
-    df["volatility_signal"] = np.select(
-        [cond_bullish, cond_bearish],
-        ["bullish", "bearish"],
-        default="neutral",
-    )
+def _window_sums(values: np.ndarray, lag: int, window: int) -> np.ndarray:
+    """Sums of ``values[i]`` (差分序列, 对应价格下标 i+lag) over each price window.
 
-    confidence_values = np.minimum(np.abs(df["vol_z_score"]) / 3.0, 1.0)
-    df["volatility_confidence"] = np.select(
-        [cond_bullish, cond_bearish],
-        [confidence_values, confidence_values],
-        default=0.5,
-    )
+    价格窗口 x[t-window+1 .. t] 内共有 window-lag 个 lag 差分; 返回按价格下标 t
+    对齐的窗口和 (t >= window-1), 由一次累加和差分得到.
+    """
+    csum = np.zeros((len(values) + 1, *values.shape[1:]))
+    np.cumsum(values, axis=0, out=csum[1:])
+    n = len(values) + lag
+    return csum[window - lag:n - lag + 1] - csum[:n - window + 1]
 
-    return df
 
+def _rolling_hurst_exponent(close: np.ndarray, window: int = HURST_WINDOW, max_lag: int = 20) -> np.ndarray:
+    """Rolling Hurst exponent over the trailing ``window`` prices (只用当日及之前的数据).
 
-def _calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> float:
-    """Calculate Hurst Exponent on price series using lag-based tau method.
+    对齐参考实现 calculate_hurst_exponent() 的 lag-tau 方法, 逐窗口等价于:
+        tau(lag) = max(1e-8, sqrt(std(x[lag:] - x[:-lag])))
+        H = polyfit(log(lag), log(tau), 1) 的斜率
+    但不逐窗口循环: 每个 lag 的差分均值 / 方差由累加和差分一次求出 (O(T·max_lag)),
+    斜率用闭式 Σ c·log(tau) / Σ c² (c 为中心化的 log(lag)).
 
-    对齐参考实现 calculate_hurst_exponent():
-    - 输入: 价格序列 (非收益率)
-    - 方法: lag-based standard deviation → log-log regression
     - H < 0.5: 均值回归, H = 0.5: 随机游走, H > 0.5: 趋势延续
+    - 支持 1D 序列与 2D (沿 axis 0) 面板; 窗口不满或含 NaN 时为 NaN
+
+    Args:
+        close: 价格序列 (非收益率).
     """
-    lags = range(2, max_lag)
-    tau = [
-        max(1e-8, np.sqrt(np.std(np.subtract(price_series.values[lag:], price_series.values[:-lag]))))
-        for lag in lags
-    ]
+    x = np.asarray(close, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if len(x) < window:
+        return out
 
-    try:
-        reg = np.polyfit(np.log(list(lags)), np.log(tau), 1)
-        return float(reg[0])
-    except (ValueError, RuntimeWarning):
-        return 0.5
+    missing = np.isnan(x)
+    filled = np.where(missing, 0.0, x)
+    log_lags = np.log(np.arange(2, max_lag, dtype=np.float64))
+    weights = log_lags - log_lags.mean()
 
+    slope = np.zeros((len(x) - window + 1, *x.shape[1:]))
+    for lag, weight in zip(range(2, max_lag), weights, strict=True):
+        n = window - lag
+        diff = filled[lag:] - filled[:-lag]
+        mean = _window_sums(diff, lag, window) / n
+        var = np.maximum(_window_sums(diff * diff, lag, window) / n - mean * mean, 0.0)
+        # log(max(1e-8, sqrt(std))) — 平坦窗口 var 精确为 0, 落到 1e-8
+        slope += weight * np.log(np.maximum(np.sqrt(np.sqrt(var)), 1e-8))
+    slope /= weights @ weights
 
-def compute_stat_arb_signal(df: pd.DataFrame) -> pd.DataFrame:
-    """统计套利策略信号.
+    slope[_window_sums(missing.astype(np.float64), 0, window) > 0] = np.nan
+    out[window - 1:] = slope
+    return out
 
-    对齐参考实现 calculate_stat_arb_signals_df():
-    - Hurst exponent 基于价格序列 (全局标量)
-    - bullish: hurst < 0.4 AND skew_63 > 1
-    - bearish: hurst < 0.4 AND skew_63 < -1
-    - confidence = (0.5 - hurst) * 2, clamped [0, 1]
-    """
-    close = df["close"].astype(float)
 
-    df["returns"] = close.pct_change()
-    df["skew_63"] = df["returns"].rolling(63).skew()
-    df["kurt_63"] = df["returns"].rolling(63).kurt()
+def _stat_arb_columns(returns: pd.Series, hurst: np.ndarray) -> dict[str, np.ndarray]:
+    """统计套利信号列 (偏度 / 峰度 / Hurst / 信号)."""
+    cols: dict[str, np.ndarray] = {}
+
+    cols["returns"] = returns.to_numpy()
+    cols["skew_63"] = returns.rolling(63).skew().to_numpy()
+    cols["kurt_63"] = returns.rolling(63).kurt().to_numpy()
+
+    # Hurst exponent — rolling window on price series
+    cols["hurst_exponent"] = hurst
+
+    return derive_stat_arb_signal(cols)
 
-    # Hurst exponent — computed on price series, applied as scalar
-    hurst = _calculate_hurst_exponent(close)
-    df["hurst_exponent"] = hurst
 
+def derive_stat_arb_signal(cols: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """统计套利信号派生列 — 输入 skew_63 / hurst_exponent (1D / 2D 通用)."""
     # Signal logic
-    cond_bullish = (df["hurst_exponent"] < 0.4) & (df["skew_63"] > 1)
-    cond_bearish = (df["hurst_exponent"] < 0.4) & (df["skew_63"] < -1)
+    cond_bullish = (cols["hurst_exponent"] < 0.4) & (cols["skew_63"] > 1)
+    cond_bearish = (cols["hurst_exponent"] < 0.4) & (cols["skew_63"] < -1)
 
-    df["stat_arb_signal"] = np.select(
+    cols["stat_arb_signal"] = np.select(
         [cond_bullish, cond_bearish],
         ["bullish", "bearish"],
         default="neutral",
     )
 
-    confidence_values = np.maximum(0, np.minimum(1, (0.5 - df["hurst_exponent"]) * 2))
-    df["stat_arb_confidence"] = np.select(
+    confidence_values = np.maximum(0, np.minimum(1, (0.5 - cols["hurst_exponent"]) * 2))
+    cols["stat_arb_confidence"] = np.select(
         [cond_bullish, cond_bearish],
         [confidence_values, confidence_values],
         default=0.5,
     )
 
+    return cols
+
+
+def compute_stat_arb_signal(df: pd.DataFrame) -> pd.DataFrame:
+    """统计套利策略信号.
+
+    对齐参考实现 calculate_stat_arb_signals_df():
+    - Hurst exponent 基于价格序列, HURST_WINDOW 日滚动窗口 (不使用未来数据)
+    - bullish: hurst < 0.4 AND skew_63 > 1
+    - bearish: hurst < 0.4 AND skew_63 < -1
+    - confidence = (0.5 - hurst) * 2, clamped [0, 1]
+    """
+    close = _to_f64(df["close"])
+
+    for col, values in _stat_arb_columns(_pct_change(close), _rolling_hurst_exponent(close)).items():
+        df[col] = values
     return df
 
 
 # =====================================
-# Database operations — with UPSERT support
+# Indicator registry: 声明式指标定义 + 共享中间量
 # =====================================
 
 
-async def _delete_existing_records(session: Any, model: type, ticker: str) -> int:
-    """Delete existing records for a ticker before re-inserting.
+INDICATORS = IndicatorRegistry(
+    intermediates=[
+        Intermediate("bbands_20", _bbands20, ("close",)),
+        Intermediate("returns", _pct_change, ("close",)),
+        Intermediate("hurst", _rolling_hurst_exponent, ("close",), {"window": HURST_WINDOW}),
+        rolling_std("close", 50),
+        rolling_std("returns", 21),
+    ],
+    indicators=[
+        IndicatorSpec(
+            "tech", _basic_columns, ("close", "high", "low", "bbands_20"),
+            # MA60 / BBANDS20 / KDJ(9,3,3) 为有限窗口; MACD(12,26,9) 为 EMA; RSI(24) 为 Wilder
+            warmup=max(60, (26 + 9) * _EMA_WARMUP_FACTOR, 24 * _WILDER_WARMUP_FACTOR),
+            columns=(
+                "ma5", "ma10", "ma20", "ma30", "ma60", "macd_diff", "macd_dea", "macd_hist",
+                "rsi_6", "rsi_12", "rsi_24", "boll_upper", "boll_middle", "boll_lower", "kdj_k", "kdj_d", "kdj_j",
+            ),
+            models=TECH_MODELS,
+            label="基础技术指标",
+        ),
+        IndicatorSpec(
+            "trend", _trend_columns, ("close", "high", "low"),
+            # EMA(55); ADX(14) 为两级 Wilder 平滑
+            warmup=max(55 * _EMA_WARMUP_FACTOR, 2 * 14 * _WILDER_WARMUP_FACTOR),
+            columns=(
+                "ema_8", "ema_21", "ema_55", "adx", "plus_di", "minus_di", "short_trend", "medium_trend",
+                "trend_strength", "trend_signal", "trend_confidence",
+            ),
+            models=TREND_MODELS,
+            label="趋势信号",
+        ),
+        IndicatorSpec(
+            "mean_reversion", _mean_reversion_columns, ("close", "bbands_20", "close_std_50"),
+            # MA/STD(50), BBANDS(20); RSI(28) 为 Wilder
+            warmup=max(50, 28 * _WILDER_WARMUP_FACTOR),
+            columns=(
+                "ma_50", "std_50", "bb_upper", "bb_middle", "bb_lower", "rsi_14", "rsi_28", "z_score",
+                "price_vs_bb", "mean_reversion_signal", "mean_reversion_confidence",
+            ),
+            models=MEAN_REV_MODELS,
+            label="均值回归信号",
+        ),
+        IndicatorSpec(
+            "momentum", _momentum_columns, ("volume", "returns"),
+            # returns(1) + mom_6m(126); volume SMA(21)
+            warmup=1 + 126,
+            columns=(
+                "returns", "mom_1m", "mom_3m", "mom_6m", "volume_ma_21", "volume_momentum", "momentum_score",
+                "volume_confirmation", "momentum_signal", "momentum_confidence",
+            ),
+            models=MOMENTUM_MODELS,
+            label="动量信号",
+        ),
+        IndicatorSpec(
+            "volatility", _volatility_columns, ("close", "high", "low", "returns", "returns_std_21"),
+            # returns(1) + hist_vol_21 + vol_ma_63/vol_std_63; ATR(14) 为 Wilder
+            warmup=max(1 + 21 + 63, 14 * _WILDER_WARMUP_FACTOR),
+            columns=(
+                "returns", "hist_vol_21", "vol_ma_63", "vol_std_63", "atr_14", "vol_regime", "vol_z_score",
+                "atr_ratio", "volatility_signal", "volatility_confidence",
+            ),
+            models=VOLATILITY_MODELS,
+            label="波动率信号",
+        ),
+        IndicatorSpec(
+            "stat_arb", _stat_arb_columns, ("returns", "hurst"),
+            # returns(1) + skew/kurt(63); 滚动 Hurst 需要 HURST_WINDOW 根收盘价
+            warmup=max(1 + 63, HURST_WINDOW),
+            columns=("returns", "skew_63", "kurt_63", "hurst_exponent", "stat_arb_signal", "stat_arb_confidence"),
+            models=STAT_ARB_MODELS,
+            label="统计套利信号",
+        ),
+    ],
+)
 
-    Uses DELETE + re-INSERT pattern for idempotent pipeline runs.
+# 由注册表派生, 供写入 / 水位线 / 日志使用 (注册顺序)
+INDICATOR_MODELS = {spec.name: spec.models for spec in INDICATORS}
+INDICATOR_WARMUP_BARS = {spec.name: spec.warmup for spec in INDICATORS}
+INDICATOR_LABELS = {spec.name: spec.label for spec in INDICATORS}
+
+
+# =====================================
+# Fused kernel: 一次遍历产出所选结果集
+# =====================================
+
+
+def compute_indicator_columns(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    volume: np.ndarray,
+    indicators: tuple[str, ...] | None = None,
+) -> dict[str, dict[str, np.ndarray]]:
+    """Fused single-pass computation of the selected indicator result sets.
+
+    与分别调用 compute_basic_indicators / 5 个 compute_*_signal 结果一致, 但:
+    - 输入为一次性转换好的 float64 数组, 不再对 df 做 6 次 .copy()
+    - returns / BBANDS(20) 等共享中间量由 INDICATORS 按依赖只计算一次,
+      只请求部分结果集时也只计算其用到的中间量
+
+    输入输出均为纯 numpy 数组, 可直接提交到 ProcessPoolExecutor: 参数与结果按
+    扁平 buffer 序列化, 无需 pickle DataFrame.
+
+    Args:
+        indicators: 结果集子集 (如 ("trend", "momentum")), None 表示全部.
+
+    Returns:
+        {"tech" | "trend" | "mean_reversion" | "momentum" | "volatility" | "stat_arb": {column: array}}
     """
-    from sqlalchemy import delete
+    prices = {"close": close, "high": high, "low": low, "volume": volume}
+    return INDICATORS.compute(prices, indicators)
 
-    stmt = delete(model).where(model.ticker == ticker)  # type: ignore[attr-defined]
-    result = await session.execute(stmt)
-    return result.rowcount
 
+def _price_arrays(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """OHLCV → (close, high, low, volume) float64 arrays, converted once."""
+    return _to_f64(df["close"]), _to_f64(df["high"]), _to_f64(df["low"]), _to_f64(df["volume"])
 
-async def _load_price_data(ticker: str, market: str) -> pd.DataFrame:
-    """从数据库加载价格数据并转为 DataFrame."""
-    from sqlalchemy import select
 
-    model = PRICE_MODELS[market]
+def _frames_from_columns(df: pd.DataFrame, columns: dict[str, dict[str, np.ndarray]]) -> dict[str, pd.DataFrame]:
+    """Attach trade_date / name from the price frame to each result set."""
+    keys = {c: df[c].to_numpy() for c in ("trade_date", "name") if c in df.columns}
+    return {
+        key: pd.DataFrame({**keys, **cols}, copy=False)
+        for key, cols in columns.items()
+    }
 
-    async with get_session() as session:
-        stmt = (
-            select(model)
-            .where(model.ticker == ticker)  # type: ignore[attr-defined]
-            .order_by(model.trade_date.asc())  # type: ignore[attr-defined]
-        )
-        result = await session.execute(stmt)
-        rows = result.scalars().all()
-
-    if not rows:
-        return pd.DataFrame()
-
-    data = []
-    for r in rows:
-        data.append({
-            "trade_date": r.trade_date,
-            "name": getattr(r, "name", ""),
-            "open": r.open,
-            "high": r.high,
-            "low": r.low,
-            "close": r.close,
-            "volume": r.volume or 0,
-        })
-
-    df = pd.DataFrame(data)
-    df = df.dropna(subset=["open", "high", "low", "close"])
-    df = df.reset_index(drop=True)
-    return df
 
+def compute_indicator_frames(df: pd.DataFrame, indicators: tuple[str, ...] | None = None) -> dict[str, pd.DataFrame]:
+    """DataFrame 版 compute_indicator_columns: 每个结果集只含 trade_date / name 与该表自己的列."""
+    return _frames_from_columns(df, compute_indicator_columns(*_price_arrays(df), indicators))
 
-async def _save_tech_indicators(df: pd.DataFrame, ticker: str, market: str) -> int:
-    """Save basic indicators (delete-then-insert upsert)."""
-    model = TECH_MODELS[market]
-    entities = []
-
-    for _, row in df.iterrows():
-        entity = model(
-            ticker=ticker,
-            name=row.get("name", ""),
-            trade_date=row["trade_date"],
-            ma5=_s(row.get("ma5")),
-            ma10=_s(row.get("ma10")),
-            ma20=_s(row.get("ma20")),
-            ma30=_s(row.get("ma30")),
-            ma60=_s(row.get("ma60")),
-            boll_upper=_s(row.get("boll_upper")),
-            boll_middle=_s(row.get("boll_middle")),
-            boll_lower=_s(row.get("boll_lower")),
-            kdj_k=_s(row.get("kdj_k")),
-            kdj_d=_s(row.get("kdj_d")),
-            kdj_j=_s(row.get("kdj_j")),
-            rsi_6=_s(row.get("rsi_6")),
-            rsi_12=_s(row.get("rsi_12")),
-            rsi_24=_s(row.get("rsi_24")),
-            macd_diff=_s(row.get("macd_diff")),
-            macd_dea=_s(row.get("macd_dea")),
-            macd_hist=_s(row.get("macd_hist")),
-        )
-        entities.append(entity)
 
-    async with get_session() as session:
-        deleted = await _delete_existing_records(session, model, ticker)
-        if deleted:
-            logger.debug(f"    🗑 删除 {deleted} 条旧技术指标记录")
-        session.add_all(entities)
-
-    return len(entities)
-
-
-async def _save_trend_signal(df: pd.DataFrame, ticker: str, market: str) -> int:
-    """Save trend signal indicators (delete-then-insert upsert)."""
-    model = TREND_MODELS[market]
-    entities = []
-    for _, row in df.iterrows():
-        entity = model(
-            ticker=ticker, name=row.get("name", ""), trade_date=row["trade_date"],
-            ema_8=_s(row.get("ema_8")), ema_21=_s(row.get("ema_21")), ema_55=_s(row.get("ema_55")),
-            adx=_s(row.get("adx")), plus_di=_s(row.get("plus_di")), minus_di=_s(row.get("minus_di")),
-            short_trend=_sb(row.get("short_trend")), medium_trend=_sb(row.get("medium_trend")),
-            trend_strength=_s(row.get("trend_strength")), trend_signal=row.get("trend_signal"),
-            trend_confidence=_s(row.get("trend_confidence")),
-        )
-        entities.append(entity)
-    async with get_session() as session:
-        await _delete_existing_records(session, model, ticker)
-        session.add_all(entities)
-    return len(entities)
-
-
-async def _save_mean_reversion_signal(df: pd.DataFrame, ticker: str, market: str) -> int:
-    """Save mean reversion signal indicators (delete-then-insert upsert)."""
-    model = MEAN_REV_MODELS[market]
-    entities = []
-    for _, row in df.iterrows():
-        entity = model(
-            ticker=ticker, name=row.get("name", ""), trade_date=row["trade_date"],
-            ma_50=_s(row.get("ma_50")), std_50=_s(row.get("std_50")), z_score=_s(row.get("z_score")),
-            bb_upper=_s(row.get("bb_upper")), bb_middle=_s(row.get("bb_middle")), bb_lower=_s(row.get("bb_lower")),
-            rsi_14=_s(row.get("rsi_14")), rsi_28=_s(row.get("rsi_28")),
-            price_vs_bb=_s(row.get("price_vs_bb")),
-            mean_reversion_signal=row.get("mean_reversion_signal"),
-            mean_reversion_confidence=_s(row.get("mean_reversion_confidence")),
+# =====================================
+# Database operations — single-statement UPSERT per ticker
+# =====================================
+
+
+async def _load_indicator_watermarks(
+    tickers: list[str],
+    market: str,
+    indicators: tuple[str, ...] | None = None,
+) -> dict[str, dict[str, date | None]]:
+    """查询每张 (所选) 指标表中各 ticker 已计算到的最新 trade_date (整批单次 UNION ALL 查询).
+
+    Returns:
+        {ticker: {table_key: 最新 trade_date, 尚无数据时为 None}}
+    """
+    from sqlalchemy import func, literal, select, union_all
+
+    keys = INDICATORS.names(indicators)
+    stmts = [
+        select(
+            literal(key).label("table_key"),
+            model.ticker.label("ticker"),  # type: ignore[attr-defined]
+            func.max(model.trade_date).label("last_date"),  # type: ignore[attr-defined]
         )
-        entities.append(entity)
+        .where(model.ticker.in_(tickers))  # type: ignore[attr-defined]
+        .group_by(model.ticker)  # type: ignore[attr-defined]
+        for key, model in ((key, INDICATOR_MODELS[key][market]) for key in keys)
+    ]
+
+    watermarks: dict[str, dict[str, date | None]] = {t: dict.fromkeys(keys) for t in tickers}
     async with get_session() as session:
-        await _delete_existing_records(session, model, ticker)
-        session.add_all(entities)
-    return len(entities)
-
-
-async def _save_momentum_signal(df: pd.DataFrame, ticker: str, market: str) -> int:
-    """Save momentum signal indicators (delete-then-insert upsert)."""
-    model = MOMENTUM_MODELS[market]
-    entities = []
-    for _, row in df.iterrows():
-        entity = model(
-            ticker=ticker, name=row.get("name", ""), trade_date=row["trade_date"],
-            returns=_s(row.get("returns")),
-            mom_1m=_s(row.get("mom_1m")), mom_3m=_s(row.get("mom_3m")), mom_6m=_s(row.get("mom_6m")),
-            volume_ma_21=_s(row.get("volume_ma_21")), volume_momentum=_s(row.get("volume_momentum")),
-            momentum_score=_s(row.get("momentum_score")),
-            volume_confirmation=_sb(row.get("volume_confirmation")),
-            momentum_signal=row.get("momentum_signal"),
-            momentum_confidence=_s(row.get("momentum_confidence")),
-        )
-        entities.append(entity)
+        result = await session.execute(union_all(*stmts))
+        for row in result:
+            watermarks[row.ticker][row.table_key] = row.last_date
+    return watermarks
+
+
+def _incremental_since(watermarks: dict[str, date | None]) -> date | None:
+    """增量起点: 所有表都已有数据时取最早的水位线, 否则 None (全量)."""
+    if watermarks and all(watermarks.values()):
+        return min(w for w in watermarks.values() if w is not None)
+    return None
+
+
+async def _load_price_data(
+    ticker: str,
+    market: str,
+    since: date | str | None = None,
+    warmup: int = 0,
+) -> pd.DataFrame:
+    """从数据库加载价格数据并转为 DataFrame (列式读取, 不经过 ORM 实体).
+
+    Args:
+        since: 增量模式下的水位线. 仅加载 trade_date > since 的新行,
+               以及 since 之前 (含) 的 warmup 根预热 K 线.
+        warmup: 预热 K 线数量.
+    """
     async with get_session() as session:
-        await _delete_existing_records(session, model, ticker)
-        session.add_all(entities)
-    return len(entities)
-
-
-async def _save_volatility_signal(df: pd.DataFrame, ticker: str, market: str) -> int:
-    """Save volatility signal indicators (delete-then-insert upsert)."""
-    model = VOLATILITY_MODELS[market]
-    entities = []
-    for _, row in df.iterrows():
-        entity = model(
-            ticker=ticker, name=row.get("name", ""), trade_date=row["trade_date"],
-            returns=_s(row.get("returns")),
-            hist_vol_21=_s(row.get("hist_vol_21")), vol_ma_63=_s(row.get("vol_ma_63")),
-            vol_regime=_s(row.get("vol_regime")), vol_std_63=_s(row.get("vol_std_63")),
-            vol_z_score=_s(row.get("vol_z_score")),
-            atr_14=_s(row.get("atr_14")), atr_ratio=_s(row.get("atr_ratio")),
-            volatility_signal=row.get("volatility_signal"),
-            volatility_confidence=_s(row.get("volatility_confidence")),
-        )
-        entities.append(entity)
+        cols = await load_price_columns(session, PRICE_MODELS[market], ticker, since=since, warmup=warmup)
+    return price_columns_to_frame(cols)
+
+
+async def _load_price_batch(
+    tickers: list[str],
+    market: str,
+    incremental: bool = False,
+    indicators: tuple[str, ...] | None = None,
+    cache: "MarketPriceCache | None" = None,
+) -> dict[str, tuple[pd.DataFrame, dict[str, date | None]]]:
+    """一批 ticker 的 (价格数据, 水位线): 水位线与价格各 1 次查询, 而非每只 ticker 各一次.
+
+    增量模式下每只 ticker 按自己的水位线只加载预热窗口 + 新 K 线.
+    传入 cache 时价格从本地缓存读取, 不查询价格表.
+    """
+    if incremental:
+        watermarks = await _load_indicator_watermarks(tickers, market, indicators)
+    else:
+        watermarks = {t: {} for t in tickers}
+    since = {t: _incremental_since(w) for t, w in watermarks.items()}
+    warmup = INDICATORS.warmup(indicators)
+
+    if cache is not None:
+        return {t: (cache.frame(t, since=since[t], warmup=warmup), watermarks[t]) for t in tickers}
     async with get_session() as session:
-        await _delete_existing_records(session, model, ticker)
-        session.add_all(entities)
-    return len(entities)
-
-
-async def _save_stat_arb_signal(df: pd.DataFrame, ticker: str, market: str) -> int:
-    """Save stat arb signal indicators (delete-then-insert upsert)."""
-    model = STAT_ARB_MODELS[market]
-    entities = []
-    for _, row in df.iterrows():
-        entity = model(
-            ticker=ticker, name=row.get("name", ""), trade_date=row["trade_date"],
-            returns=_s(row.get("returns")),
-            skew_63=_s(row.get("skew_63")), kurt_63=_s(row.get("kurt_63")),
-            hurst_exponent=_s(row.get("hurst_exponent")),
-            stat_arb_signal=row.get("stat_arb_signal"),
-            stat_arb_confidence=_s(row.get("stat_arb_confidence")),
+        batch = await load_price_columns_many(
+            session, PRICE_MODELS[market], tickers, since, warmup=warmup,
         )
-        entities.append(entity)
+    return {t: (price_columns_to_frame(batch[t]), watermarks[t]) for t in tickers}
+
+
+def _rows_after(df: pd.DataFrame, watermark: date | None) -> pd.DataFrame:
+    """Keep only rows newer than the table's watermark (all rows when None)."""
+    if watermark is None:
+        return df
+    return df[df["trade_date"] > pd.Timestamp(watermark)]
+
+
+async def _save_indicator_frames(
+    frames: dict[str, pd.DataFrame],
+    ticker: str,
+    market: str,
+    replace: bool = True,
+) -> dict[str, int]:
+    """Write the ticker's result sets (默认六张表) in a single atomic upsert statement.
+
+    Args:
+        frames: 各表待写入的行 (增量模式下已按水位线截取).
+        replace: 全量模式: 同一语句中删除该 ticker 不在本次结果里的旧行.
+                 为 False 时只 upsert 传入的日期范围.
+
+    Returns:
+        各表实际插入或更新的行数 (值未变化的已有行不计入).
+    """
+    targets = []
+    years: set[int] = set()
+    for key, df in frames.items():
+        model = INDICATOR_MODELS[key][market]
+        columns = copy_columns(model)
+        targets.append((model, columns, frame_to_columns(df, columns, constants={"ticker": ticker})))
+        years.update(df["trade_date"].dt.year.unique().tolist())
+
+    # 按年分区的表: 先补建本次写入涉及年份的分区 (同一进程内每张表 / 年份只检查一次)
+    await ensure_year_partitions([model for model, _, _ in targets], years)
+
     async with get_session() as session:
-        await _delete_existing_records(session, model, ticker)
-        session.add_all(entities)
-    return len(entities)
+        counts = await upsert_columns(session, targets, replace_tickers=[ticker] if replace else None)
+
+    return dict(zip(frames, counts, strict=True))
 
 
 # =====================================
@@ -609,64 +876,153 @@ async def _save_stat_arb_signal(df: pd.DataFrame, ticker: str, market: str) -> i
 # =====================================
 
 
-async def calculate_indicators_for_ticker(ticker: str, market: str) -> None:
-    """计算单只股票的全部技术指标和信号."""
+async def calculate_indicators_for_ticker(
+    ticker: str,
+    market: str,
+    incremental: bool = False,
+    executor: Executor | None = None,
+    indicators: tuple[str, ...] | None = None,
+) -> None:
+    """计算单只股票的技术指标和信号 (默认全部结果集).
+
+    Args:
+        incremental: 增量模式. 按表查询已计算到的最新 trade_date, 只加载
+                     预热窗口 + 新 K 线, 并只 upsert 新交易日的行.
+                     任一表尚无数据时该表回退为全量写入.
+                     非增量模式下整只 ticker 全量替换 (同一语句内删除多余旧行).
+        executor: 指标计算 (CPU 密集) 提交到该执行器, 事件循环继续处理其他
+                  ticker 的数据库读写. 为空时在当前线程内计算.
+        indicators: 只计算并写入这些结果集 (INDICATORS 中的名称, 如 ("trend", "momentum")),
+                    只加载其所需的预热窗口, 只计算其依赖的中间量. None 表示全部.
+    """
+    indicators = tuple(INDICATORS.names(indicators))
+    loaded = await _load_price_batch([ticker], market, incremental, indicators)
+    await _calculate_from_prices(ticker, market, *loaded[ticker], incremental, executor, indicators)
+
+
+async def _calculate_from_prices(
+    ticker: str,
+    market: str,
+    df: pd.DataFrame,
+    watermarks: dict[str, date | None],
+    incremental: bool,
+    executor: Executor | None,
+    indicators: tuple[str, ...],
+) -> None:
+    """计算并写入一只已加载价格数据的股票 (参数同 calculate_indicators_for_ticker)."""
     logger.info(f"  → 计算 {ticker} ({market}) 技术指标...")
 
-    df = await _load_price_data(ticker, market)
     if df.empty:
         logger.warning(f"  ⚠ {ticker} 无价格数据, 跳过")
         return
 
-    logger.info(f"    价格数据: {len(df)} 行")
-
-    # Compute all indicators on separate copies
-    tech_df = compute_basic_indicators(df.copy())
-    n1 = await _save_tech_indicators(tech_df, ticker, market)
-    logger.info(f"    ✅ 基础技术指标: {n1} 行")
-
-    trend_df = compute_trend_signal(df.copy())
-    n2 = await _save_trend_signal(trend_df, ticker, market)
-    logger.info(f"    ✅ 趋势信号: {n2} 行")
-
-    mr_df = compute_mean_reversion_signal(df.copy())
-    n3 = await _save_mean_reversion_signal(mr_df, ticker, market)
-    logger.info(f"    ✅ 均值回归信号: {n3} 行")
-
-    mom_df = compute_momentum_signal(df.copy())
-    n4 = await _save_momentum_signal(mom_df, ticker, market)
-    logger.info(f"    ✅ 动量信号: {n4} 行")
-
-    vol_df = compute_volatility_signal(df.copy())
-    n5 = await _save_volatility_signal(vol_df, ticker, market)
-    logger.info(f"    ✅ 波动率信号: {n5} 行")
+    since = _incremental_since(watermarks)
+    if since is not None and df["trade_date"].iloc[-1] <= pd.Timestamp(since):
+        logger.info(f"    ⏭ {ticker} 指标已是最新 ({since}), 跳过")
+        return
 
-    stat_df = compute_stat_arb_signal(df.copy())
-    n6 = await _save_stat_arb_signal(stat_df, ticker, market)
-    logger.info(f"    ✅ 统计套利信号: {n6} 行")
+    logger.info(f"    价格数据: {len(df)} 行" + (f" (增量, 水位线 {since})" if since else ""))
 
+    wm = watermarks.get
 
-async def calculate_all_indicators(market: str | None = None) -> None:
-    """Task 1.3.4: 全市场指标计算."""
+    # Fused single pass → selected result sets
+    if executor is None:
+        frames = compute_indicator_frames(df, indicators)
+    else:
+        loop = asyncio.get_running_loop()
+        columns = await loop.run_in_executor(executor, compute_indicator_columns, *_price_arrays(df), indicators)
+        frames = _frames_from_columns(df, columns)
+
+    written = await _save_indicator_frames(
+        {key: _rows_after(frame, wm(key)) for key, frame in frames.items()},
+        ticker,
+        market,
+        replace=not incremental,
+    )
+    for key, n in written.items():
+        logger.info(f"    ✅ {INDICATOR_LABELS[key]}: {n} 行")
+
+
+async def calculate_all_indicators(
+    market: str | None = None,
+    incremental: bool = False,
+    workers: int = 1,
+    indicators: tuple[str, ...] | None = None,
+    tickers: tuple[str, ...] | None = None,
+    batch_size: int = 200,
+    price_cache: bool = False,
+) -> None:
+    """Task 1.3.4: 全市场指标计算.
+
+    价格与水位线按每批 batch_size 只 ticker 各用一次查询加载 (而非每只 ticker 一次往返);
+    当前批计算 / 写入期间, 下一批已在后台预取.
+
+    Args:
+        workers: 计算进程数. > 1 时指标计算分发到 ProcessPoolExecutor,
+                 同时最多 2×workers 只 ticker 在途, 主事件循环并发处理其加载与写入.
+        indicators: 只计算这些结果集, None 表示全部.
+        tickers: 只计算这些股票. 指定 market 时直接使用该列表,
+                 否则从股票池中筛选.
+        price_cache: 先增量同步各市场的本地价格缓存 (price_cache), 再从缓存读取价格.
+    """
+    indicators = tuple(INDICATORS.names(indicators))
     settings = get_settings()
     universes = settings.MVP_STOCK_UNIVERSE
+    if tickers and market:
+        universes = {market: list(tickers)}
+    elif tickers:
+        universes = {mkt: [t for t in members if t in tickers] for mkt, members in universes.items()}
 
     logger.info("=" * 60)
-    logger.info("📐 开始全市场技术指标计算")
+    logger.info(
+        "📐 开始全市场技术指标计算" + (" (增量)" if incremental else "")
+        + f" workers={workers} indicators={','.join(indicators)}"
+    )
     logger.info("=" * 60)
 
-    for mkt, tickers in universes.items():
-        if market and mkt != market:
-            continue
-        logger.info(f"\n{'─' * 40}")
-        logger.info(f"▶ {mkt} 市场: {tickers}")
-        logger.info(f"{'─' * 40}")
-        for ticker in tickers:
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    in_flight = asyncio.Semaphore(2 * workers if executor else 1)
+
+    async def _run(ticker: str, mkt: str, df: pd.DataFrame, watermarks: dict[str, date | None]) -> None:
+        async with in_flight:
             try:
-                await calculate_indicators_for_ticker(ticker, mkt)
+                await _calculate_from_prices(ticker, mkt, df, watermarks, incremental, executor, indicators)
             except Exception as e:
                 logger.error(f"  ❌ {ticker} ({mkt}) 计算失败: {e}")
+
+    async def _run_market(mkt: str, members: list[str]) -> None:
+        cache = None
+        if price_cache:
+            from stock_agent.data_pipeline.price_cache import sync_price_cache
+
+            cache = await sync_price_cache(mkt, batch_size=batch_size)
+        chunks = [members[i:i + batch_size] for i in range(0, len(members), batch_size)]
+        pending = asyncio.create_task(_load_price_batch(chunks[0], mkt, incremental, indicators, cache))
+        try:
+            for i, chunk in enumerate(chunks):
+                try:
+                    loaded = await pending
+                except Exception as e:
+                    logger.error(f"  ❌ {mkt} {chunk[0]}…{chunk[-1]} ({len(chunk)} 只) 价格加载失败: {e}")
+                    loaded = {}
+                # 预取下一批, 与本批的计算 / 写入重叠
+                if i + 1 < len(chunks):
+                    pending = asyncio.create_task(_load_price_batch(chunks[i + 1], mkt, incremental, indicators, cache))
+                await asyncio.gather(*(_run(ticker, mkt, *loaded[ticker]) for ticker in chunk if ticker in loaded))
+        finally:
+            pending.cancel()
+
+    try:
+        for mkt, members in universes.items():
+            if (market and mkt != market) or not members:
                 continue
+            logger.info(f"\n{'─' * 40}")
+            logger.info(f"▶ {mkt} 市场: {members}")
+            logger.info(f"{'─' * 40}")
+            await _run_market(mkt, list(members))
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     logger.info("=" * 60)
     logger.info("🎉 全市场技术指标计算完成!")
@@ -676,13 +1032,33 @@ async def calculate_all_indicators(market: str | None = None) -> None:
 def main() -> None:
     parser = argparse.ArgumentParser(description="技术指标计算引擎")
     parser.add_argument("--market", choices=["CN", "HK", "US"], default=None, help="目标市场")
-    parser.add_argument("--ticker", default=None, help="单只股票代码")
+    parser.add_argument("--ticker", default=None, help="股票代码, 多只用逗号分隔")
+    parser.add_argument("--incremental", action="store_true", help="增量模式: 仅计算并追加新交易日")
+    parser.add_argument("--workers", type=int, default=1, help="指标计算进程数 (默认 1: 单进程顺序计算)")
+    parser.add_argument("--batch-size", type=int, default=200, help="每次查询加载的 ticker 数 (默认 200)")
+    parser.add_argument("--price-cache", action="store_true", help="先同步本地价格缓存, 再从缓存读取价格")
+    parser.add_argument(
+        "--indicators", default=None,
+        help=f"只计算这些结果集, 逗号分隔 (可选: {','.join(INDICATORS.names())}; 默认全部)",
+    )
     args = parser.parse_args()
 
-    if args.ticker and args.market:
-        asyncio.run(calculate_indicators_for_ticker(args.ticker, args.market))
+    indicators = tuple(args.indicators.split(",")) if args.indicators else None
+    try:
+        INDICATORS.names(indicators)
+    except KeyError as e:
+        parser.error(str(e))
+    tickers = tuple(args.ticker.split(",")) if args.ticker else None
+
+    if tickers and len(tickers) == 1 and args.market:
+        asyncio.run(calculate_indicators_for_ticker(
+            tickers[0], args.market, incremental=args.incremental, indicators=indicators,
+        ))
     else:
-        asyncio.run(calculate_all_indicators(args.market))
+        asyncio.run(calculate_all_indicators(
+            args.market, incremental=args.incremental, workers=args.workers, indicators=indicators, tickers=tickers,
+            batch_size=args.batch_size, price_cache=args.price_cache,
+        ))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+"""Declarative indicator registry — 指标声明 + 依赖 DAG + 共享中间量缓存.
+
+每个结果集 (一张指标表) 以 ``IndicatorSpec`` 声明自己的输入、参数、预热长度、
+输出列与各市场的结果表; 多个指标共用的中间量 (收益率、布林带、某窗口的滚动
+标准差等) 以 ``Intermediate`` 声明. 计算时引擎按依赖关系拓扑排序,
+每个中间量对同一只股票只计算一次.
+
+新增一个指标只需: 写列计算函数, 注册一个 IndicatorSpec, 加上模型与建表 SQL;
+写入 / 增量水位线 / 预热等由 indicator_calculator 统一处理.
+
+Usage:
+    registry = IndicatorRegistry(intermediates=[...], indicators=[...])
+    columns = registry.compute({"close": close, ...}, ["trend", "momentum"])
+    registry.warmup(["trend", "momentum"])     # 该子集所需的预热 K 线数
+"""
+
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# 原始价格输入 (float64 数组), 不需要注册
+PRICE_INPUTS = ("close", "high", "low", "volume")
+
+
+@dataclass(frozen=True)
+class Intermediate:
+    """A shared intermediate value: ``func(*inputs, **params)``, cached per ticker."""
+
+    name: str
+    func: Callable[..., Any]
+    inputs: tuple[str, ...]
+    params: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """One indicator result set (对应一张指标表).
+
+    Attributes:
+        func: ``func(*inputs, **params)`` → {column: array}, 须包含全部 columns.
+        inputs: 价格列 (PRICE_INPUTS) 或已注册中间量的名称.
+        warmup: 增量计算时需要的预热 K 线数.
+        columns: 输出列 (写入结果表的列, 不含 ticker / trade_date / name).
+        models: 市场 → 结果表模型.
+        label: 日志中的名称.
+    """
+
+    name: str
+    func: Callable[..., dict[str, np.ndarray]]
+    inputs: tuple[str, ...]
+    warmup: int
+    columns: tuple[str, ...]
+    models: Mapping[str, type] = field(default_factory=dict)
+    params: Mapping[str, Any] = field(default_factory=dict)
+    label: str = ""
+
+
+def rolling_std(source: str, window: int) -> Intermediate:
+    """Rolling sample std of ``source`` (ddof=1), named ``{source}_std_{window}``."""
+    return Intermediate(f"{source}_std_{window}", _rolling_std, (source,), {"window": window})
+
+
+def _rolling_std(values: np.ndarray | pd.Series, window: int) -> np.ndarray:
+    return pd.Series(values, copy=False).rolling(window).std().to_numpy()
+
+
+class IndicatorRegistry:
+    """Registered intermediates and indicators, with DAG resolution and per-ticker evaluation."""
+
+    def __init__(
+        self,
+        intermediates: Iterable[Intermediate] = (),
+        indicators: Iterable[IndicatorSpec] = (),
+    ) -> None:
+        self.intermediates: dict[str, Intermediate] = {}
+        self.indicators: dict[str, IndicatorSpec] = {}
+        for node in intermediates:
+            self.add_intermediate(node)
+        for spec in indicators:
+            self.add_indicator(spec)
+
+    def add_intermediate(self, node: Intermediate) -> Intermediate:
+        """注册中间量; 同名且定义相同时视为已注册 (允许多个指标重复声明同一 rolling_std)."""
+        existing = self.intermediates.get(node.name)
+        if existing is not None and existing != node:
+            raise ValueError(f"intermediate {node.name!r} is already registered with a different definition")
+        if node.name in PRICE_INPUTS or node.name in self.indicators:
+            raise ValueError(f"intermediate name {node.name!r} clashes with a price input or an indicator")
+        self.intermediates[node.name] = node
+        return node
+
+    def add_indicator(self, spec: IndicatorSpec) -> IndicatorSpec:
+        if spec.name in self.indicators or spec.name in self.intermediates:
+            raise ValueError(f"indicator {spec.name!r} is already registered")
+        self.indicators[spec.name] = spec
+        return spec
+
+    def __iter__(self) -> Iterator[IndicatorSpec]:
+        return iter(self.indicators.values())
+
+    def __getitem__(self, name: str) -> IndicatorSpec:
+        return self.indicators[name]
+
+    def names(self, indicators: Iterable[str] | None = None) -> list[str]:
+        """Validate a requested subset; None → 全部指标 (注册顺序). 返回按注册顺序去重的名称."""
+        if indicators is None:
+            return list(self.indicators)
+        wanted = set(indicators)
+        unknown = wanted - self.indicators.keys()
+        if unknown:
+            raise KeyError(f"unknown indicators: {sorted(unknown)} (available: {list(self.indicators)})")
+        return [name for name in self.indicators if name in wanted]
+
+    def warmup(self, indicators: Iterable[str] | None = None) -> int:
+        """该子集增量计算所需的预热 K 线数 (各指标 warmup 的最大值)."""
+        return max((self.indicators[name].warmup for name in self.names(indicators)), default=0)
+
+    def resolve(self, indicators: Iterable[str] | None = None) -> list[str]:
+        """Topologically ordered intermediates needed by the requested indicators.
+
+        深度优先遍历依赖; 未注册的输入或循环依赖抛出 ValueError.
+        """
+        order: list[str] = []
+        state: dict[str, bool] = {}  # False: 遍历中, True: 已完成
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if name in PRICE_INPUTS or state.get(name):
+                return
+            if name in state:
+                raise ValueError(f"dependency cycle: {' → '.join((*path, name))}")
+            node = self.intermediates.get(name)
+            if node is None:
+                raise ValueError(f"unknown input {name!r} (required by {path[-1]!r})")
+            state[name] = False
+            for dep in node.inputs:
+                visit(dep, (*path, name))
+            state[name] = True
+            order.append(name)
+
+        for spec_name in self.names(indicators):
+            for dep in self.indicators[spec_name].inputs:
+                visit(dep, (spec_name,))
+        return order
+
+    def compute(
+        self,
+        prices: Mapping[str, np.ndarray],
+        indicators: Iterable[str] | None = None,
+        cache: MutableMapping[str, Any] | None = None,
+    ) -> dict[str, dict[str, np.ndarray]]:
+        """Compute the requested indicators for one ticker.
+
+        Args:
+            prices: PRICE_INPUTS → float64 数组 (只需提供所选指标实际用到的列).
+            indicators: 指标子集, None 表示全部.
+            cache: 中间量缓存. 同一只股票多次调用 (如先算 trend 再算 momentum)
+                   时传入同一个 dict, 已算过的中间量不再重复计算.
+
+        Returns:
+            {indicator: {column: array}}, 每个结果集只含其声明的 columns.
+        """
+        names = self.names(indicators)
+        values: MutableMapping[str, Any] = cache if cache is not None else {}
+
+        for name in self.resolve(names):
+            if name not in values:
+                node = self.intermediates[name]
+                values[name] = node.func(*(_lookup(prices, values, dep) for dep in node.inputs), **node.params)
+
+        results: dict[str, dict[str, np.ndarray]] = {}
+        for name in names:
+            spec = self.indicators[name]
+            cols = spec.func(*(_lookup(prices, values, dep) for dep in spec.inputs), **spec.params)
+            missing = [c for c in spec.columns if c not in cols]
+            if missing:
+                raise ValueError(f"indicator {name!r} did not produce declared columns {missing}")
+            results[name] = {c: cols[c] for c in spec.columns}
+        return results
+
+
+def _lookup(prices: Mapping[str, np.ndarray], values: Mapping[str, Any], name: str) -> Any:
+    return prices[name] if name in PRICE_INPUTS else values[name]
+
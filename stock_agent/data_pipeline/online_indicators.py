@@ -0,0 +1,981 @@
+"""Online indicator state machines — 每根新 K 线 O(1) 更新, 无需重新加载历史.
+
+批量路径 (indicator_calculator / panel_engine) 每次都读入整段价格历史再计算.
+盘中或准实时更新时, 这里为每只股票维护一组可序列化的状态机, 每来一根 K 线
+各指标只根据保存的状态更新一次:
+
+  - MA: 环形缓冲区, 每根 bar 对窗口重新求和 (与批量路径的 _window_mean 相同)
+  - EMA / MACD: TA-Lib 的 SMA 种子 + k·(x - prev) + prev 递推
+  - RSI / ADX / +DI / -DI / ATR: TA-Lib 的 Wilder 平滑
+  - Bollinger Bands: 同一窗口的均值与 Σ(x - 均值)² (批量路径的 _bollinger_bands)
+  - rolling std / skew / kurt: pandas 的 Welford 中心矩在线增删, 包括其检测到
+    数值抵消时整窗重算的规则 (窗口有界, 仍为常数时间)
+  - KDJ: 9 根高低点窗口 + 两级 SMA(3) (TA-Lib STOCH)
+
+每个状态机都复现对应批量实现的浮点运算顺序: 从同一根 K 线开始喂入同一段
+序列时, 预热期之后的输出与 talib / pandas 的批量结果逐位相同. TA-Lib C 0.8
+改写了部分内核 (EMA / MACD / ATR 用 fma 单次舍入, RSI 乘 1/period, 零值判断
+阈值不同), 这里按已安装的 TA-Lib C 版本选择对应的运算顺序; 状态中记录该版本,
+升级 TA-Lib 后旧状态会被丢弃并重新回放历史.
+
+OnlineIndicatorState 组合出基础技术指标 / 趋势信号 / 均值回归信号三张表的全部
+列; 动量、波动率、统计套利 (滚动 Hurst) 仍由批量路径计算. 状态以 JSON 存入
+indicator_stream_state 表, worker 重启后从上次处理到的 trade_date 继续.
+
+Usage:
+    state = OnlineIndicatorState.from_history(df)          # 一次性回放历史
+    rows = state.update("2024-06-28", close, high, low)    # 每根新 K 线 O(1)
+    rows = state.preview("2024-07-01", close, high, low)   # 盘中未收盘 bar, 不改变状态
+
+    python -m stock_agent.data_pipeline.online_indicators                # 全市场
+    python -m stock_agent.data_pipeline.online_indicators --ticker AAPL --market US
+"""
+
+import argparse
+import asyncio
+import copy
+import logging
+import math
+import re
+from collections import deque
+from fractions import Fraction
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import talib
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from stock_agent.config.settings import get_settings
+from stock_agent.data_pipeline.indicator_calculator import (
+    _load_price_data,
+    _save_indicator_frames,
+    derive_mean_reversion_signal,
+    derive_trend_signal,
+)
+from stock_agent.database.models import IndicatorStreamState
+from stock_agent.database.session import get_session
+
+logger = logging.getLogger(__name__)
+
+NAN = math.nan
+
+
+def _talib_c_version() -> tuple[int, int]:
+    """已安装的 TA-Lib C 库版本 (major, minor), 如 b"0.6.4 (Oct 20 2025 ...)" → (0, 6)."""
+    match = re.match(rb"(\d+)\.(\d+)", talib.__ta_version__)
+    return (int(match[1]), int(match[2])) if match else (0, 0)
+
+
+# 决定各内核的浮点运算顺序; 写入状态, 版本变化时旧状态作废
+TALIB_C_VERSION = "{}.{}".format(*_talib_c_version())
+_TALIB_08 = _talib_c_version() >= (0, 8)
+
+# TA-Lib 的 TA_IS_ZERO / TA_IS_ZERO_OR_NEG 阈值
+_TA_EPSILON = 1e-14
+
+# pandas rolling 的数值抵消检测阈值 (EpsF64 * 1e3)
+_INV_COND_TOL = np.finfo(np.float64).eps * 1e3
+
+# 状态 JSON 的格式版本; 状态机结构变化时递增, 旧版本状态会被丢弃并重新回放历史
+STATE_VERSION = 2
+
+# OnlineIndicatorState 覆盖的结果集
+ONLINE_TABLES = ("tech", "trend", "mean_reversion")
+
+
+def _is_zero(value: float) -> bool:
+    return -_TA_EPSILON < value < _TA_EPSILON
+
+
+def _fma(a: float, b: float, c: float) -> float:
+    """a·b + c with a single rounding, as C ``fma`` (Python ≥ 3.13 自带 math.fma)."""
+    if math.isfinite(a) and math.isfinite(b) and math.isfinite(c):
+        return float(Fraction(a) * Fraction(b) + Fraction(c))
+    return a * b + c
+
+
+_fma = getattr(math, "fma", _fma)
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    """TA-Lib TRUE_RANGE: max(high - low, |high - prev_close|, |low - prev_close|)."""
+    out = high - low
+    out = max(out, abs(high - prev_close))
+    return max(out, abs(low - prev_close))
+
+
+# =====================================
+# Serialization
+# =====================================
+
+
+def _encode(value: Any) -> Any:
+    """State value → JSON-safe value (NaN → None; JSONB 不支持 NaN)."""
+    if isinstance(value, _StateMachine):
+        return value.to_dict()
+    if isinstance(value, deque):
+        return [None if v != v else v for v in value]
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _decode(template: Any, value: Any) -> Any:
+    """JSON value → state value, 类型取自新建实例上的同名属性."""
+    if isinstance(template, _StateMachine):
+        return type(template).from_dict(value)
+    if isinstance(template, deque):
+        return deque((NAN if v is None else v for v in value), maxlen=template.maxlen)
+    if isinstance(template, float) and value is None:
+        return NAN
+    return value
+
+
+class _StateMachine:
+    """状态机基类: ``_config`` 为构造参数, ``_state`` 为需要持久化的运行状态."""
+
+    _config: tuple[str, ...] = ()
+    _state: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {name: _encode(getattr(self, name)) for name in self._config + self._state}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "_StateMachine":
+        obj = cls(**{name: data[name] for name in cls._config})
+        for name in cls._state:
+            setattr(obj, name, _decode(getattr(obj, name), data[name]))
+        return obj
+
+
+# =====================================
+# TA-Lib state machines
+# =====================================
+
+
+class OnlineSMA(_StateMachine):
+    """TA-Lib SMA — 环形缓冲区保存最近 period 个值, 累加和按 TA-Lib 顺序滑动."""
+
+    _config = ("period",)
+    _state = ("total", "window")
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.total = 0.0
+        self.window: deque[float] = deque(maxlen=period)
+
+    def update(self, x: float) -> float:
+        self.total += x
+        self.window.append(x)
+        if len(self.window) < self.period:
+            return NAN
+        out = self.total / self.period
+        self.total -= self.window[0]
+        return out
+
+
+class OnlineWindowMean(_StateMachine):
+    """indicator_calculator._window_mean — 每根 bar 对窗口内的 period 个值从左到右重新求和.
+
+    MA 列不用 TA-Lib 的滑动累加和, 使结果与起始 bar 无关; 窗口有界, 仍为常数时间.
+    """
+
+    _config = ("period",)
+    _state = ("window",)
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.window: deque[float] = deque(maxlen=period)
+
+    def update(self, x: float) -> float:
+        self.window.append(x)
+        if len(self.window) < self.period:
+            return NAN
+        return _window_total(self.window) / self.period
+
+
+def _window_total(window: deque[float]) -> float:
+    """从左到右依次相加, 与 _window_sum 的向量化累加顺序相同."""
+    values = iter(window)
+    total = next(values)
+    for v in values:
+        total += v
+    return total
+
+
+class OnlineEMA(_StateMachine):
+    """TA-Lib EMA — 种子为前 period 个值的 SMA, 之后 k·(x - prev) + prev (0.8 起为 fma).
+
+    Args:
+        skip: 种子之前跳过的 K 线数 (MACD 快线的种子与慢线对齐).
+    """
+
+    _config = ("period", "skip")
+    _state = ("count", "total", "value")
+
+    def __init__(self, period: int, skip: int = 0) -> None:
+        self.period = period
+        self.skip = skip
+        self.k = 2.0 / (period + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value: float | None = None
+
+    def update(self, x: float) -> float:
+        if self.value is not None:
+            if _TALIB_08:
+                self.value = _fma(self.k, x - self.value, self.value)
+            else:
+                self.value = ((x - self.value) * self.k) + self.value
+            return self.value
+
+        self.count += 1
+        if self.count <= self.skip:
+            return NAN
+        self.total += x
+        if self.count - self.skip < self.period:
+            return NAN
+        self.value = self.total / self.period
+        return self.value
+
+
+class OnlineMACD(_StateMachine):
+    """TA-Lib MACD — 快线种子取 x[slow-fast .. slow-1], 三条线从第 slow+signal-2 根起输出."""
+
+    _config = ("fast", "slow", "signal")
+    _state = ("fast_ema", "slow_ema", "signal_ema")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9) -> None:
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self.fast_ema = OnlineEMA(fast, skip=slow - fast)
+        self.slow_ema = OnlineEMA(slow)
+        self.signal_ema = OnlineEMA(signal)
+
+    def update(self, x: float) -> tuple[float, float, float]:
+        """Returns (macd, signal, hist)."""
+        fast = self.fast_ema.update(x)
+        slow = self.slow_ema.update(x)
+        if slow != slow:
+            return NAN, NAN, NAN
+        macd = fast - slow
+        signal = self.signal_ema.update(macd)
+        if signal != signal:
+            return NAN, NAN, NAN
+        return macd, signal, macd - signal
+
+
+class OnlineRSI(_StateMachine):
+    """TA-Lib RSI — 前 period 个涨跌幅的简单平均作种子, 之后 Wilder 平滑.
+
+    0.8 起除以 period 写作乘以 1/period, 平滑为 (prev·(period-1) + 涨/跌幅)·(1/period),
+    且 gain + loss 不为正时输出 0 (之前为 TA_IS_ZERO).
+    """
+
+    _config = ("period",)
+    _state = ("count", "prev", "gain", "loss")
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.k = 1.0 / period
+        self.count = 0
+        self.prev: float | None = None
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def update(self, x: float) -> float:
+        if self.prev is None:
+            self.prev = x
+            return NAN
+        diff = x - self.prev
+        self.prev = x
+        self.count += 1
+        period = self.period
+
+        if _TALIB_08:
+            up = diff if diff > 0.0 else 0.0
+            if self.count <= period:
+                self.gain += up
+                self.loss += up - diff
+                if self.count < period:
+                    return NAN
+                self.gain *= self.k
+                self.loss *= self.k
+            else:
+                self.gain = (self.gain * (period - 1) + up) * self.k
+                self.loss = ((up - diff) + self.loss * (period - 1)) * self.k
+            total = self.loss + self.gain
+            return self.gain / total * 100.0 if total > 0.0 else 0.0
+
+        if self.count > period:
+            self.loss *= period - 1
+            self.gain *= period - 1
+        if diff < 0:
+            self.loss -= diff
+        else:
+            self.gain += diff
+        if self.count < period:
+            return NAN
+        self.loss /= period
+        self.gain /= period
+        total = self.gain + self.loss
+        return 0.0 if _is_zero(total) else 100.0 * (self.gain / total)
+
+
+class OnlineDMI(_StateMachine):
+    """TA-Lib PLUS_DI / MINUS_DI / ADX, 共享同一组 Wilder 平滑的 DM / TR.
+
+    DM / TR 先累加 period-1 根, 之后 S = S - S/period + v; DI 从第 period 根起输出.
+    ADX 首值为 period 个 DX 的均值 (第 2·period-1 根), 之后 Wilder 平滑,
+    TR 或 DI 之和为 0 的 bar 保持上一值.
+    """
+
+    _config = ("period",)
+    _state = ("count", "prev_high", "prev_low", "prev_close", "plus_dm", "minus_dm", "tr", "dx_sum", "adx")
+
+    def __init__(self, period: int = 14) -> None:
+        self.period = period
+        self.count = 0
+        self.prev_high: float | None = None
+        self.prev_low: float | None = None
+        self.prev_close: float | None = None
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.dx_sum = 0.0
+        self.adx: float | None = None
+
+    def update(self, high: float, low: float, close: float) -> tuple[float, float, float]:
+        """Returns (plus_di, minus_di, adx)."""
+        if self.prev_close is None:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return NAN, NAN, NAN
+
+        period = self.period
+        diff_p = high - self.prev_high
+        diff_m = self.prev_low - low
+        tr = _true_range(high, low, self.prev_close)
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+        self.count += 1
+
+        if self.count >= period:
+            self.minus_dm -= self.minus_dm / period
+            self.plus_dm -= self.plus_dm / period
+        if diff_m > 0 and diff_p < diff_m:
+            self.minus_dm += diff_m
+        elif diff_p > 0 and diff_p > diff_m:
+            self.plus_dm += diff_p
+        if self.count < period:
+            self.tr += tr
+            return NAN, NAN, NAN
+        self.tr = self.tr - (self.tr / period) + tr
+
+        # DX 始终按 TA_IS_ZERO 判断; 0.8 起 PLUS_DI / MINUS_DI 只在 TR 为正时输出非 0
+        dx: float | None = None
+        minus_di = 100.0 * (self.minus_dm / self.tr) if self.tr != 0.0 else 0.0
+        plus_di = 100.0 * (self.plus_dm / self.tr) if self.tr != 0.0 else 0.0
+        if not _is_zero(self.tr):
+            di_sum = minus_di + plus_di
+            if not _is_zero(di_sum):
+                dx = 100.0 * (abs(minus_di - plus_di) / di_sum)
+        if (self.tr <= 0.0) if _TALIB_08 else _is_zero(self.tr):
+            plus_di = minus_di = 0.0
+
+        if self.count < 2 * period:
+            if dx is not None:
+                self.dx_sum += dx
+            if self.count < 2 * period - 1:
+                return plus_di, minus_di, NAN
+            self.adx = self.dx_sum / period
+        elif dx is not None:
+            self.adx = ((self.adx * (period - 1)) + dx) / period  # type: ignore[operator]
+        return plus_di, minus_di, self.adx  # type: ignore[return-value]
+
+
+class OnlineATR(_StateMachine):
+    """TA-Lib ATR — 种子为 TR[1..period] 的 SMA, 之后 (prev·(period-1) + TR) / period.
+
+    0.8 起平滑写作 fma(a, prev, TR·(1 - a)), a = (period-1)/period.
+    """
+
+    _config = ("period",)
+    _state = ("count", "prev_close", "total", "value")
+
+    def __init__(self, period: int = 14) -> None:
+        self.period = period
+        self.a = (period - 1) / period
+        self.b = 1.0 - self.a
+        self.count = 0
+        self.prev_close: float | None = None
+        self.total = 0.0
+        self.value: float | None = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return NAN
+        tr = _true_range(high, low, self.prev_close)
+        self.prev_close = close
+
+        if self.value is not None:
+            if _TALIB_08:
+                self.value = _fma(self.a, self.value, tr * self.b)
+            else:
+                self.value *= self.period - 1
+                self.value += tr
+                self.value /= self.period
+            return self.value
+
+        self.count += 1
+        self.total += tr
+        if self.count < self.period:
+            return NAN
+        self.value = self.total / self.period
+        return self.value
+
+
+class OnlineBBands(_StateMachine):
+    """indicator_calculator._bollinger_bands — OnlineWindowMean 中轨, 窗口内 Σ(x - 中轨)² 的总体标准差."""
+
+    _config = ("period", "nbdev")
+    _state = ("window",)
+
+    def __init__(self, period: int = 20, nbdev: float = 2.0) -> None:
+        self.period = period
+        self.nbdev = nbdev
+        self.window: deque[float] = deque(maxlen=period)
+
+    def update(self, x: float) -> tuple[float, float, float]:
+        """Returns (upper, middle, lower)."""
+        self.window.append(x)
+        if len(self.window) < self.period:
+            return NAN, NAN, NAN
+
+        middle = _window_total(self.window) / self.period
+        ss = 0.0
+        for v in self.window:
+            d = v - middle
+            ss += d * d
+        dev = math.sqrt(ss / self.period) * self.nbdev
+        return middle + dev, middle, middle - dev
+
+
+class OnlineStoch(_StateMachine):
+    """TA-Lib STOCH(fastk, slowk, slowd) with SMA smoothing; K / D 在 D 就绪后一起输出.
+
+    0.8 起 fastK = (close - lowest) / range · 100, 且 range 相对高低点可忽略时取 0.
+    """
+
+    _config = ("fastk_period", "slowk_period", "slowd_period")
+    _state = ("highs", "lows", "slow_k", "slow_d")
+
+    def __init__(self, fastk_period: int = 9, slowk_period: int = 3, slowd_period: int = 3) -> None:
+        self.fastk_period = fastk_period
+        self.slowk_period = slowk_period
+        self.slowd_period = slowd_period
+        self.highs: deque[float] = deque(maxlen=fastk_period)
+        self.lows: deque[float] = deque(maxlen=fastk_period)
+        self.slow_k = OnlineSMA(slowk_period)
+        self.slow_d = OnlineSMA(slowd_period)
+
+    def update(self, high: float, low: float, close: float) -> tuple[float, float]:
+        """Returns (k, d)."""
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) < self.fastk_period:
+            return NAN, NAN
+
+        lowest = min(self.lows)
+        highest = max(self.highs)
+        if _TALIB_08:
+            diff = highest - lowest
+            tolerance = (abs(highest) + abs(lowest)) * 1e-14
+            fast_k = (close - lowest) / diff * 100.0 if abs(diff) > tolerance else 0.0
+        else:
+            diff = (highest - lowest) / 100.0
+            fast_k = (close - lowest) / diff if diff != 0.0 else 0.0
+
+        k = self.slow_k.update(fast_k)
+        if k != k:
+            return NAN, NAN
+        d = self.slow_d.update(k)
+        if d != d:
+            return NAN, NAN
+        return k, d
+
+
+# =====================================
+# pandas rolling state machines
+# =====================================
+#
+# 复现 pandas/_libs/window/aggregations.pyx 的 roll_var / roll_skew / roll_kurt:
+# 窗口滑动时先移除离开窗口的值再加入新值; 更新后若检测到数值抵消,
+# 对当前窗口从头重算. NaN 不计入 nobs.
+
+
+class OnlineRollingStd(_StateMachine):
+    """pandas ``rolling(window).std(ddof)`` — Welford + Kahan 在线增删."""
+
+    _config = ("window", "ddof")
+    _state = ("values", "nobs", "mean", "ssqdm", "comp_add", "comp_remove", "unstable")
+
+    def __init__(self, window: int, ddof: int = 1) -> None:
+        self.window = window
+        self.ddof = ddof
+        self.values: deque[float] = deque(maxlen=window)
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.unstable = False
+
+    def _add(self, val: float) -> None:
+        if val != val:
+            return
+        prev_m2 = self.ssqdm
+        self.nobs += 1
+        prev_mean = self.mean - self.comp_add
+        y = val - self.comp_add
+        t = y - self.mean
+        self.comp_add = t + self.mean - y
+        self.mean = self.mean + t / self.nobs
+        self.ssqdm = self.ssqdm + (val - prev_mean) * (val - self.mean)
+        if prev_m2 * _INV_COND_TOL > self.ssqdm:
+            self.unstable = True
+
+    def _remove(self, val: float) -> None:
+        if val != val:
+            return
+        prev_m2 = self.ssqdm
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean - self.comp_remove
+            y = val - self.comp_remove
+            t = y - self.mean
+            self.comp_remove = t + self.mean - y
+            self.mean = self.mean - t / self.nobs
+            self.ssqdm = self.ssqdm - (val - prev_mean) * (val - self.mean)
+            if prev_m2 * _INV_COND_TOL > self.ssqdm:
+                self.unstable = True
+        else:
+            self.mean = 0.0
+            self.ssqdm = 0.0
+            self.unstable = False
+
+    def update(self, x: float) -> float:
+        recompute = not self.values
+        if not recompute:
+            if len(self.values) == self.window:
+                self._remove(self.values[0])
+            self._add(x)
+        self.values.append(x)
+
+        if recompute or self.unstable:
+            self.nobs = 0
+            self.mean = self.ssqdm = self.comp_add = self.comp_remove = 0.0
+            for val in self.values:
+                self._add(val)
+            self.unstable = False
+
+        if self.nobs < self.window or self.nobs <= self.ddof:
+            return NAN
+        var = self.ssqdm / (self.nobs - self.ddof)
+        return math.sqrt(var) if var >= 0 else 0.0
+
+
+class _CentralMoments(_StateMachine):
+    """pandas roll_skew / roll_kurt 的中心矩累加器 (mean, m2, m3[, m4])."""
+
+    _config = ("order",)
+    _state = ("nobs", "mean", "m2", "m3", "m4", "unstable", "same_run", "prev_value")
+
+    def __init__(self, order: int) -> None:
+        self.order = order
+        self.reset(NAN)
+        self.unstable = False
+
+    def reset(self, first: float) -> None:
+        self.nobs = 0
+        self.mean = self.m2 = self.m3 = self.m4 = 0.0
+        self.same_run = 0
+        self.prev_value = first
+
+    def add(self, val: float) -> None:
+        if val != val:
+            return
+        self.nobs += 1
+        n = float(self.nobs)
+        delta = val - self.mean
+        delta_n = delta / n
+        term1 = delta * delta_n * (n - 1.0)
+
+        if self.order == 3:
+            m3_update = delta_n * (term1 * (n - 2.0) - 3.0 * self.m2)
+            new_m3 = self.m3 + m3_update
+            if (abs(m3_update) + abs(self.m3)) * _INV_COND_TOL > abs(new_m3):
+                self.unstable = True
+            self.m3 = new_m3
+        else:
+            m4_update = delta_n * (-4.0 * self.m3 + delta_n * (6 * self.m2 + term1 * (n * n - 3.0 * n + 3.0)))
+            new_m4 = self.m4 + m4_update
+            if (abs(m4_update) + abs(self.m4)) * _INV_COND_TOL > abs(new_m4):
+                self.unstable = True
+            self.m4 = new_m4
+            self.m3 += delta_n * (term1 * (n - 2.0) - 3.0 * self.m2)
+        self.m2 += term1
+        self.mean += delta_n
+
+        self.same_run = self.same_run + 1 if val == self.prev_value else 1
+        self.prev_value = val
+
+    def remove(self, val: float) -> None:
+        if val != val:
+            return
+        self.nobs -= 1
+        n = float(self.nobs)
+        delta = val - self.mean
+        delta_n = delta / n
+        term1 = delta_n * delta * (n + 1.0)
+
+        if self.order == 3:
+            m3_update = delta_n * (term1 * (n + 2.0) - 3.0 * self.m2)
+            new_m3 = self.m3 - m3_update
+            if (abs(m3_update) + abs(self.m3)) * _INV_COND_TOL > abs(new_m3):
+                self.unstable = True
+            self.m3 = new_m3
+        else:
+            m4_update = delta_n * (4.0 * self.m3 + delta_n * (6.0 * self.m2 - term1 * (n * n + 3.0 * n + 3.0)))
+            new_m4 = self.m4 + m4_update
+            if (abs(m4_update) + abs(self.m4)) * _INV_COND_TOL > abs(new_m4):
+                self.unstable = True
+            self.m4 = new_m4
+            self.m3 -= delta_n * (term1 * (n + 2.0) - 3.0 * self.m2)
+        self.m2 -= term1
+        self.mean -= delta_n
+
+    def recompute(self, values: deque[float]) -> None:
+        self.reset(values[0])
+        for val in values:
+            self.add(val)
+        # 与 pandas 一致: roll_skew 重算后清除不稳定标记, roll_kurt 不清除 (之后每根都整窗重算)
+        if self.order == 3:
+            self.unstable = False
+
+    def skew(self, min_periods: int) -> float:
+        nobs = self.nobs
+        if nobs < max(min_periods, 3):
+            return NAN
+        if self.same_run >= nobs:
+            return 0.0
+        n = float(nobs)
+        if self.m2 <= n * 1e-14:
+            return NAN
+        moments_ratio = self.m3 / (self.m2 * math.sqrt(self.m2))
+        correction = n * math.sqrt(n - 1) / (n - 2)
+        return moments_ratio * correction
+
+    def kurt(self, min_periods: int) -> float:
+        nobs = self.nobs
+        if nobs < max(min_periods, 4):
+            return NAN
+        if self.same_run >= nobs:
+            return -3.0
+        n = float(nobs)
+        if self.m2 <= n * 1e-14:
+            return NAN
+        moments_ratio = self.m4 / (self.m2 * self.m2)
+        inner = n * (n + 1.0) * moments_ratio - 3.0 * (n - 1.0)
+        correction = (n - 1.0) / ((n - 2.0) * (n - 3.0))
+        return correction * inner
+
+
+class OnlineRollingSkewKurt(_StateMachine):
+    """pandas ``rolling(window).skew()`` / ``.kurt()`` — 共享窗口, 各自独立的中心矩累加器."""
+
+    _config = ("window",)
+    _state = ("values", "skew_moments", "kurt_moments")
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.values: deque[float] = deque(maxlen=window)
+        self.skew_moments = _CentralMoments(3)
+        self.kurt_moments = _CentralMoments(4)
+
+    def update(self, x: float) -> tuple[float, float]:
+        """Returns (skew, kurt)."""
+        recompute = not self.values
+        leaving = self.values[0] if len(self.values) == self.window else NAN
+        self.values.append(x)
+
+        for moments in (self.skew_moments, self.kurt_moments):
+            if not recompute:
+                moments.remove(leaving)
+                moments.add(x)
+            if recompute or moments.unstable:
+                moments.recompute(self.values)
+
+        return self.skew_moments.skew(self.window), self.kurt_moments.kurt(self.window)
+
+
+# =====================================
+# Per-ticker composite state
+# =====================================
+
+
+class OnlineIndicatorState(_StateMachine):
+    """一只股票的全部在线指标状态, 输出 tech / trend / mean_reversion 三张表的列.
+
+    与批量路径 (compute_indicator_columns) 从同一根 K 线开始回放时结果逐位相同;
+    信号列复用 indicator_calculator 的 derive_*_signal.
+    """
+
+    _state = (
+        "talib", "trade_date", "bars",
+        "ma5", "ma10", "ma20", "ma30", "ma60", "macd", "rsi_6", "rsi_12", "rsi_24", "bbands", "kdj",
+        "ema_8", "ema_21", "ema_55", "dmi",
+        "ma_50", "std_50", "rsi_14", "rsi_28",
+    )
+
+    def __init__(self) -> None:
+        self.talib = TALIB_C_VERSION
+        self.trade_date: str | None = None
+        self.bars = 0
+        # 基础技术指标
+        self.ma5 = OnlineWindowMean(5)
+        self.ma10 = OnlineWindowMean(10)
+        self.ma20 = OnlineWindowMean(20)
+        self.ma30 = OnlineWindowMean(30)
+        self.ma60 = OnlineWindowMean(60)
+        self.macd = OnlineMACD(12, 26, 9)
+        self.rsi_6 = OnlineRSI(6)
+        self.rsi_12 = OnlineRSI(12)
+        self.rsi_24 = OnlineRSI(24)
+        self.bbands = OnlineBBands(20, 2.0)
+        self.kdj = OnlineStoch(9, 3, 3)
+        # 趋势信号
+        self.ema_8 = OnlineEMA(8)
+        self.ema_21 = OnlineEMA(21)
+        self.ema_55 = OnlineEMA(55)
+        self.dmi = OnlineDMI(14)
+        # 均值回归信号
+        self.ma_50 = OnlineWindowMean(50)
+        self.std_50 = OnlineRollingStd(50)
+        self.rsi_14 = OnlineRSI(14)
+        self.rsi_28 = OnlineRSI(28)
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame) -> "OnlineIndicatorState":
+        """Replay a price frame (trade_date / close / high / low, 升序) into a fresh state."""
+        state = cls()
+        for trade_date, close, high, low in zip(
+            _iso_dates(df["trade_date"]), df["close"].astype(float), df["high"].astype(float), df["low"].astype(float),
+            strict=True,
+        ):
+            state.update(trade_date, close, high, low)
+        return state
+
+    def update(self, trade_date: str, close: float, high: float, low: float) -> dict[str, dict[str, Any]]:
+        """Consume one bar and return its rows ({table_key: {column: value}})."""
+        tech: dict[str, Any] = {
+            "ma5": self.ma5.update(close),
+            "ma10": self.ma10.update(close),
+            "ma20": self.ma20.update(close),
+            "ma30": self.ma30.update(close),
+            "ma60": self.ma60.update(close),
+        }
+        tech["macd_diff"], tech["macd_dea"], tech["macd_hist"] = self.macd.update(close)
+        tech["rsi_6"] = self.rsi_6.update(close)
+        tech["rsi_12"] = self.rsi_12.update(close)
+        tech["rsi_24"] = self.rsi_24.update(close)
+        bbands = self.bbands.update(close)
+        tech["boll_upper"], tech["boll_middle"], tech["boll_lower"] = bbands
+        k, d = self.kdj.update(high, low, close)
+        tech["kdj_k"], tech["kdj_d"], tech["kdj_j"] = k, d, 3 * k - 2 * d
+
+        trend: dict[str, Any] = {
+            "ema_8": self.ema_8.update(close),
+            "ema_21": self.ema_21.update(close),
+            "ema_55": self.ema_55.update(close),
+        }
+        trend["plus_di"], trend["minus_di"], trend["adx"] = self.dmi.update(high, low, close)
+
+        mean_reversion: dict[str, Any] = {
+            "ma_50": self.ma_50.update(close),
+            "std_50": self.std_50.update(close),
+        }
+        mean_reversion["bb_upper"], mean_reversion["bb_middle"], mean_reversion["bb_lower"] = bbands
+        mean_reversion["rsi_14"] = self.rsi_14.update(close)
+        mean_reversion["rsi_28"] = self.rsi_28.update(close)
+
+        self.trade_date = trade_date
+        self.bars += 1
+
+        price = np.float64(close)
+        return {
+            "tech": tech,
+            "trend": _scalars(derive_trend_signal(_arrays(trend))),
+            "mean_reversion": _scalars(derive_mean_reversion_signal(_arrays(mean_reversion), price)),
+        }
+
+    def preview(self, trade_date: str, close: float, high: float, low: float) -> dict[str, dict[str, Any]]:
+        """Rows for a provisional bar (如盘中未收盘的 K 线), 不改变当前状态."""
+        return copy.deepcopy(self).update(trade_date, close, high, low)
+
+
+def _iso_dates(trade_dates: pd.Series) -> list[str]:
+    """datetime64 trade_date 列 → YYYY-MM-DD 列表 (一次向量化格式化; 状态以字符串存入 JSON 快照)."""
+    return np.datetime_as_string(trade_dates.to_numpy(dtype="datetime64[D]"), unit="D").tolist()
+
+
+def _arrays(cols: dict[str, Any]) -> dict[str, Any]:
+    """Scalars → numpy scalars, 使 derive_*_signal 的逐元素运算 (~, np.select) 适用."""
+    return {key: np.float64(value) for key, value in cols.items()}
+
+
+def _scalars(cols: dict[str, Any]) -> dict[str, Any]:
+    return {key: np.asarray(value).item() for key, value in cols.items()}
+
+
+def rows_to_frames(prices: pd.DataFrame, rows: list[dict[str, dict[str, Any]]]) -> dict[str, pd.DataFrame]:
+    """Per-bar rows → one frame per result set, 可直接交给 _save_indicator_frames.
+
+    trade_date / name 取自产生这些行的价格数据 (与 rows 一一对应).
+    """
+    keys = [c for c in ("trade_date", "name") if c in prices.columns]
+    frames = {}
+    for key in ONLINE_TABLES:
+        frame = pd.DataFrame([row[key] for row in rows])
+        for col in keys:
+            frame[col] = prices[col].to_numpy()
+        frames[key] = frame
+    return frames
+
+
+# =====================================
+# Database operations
+# =====================================
+
+
+async def load_online_state(ticker: str, market: str) -> OnlineIndicatorState | None:
+    """读取保存的状态; 不存在、格式版本或 TA-Lib 版本不符时返回 None."""
+    async with get_session() as session:
+        row = (await session.execute(
+            select(IndicatorStreamState.version, IndicatorStreamState.state)
+            .where(IndicatorStreamState.ticker == ticker, IndicatorStreamState.market == market)
+        )).first()
+
+    if row is None or row.version != STATE_VERSION or row.state.get("talib") != TALIB_C_VERSION:
+        return None
+    return OnlineIndicatorState.from_dict(row.state)  # type: ignore[return-value]
+
+
+async def save_online_state(ticker: str, market: str, state: OnlineIndicatorState) -> None:
+    """Upsert the state snapshot (每只股票一行)."""
+    values = {
+        "ticker": ticker,
+        "market": market,
+        "trade_date": state.trade_date,
+        "bars": state.bars,
+        "version": STATE_VERSION,
+        "state": state.to_dict(),
+    }
+    stmt = insert(IndicatorStreamState).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_indicator_stream_state_ticker_market",
+        set_={**{k: stmt.excluded[k] for k in ("trade_date", "bars", "version", "state")}, "updated_at": func.now()},
+    )
+    async with get_session() as session:
+        await session.execute(stmt)
+
+
+# =====================================
+# Main entry
+# =====================================
+
+
+async def update_online_indicators(ticker: str, market: str) -> int:
+    """用保存的状态处理新 K 线, upsert 三张表的新行并保存状态.
+
+    首次运行 (或状态格式变化) 时回放全部价格历史建立状态, 之后每次只加载
+    状态 trade_date 之后的 K 线 (已有历史行由批量路径写入, 这里只写新 K 线).
+    最新一根 K 线按 preview 写入但不推进状态: 盘中它可能仍在变化,
+    下次运行会以最终值重新计算.
+
+    Returns:
+        写入的 K 线数.
+    """
+    state = await load_online_state(ticker, market)
+    if state is None:
+        df = await _load_price_data(ticker, market)
+        if df.empty:
+            logger.warning(f"  ⚠ {ticker} 无价格数据, 跳过")
+            return 0
+        state = OnlineIndicatorState.from_history(df.iloc[:-1])
+        logger.info(f"    🧮 {ticker} 由 {len(df) - 1} 根历史 K 线建立在线状态")
+        df = df.iloc[-1:]
+    else:
+        df = await _load_price_data(ticker, market, since=state.trade_date)
+        if df.empty:
+            logger.info(f"    ⏭ {ticker} 无新 K 线 ({state.trade_date}), 跳过")
+            return 0
+
+    trade_dates = _iso_dates(df["trade_date"])
+    closes, highs, lows = (df[c].astype(float).tolist() for c in ("close", "high", "low"))
+
+    rows = [
+        state.update(trade_dates[i], closes[i], highs[i], lows[i])
+        for i in range(len(df) - 1)
+    ]
+    rows.append(state.preview(trade_dates[-1], closes[-1], highs[-1], lows[-1]))
+
+    await _save_indicator_frames(rows_to_frames(df, rows), ticker, market, replace=False)
+    if state.trade_date is not None:
+        await save_online_state(ticker, market, state)
+
+    logger.info(f"    ✅ {ticker} 在线更新 {len(rows)} 根 K 线 (状态至 {state.trade_date})")
+    return len(rows)
+
+
+async def update_all_online_indicators(market: str | None = None) -> None:
+    """对股票池逐只运行 update_online_indicators."""
+    settings = get_settings()
+
+    logger.info("=" * 60)
+    logger.info("⚡ 开始在线指标更新")
+    logger.info("=" * 60)
+
+    for mkt, tickers in settings.MVP_STOCK_UNIVERSE.items():
+        if market and mkt != market:
+            continue
+        logger.info(f"▶ {mkt} 市场: {tickers}")
+        for ticker in tickers:
+            try:
+                await update_online_indicators(ticker, mkt)
+            except Exception as e:
+                logger.error(f"  ❌ {ticker} ({mkt}) 在线更新失败: {e}")
+
+    logger.info("🎉 在线指标更新完成!")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="在线 (流式) 技术指标更新")
+    parser.add_argument("--market", choices=["CN", "HK", "US"], default=None, help="目标市场")
+    parser.add_argument("--ticker", default=None, help="单只股票代码 (需同时指定 --market)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+    if args.ticker:
+        if not args.market:
+            parser.error("--ticker 需要同时指定 --market")
+        asyncio.run(update_online_indicators(args.ticker, args.market))
+    else:
+        asyncio.run(update_all_online_indicators(args.market))
+
+
+if __name__ == "__main__":
+    main()
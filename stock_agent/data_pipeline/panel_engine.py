@@ -0,0 +1,631 @@
+"""Panel (cross-sectional) indicator engine — dates × tickers 2D 数组.
+
+indicator_calculator 逐只股票计算并入库; 选股 / 横截面排序则需要同一交易日
+全市场的指标. 这里把一个市场的 OHLCV 对齐成 (T, N) 矩阵 (T 个交易日 × N 只
+股票, 缺失 bar 为 NaN), 全部指标按列向量化计算:
+
+  - 有限窗口 (rolling std / skew / kurt / 动量): 累加和差分, 一次覆盖所有 ticker
+  - MA / Bollinger Bands: 复用 indicator_calculator 的逐窗口求和, 与起始 bar 无关
+  - 递归指标 (EMA / MACD / RSI / ADX / ATR): 沿时间轴循环、跨 ticker 向量化,
+    复现 TA-Lib 的种子与平滑规则
+  - 信号派生列: 直接复用 indicator_calculator 的 derive_*_signal
+
+每只股票的有效 bar 先被稳定地 "压" 到列尾 (停牌 / 未上市的空行移到列首),
+使每列都是一段连续序列, 与单只股票 dropna 后的输入一致; 计算完再放回日历位置.
+因此结果与 compute_basic_indicators / 5 个 compute_*_signal 对每只股票的输出
+一致 (浮点误差 ~1e-10 量级, 4 位小数入库后一致).
+
+Usage:
+    panel = await load_price_panel("US")
+    result = compute_panel_indicators(panel)
+    result.cross_section("trend")                       # 最新交易日全市场趋势信号
+    result.cross_section("momentum", "2024-06-28")      # 指定交易日
+"""
+
+import datetime
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import select
+
+from stock_agent.data_pipeline.indicator_calculator import (
+    PRICE_MODELS,
+    _bollinger_bands,
+    _rolling_hurst_exponent,
+    _window_mean,
+    derive_mean_reversion_signal,
+    derive_momentum_signal,
+    derive_stat_arb_signal,
+    derive_trend_signal,
+    derive_volatility_signal,
+)
+from stock_agent.database.session import get_session
+
+# TA-Lib 的 TA_IS_ZERO / TA_IS_ZERO_OR_NEG 阈值
+_TA_EPSILON = 1e-8
+
+_OHLCV = ("open", "high", "low", "close", "volume")
+
+
+# =====================================
+# Panel containers
+# =====================================
+
+
+@dataclass
+class PricePanel:
+    """对齐后的行情面板. 价格矩阵形状均为 (len(dates), len(tickers)), 缺失 bar 为 NaN."""
+
+    dates: np.ndarray
+    tickers: list[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def valid(self) -> np.ndarray:
+        """(T, N) bool — 该 ticker 当日有完整 OHLC (与 _load_price_data 的 dropna 一致)."""
+        return ~(np.isnan(self.open) | np.isnan(self.high) | np.isnan(self.low) | np.isnan(self.close))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PricePanel":
+        """Long-format rows (ticker, trade_date, OHLCV) → aligned panel."""
+        wide = df.pivot(index="trade_date", columns="ticker", values=list(_OHLCV)).sort_index()
+        tickers = sorted(df["ticker"].unique())
+        arrays = {
+            field: wide[field].reindex(columns=tickers).to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+            for field in _OHLCV
+        }
+        panel = cls(dates=wide.index.to_numpy(dtype="datetime64[D]"), tickers=tickers, **arrays)
+        # 与单只股票加载一致: 成交量缺失按 0 处理
+        panel.volume[np.isnan(panel.volume) & panel.valid] = 0.0
+        return panel
+
+    @classmethod
+    def from_frames(cls, frames: dict[str, pd.DataFrame]) -> "PricePanel":
+        """Per-ticker price frames (如 _load_price_data 的输出) → aligned panel."""
+        long = pd.concat(
+            [df[["trade_date", *_OHLCV]].assign(ticker=ticker) for ticker, df in frames.items()],
+            ignore_index=True,
+        )
+        return cls.from_frame(long)
+
+
+@dataclass
+class PanelIndicators:
+    """面板计算结果: columns[key][col] 为 (T, N) 数组, key 同 INDICATOR_MODELS.
+
+    valid 之外的格子 (当日无 bar): 浮点列为 NaN, 布尔列为 False, 字符串列为 "".
+    """
+
+    dates: np.ndarray
+    tickers: list[str]
+    valid: np.ndarray
+    columns: dict[str, dict[str, np.ndarray]]
+
+    def _row(self, date: str | datetime.date | None) -> int:
+        if date is None:
+            return len(self.dates) - 1
+        day = np.datetime64(date, "D")
+        row = int(np.searchsorted(self.dates, day))
+        if row >= len(self.dates) or self.dates[row] != day:
+            raise KeyError(f"trade_date not in panel: {date}")
+        return row
+
+    def cross_section(self, key: str, date: str | datetime.date | None = None) -> pd.DataFrame:
+        """某一交易日 (默认最新) 全市场的一组指标, index 为 ticker; 当日无 bar 的 ticker 不出现."""
+        row = self._row(date)
+        mask = self.valid[row]
+        return pd.DataFrame(
+            {col: values[row, mask] for col, values in self.columns[key].items()},
+            index=pd.Index(np.asarray(self.tickers)[mask], name="ticker"),
+        )
+
+    def ticker_frame(self, key: str, ticker: str) -> pd.DataFrame:
+        """单只股票的一组指标 (仅有 bar 的交易日), 列与 compute_indicator_frames 一致."""
+        j = self.tickers.index(ticker)
+        mask = self.valid[:, j]
+        data = {"trade_date": self.dates[mask]}
+        data.update({col: values[mask, j] for col, values in self.columns[key].items()})
+        return pd.DataFrame(data)
+
+
+async def load_price_panel(
+    market: str,
+    tickers: list[str] | None = None,
+    start_date: str | datetime.date | None = None,
+) -> PricePanel:
+    """一次查询加载一个市场的日线并对齐为面板.
+
+    Args:
+        tickers: 仅加载这些股票; 默认全市场.
+        start_date: 仅加载 trade_date >= start_date 的行 (date 或 YYYY-MM-DD).
+    """
+    model = PRICE_MODELS[market]
+    stmt = select(
+        model.ticker, model.trade_date,  # type: ignore[attr-defined]
+        model.open, model.high, model.low, model.close, model.volume,  # type: ignore[attr-defined]
+    )
+    if tickers:
+        stmt = stmt.where(model.ticker.in_(tickers))  # type: ignore[attr-defined]
+    if start_date:
+        stmt = stmt.where(model.trade_date >= start_date)  # type: ignore[attr-defined]
+
+    async with get_session() as session:
+        rows = (await session.execute(stmt)).all()
+
+    df = pd.DataFrame(rows, columns=["ticker", "trade_date", *_OHLCV])
+    return PricePanel.from_frame(df)
+
+
+# =====================================
+# Column-wise primitives
+# =====================================
+#
+# 输入均为 "压缩" 后的 (T, N) 数组: 第 j 列从 start[j] 行起连续有效, 之前为 NaN.
+# 各函数返回同形状数组, 未满窗口 / 预热期为 NaN.
+#
+# 递归指标沿时间轴逐行更新 (每行一次跨 ticker 的向量运算), 种子按 TA-Lib 的
+# 顺序逐项累加, 使每只股票的运算顺序与 TA-Lib 完全相同.
+
+
+def _mask_before(out: np.ndarray, start: np.ndarray, offset: int) -> np.ndarray:
+    """Set rows before ``start + offset`` of each column to NaN (in place)."""
+    out[np.arange(len(out))[:, None] < (start + offset)[None, :]] = np.nan
+    return out
+
+
+def _first_valid(x: np.ndarray, start: np.ndarray) -> np.ndarray:
+    """每列首个有效值 (空列为 0), 用于滚动和的去中心化."""
+    n_dates, n_tickers = x.shape
+    ref = x[np.minimum(start, n_dates - 1), np.arange(n_tickers)] if n_dates else np.zeros(n_tickers)
+    return np.where(np.isnan(ref), 0.0, ref)
+
+
+def _seed_rows(rows: np.ndarray, n_dates: int) -> dict[int, np.ndarray]:
+    """{row: columns} — 每行需要写入种子值的列 (row >= T 的列无种子)."""
+    order = np.argsort(rows, kind="stable")
+    sorted_rows = rows[order]
+    keep = sorted_rows < n_dates
+    uniq, first = np.unique(sorted_rows[keep], return_index=True)
+    return dict(zip(uniq.tolist(), np.split(order[keep], first[1:]), strict=True))
+
+
+def _seed_sum(x: np.ndarray, first_row: np.ndarray, count: int) -> np.ndarray:
+    """每列 x[first_row : first_row+count] 之和, 按 TA-Lib 的顺序逐项累加."""
+    n_dates, n_tickers = x.shape
+    cols = np.arange(n_tickers)
+    acc = np.zeros(n_tickers)
+    for i in range(count):
+        acc += x[np.minimum(first_row + i, n_dates - 1), cols]
+    return acc
+
+
+def _seed_mean(x: np.ndarray, first_row: np.ndarray, period: int) -> np.ndarray:
+    return _seed_sum(x, first_row, period) / period
+
+
+def _rolling_sum(x: np.ndarray, window: int, start: np.ndarray) -> np.ndarray:
+    """Rolling sum via cumulative-sum differences."""
+    n_dates, n_tickers = x.shape
+    out = np.full((n_dates, n_tickers), np.nan)
+    if n_dates >= window:
+        csum = np.zeros((n_dates + 1, n_tickers))
+        np.cumsum(np.where(np.isnan(x), 0.0, x), axis=0, out=csum[1:])
+        np.subtract(csum[window:], csum[:-window], out=out[window - 1:])
+    return _mask_before(out, start, window - 1)
+
+
+def _rolling_mean(x: np.ndarray, window: int, start: np.ndarray) -> np.ndarray:
+    """Rolling mean. 先减去每列首值再累加, 避免长序列累加和的精度损失."""
+    ref = _first_valid(x, start)
+    return _rolling_sum(x - ref, window, start) / window + ref
+
+
+def _sma(x: np.ndarray, period: int, start: np.ndarray) -> np.ndarray:
+    """indicator_calculator._window_mean: 每个窗口按行从上到下依次求和, 与单只股票的结果逐位相同.
+
+    价格多为 2~4 位小数, 均值经常正好落在第 4 位小数的舍入临界点上;
+    累加顺序不同会让入库值相差 1e-4, 所以价格均线不用累加和差分.
+    """
+    return _mask_before(_window_mean(x, period), start, period - 1)
+
+
+def _constant_run(x: np.ndarray) -> np.ndarray:
+    """(T, N) — 截至当前行, 连续相等值的个数."""
+    rows = np.arange(len(x))[:, None]
+    changed = np.ones(x.shape, dtype=bool)
+    np.not_equal(x[1:], x[:-1], out=changed[1:])
+    return rows - np.maximum.accumulate(np.where(changed, rows, 0), axis=0) + 1
+
+
+def _rolling_var(x: np.ndarray, window: int, start: np.ndarray, ddof: int) -> np.ndarray:
+    """Rolling variance. 全窗口常数时精确为 0 (同 pandas rolling().var())."""
+    d = x - _first_valid(x, start)
+    s1 = _rolling_sum(d, window, start)
+    s2 = _rolling_sum(d * d, window, start)
+    var = np.maximum((s2 - s1 * (s1 / window)) / (window - ddof), 0.0)
+    var[_constant_run(x) >= window] = 0.0
+    return var
+
+
+def _rolling_std(x: np.ndarray, window: int, start: np.ndarray) -> np.ndarray:
+    """pandas ``rolling(window).std()`` (ddof=1)."""
+    return np.sqrt(_rolling_var(x, window, start, ddof=1))
+
+
+def _rolling_skew_kurt(x: np.ndarray, window: int, start: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """pandas ``rolling(window).skew()`` / ``.kurt()`` (bias-corrected)."""
+    n = float(window)
+    x2 = x * x
+    mean = _rolling_sum(x, window, start) / n
+    s2 = _rolling_sum(x2, window, start) / n
+    s3 = _rolling_sum(x2 * x, window, start) / n
+    s4 = _rolling_sum(x2 * x2, window, start) / n
+
+    mean2 = mean * mean
+    m2 = s2 - mean2
+    m3 = s3 - mean2 * mean - 3 * mean * m2
+    m4 = s4 - mean2 * mean2 - 6 * m2 * mean2 - 4 * m3 * mean
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skew = np.sqrt(n * (n - 1.0)) * m3 / ((n - 2.0) * m2 * np.sqrt(m2))
+        kurt = ((n * n - 1.0) * m4 / (m2 * m2) - 3.0 * (n - 1.0) ** 2) / ((n - 2.0) * (n - 3.0))
+    degenerate = m2 <= 1e-14
+    skew[degenerate] = np.nan
+    kurt[degenerate] = np.nan
+
+    constant = _constant_run(x) >= window
+    skew[constant] = 0.0
+    kurt[constant] = -3.0
+    return _mask_before(skew, start, window - 1), _mask_before(kurt, start, window - 1)
+
+
+def _rolling_extreme(x: np.ndarray, window: int, start: np.ndarray, fn) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        fn(sliding_window_view(x, window, axis=0), axis=-1, out=out[window - 1:])
+    return _mask_before(out, start, window - 1)
+
+
+def _ema(x: np.ndarray, period: int, start: np.ndarray, seed_offset: int = 0) -> np.ndarray:
+    """TA-Lib EMA: 种子为 x[start+seed_offset:][:period] 的 SMA, 之后 ((x - prev)·k) + prev."""
+    n_dates, n_tickers = x.shape
+    k = 2.0 / (period + 1)
+    seeds = _seed_rows(start + seed_offset + period - 1, n_dates)
+    seed = _seed_mean(x, start + seed_offset, period)
+
+    out = np.full((n_dates, n_tickers), np.nan)
+    for t in range(min(seeds, default=n_dates), n_dates):
+        row = out[t]
+        np.subtract(x[t], out[t - 1], out=row)
+        row *= k
+        row += out[t - 1]
+        if t in seeds:
+            cols = seeds[t]
+            row[cols] = seed[cols]
+    return out
+
+
+def _wilder_mean(values: np.ndarray, seed: np.ndarray, seed_row: np.ndarray, period: int) -> np.ndarray:
+    """TA-Lib Wilder 平滑 prev = (prev·(period-1) + v) / period, 从 seed_row 起."""
+    n_dates, n_tickers = values.shape
+    seeds = _seed_rows(seed_row, n_dates)
+    out = np.full((n_dates, n_tickers), np.nan)
+    for t in range(min(seeds, default=n_dates), n_dates):
+        row = out[t]
+        np.multiply(out[t - 1], period - 1, out=row)
+        row += values[t]
+        row /= period
+        if t in seeds:
+            cols = seeds[t]
+            row[cols] = seed[cols]
+    return out
+
+
+def _macd(close: np.ndarray, start: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """TA-Lib MACD(12, 26, 9): 快线种子与慢线对齐 (x[14..25]), 三条线均从第 33 根起输出."""
+    slow = _ema(close, 26, start)
+    fast = _ema(close, 12, start, seed_offset=26 - 12)
+    macd = fast - slow
+    signal = _ema(macd, 9, start + 25)
+    _mask_before(macd, start, 33)
+    return macd, signal, macd - signal
+
+
+def _price_changes(close: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(gains, losses) per bar, first row NaN — RSI 的输入."""
+    diff = np.full(close.shape, np.nan)
+    np.subtract(close[1:], close[:-1], out=diff[1:])
+    falling = diff < 0
+    return np.where(falling, 0.0, diff), np.where(falling, -diff, 0.0)
+
+
+def _rsi(
+    gains: np.ndarray,
+    losses: np.ndarray,
+    period: int,
+    start: np.ndarray,
+) -> np.ndarray:
+    """TA-Lib RSI: 前 period 个涨跌幅取简单平均作种子, 之后 Wilder 平滑."""
+    seed_row = start + period
+    avg_gain = _wilder_mean(gains, _seed_mean(gains, start + 1, period), seed_row, period)
+    avg_loss = _wilder_mean(losses, _seed_mean(losses, start + 1, period), seed_row, period)
+    total = avg_gain + avg_loss
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(np.abs(total) < _TA_EPSILON, 0.0, 100.0 * (avg_gain / total))
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """TA-Lib TRANGE (第一行为 NaN)."""
+    tr = np.full(close.shape, np.nan)
+    prev_close = close[:-1]
+    tr[1:] = np.maximum(
+        np.maximum(high[1:] - low[1:], np.abs(prev_close - high[1:])),
+        np.abs(prev_close - low[1:]),
+    )
+    return tr
+
+
+def _wilder_sum(values: np.ndarray, start: np.ndarray, period: int) -> np.ndarray:
+    """DM / TR 平滑: 先累加 period-1 根, 之后 S = S - S/period + v (TA-Lib ADX / DI)."""
+    n_dates, n_tickers = values.shape
+    seed_row = start + period - 1
+    seeds = _seed_rows(seed_row, n_dates)
+    seed = _seed_sum(values, start + 1, period - 1)
+    out = np.full((n_dates, n_tickers), np.nan)
+    for t in range(min(seeds, default=n_dates), n_dates):
+        row = out[t]
+        np.divide(out[t - 1], period, out=row)
+        np.subtract(out[t - 1], row, out=row)
+        row += values[t]
+        if t in seeds:
+            cols = seeds[t]
+            row[cols] = seed[cols]
+    return out
+
+
+def _directional(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    period: int,
+    start: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """TA-Lib PLUS_DI / MINUS_DI / ADX, 共享同一组 Wilder 平滑的 DM / TR.
+
+    DI 从第 period 根起输出; ADX 的首值为 period 个 DX 的均值 (第 2·period-1 根),
+    之后 Wilder 平滑, TR 或 DI 之和为 0 的 bar 保持上一值.
+    """
+    diff_p = np.full(close.shape, np.nan)
+    diff_m = np.full(close.shape, np.nan)
+    np.subtract(high[1:], high[:-1], out=diff_p[1:])
+    np.subtract(low[:-1], low[1:], out=diff_m[1:])
+    plus_dm = np.where((diff_p > 0) & (diff_p > diff_m), diff_p, 0.0)
+    minus_dm = np.where((diff_m > 0) & (diff_p < diff_m), diff_m, 0.0)
+
+    smooth_plus = _wilder_sum(plus_dm, start, period)
+    smooth_minus = _wilder_sum(minus_dm, start, period)
+    smooth_tr = _wilder_sum(_true_range(high, low, close), start, period)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tr_zero = np.abs(smooth_tr) < _TA_EPSILON
+        plus_di = _mask_before(np.where(tr_zero, 0.0, 100.0 * (smooth_plus / smooth_tr)), start, period)
+        minus_di = _mask_before(np.where(tr_zero, 0.0, 100.0 * (smooth_minus / smooth_tr)), start, period)
+
+        di_sum = minus_di + plus_di
+        has_dx = ~tr_zero & ~(np.abs(di_sum) < _TA_EPSILON) & ~np.isnan(di_sum)
+        dx = np.where(has_dx, 100.0 * (np.abs(minus_di - plus_di) / di_sum), 0.0)
+
+    n_dates, n_tickers = close.shape
+    seed_row = start + 2 * period - 1
+    seeds = _seed_rows(seed_row, n_dates)
+    seed = _seed_mean(dx, start + period, period)
+    adx = np.full((n_dates, n_tickers), np.nan)
+    for t in range(min(seeds, default=n_dates), n_dates):
+        row = adx[t]
+        np.multiply(adx[t - 1], period - 1, out=row)
+        row += dx[t]
+        row /= period
+        np.copyto(row, adx[t - 1], where=~has_dx[t])
+        if t in seeds:
+            cols = seeds[t]
+            row[cols] = seed[cols]
+
+    return plus_di, minus_di, adx
+
+
+def _atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int, start: np.ndarray) -> np.ndarray:
+    """TA-Lib ATR: 种子为 TR[1..period] 的 SMA, 之后 (prev·(period-1) + TR) / period."""
+    tr = _true_range(high, low, close)
+    return _wilder_mean(tr, _seed_mean(tr, start + 1, period), start + period, period)
+
+
+def _stoch(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    start: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """TA-Lib STOCH(9, 3, 3) with SMA smoothing; K / D 均从第 12 根起输出."""
+    highest = _rolling_extreme(high, 9, start, np.max)
+    lowest = _rolling_extreme(low, 9, start, np.min)
+    diff = (highest - lowest) / 100.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fast_k = np.where(diff != 0.0, (close - lowest) / diff, 0.0)
+    fast_k = _mask_before(fast_k, start, 8)
+    slow_k = _rolling_mean(fast_k, 3, start + 8)
+    slow_d = _rolling_mean(slow_k, 3, start + 10)
+    return _mask_before(slow_k, start, 12), slow_d
+
+
+def _bbands20(close: np.ndarray, start: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """indicator_calculator._bbands20 (20, 2std), 逐列与单只股票的结果逐位相同."""
+    return tuple(_mask_before(band, start, 19) for band in _bollinger_bands(close, 20, 2.0))
+
+
+def _returns(close: np.ndarray, start: np.ndarray) -> np.ndarray:
+    """Daily returns, identical to ``Series.pct_change()`` per column."""
+    returns = np.full(close.shape, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+    return _mask_before(returns, start, 1)
+
+
+# =====================================
+# Pack / unpack
+# =====================================
+
+
+@dataclass
+class _Layout:
+    """日历位置 ↔ 压缩位置的映射. 只有中间有空洞 (停牌) 的列需要重排."""
+
+    valid: np.ndarray
+    start: np.ndarray
+    gapped: np.ndarray
+    order: np.ndarray
+
+    @classmethod
+    def from_valid(cls, valid: np.ndarray) -> "_Layout":
+        n_dates = len(valid)
+        count = valid.sum(axis=0)
+        first = np.where(count > 0, valid.argmax(axis=0), n_dates)
+        gapped = np.flatnonzero(count != n_dates - first)
+        order = np.argsort(valid[:, gapped], axis=0, kind="stable")
+        return cls(valid=valid, start=n_dates - count, gapped=gapped, order=order)
+
+    def pack(self, x: np.ndarray) -> np.ndarray:
+        packed = x.copy()
+        if self.gapped.size:
+            packed[:, self.gapped] = np.take_along_axis(x[:, self.gapped], self.order, axis=0)
+        return packed
+
+    def unpack(self, values: np.ndarray) -> np.ndarray:
+        """In place: 放回日历位置, 无 bar 的格子填 NaN / False / ""."""
+        if self.gapped.size:
+            scattered = np.empty((len(values), self.gapped.size), dtype=values.dtype)
+            np.put_along_axis(scattered, self.order, values[:, self.gapped], axis=0)
+            values[:, self.gapped] = scattered
+        fill = {"f": np.nan, "b": False}.get(values.dtype.kind, "")
+        values[~self.valid] = fill
+        return values
+
+
+# =====================================
+# Panel computation
+# =====================================
+
+
+def compute_panel_columns(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    volume: np.ndarray,
+    start: np.ndarray,
+) -> dict[str, dict[str, np.ndarray]]:
+    """All six indicator result sets on packed (T, N) arrays.
+
+    列与 compute_indicator_columns 一致; 第 j 列的有效数据须从 start[j] 行起连续.
+    """
+    bbands = _bbands20(close, start)
+    returns = _returns(close, start)
+    gains, losses = _price_changes(close)
+
+    # 基础技术指标
+    tech: dict[str, np.ndarray] = {}
+    for period in (5, 10, 20, 30, 60):
+        tech[f"ma{period}"] = _sma(close, period, start)
+    tech["macd_diff"], tech["macd_dea"], tech["macd_hist"] = _macd(close, start)
+    for period in (6, 12, 24):
+        tech[f"rsi_{period}"] = _rsi(gains, losses, period, start)
+    tech["boll_upper"], tech["boll_middle"], tech["boll_lower"] = bbands
+    k, d = _stoch(high, low, close, start)
+    tech["kdj_k"] = k
+    tech["kdj_d"] = d
+    tech["kdj_j"] = 3 * k - 2 * d
+
+    # 趋势
+    trend: dict[str, np.ndarray] = {
+        "ema_8": _ema(close, 8, start),
+        "ema_21": _ema(close, 21, start),
+        "ema_55": _ema(close, 55, start),
+    }
+    plus_di, minus_di, adx = _directional(high, low, close, 14, start)
+    trend["adx"] = adx
+    trend["plus_di"] = plus_di
+    trend["minus_di"] = minus_di
+
+    # 均值回归
+    mean_rev: dict[str, np.ndarray] = {
+        "ma_50": _sma(close, 50, start),
+        "std_50": _rolling_std(close, 50, start),
+    }
+    mean_rev["bb_upper"], mean_rev["bb_middle"], mean_rev["bb_lower"] = bbands
+    mean_rev["rsi_14"] = _rsi(gains, losses, 14, start)
+    mean_rev["rsi_28"] = _rsi(gains, losses, 28, start)
+
+    # 动量
+    momentum: dict[str, np.ndarray] = {
+        "returns": returns,
+        "mom_1m": _rolling_sum(returns, 21, start + 1),
+        "mom_3m": _rolling_sum(returns, 63, start + 1),
+        "mom_6m": _rolling_sum(returns, 126, start + 1),
+        "volume_ma_21": _rolling_mean(volume, 21, start),
+    }
+
+    # 波动率
+    hist_vol = _rolling_std(returns, 21, start + 1) * np.sqrt(252)
+    volatility: dict[str, np.ndarray] = {
+        "returns": returns,
+        "hist_vol_21": hist_vol,
+        "vol_ma_63": _rolling_mean(hist_vol, 63, start + 21),
+        "vol_std_63": _rolling_std(hist_vol, 63, start + 21),
+        "atr_14": _atr(high, low, close, 14, start),
+    }
+
+    # 统计套利
+    skew, kurt = _rolling_skew_kurt(returns, 63, start + 1)
+    stat_arb: dict[str, np.ndarray] = {
+        "returns": returns,
+        "skew_63": skew,
+        "kurt_63": kurt,
+        "hurst_exponent": _rolling_hurst_exponent(close),
+    }
+
+    return {
+        "tech": tech,
+        "trend": derive_trend_signal(trend),
+        "mean_reversion": derive_mean_reversion_signal(mean_rev, close),
+        "momentum": derive_momentum_signal(momentum, volume),
+        "volatility": derive_volatility_signal(volatility, close),
+        "stat_arb": derive_stat_arb_signal(stat_arb),
+    }
+
+
+def compute_panel_indicators(panel: PricePanel) -> PanelIndicators:
+    """计算整个面板的基础指标与 5 类策略信号, 结果按日历对齐.
+
+    对每只股票, 结果与 compute_basic_indicators / compute_*_signal 在其有效 bar
+    上的输出一致.
+    """
+    layout = _Layout.from_valid(panel.valid)
+    columns = compute_panel_columns(
+        layout.pack(panel.close),
+        layout.pack(panel.high),
+        layout.pack(panel.low),
+        layout.pack(panel.volume),
+        layout.start,
+    )
+
+    # unpack 为原地操作; returns / BBANDS 等数组在多组结果间共享, 每个只放回一次
+    seen: set[int] = set()
+    for cols in columns.values():
+        for values in cols.values():
+            if id(values) not in seen:
+                seen.add(id(values))
+                layout.unpack(values)
+    return PanelIndicators(dates=panel.dates, tickers=panel.tickers, valid=layout.valid, columns=columns)
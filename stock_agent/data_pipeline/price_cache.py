@@ -0,0 +1,403 @@
+"""Local columnar price cache — 每个市场一组内存映射的 .npy 列文件, 按 trade_date 增量同步.
+
+指标计算、回测与 Agent 工具反复从 Postgres 读取同一批日K线. 这里把
+stock_daily_price / _hk / _us 缓存到本地磁盘:
+
+    {PRICE_CACHE_DIR}/{market}/CURRENT           当前版本目录名 (原子替换)
+    {PRICE_CACHE_DIR}/{market}/v000001/
+        trade_date.npy  datetime64[D]            全部行按 (ticker, trade_date) 排序
+        open.npy / high.npy / low.npy / close.npy  float64
+        volume.npy      int64
+        index.json      ticker → [start, stop) 行区间, name 变化点, 市场水位线
+    {PRICE_CACHE_DIR}/{market}/INVALIDATED       历史已被修订、需整只重新同步的 ticker (JSON 列表)
+
+读取时 ``np.load(mmap_mode="r")`` 打开, 单只 ticker 的各列是映射区间上的切片,
+不复制也不连数据库. 同步时按每只 ticker 已缓存的最后交易日只拉取之后的新行
+(首次为全量), 合并写入新版本目录后替换 CURRENT; 已打开旧版本的读者不受影响,
+被替换的版本保留到下一次同步后才删除, 刚读到旧 CURRENT 的读者仍能打开它.
+
+按 trade_date 同步不会发现已缓存日期的数据修订 (如复权调整): 抓取器全量替换某只 ticker 的历史后
+调用 ``invalidate_price_cache`` 把它记入 INVALIDATED, 下次同步时整只重新拉取并替换, 成功后清除标记.
+
+Usage:
+    python -m stock_agent.data_pipeline.price_cache                 # 同步全部市场
+    python -m stock_agent.data_pipeline.price_cache --market US --rebuild
+
+    cache = open_price_cache("US")                  # 只读, 不连数据库; 未同步过时为 None
+    cols = cache.columns("AAPL")                    # 同 load_price_columns 的列字典 (memmap 视图)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Iterable
+from datetime import UTC, date, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+from sqlalchemy import func, select
+
+from stock_agent.config import get_settings
+from stock_agent.data_pipeline.indicator_calculator import PRICE_MODELS
+from stock_agent.database.columnar import load_price_columns_many, price_columns_to_frame
+from stock_agent.database.session import get_session
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+# 列 → 磁盘 dtype (与 load_price_columns 的输出一致)
+COLUMN_DTYPES: dict[str, np.dtype] = {
+    "trade_date": np.dtype("datetime64[D]"),
+    "open": np.dtype(np.float64),
+    "high": np.dtype(np.float64),
+    "low": np.dtype(np.float64),
+    "close": np.dtype(np.float64),
+    "volume": np.dtype(np.int64),
+}
+
+
+# 历史已被修订、下次同步需整只重新拉取的 ticker
+INVALIDATED_FILE = "INVALIDATED"
+
+
+def _cache_root(root: str | Path | None) -> Path:
+    return Path(root if root is not None else get_settings().PRICE_CACHE_DIR)
+
+
+def _day(value: str | date) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+class MarketPriceCache:
+    """Read-only, memory-mapped snapshot of one market's cached prices."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        index = json.loads((path / "index.json").read_text())
+        self.market: str = index["market"]
+        self.watermark: str | None = index["watermark"]
+        self.synced_at: str = index["synced_at"]
+        self._offsets: dict[str, tuple[int, int]] = {t: tuple(v) for t, v in index["offsets"].items()}
+        self._names: dict[str, list[tuple[str, str | None]]] = {t: [tuple(r) for r in v] for t, v in index["names"].items()}
+        rows = index["rows"]
+        # 空文件无法 mmap
+        self._arrays = {
+            col: np.load(path / f"{col}.npy", mmap_mode="r") if rows else np.empty(0, dtype=dtype)
+            for col, dtype in COLUMN_DTYPES.items()
+        }
+
+    @property
+    def tickers(self) -> list[str]:
+        return list(self._offsets)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._offsets
+
+    def last_date(self, ticker: str) -> str | None:
+        """该 ticker 已缓存的最后交易日 (YYYY-MM-DD), 未缓存时为 None."""
+        if ticker not in self._offsets:
+            return None
+        start, stop = self._offsets[ticker]
+        return str(self._arrays["trade_date"][stop - 1]) if stop > start else None
+
+    def columns(
+        self,
+        ticker: str,
+        since: str | date | None = None,
+        warmup: int = 0,
+        with_name: bool = True,
+    ) -> dict[str, np.ndarray]:
+        """One ticker's OHLCV as zero-copy memmap slices (语义同 load_price_columns).
+
+        Args:
+            since: 增量水位线. 仅返回 trade_date > since 的新行, 以及 since 之前 (含) 的 warmup 根预热 K 线.
+            with_name: 附带 name 列 (按变化点展开, 为新数组).
+        """
+        start, stop = self._offsets.get(ticker, (0, 0))
+        dates = self._arrays["trade_date"][start:stop]
+        if since is not None:
+            # 预热起点: since 之前 (含) 第 warmup+1 根 K 线; 历史不足时回退为全量
+            cutoff = int(np.searchsorted(dates, _day(since), side="right")) - 1 - warmup
+            start += max(cutoff + 1, 0)
+
+        cols = {col: arr[start:stop].view(np.ndarray) for col, arr in self._arrays.items()}
+        if with_name:
+            runs = self._names.get(ticker) or [("1970-01-01", None)]
+            starts = np.array([_day(day) for day, _ in runs], dtype="datetime64[D]")
+            names = np.array([name for _, name in runs], dtype=object)
+            cols["name"] = names[np.maximum(np.searchsorted(starts, cols["trade_date"], side="right") - 1, 0)]
+        return cols
+
+    def frame(self, ticker: str, since: str | date | None = None, warmup: int = 0) -> pd.DataFrame:
+        """DataFrame shaped like ``_load_price_data``'s output."""
+        return price_columns_to_frame(self.columns(ticker, since=since, warmup=warmup))
+
+
+def open_price_cache(market: str, root: str | Path | None = None) -> MarketPriceCache | None:
+    """Open the current cache snapshot of a market (只读, 不连数据库); 未同步过时返回 None."""
+    market_dir = _cache_root(root) / market
+    try:
+        version = (market_dir / "CURRENT").read_text().strip()
+    except FileNotFoundError:
+        return None
+    return MarketPriceCache(market_dir / version)
+
+
+# =====================================
+# Sync
+# =====================================
+
+
+async def _latest_dates(market: str) -> dict[str, str]:
+    """数据库中每只 ticker 的最新 trade_date (YYYY-MM-DD, 与 index.json 一致)."""
+    model = PRICE_MODELS[market]
+    async with get_session() as session:
+        result = await session.execute(
+            select(model.ticker, func.max(model.trade_date)).group_by(model.ticker)  # type: ignore[attr-defined]
+        )
+        return {ticker: last.isoformat() for ticker, last in result if last is not None}
+
+
+def _name_runs(dates: np.ndarray, names: np.ndarray) -> list[tuple[str, str | None]]:
+    """name 的变化点: [(首个交易日, name), ...]."""
+    if not len(dates):
+        return []
+    changed = np.ones(len(names), dtype=bool)
+    changed[1:] = names[1:] != names[:-1]
+    return [(str(dates[i]), names[i]) for i in np.flatnonzero(changed)]
+
+
+def _merge_runs(old: list, new: list) -> list:
+    merged = [tuple(r) for r in old]
+    for run in new:
+        if not merged or merged[-1][1] != run[1]:
+            merged.append(tuple(run))
+    return merged
+
+
+def _write_json(path: Path, data: Any) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def _read_invalidated(market_dir: Path) -> set[str]:
+    try:
+        return set(json.loads((market_dir / INVALIDATED_FILE).read_text()))
+    except FileNotFoundError:
+        return set()
+
+
+def _clear_invalidated(market_dir: Path, handled: set[str]) -> None:
+    """同步完成后移除已处理的 ticker (同步期间新标记的保留)."""
+    if not handled:
+        return
+    remaining = _read_invalidated(market_dir) - handled
+    if remaining:
+        _write_json(market_dir / INVALIDATED_FILE, sorted(remaining))
+    else:
+        (market_dir / INVALIDATED_FILE).unlink(missing_ok=True)
+
+
+def invalidate_price_cache(market: str, tickers: Iterable[str], root: str | Path | None = None) -> None:
+    """标记这些 ticker 的已缓存历史已被修订: 下次同步时整只重新拉取并替换, 而不只追加新交易日.
+
+    市场尚未同步过 (下次本来就是全量) 时不做任何事.
+    """
+    market_dir = _cache_root(root) / market
+    tickers = set(tickers)
+    if not tickers or not (market_dir / "CURRENT").exists():
+        return
+    _write_json(market_dir / INVALIDATED_FILE, sorted(_read_invalidated(market_dir) | tickers))
+
+
+async def sync_price_cache(
+    market: str,
+    root: str | Path | None = None,
+    batch_size: int = 200,
+    rebuild: bool = False,
+) -> MarketPriceCache:
+    """Incrementally sync one market's cache from the database and return the new snapshot.
+
+    每只 ticker 只拉取已缓存最后交易日之后的行 (批量查询, 每批 batch_size 只);
+    记入 INVALIDATED 的 ticker 整只重新拉取. 没有新数据时只刷新 synced_at.
+    有新数据时合并写入新版本目录, 再原子替换 CURRENT.
+
+    Args:
+        rebuild: 忽略现有缓存, 全量重建 (单只 ticker 的历史修订见 invalidate_price_cache).
+    """
+    market_dir = _cache_root(root) / market
+    market_dir.mkdir(parents=True, exist_ok=True)
+    current = None if rebuild else open_price_cache(market, root)
+    now = datetime.now(UTC).isoformat(timespec="seconds")
+
+    latest = await _latest_dates(market)
+    revised = _read_invalidated(market_dir)
+    # 历史已修订的 ticker 视为未缓存: 整只重新拉取, 替换旧区间
+    cached = {t: None if t in revised else current.last_date(t) for t in current.tickers} if current else {}
+    stale = sorted(t for t, last in latest.items() if cached.get(t) is None or last > cached[t])
+    if current is not None and revised & cached.keys():
+        logger.info(f"  🔁 {market} {len(revised & cached.keys())} 只 ticker 历史已修订, 整只重新同步")
+
+    if current is not None and not stale:
+        index = json.loads((current.path / "index.json").read_text())
+        _write_json(current.path / "index.json", {**index, "synced_at": now})
+        _clear_invalidated(market_dir, revised)
+        logger.info(f"  ⏭ {market} 价格缓存已是最新 (水位线 {current.watermark})")
+        return MarketPriceCache(current.path)
+
+    versions = sorted(p.name for p in market_dir.glob("v*") if p.is_dir())
+    version = f"v{int(versions[-1][1:]) + 1 if versions else 1:06d}"
+    target = market_dir / version
+    spool = Path(tempfile.mkdtemp(prefix=f".sync-{market}-", dir=market_dir))
+    try:
+        # 1) 按批拉取增量, 落盘暂存 (不在内存中累积整个市场)
+        deltas: dict[str, tuple[int, int, int]] = {}  # ticker → (批次, start, stop)
+        delta_runs: dict[str, list] = {}
+        batch_rows: dict[int, int] = {}
+        model = PRICE_MODELS[market]
+        logger.info(f"  ↓ {market} 增量同步 {len(stale)} 只 ticker")
+        for n, i in enumerate(range(0, len(stale), batch_size)):
+            chunk = stale[i:i + batch_size]
+            async with get_session() as session:
+                batch = await load_price_columns_many(
+                    session, model, chunk, {t: cached.get(t) for t in chunk}, warmup=0,
+                )
+            offset = 0
+            for ticker in chunk:
+                cols = batch[ticker]
+                rows = len(cols["trade_date"])
+                deltas[ticker] = (n, offset, offset + rows)
+                delta_runs[ticker] = _name_runs(cols["trade_date"], cols["name"])
+                offset += rows
+            batch_rows[n] = offset
+            for col in COLUMN_DTYPES:
+                np.save(spool / f"{n}_{col}.npy", np.concatenate([batch[t][col] for t in chunk]))
+
+        spooled = {
+            (n, col): np.load(spool / f"{n}_{col}.npy", mmap_mode="r" if rows else None)  # 空文件无法 mmap
+            for n, rows in batch_rows.items()
+            for col in COLUMN_DTYPES
+        }
+
+        # 2) 逐 ticker 决定保留旧区间与追加区间 (增量早于已缓存末尾时整只替换)
+        plan: list[tuple[str, tuple[int, int] | None, tuple[int, int, int] | None]] = []
+        for ticker in sorted(set(cached) | set(deltas)):
+            old = current._offsets.get(ticker) if current else None
+            new = deltas.get(ticker)
+            if new is not None and old is not None and new[2] > new[1]:
+                first_new = str(spooled[(new[0], "trade_date")][new[1]])
+                if cached[ticker] is None or first_new <= cached[ticker]:
+                    old = None
+            plan.append((ticker, old, new))
+        total = sum((o[1] - o[0] if o else 0) + (d[2] - d[1] if d else 0) for _, o, d in plan)
+
+        # 3) 直接写入新版本的内存映射文件
+        target.mkdir()
+        outputs = {
+            col: open_memmap(target / f"{col}.npy", mode="w+", dtype=dtype, shape=(total,)) if total else None
+            for col, dtype in COLUMN_DTYPES.items()
+        }
+        offsets: dict[str, list[int]] = {}
+        names: dict[str, list] = {}
+        watermark: str | None = None
+        pos = 0
+        for ticker, old, new in plan:
+            pieces: list[tuple[dict[str, np.ndarray], int, int]] = []
+            if old is not None and current is not None:
+                pieces.append((current._arrays, old[0], old[1]))
+            if new is not None:
+                pieces.append(({col: spooled[(new[0], col)] for col in COLUMN_DTYPES}, new[1], new[2]))
+            start = pos
+            for arrays, lo, hi in pieces:
+                for col, out in outputs.items():
+                    out[pos:pos + hi - lo] = arrays[col][lo:hi]  # type: ignore[index]
+                pos += hi - lo
+            offsets[ticker] = [start, pos]
+            if pos > start:
+                last = str(outputs["trade_date"][pos - 1])  # type: ignore[index]
+                watermark = last if watermark is None or last > watermark else watermark
+            old_runs = current._names.get(ticker, []) if (current and old is not None) else []
+            names[ticker] = _merge_runs(old_runs, delta_runs.get(ticker, []))
+        for out in outputs.values():
+            if out is not None:
+                out.flush()
+        del outputs
+
+        _write_json(target / "index.json", {
+            "format": CACHE_FORMAT_VERSION,
+            "market": market,
+            "rows": total,
+            "watermark": watermark,
+            "synced_at": now,
+            "offsets": offsets,
+            "names": names,
+        })
+    except BaseException:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+    finally:
+        shutil.rmtree(spool, ignore_errors=True)
+
+    # 4) 原子切换 CURRENT, 清理旧版本. 被替换的版本保留一个同步周期: 读者可能刚读到
+    #    旧的 CURRENT 还没打开目录; 更早的版本已无法经 CURRENT 到达 (已打开的读者仍持有映射)
+    try:
+        previous = (market_dir / "CURRENT").read_text().strip()
+    except FileNotFoundError:
+        previous = None
+    pointer = market_dir / "CURRENT.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, market_dir / "CURRENT")
+    _clear_invalidated(market_dir, revised)
+    for old_version in versions:
+        if old_version != previous:
+            shutil.rmtree(market_dir / old_version, ignore_errors=True)
+
+    added = total - (sum(o[1] - o[0] for o in current._offsets.values()) if current else 0)
+    logger.info(f"  ✅ {market} 价格缓存: {total:,} 行 (新增 {added:,}), 水位线 {watermark} → {version}")
+    return MarketPriceCache(target)
+
+
+async def sync_all_price_caches(
+    market: str | None = None,
+    root: str | Path | None = None,
+    batch_size: int = 200,
+    rebuild: bool = False,
+) -> None:
+    """同步全部 (或指定) 市场的本地价格缓存."""
+    logger.info("=" * 60)
+    logger.info("🗄️ 开始同步本地价格缓存" + (" (全量重建)" if rebuild else ""))
+    logger.info("=" * 60)
+
+    for mkt in PRICE_MODELS:
+        if market and mkt != market:
+            continue
+        try:
+            await sync_price_cache(mkt, root=root, batch_size=batch_size, rebuild=rebuild)
+        except Exception as e:
+            logger.error(f"  ❌ {mkt} 价格缓存同步失败: {e}")
+
+    logger.info("🎉 本地价格缓存同步完成!")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地列式价格缓存同步")
+    parser.add_argument("--market", choices=["CN", "HK", "US"], default=None, help="目标市场")
+    parser.add_argument("--root", default=None, help="缓存目录 (默认 Settings.PRICE_CACHE_DIR)")
+    parser.add_argument("--batch-size", type=int, default=200, help="每次查询加载的 ticker 数 (默认 200)")
+    parser.add_argument("--rebuild", action="store_true", help="忽略现有缓存, 全量重建")
+    args = parser.parse_args()
+    asyncio.run(sync_all_price_caches(args.market, root=args.root, batch_size=args.batch_size, rebuild=args.rebuild))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""Streaming daily price pipeline — 日K线 下载 → 转换 → 写库 三段流水线 (有界队列).
+
+抓取器原先对每个下载结果依次 转换 → 写库 (每只 ticker 一条语句), 写库期间事件循环上只有已在途的下载,
+转换 (pandas) 直接占用事件循环. 这里三段同时进行, 段间以有界 ``asyncio.Queue`` 相连:
+
+    下载   ``fetch_each(window=...)`` 调用上游 (自适应并发 / 令牌桶 / 重试 / 延后重试照旧),
+           完成的下载结果放入队列;
+    转换   ``Settings.PRICE_STREAM_TRANSFORM_WORKERS`` 个工作协程在线程中执行抓取器的 transform
+           回调 (水位线过滤、向量化派生列) 并整列转换为数组 (``frame_to_columns``);
+    写库   ``Settings.PRICE_STREAM_WRITERS`` 个写库任务跨 ticker 攒批, 满 ``PRICE_STREAM_BATCH_ROWS``
+           行或队列暂时无数据时以一条 upsert 写入 (每批一个会话 / 事务). 全量替换的 ticker 在同一
+           事务中先清除其派生数据 (``invalidate_revised_history``).
+
+队列满时上游阶段等待 (背压): 未被取走的下载结果最多 window + 队列容量 份, 内存有界.
+一批写入失败时逐只 ticker 重新写入, 失败只影响出错的 ticker.
+
+每段统计处理数、忙碌时间、被下游阻塞 (背压) 与等待上游的时间, 结束时输出各段利用率
+(``StreamStats``), 用于判断瓶颈在网络、CPU 还是数据库.
+
+Usage:
+    def transform(ticker: str, raw: pd.DataFrame) -> PriceRows | None:   # 阻塞, 在线程中执行
+        ...
+        return PriceRows(ticker, frame, {"name": name})
+
+    stats = await stream_daily_prices("akshare", _download_daily, requests, StockDailyPriceDB, transform, end_date,
+                                      split=lambda key, raw: [(key[0], raw)])
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+import pandas as pd
+
+from stock_agent.config import get_settings
+from stock_agent.data_pipeline.price_watermarks import invalidate_revised_history
+from stock_agent.data_pipeline.provider_calls import fetch_each, provider_concurrency
+from stock_agent.database.bulk import copy_columns, frame_to_columns, upsert_chunked
+from stock_agent.database.partitions import ensure_year_partitions
+from stock_agent.database.session import get_session
+
+logger = logging.getLogger(__name__)
+
+# 写库任务已攒到数据但不足一批时, 等待更多数据的最长时间 (秒)
+_FLUSH_SECONDS = 0.2
+
+# 段间队列的结束标记
+_DONE = object()
+
+
+@dataclass
+class PriceRows:
+    """transform 回调的输出: 一只 ticker 待写入的日K线."""
+
+    ticker: str
+    frame: pd.DataFrame  # 列名同表列 (trade_date, open, ...); 为空表示已是最新
+    constants: dict[str, Any] = field(default_factory=dict)  # 整列常量, 如 {"name": ...}; ticker 自动填充
+    replace: bool = False  # 全量替换: 删除该 ticker 不在 frame 中的旧行
+
+
+@dataclass
+class _Columns:
+    """转换完成、等待写库的一只 ticker (按列组织的值)."""
+
+    ticker: str
+    values: list[list[Any]]
+    years: set[int]
+    replace: bool
+
+    @property
+    def rows(self) -> int:
+        return len(self.values[0]) if self.values else 0
+
+
+@dataclass
+class StageStats:
+    """一段流水线的计时 (秒). 利用率 = 忙碌时间 / (总耗时 × 并发数)."""
+
+    name: str
+    workers: int
+    items: int = 0
+    busy: float = 0.0  # 处理耗时之和
+    blocked: float = 0.0  # 等待下游队列空位 (背压)
+    starved: float = 0.0  # 等待上游输入
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add_busy(self, seconds: float, items: int = 1) -> None:
+        with self._lock:  # 下载耗时在 provider 线程中累加
+            self.busy += seconds
+            self.items += items
+
+    def utilization(self, wall: float) -> float:
+        return self.busy / (wall * self.workers) if wall > 0 else 0.0
+
+
+@dataclass
+class StreamStats:
+    """一次 ``stream_daily_prices`` 的结果与各段利用率."""
+
+    download: StageStats
+    transform: StageStats
+    write: StageStats
+    queue_size: int
+    wall: float = 0.0
+    tickers_written: int = 0
+    rows: int = 0  # 提交写入的行数
+    rows_written: int = 0  # 实际插入或更新的行数 (值未变化的已有行不计)
+    up_to_date: int = 0
+    failed: int = 0  # 下载 / 转换 / 写库失败的 key 或 ticker 数
+    raw_peak: int = 0  # 段间队列的最大长度
+    rows_peak: int = 0
+
+    @property
+    def stages(self) -> tuple[StageStats, StageStats, StageStats]:
+        return self.download, self.transform, self.write
+
+    def as_dict(self) -> dict[str, Any]:
+        """各段指标 (供日志 / 监控使用)."""
+        return {
+            "wall_seconds": round(self.wall, 3),
+            "tickers_written": self.tickers_written,
+            "rows": self.rows,
+            "rows_written": self.rows_written,
+            "up_to_date": self.up_to_date,
+            "failed": self.failed,
+            "queue_peak": {"raw": self.raw_peak, "rows": self.rows_peak, "capacity": self.queue_size},
+            "stages": {
+                s.name: {
+                    "workers": s.workers,
+                    "items": s.items,
+                    "busy_seconds": round(s.busy, 3),
+                    "blocked_seconds": round(s.blocked, 3),
+                    "starved_seconds": round(s.starved, 3),
+                    "utilization": round(s.utilization(self.wall), 3),
+                }
+                for s in self.stages
+            },
+        }
+
+    def log_summary(self, label: str) -> None:
+        logger.info(
+            f"  📈 {label}流水线 {self.wall:.1f}s: 写入 {self.tickers_written} 只 / {self.rows_written} 行, "
+            f"队列峰值 {self.raw_peak}/{self.queue_size} (下载) {self.rows_peak}/{self.queue_size} (待写入)"
+        )
+        for s in self.stages:
+            logger.info(
+                f"     {s.name}: 利用率 {s.utilization(self.wall):.0%} ({s.workers} 并发, {s.items} 项), "
+                f"背压阻塞 {s.blocked:.1f}s, 等待输入 {s.starved:.1f}s"
+            )
+
+
+def _identity_split(key: Any, raw: Any) -> Iterable[tuple[str, Any]]:
+    return [(key, raw)]
+
+
+async def stream_daily_prices[T, K](
+    provider: str,
+    download: Callable[..., T],
+    keys: Iterable[K],
+    model: type,
+    transform: Callable[[str, Any], PriceRows | None],
+    *args: Any,
+    split: Callable[[K, T], Iterable[tuple[str, Any]]] = _identity_split,
+    describe: Callable[[K], str] = str,
+    **kwargs: Any,
+) -> StreamStats:
+    """下载 → 转换 → 写库 三段并发执行, 把 keys 的日K线写入 model 对应的表.
+
+    Args:
+        download: 阻塞的下载函数, ``download(key, *args, **kwargs)`` (经 fetch_each 在 provider 线程池中执行).
+        transform: 阻塞的转换回调 ``transform(ticker, raw) -> PriceRows | None``, 在线程中执行
+                   (可能多个线程同时调用, 须线程安全). 返回 None 表示跳过 (无数据 / 另行处理),
+                   frame 为空表示已是最新.
+        split: 一个下载结果 → [(ticker, raw)] (如一批 ticker 的 yf.download 结果), 默认 key 即 ticker.
+        describe: 下载失败时日志中 key 的描述.
+
+    每只 ticker 的转换 / 写入失败只记录日志, 不影响其余 ticker.
+    """
+    settings = get_settings()
+    queue_size = max(1, settings.PRICE_STREAM_QUEUE_SIZE)
+    concurrency = provider_concurrency(provider)
+    stats = StreamStats(
+        download=StageStats("下载", concurrency),
+        transform=StageStats("转换", max(1, settings.PRICE_STREAM_TRANSFORM_WORKERS)),
+        write=StageStats("写库", max(1, settings.PRICE_STREAM_WRITERS)),
+        queue_size=queue_size,
+    )
+    batch_rows = max(1, settings.PRICE_STREAM_BATCH_ROWS)
+    columns = copy_columns(model)
+    raw_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    rows_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    partitions_lock = asyncio.Lock()  # 新建分区需要父表的排他锁, 写库任务间串行
+
+    @functools.wraps(download)
+    def _timed_download(*call_args: Any, **call_kwargs: Any) -> T:
+        start = time.perf_counter()
+        try:
+            return download(*call_args, **call_kwargs)
+        finally:
+            stats.download.add_busy(time.perf_counter() - start)
+
+    async def _put(queue: asyncio.Queue, item: Any, stage: StageStats) -> int:
+        start = time.perf_counter()
+        await queue.put(item)
+        stage.blocked += time.perf_counter() - start
+        return queue.qsize()
+
+    async def _get(queue: asyncio.Queue, stage: StageStats, timeout: float | None = None) -> Any:
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(queue.get(), timeout) if timeout else await queue.get()
+        finally:
+            stage.starved += time.perf_counter() - start
+
+    # ---- 下载 ----
+
+    async def _downloader() -> None:
+        # window: 已完成但未进入队列的下载结果最多 2 × 并发数份, 队列满时暂停提交新的下载
+        async for key, result in fetch_each(provider, _timed_download, keys, *args, window=2 * concurrency, **kwargs):
+            stats.raw_peak = max(stats.raw_peak, await _put(raw_queue, (key, result), stats.download))
+        for _ in range(stats.transform.workers):
+            await raw_queue.put(_DONE)
+
+    # ---- 转换 ----
+
+    def _convert(key: K, raw: T) -> tuple[list[_Columns], int, int]:
+        """(待写入的 ticker, 已是最新的 ticker 数, 失败数); 在线程中执行."""
+        start = time.perf_counter()
+        converted: list[_Columns] = []
+        up_to_date = failed = 0
+        for ticker, payload in split(key, raw):
+            try:
+                prices = transform(ticker, payload)
+                if prices is None:
+                    continue
+                if prices.frame.empty:
+                    up_to_date += 1
+                    continue
+                values = frame_to_columns(prices.frame, columns, {**prices.constants, "ticker": ticker})
+                years = set(pd.DatetimeIndex(prices.frame["trade_date"]).year.unique().tolist())
+                converted.append(_Columns(ticker, values, years, prices.replace))
+            except Exception as e:
+                logger.error(f"  ❌ {ticker} 转换失败: {e}")
+                failed += 1
+        stats.transform.add_busy(time.perf_counter() - start)
+        return converted, up_to_date, failed
+
+    async def _transformer() -> None:
+        while (item := await _get(raw_queue, stats.transform)) is not _DONE:
+            key, result = item
+            try:
+                raw = result.result()
+            except Exception as e:
+                logger.error(f"  ❌ {describe(key)} 获取失败: {e}")
+                stats.failed += 1
+                continue
+
+            converted, up_to_date, failed = await asyncio.to_thread(_convert, key, raw)
+            stats.up_to_date += up_to_date
+            stats.failed += failed
+            for prices in converted:
+                stats.rows_peak = max(stats.rows_peak, await _put(rows_queue, prices, stats.transform))
+
+    # ---- 写库 ----
+
+    async def _write(batch: list[_Columns]) -> None:
+        values = [list(itertools.chain.from_iterable(p.values[i] for p in batch)) for i in range(len(columns))]
+        replace = [p.ticker for p in batch if p.replace]
+        rows = sum(p.rows for p in batch)
+        async with partitions_lock:
+            await ensure_year_partitions([model], set().union(*(p.years for p in batch)))
+        async with get_session() as session:
+            # 全量替换的 ticker: 派生数据与替换写入在同一事务中清除
+            await invalidate_revised_history(session, model, replace)
+            written = await upsert_chunked(session, model, columns, values, replace or None)
+        stats.tickers_written += len(batch)
+        stats.rows += rows
+        stats.rows_written += written
+        tickers = batch[0].ticker if len(batch) == 1 else f"{batch[0].ticker} … {batch[-1].ticker}"
+        logger.info(
+            f"  ✅ {tickers} ({len(batch)} 只): {written}/{rows} 行" + (f", {len(replace)} 只替换" if replace else "")
+        )
+
+    async def _flush(batch: list[_Columns]) -> None:
+        start = time.perf_counter()
+        try:
+            await _write(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"  ❌ {batch[0].ticker} 写入失败: {e}")
+                stats.failed += 1
+            else:
+                # 一批失败 (事务整体回滚) 时逐只重写, 找出出错的 ticker
+                logger.warning(f"  ⚠ {len(batch)} 只合并写入失败 ({e}), 逐只重试")
+                for prices in batch:
+                    await _flush([prices])
+                return
+        stats.write.add_busy(time.perf_counter() - start, items=len(batch))
+
+    async def _writer() -> None:
+        batch: list[_Columns] = []
+        rows = 0
+        done = False
+        while not done:
+            try:
+                item = await _get(rows_queue, stats.write, _FLUSH_SECONDS if batch else None)
+            except TimeoutError:
+                item = None  # 暂时没有更多数据: 先写入已攒的部分
+            if item is _DONE:
+                done = True
+            elif item is not None:
+                batch.append(item)
+                rows += item.rows
+                if rows < batch_rows:
+                    continue
+            if batch:
+                await _flush(batch)
+                batch, rows = [], 0
+
+    async def _transform_stage() -> None:
+        async with asyncio.TaskGroup() as group:
+            for _ in range(stats.transform.workers):
+                group.create_task(_transformer())
+        for _ in range(stats.write.workers):
+            await rows_queue.put(_DONE)
+
+    # 任一段意外异常时 TaskGroup 取消其余各段 (每只 ticker 的错误已在各段内处理)
+    started = time.perf_counter()
+    async with asyncio.TaskGroup() as group:
+        group.create_task(_downloader())
+        group.create_task(_transform_stage())
+        for _ in range(stats.write.workers):
+            group.create_task(_writer())
+    stats.wall = time.perf_counter() - started
+    return stats
@@ -0,0 +1,136 @@
+"""Stored price watermarks for delta fetching — 日K线增量抓取的水位线与尾部重叠校验.
+
+抓取器原先每次按 period (默认 5y) 全量下载每只 ticker, 库中已有的交易日在写入时撞唯一约束.
+现在抓取前先用一次查询取出各 ticker 已入库的最后 OVERLAP_BARS 根收盘价 (``load_price_tails``):
+
+    * 最后一根的 trade_date 即水位线; 只向上游请求从尾部第一根开始的区间
+      (OVERLAP_BARS 根重叠 + 新交易日), 只写入水位线之后的行;
+    * 重叠区间的收盘价与库中不一致 (``tail_changed``) 说明复权因子已变化 —
+      前复权 / auto_adjust 的历史价格整体改变, 该 ticker 改为按 period 全量重新下载并替换已有行;
+    * 库中尚无数据的 ticker 按 period 全量下载.
+
+全量替换的写入事务中 (price_stream) 由 ``invalidate_revised_history`` 清除这些 ticker 的派生数据:
+指标表中的行与在线指标状态 (下次指标计算回退为全量重算), 并标记本地价格缓存整只重新同步
+(缓存按 trade_date 增量同步, 自己发现不了已缓存日期的修订).
+"""
+
+import logging
+from collections.abc import Iterable, Sequence
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from stock_agent.database.base import to_date
+from stock_agent.database.models.indicator_state import IndicatorStreamState
+from stock_agent.database.partitions import PARTITIONED_MODELS
+from stock_agent.database.session import get_session
+
+logger = logging.getLogger(__name__)
+
+# 增量下载与库中重叠的交易日数, 用于发现复权调整
+OVERLAP_BARS = 5
+
+# 收盘价入库保留 4 位小数: 绝对误差 1e-4 以内视为一致; 相对误差 1e-4 远小于一次除权的调整幅度
+_CLOSE_RTOL = 1e-4
+_CLOSE_ATOL = 1e-4
+
+
+async def load_price_tails(model: type, tickers: list[str], bars: int = OVERLAP_BARS) -> dict[str, pd.Series]:
+    """各 ticker 已入库的最后 bars 根收盘价, 整批单次查询.
+
+    Returns:
+        {ticker: Series(index=trade_date 升序, values=close)}; 库中无数据的 ticker 不在结果中.
+    """
+    ranked = (
+        select(
+            model.ticker,  # type: ignore[attr-defined]
+            model.trade_date,  # type: ignore[attr-defined]
+            model.close,  # type: ignore[attr-defined]
+            func.row_number()
+            .over(partition_by=model.ticker, order_by=model.trade_date.desc())  # type: ignore[attr-defined]
+            .label("rn"),
+        )
+        .where(model.ticker.in_(tickers))  # type: ignore[attr-defined]
+        .subquery()
+    )
+    async with get_session() as session:
+        rows = (
+            await session.execute(
+                select(ranked.c.ticker, ranked.c.trade_date, ranked.c.close).where(ranked.c.rn <= bars)
+            )
+        ).all()
+
+    frame = pd.DataFrame(rows, columns=["ticker", "trade_date", "close"])
+    return {
+        ticker: group.set_index("trade_date")["close"].astype("float64").sort_index()
+        for ticker, group in frame.groupby("ticker", sort=False)
+    }
+
+
+def fetch_start(tail: pd.Series | None) -> date | None:
+    """增量下载的起始交易日 (尾部第一根); 库中无数据时为 None, 表示按 period 全量下载."""
+    return None if tail is None or tail.empty else tail.index[0]
+
+
+def watermark(tail: pd.Series | None) -> date | None:
+    """库中该 ticker 的最新 trade_date."""
+    return None if tail is None or tail.empty else tail.index[-1]
+
+
+def close_series(dates: Iterable, closes: Iterable) -> pd.Series:
+    """上游数据的 (交易日, 收盘价) → Series(index=datetime.date), 用于与 tail 比较."""
+    return pd.Series(
+        pd.to_numeric(pd.Series(list(closes)), errors="coerce").to_numpy(dtype="float64"),
+        index=[to_date(d) for d in dates],
+    )
+
+
+def tail_changed(tail: pd.Series, fetched: pd.Series) -> bool:
+    """重叠交易日上库中收盘价与新下载的不一致 — 复权因子已变化, 需全量重新下载.
+
+    新数据与库中尾部没有任何重叠交易日 (无法校验) 时也视为变化; 新数据为空时不变化.
+    """
+    if fetched.empty:
+        return False
+    common = tail.index.intersection(fetched.index)
+    if common.empty:
+        return True
+    stored = tail.loc[common].to_numpy(dtype="float64")
+    latest = fetched.loc[common].to_numpy(dtype="float64")
+    return not np.isclose(stored, latest, rtol=_CLOSE_RTOL, atol=_CLOSE_ATOL, equal_nan=True).all()
+
+
+async def invalidate_revised_history(session: AsyncSession, model: type, tickers: Sequence[str]) -> None:
+    """历史价格将被全量替换 (复权调整 / full 重下载) 的 ticker: 清除基于旧价格的派生数据.
+
+    * 标记本地价格缓存中这些 ticker 需整只重新同步 (price_cache.invalidate_price_cache);
+    * 删除各指标表中这些 ticker 的行 — 增量水位线随之为空, 下次指标计算回退为全量重算;
+    * 删除其在线指标状态 (online_indicators) — 下次从完整历史重新建立.
+
+    删除在调用方的 session 中执行, 须与替换价格的写入处于同一事务: 两者一起提交或一起回滚,
+    不会留下价格已替换、派生数据仍基于旧价格的状态. 缓存标记先于提交写入, 事务回滚时
+    只多一次整只重新同步.
+
+    Args:
+        model: 日K线模型 (确定市场与对应的指标表).
+    """
+    if not tickers:
+        return
+    # price_cache 依赖 indicator_calculator (TA-Lib), 只在需要时导入
+    from stock_agent.data_pipeline.price_cache import invalidate_price_cache
+
+    market = next(market for market, models in PARTITIONED_MODELS.items() if models[0] is model)
+    invalidate_price_cache(market, tickers)
+    for indicator_model in PARTITIONED_MODELS[market][1:]:
+        await session.execute(
+            delete(indicator_model).where(indicator_model.ticker.in_(tickers))  # type: ignore[attr-defined]
+        )
+    await session.execute(
+        delete(IndicatorStreamState).where(
+            IndicatorStreamState.market == market, IndicatorStreamState.ticker.in_(tickers)
+        )
+    )
+    logger.info(f"  🧹 {market} {len(tickers)} 只历史价格替换: 清除指标与在线状态, 价格缓存待整只重新同步")
@@ -0,0 +1,127 @@
+"""Per-run memoization of upstream provider calls — 一次运行内每个上游请求最多发出一次.
+
+同一次管道运行中, 不同抓取函数会重复请求相同的上游数据: A 股日K线 / 基本信息 / 公司信息
+各调用一次 ``ak.stock_individual_info_em``, 基本信息每只 ticker 下载一次全市场
+``ak.stock_zh_a_spot_em`` 快照; yfinance 的 ``.info`` 在基本信息与财务数据中各请求一次.
+
+抓取函数在阻塞的下载函数中经 ``cached_call`` 调用上游, 按 (函数, 参数) 缓存结果:
+
+    def _individual_info(ticker: str) -> dict:
+        df = cached_call("akshare", ak.stock_individual_info_em, symbol=ticker)
+        ...
+
+缓存的作用域是一次运行 (``provider_run``): 抓取入口函数都由 ``@with_provider_run`` 装饰,
+嵌套时沿用最外层的缓存 — ``run_pipeline`` / ``fetch_all_*`` 的整次运行共享一份,
+单独调用某个抓取函数时只在该函数内共享. 不在任何运行中时直接调用上游, 不缓存.
+
+    * 同一 key 的并发调用只有一个线程请求上游, 其余等待其结果 (single-flight);
+    * 上游异常不缓存, 之后的调用会重新请求;
+    * 缓存的结果被多个调用方共享, 调用方不得原地修改 (DataFrame 先 copy);
+    * 未命中时经 ``provider_recorder.recorded_call`` 请求上游, 跨运行的磁盘录制 / 回放由它负责.
+
+全市场快照用 ``memoized`` 缓存一个 "下载并按代码建索引" 的函数, 每次运行只下载 / 建索引一次,
+之后每只 ticker 按代码查表.
+"""
+
+import contextlib
+import contextvars
+import functools
+import logging
+import threading
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import Future
+from typing import Any
+
+from stock_agent.data_pipeline.provider_recorder import recorded_call
+
+logger = logging.getLogger(__name__)
+
+CacheKey = tuple[str, tuple, tuple]
+
+
+def _call_key(fn: Callable[..., Any], args: tuple, kwargs: dict[str, Any]) -> CacheKey:
+    """(函数全名, 位置参数, 排序后的关键字参数); 参数须可哈希."""
+    name = f"{getattr(fn, '__module__', None) or ''}.{getattr(fn, '__qualname__', repr(fn))}"
+    return name, args, tuple(sorted(kwargs.items()))
+
+
+class ProviderCache:
+    """一次运行的上游调用缓存 (线程安全, 阻塞调用在 provider 线程池中并发执行)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[CacheKey, Future] = {}
+        self.upstream_calls = 0
+        self.hits = 0
+
+    def call[T](self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        key = _call_key(fn, args, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = Future()
+            else:
+                self.hits += 1
+        if not owner:
+            return entry.result()  # 等待同一 key 正在进行的调用; 其异常在这里重新抛出
+
+        try:
+            value = fn(*args, **kwargs)
+            with self._lock:
+                self.upstream_calls += 1
+        except BaseException as e:
+            with self._lock:
+                del self._entries[key]  # 异常不缓存
+            entry.set_exception(e)
+            raise
+        entry.set_result(value)
+        return value
+
+
+_current: contextvars.ContextVar[ProviderCache | None] = contextvars.ContextVar("provider_cache", default=None)
+
+
+@contextlib.contextmanager
+def provider_run() -> Iterator[ProviderCache]:
+    """进入一次运行的调用缓存作用域; 已在运行中时沿用外层缓存."""
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+
+    cache = ProviderCache()
+    token = _current.set(cache)
+    try:
+        yield cache
+    finally:
+        _current.reset(token)
+        if cache.upstream_calls or cache.hits:
+            logger.info(f"🗂 上游调用缓存: {cache.upstream_calls} 次请求, {cache.hits} 次命中")
+
+
+def memoized[T](fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在当前运行的缓存中调用 ``fn(*args, **kwargs)``; 不在运行中时直接调用.
+
+    用于由上游数据派生、每次运行只需计算一次的值 (如按代码建索引的全市场快照).
+    """
+    cache = _current.get()
+    if cache is None:
+        return fn(*args, **kwargs)
+    return cache.call(fn, *args, **kwargs)
+
+
+def cached_call[T](provider: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """一次上游调用: 当前运行内缓存, 未命中时经 ``recorded_call`` (录制 / 回放) 请求上游."""
+    return memoized(recorded_call, provider, fn, *args, **kwargs)
+
+
+def with_provider_run[T](fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """装饰抓取入口 (async 函数): 在 ``provider_run()`` 中执行, 嵌套调用共享外层运行的缓存."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        with provider_run():
+            return await fn(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,182 @@
+"""Blocking provider calls off the event loop — akshare / yfinance 调用的线程池、限流与重试.
+
+akshare 与 yfinance 都是同步 HTTP 客户端, 直接在 async 抓取函数里调用会阻塞事件循环,
+逐只 ticker 串行下载. 抓取函数把每只 ticker 的上游调用写成一个同步函数, 经 ``fetch_each``
+提交到共享线程池:
+
+    async for ticker, download in fetch_each("yfinance", _download_daily, tickers, period):
+        try:
+            df, name = download.result()     # 下载异常在这里抛出, 沿用逐 ticker 的 try/except
+            ...                              # 在调用方的会话中写库
+        except Exception as e:
+            logger.error(...)
+
+同一数据源最多 ``Settings.PROVIDER_CONCURRENCY[provider]`` 个调用在途 (不超过上游限频),
+结果按完成顺序交回事件循环, 写库在调用方协程中依次进行, 与其余下载重叠.
+``window`` 限制已提交但未被取走的 key 数, 下游处理慢时下载随之暂停 (price_stream 的有界流水线).
+
+上游保护 (见 provider_limits):
+
+    * 并发上限是自适应的: 遇到限流错误减半, 连续成功后逐步恢复;
+    * 可重试的错误 (限流 / 超时 / 网络 / 5xx) 由 ``run_blocking`` 指数退避 (带抖动) 重试,
+      最多 ``Settings.MAX_RETRIES`` 次;
+    * 仍然失败的 key 由 ``fetch_each`` 放入延后重试队列: 其余 key 全部完成并冷却
+      ``Settings.PROVIDER_RETRY_DEFER_SECONDS`` 秒后再试一轮, 之后才把失败交给调用方;
+    * 令牌桶限速在真正请求上游处 (provider_recorder.recorded_call) 生效.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import weakref
+from collections.abc import AsyncIterator, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from stock_agent.config import get_settings
+from stock_agent.data_pipeline.provider_limits import AdaptiveLimiter, is_retryable
+
+logger = logging.getLogger(__name__)
+
+# 未在 PROVIDER_CONCURRENCY 中配置的数据源
+_DEFAULT_CONCURRENCY = 2
+
+# 退避重试的初始等待与最长等待 (秒)
+_RETRY_INITIAL_WAIT = 1.0
+_RETRY_MAX_WAIT = 60.0
+
+# fetch_each 中 key 迭代结束的标记
+_END = object()
+
+_executor: ThreadPoolExecutor | None = None
+# 事件循环 → 数据源 → 自适应并发上限 (asyncio 同步原语绑定首次使用它的事件循环)
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, AdaptiveLimiter]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def provider_concurrency(provider: str) -> int:
+    """该数据源同时在途的调用数上限 (自适应并发的初始值与上限)."""
+    return max(1, int(get_settings().PROVIDER_CONCURRENCY.get(provider, _DEFAULT_CONCURRENCY)))
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """共享线程池, 大小为各数据源并发上限之和 (限流由 AdaptiveLimiter 负责)."""
+    global _executor
+    if _executor is None:
+        limits = get_settings().PROVIDER_CONCURRENCY.values()
+        _executor = ThreadPoolExecutor(
+            max_workers=max(sum(max(1, int(n)) for n in limits), _DEFAULT_CONCURRENCY),
+            thread_name_prefix="provider",
+        )
+    return _executor
+
+
+def _limiter(provider: str) -> AdaptiveLimiter:
+    per_loop = _limiters.setdefault(asyncio.get_running_loop(), {})
+    if provider not in per_loop:
+        per_loop[provider] = AdaptiveLimiter(provider, provider_concurrency(provider))
+    return per_loop[provider]
+
+
+def _log_retry(provider: str, fn: Callable[..., Any]) -> Callable[[Any], None]:
+    def before_sleep(state: Any) -> None:
+        exc = state.outcome.exception()
+        logger.warning(
+            f"  ⚠ {provider} {getattr(fn, '__name__', fn)} 第 {state.attempt_number} 次失败 ({exc}), "
+            f"{state.next_action.sleep:.1f}s 后重试"
+        )
+
+    return before_sleep
+
+
+async def run_blocking[T](provider: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在线程池中执行一次阻塞的上游调用, 受该数据源的自适应并发上限约束.
+
+    可重试的错误 (provider_limits.is_retryable) 指数退避后重试, 最多 Settings.MAX_RETRIES 次;
+    退避等待期间不占并发名额. 调用在调用方的 contextvars 上下文中执行 (同 asyncio.to_thread),
+    如 provider_cache 的运行作用域.
+    """
+    limiter = _limiter(provider)
+    loop = asyncio.get_running_loop()
+    retrying = AsyncRetrying(
+        retry=retry_if_exception(is_retryable),
+        stop=stop_after_attempt(get_settings().MAX_RETRIES + 1),
+        wait=wait_exponential_jitter(initial=_RETRY_INITIAL_WAIT, max=_RETRY_MAX_WAIT),
+        before_sleep=_log_retry(provider, fn),
+        reraise=True,
+    )
+    async for attempt in retrying:
+        with attempt:
+            epoch = await limiter.acquire()
+            error: BaseException | None = None
+            try:
+                call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+                return await loop.run_in_executor(_get_executor(), call)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                await limiter.release(epoch, error)
+    raise AssertionError("unreachable")  # AsyncRetrying(reraise=True) 总是返回或抛出
+
+
+async def fetch_each[T, K](
+    provider: str,
+    fn: Callable[..., T],
+    keys: Iterable[K],
+    *args: Any,
+    window: int | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[tuple[K, "asyncio.Future[T]"]]:
+    """对每个 key (ticker, 或一批 ticker 的 tuple) 并发执行 ``fn(key, *args, **kwargs)``,
+    按完成顺序产出 (key, 已完成的 future).
+
+    ``future.result()`` 返回结果或抛出该 key 的下载异常. 重试后仍因可重试错误失败的 key
+    延后到其余 key 完成并冷却后再试一轮. 调用方提前退出时取消尚未开始的调用.
+
+    Args:
+        window: 最多同时提交 (在途或已完成但未被取走) 的 key 数; 调用方取走一个结果后才提交下一个,
+                下游处理慢时已下载的数据不会堆积 (见 price_stream). None 时全部 key 一次提交.
+    """
+
+    def _submit(key: K) -> asyncio.Task:
+        return asyncio.ensure_future(run_blocking(provider, fn, key, *args, **kwargs))
+
+    remaining = iter(keys)
+    tasks: dict[asyncio.Task, K] = {}
+
+    def _fill() -> None:
+        while window is None or len(tasks) < window:
+            key = next(remaining, _END)
+            if key is _END:
+                return
+            tasks[_submit(key)] = key  # type: ignore[arg-type]
+
+    deferred: list[K] = []
+    retried = False
+    try:
+        _fill()
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key = tasks.pop(task)
+                if not retried and not task.cancelled() and task.exception() and is_retryable(task.exception()):
+                    deferred.append(key)
+                    continue
+                yield key, task
+            _fill()
+
+            if not tasks and deferred and not retried:
+                retried = True
+                delay = get_settings().PROVIDER_RETRY_DEFER_SECONDS
+                logger.info(f"  🔁 {provider}: {len(deferred)} 个失败的调用 {delay:.0f}s 后重试一轮")
+                await asyncio.sleep(delay)
+                remaining = iter(deferred)
+                _fill()
+    finally:
+        for task in tasks:
+            task.cancel()
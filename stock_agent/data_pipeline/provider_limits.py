@@ -0,0 +1,147 @@
+"""Provider rate limits and throttling detection — 上游数据源的令牌桶限速、自适应并发与错误分类.
+
+三层保护, 由 provider_calls / provider_recorder 使用, 抓取函数无需感知:
+
+    * 令牌桶 (``rate_limit``): 每次真正发往上游的请求前取令牌 (录制回放 / 运行内缓存命中不计).
+      ``Settings.PROVIDER_RATE_LIMITS`` 按数据源配置每秒请求数, 也可按 "数据源.函数名" 单独配置某个
+      接口 (两者同时生效);
+    * 自适应并发 (``AdaptiveLimiter``, AIMD): 同一数据源同时在途的调用数从
+      ``Settings.PROVIDER_CONCURRENCY`` 开始, 遇到限流错误减半, 连续成功后逐个恢复;
+    * 错误分类: ``is_throttled`` (429 / 限流异常 / 服务端断开连接) 与 ``is_retryable``
+      (限流 + 超时 / 网络错误 / 5xx), 决定是否退避重试、是否收缩并发.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from stock_agent.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# ---- Error classification ----
+
+
+def _status_code(exc: BaseException) -> int | None:
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """上游的限流信号: HTTP 429, yfinance YFRateLimitError, 或服务端主动断开连接 (东方财富限流时的表现)."""
+    if _status_code(exc) == 429 or "RateLimit" in type(exc).__name__:
+        return True
+    if isinstance(exc, ConnectionResetError | ConnectionRefusedError | ConnectionAbortedError):
+        return True
+    message = str(exc).lower()
+    return "too many requests" in message or "rate limit" in message or "remotedisconnected" in message
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """值得退避后重试的错误: 限流, 超时 / 网络错误 (含 requests 的异常, 它们继承 OSError), 5xx."""
+    if is_throttled(exc):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status >= 500
+    # 本地文件错误也是 OSError, 不重试
+    return isinstance(exc, OSError) and not isinstance(exc, FileNotFoundError | PermissionError)
+
+
+# ---- Token bucket ----
+
+
+class TokenBucket:
+    """线程安全的令牌桶: 每秒补充 rate 个令牌, 容量 burst; ``acquire`` 阻塞直到取得令牌."""
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, burst if burst is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """取一个令牌, 返回等待的秒数."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_buckets: dict[str, TokenBucket | None] = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket(name: str) -> TokenBucket | None:
+    with _buckets_lock:
+        if name not in _buckets:
+            rate = get_settings().PROVIDER_RATE_LIMITS.get(name)
+            _buckets[name] = TokenBucket(float(rate)) if rate and rate > 0 else None
+        return _buckets[name]
+
+
+def rate_limit(provider: str, endpoint: str) -> float:
+    """真正请求上游前调用 (阻塞): 依次取数据源与该接口的令牌 (未配置的不限), 返回等待的秒数."""
+    waited = 0.0
+    for name in (provider, f"{provider}.{endpoint}"):
+        bucket = _bucket(name)
+        if bucket is not None:
+            waited += bucket.acquire()
+    return waited
+
+
+# ---- Adaptive concurrency ----
+
+
+class AdaptiveLimiter:
+    """AIMD 并发上限: 限流时减半 (乘性减), 每连续成功 ``limit`` 次加一 (加性增), 不超过初始上限.
+
+    同一轮并发中多个请求同时被限流只减半一次: 只有在上一次收缩之后发出的请求才会再次收缩.
+    绑定创建它的事件循环.
+    """
+
+    def __init__(self, provider: str, max_limit: int) -> None:
+        self.provider = provider
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self._active = 0
+        self._successes = 0
+        self._epoch = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> int:
+        """占用一个并发名额, 返回当前的收缩代数 (交给 ``release``)."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+            return self._epoch
+
+    async def release(self, epoch: int, exc: BaseException | None = None) -> None:
+        """释放名额, 并按调用结果调整并发上限."""
+        async with self._cond:
+            self._active -= 1
+            if exc is None:
+                self._successes += 1
+                if self.limit < self.max_limit and self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            elif is_throttled(exc):
+                self._successes = 0
+                if epoch == self._epoch:
+                    self._epoch += 1
+                    if self.limit > 1:
+                        self.limit = max(1, self.limit // 2)
+                        logger.warning(f"  ⚠ {self.provider} 限流 ({type(exc).__name__}), 并发降为 {self.limit}")
+            self._cond.notify_all()
@@ -0,0 +1,222 @@
+"""Record / replay of raw upstream responses — 上游原始返回值的磁盘录制与离线回放.
+
+抓取函数的每个上游调用 (``yf.download``, ``ak.stock_zh_a_hist``, ``.info`` …) 经
+``recorded_call(provider, fn, *args, **kwargs)`` 发出, 按 (数据源, 函数, 参数, 日期) 存取原始返回值:
+
+    off     直接请求上游 (默认);
+    record  读穿: 当天已录制的调用直接读盘, 否则请求上游并写盘 — 同一天重复运行不再访问上游;
+    replay  只读盘, 取不晚于回放日期 (默认今天) 的最近一次录制; 没有录制时抛出 ReplayMissError,
+            不访问网络. 配合 --replay-date 可在任意一天确定性地重放同一批数据 (基准测试).
+
+模式来自 Settings.PROVIDER_RECORD_MODE, 或抓取 CLI 的 ``--record`` / ``--replay [--replay-date]``.
+回放时 ``pipeline_today()`` 返回回放日期, 由 "今天" 推算的请求区间 (如 A 股 period → 起止日期)
+与录制时一致.
+
+存储: ``{PROVIDER_RECORD_DIR}/{provider}/{函数名}/{YYYY-MM-DD}/{参数摘要}.parquet`` (zstd 压缩);
+dict / list 等值 (yfinance ``.info``) 存为同名 ``.json``. DataFrame 的列标签 (MultiIndex / Timestamp)
+与 pyarrow 无法表示的混合类型 object 列随文件元数据保存, 读回与上游返回一致. 需要安装 pyarrow.
+
+录制的是上游原始返回值, 位于 provider_cache 的运行内缓存之下: 缓存未命中时才经过这里.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+from collections.abc import Callable
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from stock_agent.config import get_settings
+from stock_agent.data_pipeline.provider_limits import rate_limit
+
+logger = logging.getLogger(__name__)
+
+RECORD_MODES = ("off", "record", "replay")
+
+# parquet schema 元数据中保存还原信息 (原列标签, 按 pickle 存储的列) 的键
+_META_KEY = b"stock_agent.recording"
+
+_mode: str | None = None
+_replay_date: date | None = None
+
+
+class ReplayMissError(LookupError):
+    """回放模式下该调用没有录制."""
+
+
+def configure_recording(mode: str | None = None, replay_date: date | None = None) -> None:
+    """设置录制模式 (None 时取 Settings.PROVIDER_RECORD_MODE) 与回放日期 (None 为今天)."""
+    global _mode, _replay_date
+    mode = mode or get_settings().PROVIDER_RECORD_MODE
+    if mode not in RECORD_MODES:
+        raise ValueError(f"Unknown provider record mode: {mode!r} (expected one of {RECORD_MODES})")
+    _mode, _replay_date = mode, replay_date
+
+
+def recording_mode() -> str:
+    if _mode is None:
+        configure_recording()
+    return _mode  # type: ignore[return-value]
+
+
+def pipeline_today() -> date:
+    """抓取区间推算使用的 "今天": 回放模式下为回放日期."""
+    if recording_mode() == "replay" and _replay_date is not None:
+        return _replay_date
+    return date.today()
+
+
+def add_recording_args(parser: argparse.ArgumentParser) -> None:
+    """为抓取 CLI 添加 --record / --replay / --replay-date."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--record",
+        action="store_true",
+        help="录制上游原始返回值; 当天已录制的调用直接读盘 (默认: Settings.PROVIDER_RECORD_MODE)",
+    )
+    group.add_argument("--replay", action="store_true", help="只从录制回放, 不访问网络")
+    parser.add_argument(
+        "--replay-date",
+        type=date.fromisoformat,
+        default=None,
+        help="回放不晚于该日期 (YYYY-MM-DD) 的最近录制 (默认: 今天)",
+    )
+
+
+def configure_from_args(args: argparse.Namespace) -> None:
+    """按 add_recording_args 的参数设置录制模式."""
+    mode = "record" if args.record else "replay" if args.replay else None
+    configure_recording(mode, args.replay_date)
+
+
+# ---- Storage ----
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_.-]", "_", name)
+
+
+def _function_name(fn: Callable[..., Any]) -> str:
+    # 不含模块路径: 上游库版本间函数所在的子模块会变化, 录制仍可复用
+    return getattr(fn, "__qualname__", None) or repr(fn)
+
+
+def _call_dir(provider: str, fn: Callable[..., Any]) -> Path:
+    return Path(get_settings().PROVIDER_RECORD_DIR) / _safe(provider) / _safe(_function_name(fn))
+
+
+def _call_repr(args: tuple, kwargs: dict[str, Any]) -> str:
+    return repr((args, sorted(kwargs.items())))
+
+
+def _write_frame(path: Path, df: pd.DataFrame, call: str) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # 列标签改为位置名 (parquet 只接受字符串列名), 原标签存入元数据
+    data = df.set_axis([f"c{i}" for i in range(df.shape[1])], axis=1)
+    pickled = []
+    for name in data.columns:
+        if data[name].dtype == object:
+            try:
+                pa.array(data[name], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                data[name] = data[name].map(pickle.dumps)  # 混合类型 (如 akshare 的 item/value 表)
+                pickled.append(name)
+
+    table = pa.Table.from_pandas(data, preserve_index=True)
+    meta = pickle.dumps({"call": call, "columns": df.columns, "pickled": pickled})
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: meta})
+    pq.write_table(table, path, compression="zstd")
+
+
+def _read_frame(path: Path, call: str) -> pd.DataFrame | None:
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    meta = pickle.loads(table.schema.metadata[_META_KEY])
+    if meta["call"] != call:  # 摘要碰撞
+        return None
+    df = table.to_pandas()
+    for name in meta["pickled"]:
+        df[name] = df[name].map(pickle.loads)
+    return df.set_axis(meta["columns"], axis=1)
+
+
+def _store(directory: Path, digest: str, call: str, value: Any) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = ".parquet" if isinstance(value, pd.DataFrame) else ".json"
+    path = directory / f"{digest}{suffix}"
+    tmp = directory / f".{digest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if isinstance(value, pd.DataFrame):
+            _write_frame(tmp, value, call)
+        else:
+            tmp.write_text(json.dumps({"call": call, "value": value}, ensure_ascii=False, default=str))
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _load(directory: Path, digest: str, call: str) -> tuple[bool, Any]:
+    frame = directory / f"{digest}.parquet"
+    if frame.exists():
+        df = _read_frame(frame, call)
+        return (df is not None), df
+    doc = directory / f"{digest}.json"
+    if doc.exists():
+        stored = json.loads(doc.read_text())
+        return stored["call"] == call, stored["value"]
+    return False, None
+
+
+def _upstream[T](provider: str, fn: Callable[..., T], args: tuple, kwargs: dict[str, Any]) -> T:
+    """真正请求上游: 先按数据源 / 接口的令牌桶限速."""
+    rate_limit(provider, _function_name(fn))
+    return fn(*args, **kwargs)
+
+
+def recorded_call[T](provider: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """按当前录制模式执行一次上游调用 ``fn(*args, **kwargs)`` (阻塞).
+
+    返回 DataFrame / JSON 值 (dict, list, 标量) 的上游函数可以录制; 参数以 repr 计算摘要.
+    """
+    mode = recording_mode()
+    if mode == "off":
+        return _upstream(provider, fn, args, kwargs)
+
+    call = _call_repr(args, kwargs)
+    digest = hashlib.sha256(call.encode()).hexdigest()[:24]
+    base = _call_dir(provider, fn)
+
+    if mode == "replay":
+        until = pipeline_today().isoformat()
+        days = [d.name for d in base.iterdir() if d.is_dir() and d.name <= until] if base.is_dir() else []
+        for day in sorted(days, reverse=True):
+            found, value = _load(base / day, digest, call)
+            if found:
+                return value
+        raise ReplayMissError(f"{provider} {_function_name(fn)}{call} 在 {until} 及之前没有录制")
+
+    directory = base / date.today().isoformat()
+    try:
+        found, value = _load(directory, digest, call)
+        if found:
+            return value
+    except Exception as e:
+        logger.warning(f"  ⚠ 录制 {directory / digest} 读取失败, 重新请求: {e}")
+
+    value = _upstream(provider, fn, args, kwargs)
+    try:
+        _store(directory, digest, call, value)
+    except Exception as e:
+        logger.warning(f"  ⚠ {provider} {_function_name(fn)} 的返回值未能录制: {e}")
+    return value
@@ -5,6 +5,10 @@ Usage:
     python -m stock_agent.data_pipeline.run_pipeline --market CN   # 仅A股
     python -m stock_agent.data_pipeline.run_pipeline --market HK   # 仅港股
     python -m stock_agent.data_pipeline.run_pipeline --market US   # 仅美股
+
+    # 录制上游原始返回值 (当天重复运行不再访问上游) / 离线确定性回放 (见 provider_recorder)
+    python -m stock_agent.data_pipeline.run_pipeline --record
+    python -m stock_agent.data_pipeline.run_pipeline --replay --replay-date 2025-06-30
 """
 
 import argparse
@@ -19,6 +23,8 @@ from stock_agent.data_pipeline.akshare_fetcher import (
 )
 from stock_agent.data_pipeline.financial_fetcher import fetch_all_financial_data
 from stock_agent.data_pipeline.indicator_calculator import calculate_all_indicators
+from stock_agent.data_pipeline.provider_cache import with_provider_run
+from stock_agent.data_pipeline.provider_recorder import add_recording_args, configure_from_args
 from stock_agent.data_pipeline.yfinance_fetcher import (
     fetch_hk_basic_info,
     fetch_hk_daily_prices,
@@ -30,9 +36,12 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(na
 logger = logging.getLogger(__name__)
 
 
+@with_provider_run
 async def run_pipeline(market: str | None = None) -> None:
     """Run data pipeline for specified market(s).
 
+    整次运行共享一份上游调用缓存 (provider_cache): 各抓取任务对同一上游请求只发出一次.
+
     Args:
         market: "CN", "HK", "US", or None for all.
     """
@@ -53,14 +62,14 @@ async def run_pipeline(market: str | None = None) -> None:
 
     if market is None or market == "HK":
         tasks.extend([
+            ("港股基本信息", fetch_hk_basic_info()),  # 先于日K线: 日K线的 name 取自基本信息表
             ("港股日K线", fetch_hk_daily_prices()),
-            ("港股基本信息", fetch_hk_basic_info()),
         ])
 
     if market is None or market == "US":
         tasks.extend([
-            ("美股日K线", fetch_us_daily_prices()),
             ("美股基本信息", fetch_us_basic_info()),
+            ("美股日K线", fetch_us_daily_prices()),
         ])
 
     # Financial data (all markets)
@@ -88,7 +97,9 @@ async def run_pipeline(market: str | None = None) -> None:
 def main() -> None:
     parser = argparse.ArgumentParser(description="Stock data pipeline runner")
     parser.add_argument("--market", choices=["CN", "HK", "US"], default=None, help="Target market")
+    add_recording_args(parser)
     args = parser.parse_args()
+    configure_from_args(args)
     asyncio.run(run_pipeline(args.market))
 
 
@@ -9,17 +9,40 @@ Usage:
     # 指定 ticker 和 period
     python -m stock_agent.data_pipeline.yfinance_fetcher --tickers AAPL MSFT --period 1y
     python -m stock_agent.data_pipeline.yfinance_fetcher --tickers 0700.HK 9988.HK --period 3y
+
+    # 日K线默认增量 (只下载库中水位线之后的交易日, 见 price_watermarks); --full 全量重新下载
+    python -m stock_agent.data_pipeline.yfinance_fetcher --tickers AAPL --period 5y --full
+
+    # 录制上游返回值 / 离线回放 (见 provider_recorder)
+    python -m stock_agent.data_pipeline.yfinance_fetcher --record
+    python -m stock_agent.data_pipeline.yfinance_fetcher --replay --replay-date 2025-06-30
 """
 
 import argparse
 import asyncio
+import functools
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from stock_agent.config import get_settings
+from stock_agent.data_pipeline.price_stream import PriceRows, StreamStats, stream_daily_prices
+from stock_agent.data_pipeline.price_watermarks import (
+    close_series,
+    fetch_start,
+    load_price_tails,
+    tail_changed,
+    watermark,
+)
+from stock_agent.data_pipeline.provider_cache import cached_call, with_provider_run
+from stock_agent.data_pipeline.provider_calls import fetch_each
+from stock_agent.data_pipeline.provider_recorder import add_recording_args, configure_from_args, recorded_call
 from stock_agent.database.models.stock_hk import StockBasicInfoHKDB, StockDailyPriceHKDB
 from stock_agent.database.models.stock_us import StockBasicInfoUSDB, StockDailyPriceUSDB
 from stock_agent.database.session import get_session
@@ -28,58 +51,58 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(na
 logger = logging.getLogger(__name__)
 
 
-# ---- Helper: yfinance DataFrame → ORM entities ----
-
-
-def _history_to_daily_price_entities(
-    df: pd.DataFrame,
-    ticker: str,
-    model_class: type,
-    stock_name: str = "",
-) -> list:
-    """Convert yfinance history DataFrame to list of ORM entities."""
-    entities = []
-    for date_idx, row in df.iterrows():
-        trade_date = date_idx.strftime("%Y-%m-%d") if hasattr(date_idx, "strftime") else str(date_idx)[:10]
-
-        # Compute derived fields
-        prev_close = row.get("Close", 0)
-        open_price = row.get("Open", 0)
-        high_price = row.get("High", 0)
-        low_price = row.get("Low", 0)
-        close_price = row.get("Close", 0)
-
-        # amplitude = (high - low) / prev_close * 100  (approximate)
-        amplitude = ((high_price - low_price) / prev_close * 100) if prev_close else None
-        # amount_change = close - open (简化)
-        amount_change = close_price - open_price if open_price else None
-
-        entity = model_class(
-            ticker=ticker,
-            name=stock_name,
-            trade_date=trade_date,
-            open=round(open_price, 4) if pd.notna(open_price) else None,
-            high=round(high_price, 4) if pd.notna(high_price) else None,
-            low=round(low_price, 4) if pd.notna(low_price) else None,
-            close=round(close_price, 4) if pd.notna(close_price) else None,
-            volume=int(row.get("Volume", 0)) if pd.notna(row.get("Volume")) else None,
-            amount=None,  # yfinance doesn't provide amount directly
-            amplitude=round(amplitude, 4) if amplitude and pd.notna(amplitude) else None,
-            pct_change=None,  # Will be computed later or from indicator_calculator
-            amount_change=round(amount_change, 4) if amount_change and pd.notna(amount_change) else None,
-            turnover_rate=None,  # Not available from yfinance
-        )
-        entities.append(entity)
-    return entities
+# ---- Helper: yfinance DataFrame → 日K线表列 / ORM entities ----
 
 
-def _info_to_basic_info_entity(
-    info: dict,
-    ticker: str,
-    model_class: type,
-) -> object:
-    """Convert yfinance .info dict to a basic info ORM entity."""
-    return model_class(
+def _history_to_price_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """yfinance 日K线 (index=日期, Open/High/Low/Close/Volume) → 日K线表列, 按日期升序 (整列向量化计算).
+
+    派生列与原逐行实现一致:
+        amplitude     = (high - low) / close * 100   (以当日收盘价近似昨收)
+        amount_change = close - open                  (简化; open 为 0 时为空)
+        pct_change    = 相邻两日 (保留 4 位小数后的) 收盘价涨跌幅 %, 首行为空
+    为 0 的 amplitude / amount_change 与缺失一样写 NULL; amount / turnover_rate yfinance 不提供.
+    四舍五入与 NaN / inf → NULL 由 bulk.frame_to_columns 按列完成.
+    """
+    df = df.sort_index()
+    dates = pd.DatetimeIndex(df.index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+
+    def _col(name: str) -> np.ndarray:
+        if name not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+    open_, high, low, close = _col("Open"), _col("High"), _col("Low"), _col("Close")
+    rounded_close = np.round(close, 4)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amplitude = (high - low) / close * 100
+        amount_change = np.where(open_ != 0, close - open_, np.nan)
+        pct_change = np.full(len(df), np.nan)
+        prev, curr = rounded_close[:-1], rounded_close[1:]
+        pct_change[1:] = np.where((prev != 0) & (curr != 0), (curr - prev) / prev * 100, np.nan)
+    amplitude[amplitude == 0] = np.nan
+    amount_change[amount_change == 0] = np.nan
+
+    return pd.DataFrame(
+        {
+            "trade_date": dates.normalize(),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": _col("Volume"),
+            "amplitude": amplitude,
+            "pct_change": pct_change,
+            "amount_change": amount_change,
+        }
+    )
+
+
+def _info_to_basic_info_values(info: dict, ticker: str) -> dict:
+    """Convert yfinance .info dict to basic info column values."""
+    return dict(
         ticker=ticker,
         market=info.get("market", ""),
         exchange=info.get("exchange", ""),
@@ -123,110 +146,215 @@ def _info_to_basic_info_entity(
     )
 
 
-# ---- Compute pct_change after data is collected ----
+async def _upsert_basic_info(session: AsyncSession, model_class: type, values: dict) -> None:
+    """按 ticker upsert 一行基本信息: 重复运行时覆盖旧值, 不会违反 UniqueConstraint('ticker').
+
+    在 savepoint 中执行, 单只 ticker 写入失败只回滚这一行, 会话仍可继续提交.
+    """
+    stmt = insert(model_class).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["ticker"],
+        set_={**{k: stmt.excluded[k] for k in values if k != "ticker"}, "updated_at": func.now()},
+    )
+    async with session.begin_nested():
+        await session.execute(stmt)
+
+
+# ---- Blocking downloads (run in the provider thread pool) ----
 
 
-def _compute_pct_change(entities: list) -> list:
-    """Compute pct_change for a sorted-by-date entity list."""
-    # Sort by trade_date ascending
-    entities.sort(key=lambda e: e.trade_date)
-    for i in range(1, len(entities)):
-        prev_close = entities[i - 1].close
-        curr_close = entities[i].close
-        if prev_close and curr_close and prev_close != 0:
-            entities[i].pct_change = round((curr_close - prev_close) / prev_close * 100, 4)
-    return entities
+def _download_daily_batch(chunk: tuple[date | None, tuple[str, ...]], period: str) -> dict[str, pd.DataFrame]:
+    """一次 yf.download 下载一批 ticker 的日K线, 拆分为 ticker → DataFrame (阻塞, 经 fetch_each 在线程池中执行).
+
+    Args:
+        chunk: (起始交易日, tickers). 起始日为 None 时按 period 全量下载, 否则下载该日至今.
+
+    多只 ticker 的结果按交易日对齐, 某只 ticker 没有交易的日期整行为 NaN, 拆分时丢弃;
+    整只下载失败 / 无数据的 ticker 不出现在结果中.
+    """
+    start, tickers = chunk
+    logger.info(f"  → 获取 {len(tickers)} 只: {tickers[0]} … {tickers[-1]}" + (f" (自 {start})" if start else ""))
+    data = recorded_call(
+        "yfinance",
+        yf.download,
+        list(tickers),
+        **({"start": start.isoformat()} if start else {"period": period}),
+        auto_adjust=True,
+        repair=True,
+        group_by="ticker",
+        threads=False,  # 批次间的并发由 provider_calls 控制
+        progress=False,
+    )
+    if data is None or data.empty:
+        return {}
+
+    if isinstance(data.columns, pd.MultiIndex):
+        by_symbol = {t.upper(): t for t in tickers}
+        frames = {
+            by_symbol.get(symbol, symbol): data.xs(symbol, level=0, axis=1)
+            for symbol in data.columns.get_level_values(0).unique()
+        }
+    else:
+        frames = {tickers[0]: data} if len(tickers) == 1 else {}
+
+    result = {}
+    for ticker, df in frames.items():
+        df = df.dropna(subset=["Close"]) if "Close" in df.columns else df.dropna(how="all")
+        if not df.empty:
+            result[ticker] = df
+    return result
+
+
+def _ticker_info(ticker: str) -> dict:
+    return yf.Ticker(ticker).info
+
+
+def ticker_info(ticker: str) -> dict:
+    """yf.Ticker(ticker).info, 在当前运行内缓存 (基本信息与财务数据共用一次请求, 见 provider_cache). 阻塞."""
+    return cached_call("yfinance", _ticker_info, ticker)
+
+
+def _download_info(ticker: str) -> dict:
+    """下载一只 ticker 的 .info (阻塞, 经 fetch_each 在线程池中执行)."""
+    logger.info(f"  → 获取 {ticker} 基本信息 ...")
+    return ticker_info(ticker)
 
 
 # ---- Main Fetch Functions ----
 
 
+async def _basic_info_names(model: type, tickers: list[str]) -> dict[str, str]:
+    """从基本信息表读取简称 (fetch_*_basic_info 写入), 代替每只 ticker 一次 .info 请求."""
+    async with get_session() as session:
+        rows = await session.execute(
+            select(model.ticker, model.short_name).where(model.ticker.in_(tickers))  # type: ignore[attr-defined]
+        )
+        return {ticker: name for ticker, name in rows if name}
+
+
+async def _fetch_daily_prices(
+    tickers: list[str],
+    period: str,
+    chunk_size: int | None,
+    price_model: type,
+    info_model: type,
+    label: str,
+    full: bool = False,
+) -> None:
+    """增量下载并写入日K线 (见 price_watermarks).
+
+    库中已有数据的 ticker 按相同的起始交易日分组, 只下载尾部重叠区间之后的数据; 其余按 period
+    全量下载. 每组按 chunk_size 只一批调用 yf.download, 各批并发下载; 下载、转换与写库经
+    price_stream 流水线同时进行, 跨 ticker 攒批按 (ticker, trade_date) upsert (重跑不报唯一约束冲突).
+    重叠区间收盘价变化 (复权调整) 的 ticker 最后按 period 全量重新下载, 替换已有行,
+    在替换写入的同一事务中清除其指标与在线状态, 并标记本地价格缓存 (见 price_watermarks.invalidate_revised_history).
+    """
+    chunk_size = max(1, chunk_size or get_settings().YF_DOWNLOAD_CHUNK_SIZE)
+    logger.info(
+        f"📊 开始获取{label}日K线: {tickers}, period={period}, chunk_size={chunk_size}" + (" (全量)" if full else "")
+    )
+
+    names = await _basic_info_names(info_model, tickers)
+    missing = [t for t in tickers if t not in names]
+    if missing:
+        logger.info(f"  ℹ {len(missing)} 只在基本信息表中无简称, name 暂用 ticker")
+    tails = {} if full else await load_price_tails(price_model, tickers)
+
+    def _chunks(members: list[str], by_start: bool) -> list[tuple[date | None, tuple[str, ...]]]:
+        groups: dict[date | None, list[str]] = {}
+        for ticker in members:
+            groups.setdefault(fetch_start(tails.get(ticker)) if by_start else None, []).append(ticker)
+        return [
+            (start, tuple(group[i:i + chunk_size]))
+            for start, group in groups.items()
+            for i in range(0, len(group), chunk_size)
+        ]
+
+    adjusted: list[str] = []  # 转换线程中追加 (list.append 线程安全)
+
+    def _transform(ticker: str, df: pd.DataFrame | None, replace: bool) -> PriceRows | None:
+        if df is None:
+            logger.warning(f"  ⚠ {ticker} 无数据")
+            return None
+        tail = None if replace else tails.get(ticker)
+        if tail is not None and tail_changed(tail, close_series(df.index, df["Close"])):
+            adjusted.append(ticker)
+            return None
+
+        frame = _history_to_price_frame(df)  # pct_change 在过滤前计算: 首个新交易日取重叠区间的昨收
+        last = watermark(tail)
+        if last is not None:
+            frame = frame[frame["trade_date"] > pd.Timestamp(last)]
+        return PriceRows(ticker, frame, {"name": names.get(ticker, ticker)}, replace=replace)
+
+    async def _run(chunks: list[tuple[date | None, tuple[str, ...]]], replace: bool) -> StreamStats:
+        # 下载 / 转换 / 写库三段并发, 跨 ticker 攒批 upsert (见 price_stream)
+        stats = await stream_daily_prices(
+            "yfinance",
+            _download_daily_batch,
+            chunks,
+            price_model,
+            functools.partial(_transform, replace=replace),
+            period,
+            split=lambda key, frames: [(ticker, frames.get(ticker)) for ticker in key[1]],
+            describe=lambda key: f"{key[1][0]} … {key[1][-1]} ({len(key[1])} 只)",
+        )
+        stats.log_summary(label)
+        return stats
+
+    runs = [await _run(_chunks(tickers, by_start=not full), replace=full)]
+    if adjusted:
+        logger.info(f"  🔁 {len(adjusted)} 只重叠区间价格已变化 (复权调整), 全量重新下载: {adjusted}")
+        runs.append(await _run(_chunks(adjusted, by_start=False), replace=True))
+
+    total_rows = sum(stats.rows_written for stats in runs)
+    up_to_date = sum(stats.up_to_date for stats in runs)
+    logger.info(
+        f"📊 {label}日K线获取完成, 共写入 {total_rows} 行" + (f", {up_to_date} 只已是最新" if up_to_date else "")
+    )
+
+
 async def fetch_hk_daily_prices(
     tickers: list[str] | None = None,
     period: str = "5y",
+    chunk_size: int | None = None,
+    full: bool = False,
 ) -> None:
-    """Task 1.2.2: 获取港股日K线.
+    """Task 1.2.2: 获取港股日K线 (默认增量: 只下载库中水位线之后的交易日).
 
     Args:
         tickers: 港股 ticker 列表, 为空时使用 MVP 股票池.
         period: yfinance period 字符串, 如 '1y', '2y', '5y', 'max'.
+        chunk_size: 每次 yf.download 请求的 ticker 数, 默认 Settings.YF_DOWNLOAD_CHUNK_SIZE.
+        full: 忽略库中水位线, 按 period 全量下载并替换已有行.
     """
     if not tickers:
         settings = get_settings()
         tickers = settings.MVP_STOCK_UNIVERSE["HK"]
-    logger.info(f"📊 开始获取港股日K线: {tickers}, period={period}")
-
-    async with get_session() as session:
-        total_rows = 0
-        for ticker in tickers:
-            try:
-                logger.info(f"  → 获取 {ticker} ...")
-                yf_ticker = yf.Ticker(ticker)
-                df = yf_ticker.history(period=period, auto_adjust=True, repair=True)
-
-                if df.empty:
-                    logger.warning(f"  ⚠ {ticker} 无数据")
-                    continue
-
-                stock_name = yf_ticker.info.get("shortName", ticker)
-                entities = _history_to_daily_price_entities(df, ticker, StockDailyPriceHKDB, stock_name)
-                entities = _compute_pct_change(entities)
-
-                session.add_all(entities)
-                await session.flush()
-                total_rows += len(entities)
-                logger.info(f"  ✅ {ticker}: {len(entities)} 行写入")
-
-            except Exception as e:
-                logger.error(f"  ❌ {ticker} 获取失败: {e}")
-                continue
-
-        logger.info(f"📊 港股日K线获取完成, 共 {total_rows} 行")
+    await _fetch_daily_prices(tickers, period, chunk_size, StockDailyPriceHKDB, StockBasicInfoHKDB, "港股", full=full)
 
 
 async def fetch_us_daily_prices(
     tickers: list[str] | None = None,
     period: str = "5y",
+    chunk_size: int | None = None,
+    full: bool = False,
 ) -> None:
-    """Task 1.2.3: 获取美股日K线.
+    """Task 1.2.3: 获取美股日K线 (默认增量: 只下载库中水位线之后的交易日).
 
     Args:
         tickers: 美股 ticker 列表, 为空时使用 MVP 股票池.
         period: yfinance period 字符串, 如 '1y', '2y', '5y', 'max'.
+        chunk_size: 每次 yf.download 请求的 ticker 数, 默认 Settings.YF_DOWNLOAD_CHUNK_SIZE.
+        full: 忽略库中水位线, 按 period 全量下载并替换已有行.
     """
     if not tickers:
         settings = get_settings()
         tickers = settings.MVP_STOCK_UNIVERSE["US"]
-    logger.info(f"📊 开始获取美股日K线: {tickers}, period={period}")
-
-    async with get_session() as session:
-        total_rows = 0
-        for ticker in tickers:
-            try:
-                logger.info(f"  → 获取 {ticker} ...")
-                yf_ticker = yf.Ticker(ticker)
-                df = yf_ticker.history(period=period, auto_adjust=True, repair=True)
-
-                if df.empty:
-                    logger.warning(f"  ⚠ {ticker} 无数据")
-                    continue
-
-                stock_name = yf_ticker.info.get("shortName", ticker)
-                entities = _history_to_daily_price_entities(df, ticker, StockDailyPriceUSDB, stock_name)
-                entities = _compute_pct_change(entities)
-
-                session.add_all(entities)
-                await session.flush()
-                total_rows += len(entities)
-                logger.info(f"  ✅ {ticker}: {len(entities)} 行写入")
-
-            except Exception as e:
-                logger.error(f"  ❌ {ticker} 获取失败: {e}")
-                continue
-
-        logger.info(f"📊 美股日K线获取完成, 共 {total_rows} 行")
+    await _fetch_daily_prices(tickers, period, chunk_size, StockDailyPriceUSDB, StockBasicInfoUSDB, "美股", full=full)
 
 
+@with_provider_run
 async def fetch_hk_basic_info(tickers: list[str] | None = None) -> None:
     """Task 1.2.5 (part 1): 获取港股基本信息.
 
@@ -239,19 +367,15 @@ async def fetch_hk_basic_info(tickers: list[str] | None = None) -> None:
     logger.info(f"📋 开始获取港股基本信息: {tickers}")
 
     async with get_session() as session:
-        for ticker in tickers:
+        async for ticker, download in fetch_each("yfinance", _download_info, tickers):
             try:
-                logger.info(f"  → 获取 {ticker} 基本信息 ...")
-                yf_ticker = yf.Ticker(ticker)
-                info = yf_ticker.info
+                info = download.result()
 
                 if not info or "shortName" not in info:
                     logger.warning(f"  ⚠ {ticker} 无基本信息")
                     continue
 
-                entity = _info_to_basic_info_entity(info, ticker, StockBasicInfoHKDB)
-                session.add(entity)
-                await session.flush()
+                await _upsert_basic_info(session, StockBasicInfoHKDB, _info_to_basic_info_values(info, ticker))
                 logger.info(f"  ✅ {ticker}: {info.get('shortName', 'N/A')}")
 
             except Exception as e:
@@ -261,6 +385,7 @@ async def fetch_hk_basic_info(tickers: list[str] | None = None) -> None:
     logger.info("📋 港股基本信息获取完成")
 
 
+@with_provider_run
 async def fetch_us_basic_info(tickers: list[str] | None = None) -> None:
     """Task 1.2.5 (part 2): 获取美股基本信息.
 
@@ -273,19 +398,15 @@ async def fetch_us_basic_info(tickers: list[str] | None = None) -> None:
     logger.info(f"📋 开始获取美股基本信息: {tickers}")
 
     async with get_session() as session:
-        for ticker in tickers:
+        async for ticker, download in fetch_each("yfinance", _download_info, tickers):
             try:
-                logger.info(f"  → 获取 {ticker} 基本信息 ...")
-                yf_ticker = yf.Ticker(ticker)
-                info = yf_ticker.info
+                info = download.result()
 
                 if not info or "shortName" not in info:
                     logger.warning(f"  ⚠ {ticker} 无基本信息")
                     continue
 
-                entity = _info_to_basic_info_entity(info, ticker, StockBasicInfoUSDB)
-                session.add(entity)
-                await session.flush()
+                await _upsert_basic_info(session, StockBasicInfoUSDB, _info_to_basic_info_values(info, ticker))
                 logger.info(f"  ✅ {ticker}: {info.get('shortName', 'N/A')}")
 
             except Exception as e:
@@ -295,16 +416,24 @@ async def fetch_us_basic_info(tickers: list[str] | None = None) -> None:
     logger.info("📋 美股基本信息获取完成")
 
 
+@with_provider_run
 async def fetch_all_yfinance_data(
     tickers: list[str] | None = None,
     period: str = "5y",
+    chunk_size: int | None = None,
+    full: bool = False,
 ) -> None:
     """运行所有 yfinance 数据获取任务.
 
+    基本信息先于日K线获取: 日K线的 name 取自基本信息表的简称. 基本信息按 ticker
+    upsert, 重复运行不会因唯一约束失败而拖累之后的日K线.
+
     Args:
         tickers: 指定 ticker 列表. 为空时使用 MVP 股票池.
                  会自动按后缀分流: .HK → 港股, 其余 → 美股.
         period: yfinance period 字符串, 默认 '5y'.
+        chunk_size: 每次 yf.download 请求的 ticker 数, 默认 Settings.YF_DOWNLOAD_CHUNK_SIZE.
+        full: 日K线忽略库中水位线, 按 period 全量下载并替换已有行.
     """
     logger.info("=" * 60)
     logger.info("🚀 开始 yfinance 数据获取")
@@ -318,10 +447,10 @@ async def fetch_all_yfinance_data(
         hk = None
         us = None
 
-    await fetch_hk_daily_prices(tickers=hk, period=period)
-    await fetch_us_daily_prices(tickers=us, period=period)
     await fetch_hk_basic_info(tickers=hk)
     await fetch_us_basic_info(tickers=us)
+    await fetch_hk_daily_prices(tickers=hk, period=period, chunk_size=chunk_size, full=full)
+    await fetch_us_daily_prices(tickers=us, period=period, chunk_size=chunk_size, full=full)
 
     logger.info("=" * 60)
     logger.info("🎉 yfinance 数据获取完成!")
@@ -341,9 +470,22 @@ def _parse_args() -> argparse.Namespace:
         default="5y",
         help="yfinance 数据周期, 如 1y/2y/5y/max (默认: 5y)",
     )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="每次 yf.download 请求的 ticker 数 (默认: Settings.YF_DOWNLOAD_CHUNK_SIZE)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="日K线忽略库中水位线, 按 period 全量下载并替换已有行 (默认: 增量)",
+    )
+    add_recording_args(parser)
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = _parse_args()
-    asyncio.run(fetch_all_yfinance_data(tickers=args.tickers, period=args.period))
+    configure_from_args(args)
+    asyncio.run(fetch_all_yfinance_data(tickers=args.tickers, period=args.period, chunk_size=args.chunk_size, full=args.full))
@@ -1,9 +1,62 @@
-"""SQLAlchemy declarative base for all ORM models."""
+"""SQLAlchemy declarative base and shared column types for all ORM models."""
 
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Date, Index, text
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.types import TypeDecorator
 
 
 class Base(DeclarativeBase):
     """Base class for all SQLAlchemy ORM models."""
 
     pass
+
+
+def to_date(value: str | date | np.datetime64 | None) -> date | None:
+    """YYYY-MM-DD 字符串 / datetime / pandas Timestamp / np.datetime64 → datetime.date (None 与空字符串为 None)."""
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value.strip()[:10]) if value.strip() else None
+    return np.datetime64(value, "D").item()
+
+
+# 日K线与指标 / 信号表按 trade_date 每年一个 RANGE 分区 (scripts/db/005_partition_by_year.sql).
+# 分区表的主键 / 唯一约束必须包含分区键, 这些表的主键为 (id, trade_date).
+YEARLY_PARTITION = {"postgresql_partition_by": "RANGE (trade_date)"}
+
+
+def latest_bars_index(name: str) -> Index:
+    """价格表 (ticker, trade_date DESC) 覆盖索引: 最近 N 根 K 线 / OHLCV 列式加载走 Index Only Scan.
+
+    (ticker, trade_date) 的其余查询由唯一约束承担, 不再为 ticker / name 单独建 B-tree
+    (scripts/db/006_rework_price_indexes.sql).
+    """
+    return Index(name, "ticker", text("trade_date DESC"), postgresql_include=["open", "high", "low", "close", "volume"])
+
+
+def trade_date_brin(name: str) -> Index:
+    """指标 / 信号表的 trade_date BRIN 索引: 每个分区只有几个页, 代替单列 B-tree.
+
+    价格表保留 trade_date B-tree: 历史数据按 ticker 回填, BRIN 无法为面板加载排除页.
+    """
+    return Index(name, "trade_date", postgresql_using="brin", postgresql_with={"pages_per_range": 32})
+
+
+class TradeDate(TypeDecorator):
+    """Native DATE column for trade_date (交易日).
+
+    读出为 datetime.date; 写入 / 过滤时除 date 外也接受 YYYY-MM-DD 字符串
+    (asyncpg 的 DATE 参数只接受 date 对象), 调用方无需逐处转换.
+    """
+
+    impl = Date
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> date | None:
+        return to_date(value)
@@ -0,0 +1,344 @@
+"""Bulk write helpers — vectorized DataFrame → record tuples → asyncpg COPY.
+
+ORM 逐行写入 (iterrows + 每个单元格 Python 转换 + 每行一个实体) 在
+数千只股票 × 多年数据时是主要开销. 这里按列一次性完成 NaN → NULL 和
+四舍五入, 再通过 asyncpg ``copy_records_to_table`` 以 COPY 协议流式写入.
+
+多张表需要原子地一起更新时 (如同一 ticker 的六张指标表), 用 ``upsert_columns``
+把全部数据作为数组参数放进一条带数据修改 CTE 的语句: 每张表一个
+``INSERT ... SELECT FROM unnest(...) ON CONFLICT (ticker, trade_date) DO UPDATE``,
+单条语句天然原子, 读者看不到只更新了一半的结果集.
+
+Usage:
+    columns = copy_columns(model)
+    records = frame_to_records(df, columns, constants={"ticker": "AAPL"})
+    async with get_session() as session:
+        await copy_records(session, model, columns, records)
+
+    # 多表原子 upsert
+    values = frame_to_columns(df, columns, constants={"ticker": "AAPL"})
+    async with get_session() as session:
+        counts = await upsert_columns(session, [(model, columns, values)])
+"""
+
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Boolean, Column, Date, Float, Integer, String, Table
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from stock_agent.database.base import to_date
+
+# 由数据库默认值 / 自增填充, COPY 时不写
+DEFAULT_SKIP_COLUMNS = frozenset({"id", "symbol", "created_at", "updated_at"})
+
+# 行情 / 指标表的唯一键, upsert 的冲突目标
+UPSERT_KEY = ("ticker", "trade_date")
+
+# (model, columns, 按列组织的值) — upsert_columns 的一个写入目标
+UpsertTarget = tuple[type, Sequence[Column], Sequence[Sequence[Any]]]
+
+# upsert_chunked 单条语句最多写入的行数. 值以每列一个数组参数传入, 参数个数只取决于列数;
+# 按行分块限制单条语句与单个数组参数的大小
+UPSERT_CHUNK_ROWS = 5000
+
+
+def copy_columns(model: type, skip: frozenset[str] = DEFAULT_SKIP_COLUMNS) -> list[Column]:
+    """Return the model's table columns that a bulk write should populate."""
+    return [c for c in model.__table__.columns if c.name not in skip]  # type: ignore[attr-defined]
+
+
+def _column_values(series: pd.Series, column: Column, ndigits: int) -> np.ndarray:
+    """Convert one DataFrame column to an object array of Python values (NaN → None)."""
+    if isinstance(column.type, Float):
+        values = np.round(series.to_numpy(dtype=np.float64, na_value=np.nan), ndigits)
+        out = values.astype(object)
+        out[~np.isfinite(values)] = None
+        return out
+
+    if isinstance(column.type, Integer):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        mask = ~np.isfinite(values)
+        out = np.where(mask, 0, values).astype(np.int64).astype(object)
+        out[mask] = None
+        return out
+
+    if isinstance(column.type, Date) or isinstance(getattr(column.type, "impl_instance", None), Date):
+        # datetime64 / YYYY-MM-DD 字符串 / date 一次转换为 datetime64[D], 再转 datetime.date (NaT → None)
+        return series.to_numpy(dtype="datetime64[D]").astype(object)
+
+    if isinstance(column.type, Boolean):
+        mask = series.isna().to_numpy()
+        out = series.where(~mask, False).to_numpy(dtype=bool).astype(object)
+        out[mask] = None
+        return out
+
+    out = series.to_numpy(dtype=object)
+    out[pd.isna(out)] = None
+    return out
+
+
+def frame_to_columns(
+    df: pd.DataFrame,
+    columns: Sequence[Column],
+    constants: Mapping[str, Any] | None = None,
+    ndigits: int = 4,
+) -> list[list[Any]]:
+    """Vectorized DataFrame → one list of Python values per column, in ``columns`` order.
+
+    Args:
+        columns: 目标列 (通常来自 ``copy_columns``), 按列类型决定转换方式:
+                 Float 四舍五入到 ndigits 位, Integer 转 int, Boolean 转 bool,
+                 Date (含 TradeDate) 转 datetime.date, 其余原样; 所有 NaN / inf / None / NaT 统一转为 NULL.
+        constants: 整列常量 (如 ticker), 优先于 df 中的同名列.
+        ndigits: Float 列保留的小数位数.
+    """
+    constants = constants or {}
+    n = len(df)
+    arrays: list[list[Any]] = []
+    for column in columns:
+        if column.name in constants:
+            arrays.append([constants[column.name]] * n)
+        elif column.name in df.columns:
+            arrays.append(_column_values(df[column.name], column, ndigits).tolist())
+        else:
+            arrays.append([None] * n)
+    return arrays
+
+
+def frame_to_records(
+    df: pd.DataFrame,
+    columns: Sequence[Column],
+    constants: Mapping[str, Any] | None = None,
+    ndigits: int = 4,
+) -> list[tuple]:
+    """Vectorized DataFrame → list of record tuples in ``columns`` order (参数同 frame_to_columns)."""
+    return list(zip(*frame_to_columns(df, columns, constants, ndigits), strict=True))
+
+
+async def copy_records(
+    session: AsyncSession,
+    model: type,
+    columns: Sequence[Column | str],
+    records: Sequence[tuple],
+) -> int:
+    """Stream records into the model's table with COPY on the session's connection.
+
+    COPY 复用 session 的底层 asyncpg 连接, 与同一 session 中已执行的
+    DELETE 等语句处于同一事务内, 由 ``get_session`` 统一提交 / 回滚.
+    """
+    if not records:
+        return 0
+
+    table = model.__table__  # type: ignore[attr-defined]
+    names = [c if isinstance(c, str) else c.name for c in columns]
+
+    driver = await driver_connection(session)
+    await driver.copy_records_to_table(
+        table.name,
+        records=records,
+        columns=names,
+        schema_name=table.schema,
+    )
+    return len(records)
+
+
+async def driver_connection(session: AsyncSession) -> Any:
+    """The session's underlying asyncpg connection (COPY / 数组参数语句直接走驱动, 共享 bulk 与 columnar)."""
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    return raw.driver_connection
+
+
+def qualified_name(table: Table) -> str:
+    """schema.table (无 schema 时为表名), 用于手写 SQL."""
+    return f"{table.schema}.{table.name}" if table.schema else table.name
+
+
+def _array_type(column: Column, dialect: Any) -> str:
+    # 字符串列按 text 传入: 显式转换为 varchar(n) 会静默截断, 赋值转换才会校验长度
+    if isinstance(column.type, String):
+        return "text"
+    return column.type.compile(dialect=dialect)
+
+
+@lru_cache(maxsize=64)
+def _upsert_sql(targets: tuple[tuple[Table, tuple[Column, ...]], ...], replace: bool) -> str:
+    """Build the multi-table upsert statement (按表结构缓存).
+
+    参数顺序: [replace 时的 ticker 列表], 然后每个目标的各列数组.
+    """
+    dialect = postgresql.dialect()  # type: ignore[no-untyped-call]
+    ctes: list[str] = []
+    counts: list[str] = []
+    param = 1
+    if replace:
+        replace_param = f"${param}::text[]"
+        param += 1
+
+    for i, (table, columns) in enumerate(targets):
+        names = [c.name for c in columns]
+        arrays: dict[str, str] = {}
+        for column in columns:
+            arrays[column.name] = f"${param}::{_array_type(column, dialect)}[]"
+            param += 1
+
+        name = qualified_name(table)
+        updates = [n for n in names if n not in UPSERT_KEY]
+        assignments = [f"{n} = EXCLUDED.{n}" for n in updates]
+        if "updated_at" in table.c and "updated_at" not in names:
+            assignments.append("updated_at = now()")
+        current = ", ".join(f"t.{n}" for n in updates)
+        incoming = ", ".join(f"EXCLUDED.{n}" for n in updates)
+
+        ctes.append(
+            f"u{i} AS (INSERT INTO {name} AS t ({', '.join(names)}) "
+            f"SELECT * FROM unnest({', '.join(arrays.values())}) "
+            f"ON CONFLICT ({', '.join(UPSERT_KEY)}) DO UPDATE SET {', '.join(assignments)} "
+            f"WHERE ({current}) IS DISTINCT FROM ({incoming}) "
+            f"RETURNING 1)"
+        )
+        if replace:
+            # 全量替换: 删除不在本次结果中的旧行. 与 upsert 的键不相交, 可在同一语句中执行
+            ctes.append(
+                f"d{i} AS (DELETE FROM {name} AS t WHERE t.ticker = ANY({replace_param}) "
+                f"AND NOT EXISTS (SELECT 1 FROM unnest({arrays['ticker']}, {arrays['trade_date']}) "
+                f"AS n(ticker, trade_date) WHERE n.ticker = t.ticker AND n.trade_date = t.trade_date))"
+            )
+        counts.append(f"(SELECT count(*) FROM u{i})")
+
+    return "WITH " + ",\n".join(ctes) + "\nSELECT " + ", ".join(counts)
+
+
+async def upsert_columns(
+    session: AsyncSession,
+    targets: Sequence[UpsertTarget],
+    replace_tickers: Sequence[str] | None = None,
+) -> list[int]:
+    """Upsert several tables atomically in one statement, keyed on (ticker, trade_date).
+
+    每个目标的值按列组织 (见 ``frame_to_columns``), 作为数组参数整体传入; 全部表
+    在同一条语句中写入, 约 2 次网络往返 (parse + execute), 不依赖显式事务.
+    冲突行仅在值有变化时更新 (并刷新 updated_at), 未变化的行不产生写入.
+
+    Args:
+        targets: (model, columns, 按列组织的值); columns 须包含 ticker 与 trade_date.
+        replace_tickers: 全量替换这些 ticker: 同一语句中删除其不在本次结果里的旧行.
+                         为空时只插入 / 更新传入的日期范围.
+
+    Returns:
+        每个目标实际插入或更新的行数.
+    """
+    if not targets:
+        return []
+
+    key = tuple(
+        (model.__table__, tuple(columns))  # type: ignore[attr-defined]
+        for model, columns, _ in targets
+    )
+    sql = _upsert_sql(key, replace_tickers is not None)
+
+    args: list[Any] = [list(replace_tickers)] if replace_tickers is not None else []
+    for _, _, values in targets:
+        args.extend(values)
+
+    driver = await driver_connection(session)
+    row = await driver.fetchrow(sql, *args)
+    return list(row)
+
+
+def entities_to_columns(entities: Sequence[Any], columns: Sequence[Column]) -> list[list[Any]]:
+    """ORM 实体 → 按列组织的值 (``upsert_columns`` 的输入), 按列类型规整.
+
+    Date (含 TradeDate) 转 datetime.date (asyncpg 不接受字符串), Float 的 NaN / inf 与
+    Integer 的 NaN 转为 NULL; ORM 写入时由 TypeDecorator 完成的转换在这里一次做完.
+    """
+    arrays: list[list[Any]] = []
+    for column in columns:
+        values = [getattr(entity, column.name, None) for entity in entities]
+        if isinstance(column.type, Date) or isinstance(getattr(column.type, "impl_instance", None), Date):
+            values = [to_date(v) for v in values]
+        elif isinstance(column.type, Float):
+            values = [float(v) if v is not None and np.isfinite(v) else None for v in values]
+        elif isinstance(column.type, Integer):
+            values = [int(v) if v is not None and np.isfinite(v) else None for v in values]
+        arrays.append(values)
+    return arrays
+
+
+@lru_cache(maxsize=64)
+def _delete_missing_sql(table: Table) -> str:
+    """删除给定 ticker 中不在 (ticker, trade_date) 数组里的旧行 (分块全量替换的第一步)."""
+    return (
+        f"DELETE FROM {qualified_name(table)} AS t WHERE t.ticker = ANY($1::text[]) "
+        f"AND NOT EXISTS (SELECT 1 FROM unnest($2::text[], $3::date[]) AS n(ticker, trade_date) "
+        f"WHERE n.ticker = t.ticker AND n.trade_date = t.trade_date)"
+    )
+
+
+async def upsert_chunked(
+    session: AsyncSession,
+    model: type,
+    columns: Sequence[Column],
+    values: Sequence[Sequence[Any]],
+    replace_tickers: Sequence[str] | None = None,
+    chunk_rows: int = UPSERT_CHUNK_ROWS,
+) -> int:
+    """Upsert one table on (ticker, trade_date) in statements of at most ``chunk_rows`` rows.
+
+    语义同单表的 ``upsert_columns``: 冲突行仅在值有变化时更新, 重复写入相同数据不产生写入.
+    多块写入时全量替换 (replace_tickers) 先用一条 DELETE 删除不在本次结果中的旧行,
+    再逐块 upsert; 各语句在 session 的同一事务中, 由调用方统一提交.
+
+    Returns:
+        实际插入或更新的行数.
+    """
+    n = len(values[0]) if values else 0
+    if n <= chunk_rows:
+        if not n and replace_tickers is None:
+            return 0
+        (count,) = await upsert_columns(session, [(model, columns, values)], replace_tickers)
+        return count
+
+    names = [c.name for c in columns]
+    if replace_tickers is not None:
+        driver = await driver_connection(session)
+        await driver.execute(
+            _delete_missing_sql(model.__table__),  # type: ignore[attr-defined]
+            list(replace_tickers),
+            values[names.index("ticker")],
+            values[names.index("trade_date")],
+        )
+    written = 0
+    for start in range(0, n, chunk_rows):
+        chunk = [column_values[start:start + chunk_rows] for column_values in values]
+        (count,) = await upsert_columns(session, [(model, columns, chunk)])
+        written += count
+    return written
+
+
+async def upsert_daily_prices(
+    session: AsyncSession,
+    model: type,
+    entities: Sequence[Any],
+    replace: bool = False,
+) -> int:
+    """Idempotently write daily price entities (StockDailyPrice*DB) with a chunked upsert.
+
+    ``StockRepository.upsert_daily_prices`` 的写入路径: 实体经 ``entities_to_columns`` 转为列数组后
+    按 (ticker, trade_date) upsert (代替 ``session.add_all`` + ``flush``, 后者重复运行会撞唯一约束),
+    值未变化的已有行不写入, 可安全重跑. 实体不加入会话; 写入在 session 的事务中, 由调用方提交.
+
+    Args:
+        replace: 全量替换实体涉及的 ticker: 同时删除其不在本次结果中的旧行.
+
+    Returns:
+        实际插入或更新的行数.
+    """
+    columns = copy_columns(model)
+    tickers = sorted({entity.ticker for entity in entities}) if replace else None
+    return await upsert_chunked(session, model, columns, entities_to_columns(entities, columns), tickers)
@@ -0,0 +1,249 @@
+"""Columnar reads — asyncpg binary COPY → typed numpy arrays (不经过 ORM).
+
+``select(model)`` 逐行实例化 ORM 对象, 再逐字段拷贝成 dict 列表才能构造
+DataFrame; 行情加载只需要 6 列数值. 这里用 ``COPY (SELECT ...) TO STDOUT
+(FORMAT binary)`` 只选需要的列, 并在 SQL 中把每列变为定长 (日期 → int4
+天数, NULL → NaN / 0), 于是每行二进制记录长度固定, 整个结果可直接用
+numpy 结构化 dtype 一次解码, 不产生逐行 / 逐单元格的 Python 对象.
+trade_date 为原生 DATE, 直接以天数传输后视为 datetime64[D], 不经过字符串.
+
+Usage:
+    async with get_session() as session:
+        cols = await load_price_columns(session, StockDailyPriceUSDB, "AAPL")
+    df = price_columns_to_frame(cols)          # 与 _load_price_data 输出相同的 DataFrame
+    table = price_columns_to_arrow(cols)       # pyarrow.Table (需要安装 pyarrow)
+"""
+
+import struct
+from collections.abc import Mapping, Sequence
+from datetime import date
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from stock_agent.database.base import to_date
+from stock_agent.database.bulk import driver_connection, qualified_name
+
+# 日期参数: date / datetime64 / YYYY-MM-DD 字符串 (经 to_date 转换), None 表示不限
+DateLike = date | np.datetime64 | str | None
+
+# 二进制 COPY 格式: 11 字节签名 + int32 flags + int32 扩展区长度; 结尾为 int16 -1
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_COPY_HEADER = struct.Struct(">11sii")
+_COPY_TRAILER = b"\xff\xff"
+
+# 定长列在二进制 COPY 中的编码 (网络字节序)
+_BINARY_DTYPES = {"int4": ">i4", "int8": ">i8", "float8": ">f8"}
+
+# 价格列: (输出名, SQL 表达式 (价格表别名 p), 二进制类型). 日期以距 1970-01-01 的天数传输
+PRICE_FIELDS: tuple[tuple[str, str, str], ...] = (
+    ("trade_date", "p.trade_date - DATE '1970-01-01'", "int4"),
+    ("open", "coalesce(p.open, 'NaN')", "float8"),
+    ("high", "coalesce(p.high, 'NaN')", "float8"),
+    ("low", "coalesce(p.low, 'NaN')", "float8"),
+    ("close", "coalesce(p.close, 'NaN')", "float8"),
+    ("volume", "coalesce(p.volume, 0)::int8", "int8"),
+)
+
+
+def _record_dtype(fields: Sequence[tuple[str, str, str]]) -> np.dtype:
+    """Structured dtype of one binary COPY tuple: int16 字段数, 然后每列 int32 长度 + 数据."""
+    layout: list[tuple[str, str]] = [("_nfields", ">i2")]
+    for name, _, pg_type in fields:
+        layout += [(f"_len_{name}", ">i4"), (name, _BINARY_DTYPES[pg_type])]
+    return np.dtype(layout)
+
+
+def decode_binary_copy(payload: bytes, fields: Sequence[tuple[str, str, str]]) -> dict[str, np.ndarray]:
+    """Decode a binary COPY payload of fixed-width, non-NULL columns into native-endian arrays.
+
+    Raises:
+        ValueError: 格式不符 (签名错误 / 出现 NULL / 字段数或长度与 fields 不一致).
+    """
+    signature, _flags, ext_len = _COPY_HEADER.unpack_from(payload)
+    if signature != _COPY_SIGNATURE or not payload.endswith(_COPY_TRAILER):
+        raise ValueError("not a PostgreSQL binary COPY payload")
+
+    dtype = _record_dtype(fields)
+    body = memoryview(payload)[_COPY_HEADER.size + ext_len:-len(_COPY_TRAILER)]
+    if len(body) % dtype.itemsize:
+        raise ValueError("binary COPY rows are not fixed-width (NULL or unexpected column type?)")
+
+    records = np.frombuffer(body, dtype=dtype)
+    if len(records) and (records["_nfields"] != len(fields)).any():
+        raise ValueError(f"expected {len(fields)} fields per row")
+    for name, _, pg_type in fields:
+        if len(records) and (records[f"_len_{name}"] != np.dtype(_BINARY_DTYPES[pg_type]).itemsize).any():
+            raise ValueError(f"column {name!r} is NULL or not {pg_type}")
+
+    return {name: records[name].astype(records.dtype[name].newbyteorder("=")) for name, _, _ in fields}
+
+
+async def copy_columns_from_query(
+    session: AsyncSession,
+    query: str,
+    args: Sequence[Any],
+    fields: Sequence[tuple[str, str, str]],
+) -> dict[str, np.ndarray]:
+    """Run ``COPY (query) TO STDOUT (FORMAT binary)`` on the session's connection and decode it.
+
+    query 须按 fields 的顺序选出各列 (fields 中的 SQL 表达式仅供调用方拼接).
+    """
+    chunks: list[bytes] = []
+
+    async def _sink(chunk: bytes) -> None:
+        chunks.append(chunk)
+
+    driver = await driver_connection(session)
+    await driver.copy_from_query(query, *args, output=_sink, format="binary")
+    return decode_binary_copy(b"".join(chunks), fields)
+
+
+def _price_source(table: str, start_date: DateLike, end_date: DateLike) -> tuple[str, list[Any]]:
+    """FROM / WHERE shared by the price and name queries.
+
+    参数: $1 ticker 数组, $2 对应的水位线数组 (NULL 表示全量), $3 预热 K 线数, 之后为日期区间.
+    每只 ticker 的预热起点为其水位线之前 (含) 第 warmup+1 根 K 线; 历史不足或无水位线时
+    (子查询为 NULL) 回退为全量.
+    """
+    args: list[Any] = []
+    clauses = [
+        f"p.trade_date > coalesce((SELECT c.trade_date FROM {table} c WHERE c.ticker = w.ticker "
+        f"AND c.trade_date <= w.since ORDER BY c.trade_date DESC OFFSET $3 LIMIT 1), '-infinity')"
+    ]
+    for op, value in ((">=", start_date), ("<=", end_date)):
+        if value is not None:
+            args.append(to_date(value))
+            clauses.append(f"p.trade_date {op} ${len(args) + 3}")
+    source = (
+        f"unnest($1::text[], $2::date[]) WITH ORDINALITY AS w(ticker, since, idx) "
+        f"JOIN {table} p ON p.ticker = w.ticker WHERE {' AND '.join(clauses)}"
+    )
+    return source, args
+
+
+async def load_price_columns_many(
+    session: AsyncSession,
+    model: type,
+    tickers: Sequence[str],
+    since: Mapping[str, DateLike] | None = None,
+    warmup: int = 0,
+    start_date: DateLike = None,
+    end_date: DateLike = None,
+    with_name: bool = True,
+) -> dict[str, dict[str, np.ndarray]]:
+    """Load OHLCV for a batch of tickers in one query, split into per-ticker array views.
+
+    结果按 (ticker, trade_date) 排序, ticker 以其在 tickers 中的序号 (定长 int4) 传输,
+    整批一次解码后按序号边界切片: 各 ticker 的数组是同一批缓冲区上的视图, 不再复制.
+
+    Args:
+        since: ticker → 增量水位线. 有水位线的 ticker 仅加载 trade_date > since 的新行以及
+               since 之前 (含) 的 warmup 根预热 K 线; 缺省 / None 为全量.
+        start_date / end_date: 闭区间过滤.
+        with_name: 同时加载 name 列 (按变化点单独查询后展开).
+
+    日期参数均接受 date / datetime64 / YYYY-MM-DD 字符串.
+
+    Returns:
+        {ticker: 列字典 (同 load_price_columns)}, 每只请求的 ticker 都有一项 (无数据时为空数组).
+    """
+    table: Table = model.__table__  # type: ignore[attr-defined]
+    name = qualified_name(table)
+    source, extra = _price_source(name, start_date, end_date)
+    since = since or {}
+    args: list[Any] = [list(tickers), [to_date(since.get(t)) for t in tickers], warmup, *extra]
+
+    fields = (("_idx", "w.idx::int4", "int4"), *PRICE_FIELDS)
+    cols = await copy_columns_from_query(
+        session,
+        f"SELECT {', '.join(expr for _, expr, _ in fields)} FROM {source} ORDER BY w.idx, p.trade_date",
+        args,
+        fields,
+    )
+
+    valid = ~np.isnan(np.stack([cols[c] for c in ("open", "high", "low", "close")])).any(axis=0)
+    if not valid.all():
+        cols = {key: values[valid] for key, values in cols.items()}
+    idx = cols.pop("_idx")
+    days = cols.pop("trade_date")
+    cols = {"trade_date": days.astype("datetime64[D]"), **cols}
+
+    if with_name:
+        # name 逐行几乎不变: 只取每只 ticker 的变化点 (首行 + 与前一行不同的行), 再按 (序号, 日期) 展开
+        driver = await driver_connection(session)
+        changes = await driver.fetch(
+            f"SELECT idx, day, name FROM (SELECT w.idx::int4 AS idx, p.trade_date - DATE '1970-01-01' AS day, "
+            f"p.name, row_number() OVER x AS rn, lag(p.name) OVER x AS prev FROM {source} "
+            f"WINDOW x AS (PARTITION BY w.idx ORDER BY p.trade_date)) s "
+            f"WHERE rn = 1 OR name IS DISTINCT FROM prev ORDER BY idx, day",
+            *args,
+        )
+        names = np.array([r["name"] for r in changes] + [None], dtype=object)
+        starts = _row_keys(
+            np.array([r["idx"] for r in changes], dtype=np.int64),
+            np.array([r["day"] for r in changes], dtype=np.int64),
+        )
+        pos = np.searchsorted(starts, _row_keys(idx, days), side="right") - 1
+        cols["name"] = names[np.where(pos >= 0, pos, -1)]
+
+    # 序号有序 (1-based) → 每只 ticker 的行区间, 切片为视图
+    bounds = np.searchsorted(idx, np.arange(1, len(tickers) + 2))
+    return {
+        ticker: {key: values[bounds[i]:bounds[i + 1]] for key, values in cols.items()}
+        for i, ticker in enumerate(tickers)
+    }
+
+
+async def load_price_columns(
+    session: AsyncSession,
+    model: type,
+    ticker: str,
+    since: DateLike = None,
+    warmup: int = 0,
+    start_date: DateLike = None,
+    end_date: DateLike = None,
+    with_name: bool = True,
+) -> dict[str, np.ndarray]:
+    """Load one ticker's OHLCV as typed arrays, ordered by trade_date.
+
+    Args:
+        since: 增量水位线. 仅加载 trade_date > since 的新行, 以及 since 之前 (含) 的 warmup 根预热 K 线.
+        start_date / end_date: 闭区间过滤 (date / datetime64 / YYYY-MM-DD).
+        with_name: 同时加载 name 列 (按变化点单独查询后展开, 通常只有 1 行).
+
+    Returns:
+        trade_date (datetime64[D]), open / high / low / close (float64), volume (int64),
+        name (object, 仅 with_name). OHLC 任一为 NULL / NaN 的行已剔除.
+    """
+    batch = await load_price_columns_many(
+        session, model, [ticker], {ticker: since}, warmup, start_date, end_date, with_name,
+    )
+    return batch[ticker]
+
+
+def _row_keys(idx: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """(ticker 序号, 日期天数) → 单调的 int64 键, 用于 searchsorted."""
+    return (idx.astype(np.int64) << 32) + (days.astype(np.int64) + (1 << 31))
+
+
+def price_columns_to_frame(cols: dict[str, np.ndarray]) -> pd.DataFrame:
+    """Arrays → DataFrame shaped like ``_load_price_data``'s output (trade_date 为 datetime64, 不做字符串格式化)."""
+    if not len(cols["trade_date"]):
+        return pd.DataFrame()
+    data: dict[str, Any] = {"trade_date": cols["trade_date"]}
+    if "name" in cols:
+        data["name"] = cols["name"]
+    for key in ("open", "high", "low", "close", "volume"):
+        data[key] = cols[key]
+    return pd.DataFrame(data, copy=False)
+
+
+def price_columns_to_arrow(cols: dict[str, np.ndarray]) -> Any:
+    """Arrays → ``pyarrow.Table`` (trade_date 为 date32). 需要安装 pyarrow."""
+    import pyarrow as pa
+
+    return pa.table({key: pa.array(values) for key, values in cols.items()})
@@ -54,6 +54,9 @@ from stock_agent.database.models.vector import (
 from stock_agent.database.models.user import ChatMessage, ChatSession, User
 from stock_agent.database.models.agent_log import AgentExecutionLog
 
+# Pipeline state models
+from stock_agent.database.models.indicator_state import IndicatorStreamState
+
 __all__ = [
     # A-share
     "StockBasicInfoA",
@@ -98,4 +101,6 @@ __all__ = [
     "ChatSession",
     "ChatMessage",
     "AgentExecutionLog",
+    # Pipeline state
+    "IndicatorStreamState",
 ]
@@ -0,0 +1,30 @@
+"""Online indicator state model — 流式指标状态机的持久化."""
+
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from stock_agent.database.base import Base, TradeDate
+
+
+class IndicatorStreamState(Base):
+    """流式指标状态表 — 每只股票一行, 保存 OnlineIndicatorState 的 JSON 快照.
+
+    worker 重启后从 trade_date 之后的 K 线继续更新, 无需重新加载价格历史.
+    """
+
+    __tablename__ = "indicator_stream_state"
+    __table_args__ = (
+        UniqueConstraint("ticker", "market", name="uq_indicator_stream_state_ticker_market"),
+        {"comment": "流式指标状态表"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ticker = Column(String(50), nullable=False, comment="股票代码")
+    market = Column(String(10), nullable=False, comment="市场: CN / HK / US")
+    trade_date = Column(TradeDate, nullable=False, comment="状态已处理到的交易日")
+    bars = Column(Integer, nullable=False, default=0, comment="已处理的 K 线数量")
+    version = Column(Integer, nullable=False, default=1, comment="状态格式版本")
+    state = Column(JSONB, nullable=False, comment="各指标状态机的 JSON 快照")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
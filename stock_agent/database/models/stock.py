@@ -2,7 +2,7 @@ from sqlalchemy import Column, String, Integer, \
 DateTime, Float, Boolean, Text, ForeignKey, Index, UniqueConstraint
 #from sqlalchemy.ext.declarative import declarative_base
 import datetime
-from stock_agent.database.base import Base # 修正导入路径
+from stock_agent.database.base import YEARLY_PARTITION, Base, TradeDate, latest_bars_index, trade_date_brin # 修正导入路径
 
 #Base = declarative_base()
 
@@ -36,10 +36,10 @@ class StockDailyPriceDB(Base):
     __tablename__ = "stock_daily_price"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String(10), nullable=False, index=True, comment="股票代码")
+    ticker = Column(String(10), nullable=False, comment="股票代码")
     symbol = Column(String(20), comment="股票代码（含市场标识）")
-    name = Column(String(50), index=True, comment="股票名称")
-    trade_date = Column(String(10), index=True, comment="交易日期")
+    name = Column(String(50), comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     open = Column(Float, comment="开盘价")
     high = Column(Float, comment="最高价")
     low = Column(Float, comment="最低价")
@@ -56,9 +56,9 @@ class StockDailyPriceDB(Base):
     # 创建索引和唯一约束
     __table_args__ = (
         UniqueConstraint('ticker', 'trade_date', name='uq_stock_daily_ticker_date'),
-        Index('idx_stock_daily_price_ticker', 'ticker'),
-        Index('idx_stock_daily_price_name', 'name'),
+        latest_bars_index('idx_stock_daily_price_ticker_date_desc'),
         Index('idx_stock_daily_price_trade_date', 'trade_date'),
+        YEARLY_PARTITION,
     )
 
     def __repr__(self):
@@ -72,10 +72,10 @@ class StockTechnicalIndicatorsDB(Base):
     __table_args__ = {'comment': '股票基本技术指标数据表'}
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String(10), nullable=False, index=True, comment="股票代码")
+    ticker = Column(String(10), nullable=False, comment="股票代码")
     symbol = Column(String(20), comment="股票代码（含市场标识）")
-    name = Column(String(50), index=True, comment="股票名称")
-    trade_date = Column(String(10), index=True, comment="交易日期")
+    name = Column(String(50), comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     ma5 = Column(Float, comment="5日均线")
     ma10 = Column(Float, comment="10日均线")
     ma20 = Column(Float, comment="20日均线")
@@ -98,11 +98,8 @@ class StockTechnicalIndicatorsDB(Base):
 
     __table_args__ = (
         UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_ind_ticker_date'),
-        # 在columns上已经指定index=True属性,所以不需要另外加索引
-        #Index('idx_stock_tech_ind_ticker', 'ticker'),
-        #Index('idx_stock_tech_ind_trade_date', 'trade_date'),
-        #Index('idx_stock_tech_ind_ticker_trade_date', 'ticker', 'trade_date'),
-        {'comment': '股票基本技术指标数据表'}
+        trade_date_brin('idx_stock_tech_ind_trade_date_brin'),
+        {'comment': '股票基本技术指标数据表', **YEARLY_PARTITION}
     )
 
     def __repr__(self):
@@ -114,10 +111,10 @@ class StockTechnicalTrendSignalIndicatorsDB(Base):
     __table_args__ = {'comment': '股票趋势跟踪策略信号指标数据表'}
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String(10), nullable=False, index=True, comment="股票代码")
+    ticker = Column(String(10), nullable=False, comment="股票代码")
     symbol = Column(String(20), comment="股票代码（含市场标识）")
-    name = Column(String(50), index=True, comment="股票名称")
-    trade_date = Column(String(10), index=True, comment="交易日期")
+    name = Column(String(50), comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     ema_8 = Column(Float, comment="8日指数移动平均线")
     ema_21 = Column(Float, comment="21日指数移动平均线")
     ema_55 = Column(Float, comment="55日指数移动平均线")
@@ -134,10 +131,8 @@ class StockTechnicalTrendSignalIndicatorsDB(Base):
 
     __table_args__ = (
         UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_trend_ticker_date'),
-        #Index('idx_stock_tech_trend_ticker', 'ticker'),
-        #Index('idx_stock_tech_trend_trade_date', 'trade_date'),
-        #Index('idx_stock_tech_ind_ticker_trade_date', 'ticker', 'trade_date'),
-        {'comment': '股票趋势跟踪策略信号指标数据表'}
+        trade_date_brin('idx_stock_tech_trend_trade_date_brin'),
+        {'comment': '股票趋势跟踪策略信号指标数据表', **YEARLY_PARTITION}
     )
 
     def __repr__(self):
@@ -149,10 +144,10 @@ class StockTechnicalMeanReversionSignalIndicatorsDB(Base):
     __table_args__ = {'comment': '股票均值回归策略信号指标数据表'}
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String(10), nullable=False, index=True, comment="股票代码")
+    ticker = Column(String(10), nullable=False, comment="股票代码")
     symbol = Column(String(20), comment="股票代码（含市场标识）")
-    name = Column(String(50), index=True, comment="股票名称")
-    trade_date = Column(String(10), index=True, comment="交易日期")
+    name = Column(String(50), comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     ma_50 = Column(Float, comment="50日简单移动平均线")
     std_50 = Column(Float, comment="50日价格标准差")
     z_score = Column(Float, comment="价格Z-Score")
@@ -169,10 +164,8 @@ class StockTechnicalMeanReversionSignalIndicatorsDB(Base):
 
     __table_args__ = (
         UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_mean_rev_ticker_date'),
-        Index('idx_stock_tech_mean_rev_ticker', 'ticker'),
-        Index('idx_stock_tech_mean_rev_trade_date', 'trade_date'),
-        #Index('idx_stock_tech_ind_ticker_trade_date', 'ticker', 'trade_date'),
-        {'comment': '股票均值回归策略信号指标数据表'}
+        trade_date_brin('idx_stock_tech_mean_rev_trade_date_brin'),
+        {'comment': '股票均值回归策略信号指标数据表', **YEARLY_PARTITION}
     )
 
     def __repr__(self):
@@ -184,10 +177,10 @@ class StockTechnicalMomentumSignalIndicatorsDB(Base):
     __table_args__ = {'comment': '股票动量策略信号指标数据表'}
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String(10), nullable=False, index=True, comment="股票代码")
+    ticker = Column(String(10), nullable=False, comment="股票代码")
     symbol = Column(String(20), comment="股票代码（含市场标识）")
-    name = Column(String(50), index=True, comment="股票名称")
-    trade_date = Column(String(10), index=True, comment="交易日期")
+    name = Column(String(50), comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     returns = Column(Float, comment="日收益率")
     mom_1m = Column(Float, comment="1个月累计收益率")
     mom_3m = Column(Float, comment="3个月累计收益率")
@@ -203,10 +196,8 @@ class StockTechnicalMomentumSignalIndicatorsDB(Base):
 
     __table_args__ = (
         UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_momentum_ticker_date'),
-        Index('idx_stock_tech_momentum_ticker', 'ticker'),
-        Index('idx_stock_tech_momentum_trade_date', 'trade_date'),
-        #Index('idx_stock_tech_ind_ticker_trade_date', 'ticker', 'trade_date'),
-        {'comment': '股票动量策略信号指标数据表'}
+        trade_date_brin('idx_stock_tech_momentum_trade_date_brin'),
+        {'comment': '股票动量策略信号指标数据表', **YEARLY_PARTITION}
     )
 
     def __repr__(self):
@@ -218,10 +209,10 @@ class StockTechnicalVolatilitySignalIndicatorsDB(Base):
     __table_args__ = {'comment': '股票波动率策略信号指标数据表'}
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String(10), nullable=False, index=True, comment="股票代码")
+    ticker = Column(String(10), nullable=False, comment="股票代码")
     symbol = Column(String(20), comment="股票代码（含市场标识）")
-    name = Column(String(50), index=True, comment="股票名称")
-    trade_date = Column(String(10), index=True, comment="交易日期")
+    name = Column(String(50), comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     returns = Column(Float, comment="日收益率")
     hist_vol_21 = Column(Float, comment="21日历史波动率 (年化)")
     vol_ma_63 = Column(Float, comment="63日历史波动率的SMA")
@@ -237,10 +228,8 @@ class StockTechnicalVolatilitySignalIndicatorsDB(Base):
 
     __table_args__ = (
         UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_volatility_ticker_date'),
-        Index('idx_stock_tech_volatility_ticker', 'ticker'),
-        Index('idx_stock_tech_volatility_trade_date', 'trade_date'),
-        #Index('idx_stock_tech_ind_ticker_trade_date', 'ticker', 'trade_date'),
-        {'comment': '股票波动率策略信号指标数据表'}
+        trade_date_brin('idx_stock_tech_volatility_trade_date_brin'),
+        {'comment': '股票波动率策略信号指标数据表', **YEARLY_PARTITION}
     )
 
     def __repr__(self):
@@ -252,10 +241,10 @@ class StockTechnicalStatArbSignalIndicatorsDB(Base):
     __table_args__ = {'comment': '股票统计套利策略信号指标数据表'}
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String(10), nullable=False, index=True, comment="股票代码")
+    ticker = Column(String(10), nullable=False, comment="股票代码")
     symbol = Column(String(20), comment="股票代码（含市场标识）")
-    name = Column(String(50), index=True, comment="股票名称")
-    trade_date = Column(String(10), index=True, comment="交易日期")
+    name = Column(String(50), comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     returns = Column(Float, comment="日收益率")
     skew_63 = Column(Float, comment="63日收益率偏度")
     kurt_63 = Column(Float, comment="63日收益率峰度")
@@ -267,9 +256,8 @@ class StockTechnicalStatArbSignalIndicatorsDB(Base):
 
     __table_args__ = (
         UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_stat_arb_ticker_date'),
-        Index('idx_stock_tech_stat_arb_ticker', 'ticker'),
-        Index('idx_stock_tech_stat_arb_trade_date', 'trade_date'),
-        {'comment': '股票统计套利策略信号指标数据表'}
+        trade_date_brin('idx_stock_tech_stat_arb_trade_date_brin'),
+        {'comment': '股票统计套利策略信号指标数据表', **YEARLY_PARTITION}
     )
 
     def __repr__(self):
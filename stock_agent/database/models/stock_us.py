@@ -2,7 +2,7 @@ from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, D
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 import datetime
-from stock_agent.database.base import Base
+from stock_agent.database.base import YEARLY_PARTITION, Base, TradeDate, latest_bars_index, trade_date_brin
 
 #Base = declarative_base()
 
@@ -10,9 +10,9 @@ class StockDailyPriceUSDB(Base):
     __tablename__ = 'stock_daily_price_us'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String, index=True, nullable=False, comment="股票代码")
-    name = Column(String, index=True, comment="股票名称")
-    trade_date = Column(String, index=True, comment="交易日期") # Consider Date type if appropriate
+    ticker = Column(String, nullable=False, comment="股票代码")
+    name = Column(String, comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     open = Column(Float, comment="开盘价")
     high = Column(Float, comment="最高价")
     low = Column(Float, comment="最低价")
@@ -26,15 +26,20 @@ class StockDailyPriceUSDB(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    __table_args__ = (UniqueConstraint('ticker', 'trade_date', name='uq_stock_daily_price_us_ticker_date'), {'comment': '美国股票每日价格数据表'})
+    __table_args__ = (
+        UniqueConstraint('ticker', 'trade_date', name='uq_stock_daily_price_us_ticker_date'),
+        latest_bars_index('idx_stock_daily_price_us_ticker_date_desc'),
+        Index('idx_stock_daily_price_us_trade_date', 'trade_date'),
+        {'comment': '美国股票每日价格数据表', **YEARLY_PARTITION},
+    )
 
 class StockTechnicalIndicatorsUSDB(Base):
     __tablename__ = 'stock_technical_indicators_us'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String, index=True, nullable=False, comment="股票代码")
-    name = Column(String, index=True, comment="股票名称")
-    trade_date = Column(String, index=True, comment="交易日期") # Consider Date type
+    ticker = Column(String, nullable=False, comment="股票代码")
+    name = Column(String, comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     ma5 = Column(Float, comment="5日均线")
     ma10 = Column(Float, comment="10日均线")
     ma20 = Column(Float, comment="20日均线")
@@ -55,15 +60,19 @@ class StockTechnicalIndicatorsUSDB(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    __table_args__ = (UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_indicators_us_ticker_date'), {'comment': '美国股票技术指标数据表'})
+    __table_args__ = (
+        UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_indicators_us_ticker_date'),
+        trade_date_brin('idx_stock_tech_ind_us_trade_date_brin'),
+        {'comment': '美国股票技术指标数据表', **YEARLY_PARTITION},
+    )
 
 class StockTechnicalTrendSignalIndicatorsUSDB(Base):
     __tablename__ = 'stock_technical_trend_signal_indicators_us'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String, index=True, nullable=False, comment="股票代码")
-    name = Column(String, index=True, comment="股票名称")
-    trade_date = Column(String, index=True, comment="交易日期")
+    ticker = Column(String, nullable=False, comment="股票代码")
+    name = Column(String, comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     ema_8 = Column(Float, comment="8日指数移动平均线")
     ema_21 = Column(Float, comment="21日指数移动平均线")
     ema_55 = Column(Float, comment="55日指数移动平均线")
@@ -78,15 +87,19 @@ class StockTechnicalTrendSignalIndicatorsUSDB(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    __table_args__ = (UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_trend_sig_us_ticker_date'), {'comment': '美国股票技术趋势信号指标数据表'})
+    __table_args__ = (
+        UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_trend_sig_us_ticker_date'),
+        trade_date_brin('idx_stock_tech_trend_us_trade_date_brin'),
+        {'comment': '美国股票技术趋势信号指标数据表', **YEARLY_PARTITION},
+    )
 
 class StockTechnicalMeanReversionSignalIndicatorsUSDB(Base):
     __tablename__ = 'stock_technical_mean_reversion_signal_indicators_us'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String, index=True, nullable=False, comment="股票代码")
-    name = Column(String, index=True, comment="股票名称")
-    trade_date = Column(String, index=True, comment="交易日期")
+    ticker = Column(String, nullable=False, comment="股票代码")
+    name = Column(String, comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     ma_50 = Column(Float, comment="50日简单移动平均线")
     std_50 = Column(Float, comment="50日价格标准差")
     z_score = Column(Float, comment="价格Z-Score")
@@ -101,15 +114,19 @@ class StockTechnicalMeanReversionSignalIndicatorsUSDB(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    __table_args__ = (UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_mean_rev_sig_us_ticker_date'), {'comment': '美国股票技术均值回归信号指标数据表'})
+    __table_args__ = (
+        UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_mean_rev_sig_us_ticker_date'),
+        trade_date_brin('idx_stock_tech_mean_rev_us_trade_date_brin'),
+        {'comment': '美国股票技术均值回归信号指标数据表', **YEARLY_PARTITION},
+    )
 
 class StockTechnicalMomentumSignalIndicatorsUSDB(Base):
     __tablename__ = 'stock_technical_momentum_signal_indicators_us'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String, index=True, nullable=False, comment="股票代码")
-    name = Column(String, index=True, comment="股票名称")
-    trade_date = Column(String, index=True, comment="交易日期")
+    ticker = Column(String, nullable=False, comment="股票代码")
+    name = Column(String, comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     returns = Column(Float, comment="日收益率")
     mom_1m = Column(Float, comment="1个月累计收益率")
     mom_3m = Column(Float, comment="3个月累计收益率")
@@ -123,15 +140,19 @@ class StockTechnicalMomentumSignalIndicatorsUSDB(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    __table_args__ = (UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_momentum_sig_us_ticker_date'), {'comment': '美国股票技术动量信号指标数据表'})
+    __table_args__ = (
+        UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_momentum_sig_us_ticker_date'),
+        trade_date_brin('idx_stock_tech_momentum_us_trade_date_brin'),
+        {'comment': '美国股票技术动量信号指标数据表', **YEARLY_PARTITION},
+    )
 
 class StockTechnicalVolatilitySignalIndicatorsUSDB(Base):
     __tablename__ = 'stock_technical_volatility_signal_indicators_us'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String, index=True, nullable=False, comment="股票代码")
-    name = Column(String, index=True, comment="股票名称")
-    trade_date = Column(String, index=True, comment="交易日期")
+    ticker = Column(String, nullable=False, comment="股票代码")
+    name = Column(String, comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     returns = Column(Float, comment="日收益率")
     hist_vol_21 = Column(Float, comment="21日历史波动率 (年化)")
     vol_ma_63 = Column(Float, comment="63日历史波动率的SMA")
@@ -145,15 +166,19 @@ class StockTechnicalVolatilitySignalIndicatorsUSDB(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    __table_args__ = (UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_volatility_sig_us_ticker_date'), {'comment': '美国股票技术波动率信号指标数据表'})
+    __table_args__ = (
+        UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_volatility_sig_us_ticker_date'),
+        trade_date_brin('idx_stock_tech_volatility_us_trade_date_brin'),
+        {'comment': '美国股票技术波动率信号指标数据表', **YEARLY_PARTITION},
+    )
 
 class StockTechnicalStatArbSignalIndicatorsUSDB(Base):
     __tablename__ = 'stock_technical_stat_arb_signal_indicators_us'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticker = Column(String, index=True, nullable=False, comment="股票代码")
-    name = Column(String, index=True, comment="股票名称")
-    trade_date = Column(String, index=True, comment="交易日期")
+    ticker = Column(String, nullable=False, comment="股票代码")
+    name = Column(String, comment="股票名称")
+    trade_date = Column(TradeDate, primary_key=True, comment="交易日期 (分区键)")
     returns = Column(Float, comment="日收益率")
     skew_63 = Column(Float, comment="63日收益率偏度")
     kurt_63 = Column(Float, comment="63日收益率峰度")
@@ -163,7 +188,11 @@ class StockTechnicalStatArbSignalIndicatorsUSDB(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    __table_args__ = (UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_stat_arb_sig_us_ticker_date'), {'comment': '美国股票技术统计套利信号指标数据表'})
+    __table_args__ = (
+        UniqueConstraint('ticker', 'trade_date', name='uq_stock_tech_stat_arb_sig_us_ticker_date'),
+        trade_date_brin('idx_stock_tech_stat_arb_us_trade_date_brin'),
+        {'comment': '美国股票技术统计套利信号指标数据表', **YEARLY_PARTITION},
+    )
 
 class StockIndexBasicUSDB(Base):
     __tablename__ = 'stock_index_basic_us'
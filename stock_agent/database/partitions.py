@@ -0,0 +1,190 @@
+"""Yearly trade_date partitions — 日K线与指标 / 信号表年度分区的创建与归档.
+
+scripts/db/005_partition_by_year.sql 把下列 21 张表转换为 PARTITION BY RANGE (trade_date),
+每年一个分区 ``{table}_y{year}``, 并安装两个 SQL 函数:
+
+    ensure_trade_date_partitions(parent, first_year, last_year)   补建缺失的年度分区
+    archive_trade_date_partitions(parent, before_year)            DETACH 旧年份分区并移入 archive schema
+
+写入前调用 ``ensure_year_partitions`` 按数据涉及的年份补建分区 (每个进程对每张表 / 年份
+只检查一次), 跨年后的第一次写入不会因缺少分区而失败. 旧年份用 ``archive_year_partitions``
+整个分区 DETACH, 代替逐行 DELETE. 未执行 005 (表未分区) 时两者均为空操作.
+
+Usage:
+    python -m stock_agent.database.partitions                          # 全部市场补建到明年
+    python -m stock_agent.database.partitions --market US --years 2010 2027
+    python -m stock_agent.database.partitions --market US --archive-before 2015
+"""
+
+import argparse
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from stock_agent.database.models import (
+    StockDailyPriceDB,
+    StockDailyPriceHKDB,
+    StockDailyPriceUSDB,
+    StockTechnicalIndicatorsDB,
+    StockTechnicalIndicatorsHKDB,
+    StockTechnicalIndicatorsUSDB,
+    StockTechnicalMeanReversionSignalIndicatorsDB,
+    StockTechnicalMeanReversionSignalIndicatorsHKDB,
+    StockTechnicalMeanReversionSignalIndicatorsUSDB,
+    StockTechnicalMomentumSignalIndicatorsDB,
+    StockTechnicalMomentumSignalIndicatorsHKDB,
+    StockTechnicalMomentumSignalIndicatorsUSDB,
+    StockTechnicalStatArbSignalIndicatorsDB,
+    StockTechnicalStatArbSignalIndicatorsHKDB,
+    StockTechnicalStatArbSignalIndicatorsUSDB,
+    StockTechnicalTrendSignalIndicatorsDB,
+    StockTechnicalTrendSignalIndicatorsHKDB,
+    StockTechnicalTrendSignalIndicatorsUSDB,
+    StockTechnicalVolatilitySignalIndicatorsDB,
+    StockTechnicalVolatilitySignalIndicatorsHKDB,
+    StockTechnicalVolatilitySignalIndicatorsUSDB,
+)
+from stock_agent.database.session import get_session
+
+logger = logging.getLogger(__name__)
+
+# 市场 → 按年分区的表 (日K线 + 基础指标 + 五张信号表)
+PARTITIONED_MODELS: dict[str, tuple[type, ...]] = {
+    "CN": (
+        StockDailyPriceDB,
+        StockTechnicalIndicatorsDB,
+        StockTechnicalTrendSignalIndicatorsDB,
+        StockTechnicalMeanReversionSignalIndicatorsDB,
+        StockTechnicalMomentumSignalIndicatorsDB,
+        StockTechnicalVolatilitySignalIndicatorsDB,
+        StockTechnicalStatArbSignalIndicatorsDB,
+    ),
+    "HK": (
+        StockDailyPriceHKDB,
+        StockTechnicalIndicatorsHKDB,
+        StockTechnicalTrendSignalIndicatorsHKDB,
+        StockTechnicalMeanReversionSignalIndicatorsHKDB,
+        StockTechnicalMomentumSignalIndicatorsHKDB,
+        StockTechnicalVolatilitySignalIndicatorsHKDB,
+        StockTechnicalStatArbSignalIndicatorsHKDB,
+    ),
+    "US": (
+        StockDailyPriceUSDB,
+        StockTechnicalIndicatorsUSDB,
+        StockTechnicalTrendSignalIndicatorsUSDB,
+        StockTechnicalMeanReversionSignalIndicatorsUSDB,
+        StockTechnicalMomentumSignalIndicatorsUSDB,
+        StockTechnicalVolatilitySignalIndicatorsUSDB,
+        StockTechnicalStatArbSignalIndicatorsUSDB,
+    ),
+}
+
+_ENSURE_SQL = text("SELECT ensure_trade_date_partitions(CAST(:table AS regclass), :first_year, :last_year)")
+_ARCHIVE_SQL = text("SELECT archive_trade_date_partitions(CAST(:table AS regclass), :before_year)")
+_INSTALLED_SQL = text("SELECT to_regprocedure('ensure_trade_date_partitions(regclass, integer, integer)') IS NOT NULL")
+
+# 本进程已确认存在的 (表, 年份); 分区只增不减 (归档的是旧年份), 缓存无需失效
+_known_partitions: set[tuple[str, int]] = set()
+
+
+async def ensure_year_partitions(
+    models: Iterable[type],
+    years: Iterable[int],
+    session: AsyncSession | None = None,
+) -> int:
+    """确保 models 对应的表都有 years 各年 (含中间年份) 的分区, 返回新建的分区数.
+
+    Args:
+        session: 调用方已在该会话中写过这些表时必须传入. 新建分区需要父表的
+                 ACCESS EXCLUSIVE 锁, 换一个连接会等待调用方自己未提交的写入而卡住;
+                 传入时 DDL 随调用方事务提交, 调用方可能回滚, 因此不记入进程内缓存.
+                 默认在独立的短事务中执行, 提交后记入缓存.
+
+    数据库未执行 005 迁移时直接返回 0.
+    """
+    years = {int(y) for y in years}
+    if not years:
+        return 0
+    first_year, last_year = min(years), max(years)
+    span = range(first_year, last_year + 1)
+    tables = [m.__tablename__ for m in models]
+    missing = [t for t in tables if any((t, y) not in _known_partitions for y in span)]
+    if not missing:
+        return 0
+
+    async def ensure(session: AsyncSession) -> int:
+        if not await session.scalar(_INSTALLED_SQL):
+            return 0
+        created = 0
+        for table in missing:
+            created += await session.scalar(
+                _ENSURE_SQL, {"table": table, "first_year": first_year, "last_year": last_year}
+            )
+        return created
+
+    if session is not None:
+        # DDL 随调用方事务提交或回滚, 这里无法得知结果, 不写入缓存
+        created = await ensure(session)
+    else:
+        async with get_session() as own_session:
+            created = await ensure(own_session)
+        # 独立事务已提交, 分区确实存在
+        _known_partitions.update((t, y) for t in missing for y in span)
+    if created:
+        logger.info(f"🗂 新建 {created} 个年度分区 ({first_year}..{last_year}): {', '.join(missing)}")
+    return created
+
+
+async def archive_year_partitions(market: str, before_year: int) -> list[str]:
+    """把该市场各分区表中 before_year 之前年份的分区 DETACH 并移入 archive schema.
+
+    Returns:
+        归档后的表名 (archive.{table}_y{year}).
+    """
+    archived: list[str] = []
+    async with get_session() as session:
+        for model in PARTITIONED_MODELS[market]:
+            result = await session.execute(_ARCHIVE_SQL, {"table": model.__tablename__, "before_year": before_year})
+            archived.extend(result.scalars())
+    for name in archived:
+        logger.info(f"  📦 {name}")
+    return archived
+
+
+async def maintain_partitions(
+    markets: list[str],
+    years: tuple[int, int] | None = None,
+    archive_before: int | None = None,
+) -> None:
+    """补建年度分区 (默认今年和明年), 可选归档旧年份."""
+    first_year, last_year = years or (date.today().year, date.today().year + 1)
+    for market in markets:
+        created = await ensure_year_partitions(PARTITIONED_MODELS[market], range(first_year, last_year + 1))
+        logger.info(f"✅ {market}: {first_year}..{last_year} 分区就绪, 新建 {created} 个")
+        if archive_before is not None:
+            archived = await archive_year_partitions(market, archive_before)
+            logger.info(f"📦 {market}: 归档 {archive_before} 年之前的 {len(archived)} 个分区")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="日K线与指标表年度分区: 补建 / 归档")
+    parser.add_argument("--market", choices=["CN", "HK", "US"], default=None, help="目标市场 (默认全部)")
+    parser.add_argument(
+        "--years", type=int, nargs=2, metavar=("FIRST", "LAST"), default=None, help="补建的年份区间 (默认今年..明年)"
+    )
+    parser.add_argument("--archive-before", type=int, default=None, help="DETACH 该年之前的分区并移入 archive schema")
+    args = parser.parse_args()
+    if args.years and args.years[0] > args.years[1]:
+        parser.error("--years FIRST must be <= LAST")
+
+    markets = [args.market] if args.market else list(PARTITIONED_MODELS)
+    asyncio.run(maintain_partitions(markets, tuple(args.years) if args.years else None, args.archive_before))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 """Stock data repository — auto-routes queries to market-specific tables."""
 
+from datetime import date
 from typing import Any
 
+import numpy as np
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from stock_agent.database.base import Base
+from stock_agent.database import bulk
+from stock_agent.database.base import Base, to_date
+from stock_agent.database.columnar import load_price_columns
 from stock_agent.database.models.stock import (
     FinancialMetricsDB,
     StockBasicInfoDB,
@@ -40,6 +44,7 @@ from stock_agent.database.models.stock_us import (
     StockTechnicalTrendSignalIndicatorsUSDB,
     StockTechnicalVolatilitySignalIndicatorsUSDB,
 )
+from stock_agent.database.partitions import ensure_year_partitions
 from stock_agent.database.repositories.base import BaseRepository
 
 # ---- Market Routing Maps ----
@@ -134,8 +139,8 @@ class StockRepository:
         self,
         ticker: str,
         market: str,
-        start_date: str | None = None,
-        end_date: str | None = None,
+        start_date: str | date | None = None,
+        end_date: str | date | None = None,
         limit: int = 500,
     ) -> list[Any]:
         """获取日K线数据，按 market 路由."""
@@ -149,12 +154,37 @@ class StockRepository:
         result = await self.session.execute(stmt)
         return list(result.scalars().all())
 
-    async def upsert_daily_prices(self, entities: list[Any], market: str) -> int:
-        """批量写入日K线数据 (add_all + flush)."""
-        _resolve_model(_DAILY_PRICE_MAP, market)  # validate market
-        self.session.add_all(entities)
-        await self.session.flush()
-        return len(entities)
+    async def get_daily_price_columns(
+        self,
+        ticker: str,
+        market: str,
+        start_date: str | date | None = None,
+        end_date: str | date | None = None,
+    ) -> dict[str, np.ndarray]:
+        """获取日K线 OHLCV 列 (按日期升序的 numpy 数组, 二进制 COPY 读取, 不实例化 ORM 对象).
+
+        适合指标计算 / 工具批量取数; 单行字段访问仍用 get_daily_prices.
+        """
+        model = _resolve_model(_DAILY_PRICE_MAP, market)
+        return await load_price_columns(self.session, model, ticker, start_date=start_date, end_date=end_date)
+
+    async def upsert_daily_prices(self, entities: list[Any], market: str, replace: bool = False) -> int:
+        """批量写入日K线数据: 实体按列转为数组后按 (ticker, trade_date) 分块 upsert (bulk.upsert_daily_prices).
+
+        冲突行仅在值有变化时更新 (IS DISTINCT FROM), 可安全重跑; 写入在本会话的事务中, 由调用方提交.
+        实体只作为值的载体, 不加入会话.
+
+        Args:
+            replace: 全量替换实体涉及的 ticker: 同时删除其不在 entities 中的旧行.
+
+        Returns:
+            实际插入或更新的行数.
+        """
+        model = _resolve_model(_DAILY_PRICE_MAP, market)
+        if not entities:
+            return 0
+        await ensure_year_partitions([model], {to_date(e.trade_date).year for e in entities}, session=self.session)
+        return await bulk.upsert_daily_prices(self.session, model, entities, replace=replace)
 
     # ---- Technical Indicators ----
 
@@ -162,8 +192,8 @@ class StockRepository:
         self,
         ticker: str,
         market: str,
-        start_date: str | None = None,
-        end_date: str | None = None,
+        start_date: str | date | None = None,
+        end_date: str | date | None = None,
         limit: int = 500,
     ) -> list[Any]:
         """获取技术指标."""
@@ -191,8 +221,8 @@ class StockRepository:
         ticker: str,
         market: str,
         signal_type: str,
-        start_date: str | None = None,
-        end_date: str | None = None,
+        start_date: str | date | None = None,
+        end_date: str | date | None = None,
         limit: int = 500,
     ) -> list[Any]:
         """获取策略信号指标.
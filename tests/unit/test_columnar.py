@@ -0,0 +1,150 @@
+"""columnar 二进制 COPY 解码: 手工构造的 PGCOPY 缓冲区."""
+
+import math
+import struct
+from datetime import date
+
+import numpy as np
+import pytest
+
+from stock_agent.database import columnar
+from stock_agent.database.columnar import PRICE_FIELDS, decode_binary_copy, load_price_columns_many
+from stock_agent.database.models.stock import StockDailyPriceDB
+
+_PACK = {"int4": ">i", "int8": ">q", "float8": ">d"}
+_EPOCH = date(1970, 1, 1)
+
+
+def _copy_payload(rows: list[tuple], fields=PRICE_FIELDS, ext: bytes = b"") -> bytes:
+    """PGCOPY 缓冲区: 头部 (签名 / flags / 扩展区) + 每行 int16 字段数 + (int32 长度, 值) + 结尾 -1. None → NULL."""
+    out = [struct.pack(">11sii", b"PGCOPY\n\xff\r\n\x00", 0, len(ext)), ext]
+    for row in rows:
+        out.append(struct.pack(">h", len(row)))
+        for value, (_, _, pg_type) in zip(row, fields, strict=True):
+            if value is None:
+                out.append(struct.pack(">i", -1))
+            else:
+                data = struct.pack(_PACK[pg_type], value)
+                out.append(struct.pack(">i", len(data)) + data)
+    out.append(b"\xff\xff")
+    return b"".join(out)
+
+
+def _days(day: date) -> int:
+    return (day - _EPOCH).days
+
+
+def test_decode_dates_numerics_and_nan() -> None:
+    rows = [
+        (_days(date(2024, 1, 2)), 10.0, 11.5, 9.75, 11.0, 1_000),
+        (_days(date(1969, 12, 31)), math.nan, 1.0, 0.5, 0.75, 0),  # 纪元之前 → 负天数; NULL 已在 SQL 中转为 NaN
+        (_days(date(2024, 1, 3)), 11.0, 12.0, 10.0, 11.25, 2**40),
+    ]
+
+    cols = decode_binary_copy(_copy_payload(rows, ext=b"\x00\x00\x00\x00"), PRICE_FIELDS)
+
+    assert cols["trade_date"].astype("datetime64[D]").tolist() == [
+        date(2024, 1, 2),
+        date(1969, 12, 31),
+        date(2024, 1, 3),
+    ]
+    assert cols["close"].dtype == np.float64 and cols["close"].dtype.isnative
+    np.testing.assert_array_equal(cols["open"], [10.0, np.nan, 11.0])
+    np.testing.assert_array_equal(cols["low"], [9.75, 0.5, 10.0])
+    assert cols["volume"].dtype == np.int64
+    assert cols["volume"].tolist() == [1_000, 0, 2**40]
+
+
+def test_decode_empty_result() -> None:
+    cols = decode_binary_copy(_copy_payload([]), PRICE_FIELDS)
+
+    assert all(len(values) == 0 for values in cols.values())
+    assert cols["open"].dtype == np.float64
+
+
+@pytest.mark.parametrize(
+    ("payload", "message"),
+    [
+        # NULL 使该行变短, 不再是定长记录
+        (_copy_payload([(1, 1.0, 1.0, 1.0, 1.0, 1), (2, None, 1.0, 1.0, 1.0, 1)]), "not fixed-width"),
+        (b"NOTCOPY\n\xff\r\n" + _copy_payload([])[11:], "not a PostgreSQL binary COPY"),
+        (_copy_payload([(1, 1.0, 1.0, 1.0, 1.0, 1)])[:-2], "not a PostgreSQL binary COPY"),
+    ],
+)
+def test_decode_rejects_malformed_payload(payload: bytes, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        decode_binary_copy(payload, PRICE_FIELDS)
+
+
+def test_decode_rejects_field_count_and_width_mismatch() -> None:
+    header = 19  # 11 字节签名 + flags + 扩展区长度
+    row = bytearray(_copy_payload([(1, 1.0, 1.0, 1.0, 1.0, 1)]))
+
+    bad_count = bytearray(row)
+    bad_count[header : header + 2] = struct.pack(">h", 5)
+    with pytest.raises(ValueError, match="expected 6 fields"):
+        decode_binary_copy(bytes(bad_count), PRICE_FIELDS)
+
+    # 行总长不变, 但 volume 的长度字段不是 int8 的 8 字节
+    volume_len = len(row) - 2 - 8 - 4
+    bad_width = bytearray(row)
+    bad_width[volume_len : volume_len + 4] = struct.pack(">i", 4)
+    with pytest.raises(ValueError, match="column 'volume' is NULL or not int8"):
+        decode_binary_copy(bytes(bad_width), PRICE_FIELDS)
+
+
+class _FakeDriver:
+    """asyncpg 连接替身: copy_from_query 写出预先构造的缓冲区 (分块), fetch 返回 name 变化点."""
+
+    def __init__(self, payload: bytes, names: list[dict]) -> None:
+        self.payload = payload
+        self.names = names
+        self.copy_args: tuple = ()
+
+    async def copy_from_query(self, query: str, *args, output, format: str) -> None:
+        assert format == "binary"
+        self.copy_args = args
+        for i in range(0, len(self.payload), 7):
+            await output(self.payload[i : i + 7])
+
+    async def fetch(self, query: str, *args) -> list[dict]:
+        return self.names
+
+
+async def test_load_many_drops_nan_rows_and_splits_per_ticker(monkeypatch) -> None:
+    fields = (("_idx", "", "int4"), *PRICE_FIELDS)
+    d = [_days(date(2024, 1, day)) for day in (2, 3, 4, 5)]
+    rows = [
+        (1, d[0], 1.0, 1.5, 0.5, 1.25, 100),
+        (1, d[1], math.nan, 1.5, 0.5, 1.25, 100),  # OHLC 含 NaN → 剔除
+        (1, d[2], 2.0, 2.5, 1.5, 2.25, 200),
+        (3, d[0], 5.0, 5.5, 4.5, 5.25, 0),
+        (3, d[3], 6.0, 6.5, 5.5, math.nan, 0),  # close 为 NaN → 剔除
+    ]
+    names = [
+        {"idx": 1, "day": d[0], "name": "Alpha"},
+        {"idx": 1, "day": d[2], "name": "Alpha Inc"},
+        {"idx": 3, "day": d[0], "name": "Gamma"},
+    ]
+    driver = _FakeDriver(_copy_payload(rows, fields), names)
+
+    async def driver_connection(session):
+        return driver
+
+    monkeypatch.setattr(columnar, "driver_connection", driver_connection)
+
+    batch = await load_price_columns_many(
+        None, StockDailyPriceDB, ["AAA", "BBB", "CCC"], since={"AAA": "2024-01-01"}, warmup=5
+    )
+
+    assert driver.copy_args[:3] == (["AAA", "BBB", "CCC"], [date(2024, 1, 1), None, None], 5)
+    assert list(batch) == ["AAA", "BBB", "CCC"]
+    aaa, bbb, ccc = batch["AAA"], batch["BBB"], batch["CCC"]
+    assert aaa["trade_date"].tolist() == [date(2024, 1, 2), date(2024, 1, 4)]
+    assert aaa["close"].tolist() == [1.25, 2.25]
+    assert aaa["volume"].tolist() == [100, 200]
+    assert aaa["name"].tolist() == ["Alpha", "Alpha Inc"]
+    assert all(len(values) == 0 for values in bbb.values())
+    assert ccc["trade_date"].tolist() == [date(2024, 1, 2)]
+    assert ccc["name"].tolist() == ["Gamma"]
+    assert "_idx" not in aaa
@@ -0,0 +1,53 @@
+"""增量计算: 预热窗口 + 新 K 线的结果与全量重算在 4 位小数入库后完全一致."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_agent.data_pipeline.indicator_calculator import INDICATORS, _rows_after, compute_indicator_frames
+
+BARS = 1400
+
+
+@pytest.fixture(scope="module")
+def prices() -> pd.DataFrame:
+    """4 位小数的合成 OHLCV: 均值常落在第 4 位小数的舍入临界点上."""
+    rng = np.random.default_rng(3)
+    close = np.round(50 * np.exp(np.cumsum(rng.normal(0, 0.02, BARS))), 4)
+    return pd.DataFrame(
+        {
+            "trade_date": pd.bdate_range("2015-01-01", periods=BARS),
+            "name": "TEST",
+            "open": close,
+            "high": np.round(close * (1 + rng.uniform(0, 0.02, BARS)), 4),
+            "low": np.round(close * (1 - rng.uniform(0, 0.02, BARS)), 4),
+            "close": close,
+            "volume": rng.integers(100_000, 1_000_000, BARS).astype(float),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def full(prices: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    return compute_indicator_frames(prices)
+
+
+@pytest.mark.parametrize("split", [INDICATORS.warmup() + 1, 900, 1211, BARS - 1])
+def test_incremental_matches_full_recompute(prices, full, split: int) -> None:
+    # 同 load_price_columns(since=, warmup=): 水位线 (含) 之前的 warmup 根 + 之后的新行
+    since = prices["trade_date"].iloc[split - 1]
+    window = prices.iloc[split - INDICATORS.warmup() :].reset_index(drop=True)
+
+    incremental = compute_indicator_frames(window)
+
+    for key, frame in full.items():
+        got = _rows_after(incremental[key], since).reset_index(drop=True)
+        want = frame.iloc[split:].reset_index(drop=True)
+        assert len(got) == len(want) == BARS - split, key
+        for column in want.columns:
+            if want[column].dtype.kind == "f":
+                np.testing.assert_array_equal(
+                    got[column].round(4).to_numpy(), want[column].round(4).to_numpy(), err_msg=f"{key}.{column}"
+                )
+            else:
+                assert got[column].tolist() == want[column].tolist(), f"{key}.{column}"
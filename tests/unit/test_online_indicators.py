@@ -0,0 +1,115 @@
+"""online_indicators 状态机: 与批量路径逐位一致, JSON 快照可续算."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_agent.data_pipeline.indicator_calculator import INDICATOR_WARMUP_BARS, compute_indicator_frames
+from stock_agent.data_pipeline.online_indicators import (
+    ONLINE_TABLES,
+    OnlineEMA,
+    OnlineIndicatorState,
+    OnlineRollingStd,
+    OnlineRSI,
+    _iso_dates,
+    rows_to_frames,
+)
+
+BARS = 900
+
+
+@pytest.fixture(scope="module")
+def prices() -> pd.DataFrame:
+    """合成 OHLCV: 对数随机游走, 含一段横盘 (检验零变动 / 数值抵消分支)."""
+    rng = np.random.default_rng(20240628)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, BARS)))
+    close[300:330] = close[299]
+    high = close * (1 + rng.uniform(0, 0.02, BARS))
+    low = close * (1 - rng.uniform(0, 0.02, BARS))
+    return pd.DataFrame(
+        {
+            "trade_date": pd.bdate_range("2020-01-01", periods=BARS),
+            "name": "TEST",
+            "open": close,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": rng.integers(100_000, 1_000_000, BARS).astype(float),
+        }
+    )
+
+
+def _stream(state: OnlineIndicatorState, df: pd.DataFrame) -> list[dict]:
+    return [
+        state.update(day, close, high, low)
+        for day, close, high, low in zip(_iso_dates(df["trade_date"]), df["close"], df["high"], df["low"], strict=True)
+    ]
+
+
+def _assert_frames_equal(actual: dict[str, pd.DataFrame], expected: dict[str, pd.DataFrame], offset: int = 0) -> None:
+    """逐列精确比较预热期之后的行; offset 为两组帧首行在完整序列中的位置."""
+    for key in ONLINE_TABLES:
+        skip = max(0, INDICATOR_WARMUP_BARS[key] - offset)
+        got = actual[key].iloc[skip:].reset_index(drop=True)
+        want = expected[key].iloc[skip:].reset_index(drop=True)
+        assert not want.empty
+        assert set(got.columns) == set(want.columns), key
+        for column in want.columns:
+            if want[column].dtype.kind == "f":
+                np.testing.assert_array_equal(
+                    got[column].to_numpy(dtype=np.float64), want[column].to_numpy(), err_msg=f"{key}.{column}"
+                )
+            else:
+                assert got[column].tolist() == want[column].tolist(), f"{key}.{column}"
+
+
+def test_stream_matches_batch_after_warmup(prices: pd.DataFrame) -> None:
+    rows = _stream(OnlineIndicatorState(), prices)
+
+    _assert_frames_equal(rows_to_frames(prices, rows), compute_indicator_frames(prices, ONLINE_TABLES))
+
+
+def test_json_round_trip_resumes_identically(prices: pd.DataFrame) -> None:
+    split = 600
+    state = OnlineIndicatorState.from_history(prices.iloc[:split])
+    snapshot = json.loads(json.dumps(state.to_dict()))  # JSONB 中的形态: NaN 存为 null
+    resumed = OnlineIndicatorState.from_dict(snapshot)
+
+    assert resumed.to_dict() == state.to_dict()
+    assert resumed.trade_date == _iso_dates(prices["trade_date"])[split - 1]
+    assert resumed.bars == split
+
+    tail = prices.iloc[split:]
+    rows = _stream(resumed, tail)
+    batch = compute_indicator_frames(prices, ONLINE_TABLES)
+    _assert_frames_equal(
+        rows_to_frames(tail, rows),
+        {key: frame.iloc[split:] for key, frame in batch.items()},
+        offset=split,
+    )
+
+
+def test_preview_does_not_advance_state(prices: pd.DataFrame) -> None:
+    state = OnlineIndicatorState.from_history(prices.iloc[:200])
+    before = state.to_dict()
+    bar = prices.iloc[200]
+
+    preview = state.preview("2099-01-01", bar["close"], bar["high"], bar["low"])
+
+    assert state.to_dict() == before
+    assert preview == state.update("2099-01-01", bar["close"], bar["high"], bar["low"])
+
+
+@pytest.mark.parametrize("machine", [OnlineEMA(8), OnlineRSI(14), OnlineRollingStd(50)])
+def test_machine_round_trip_during_warmup(machine, prices: pd.DataFrame) -> None:
+    """预热期内 (缓冲区未满, 含 NaN) 的快照同样可以续算."""
+    closes = prices["close"].tolist()
+    for x in closes[:5]:
+        machine.update(x)
+    resumed = type(machine).from_dict(json.loads(json.dumps(machine.to_dict())))
+
+    expected = [machine.update(x) for x in closes[5:120]]
+    actual = [resumed.update(x) for x in closes[5:120]]
+    np.testing.assert_array_equal(actual, expected)
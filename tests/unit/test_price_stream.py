@@ -0,0 +1,206 @@
+"""price_stream 流水线: 假的下载 / 转换回调 + 替换掉的写库, 不连数据库."""
+
+import asyncio
+import contextlib
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from stock_agent.config import get_settings
+from stock_agent.data_pipeline import price_stream
+from stock_agent.data_pipeline.price_stream import PriceRows, stream_daily_prices
+from stock_agent.database.models.stock_us import StockDailyPriceUSDB
+
+PROVIDER = "fake"
+BARS = 3
+
+
+def _frame(ticker: str) -> pd.DataFrame:
+    close = float(len(ticker))
+    return pd.DataFrame(
+        {
+            "trade_date": pd.bdate_range("2024-01-01", periods=BARS),
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": [close + i for i in range(BARS)],
+            "volume": 100,
+        }
+    )
+
+
+class FakeDB:
+    """替换 upsert_chunked / get_session / ensure_year_partitions / invalidate_revised_history, 记录每次写入."""
+
+    def __init__(self, fail: set[str] = frozenset(), delay: float = 0.0) -> None:
+        self.fail = set(fail)
+        self.delay = delay
+        self.calls: list[dict] = []  # 每次 upsert: {"tickers": [...], "ok": bool, ...}
+        self.written: list[str] = []
+        self.columns: list[str] = []
+        self.invalidated: list[list[str]] = []  # 每次写入事务中清除派生数据的 ticker
+
+    async def upsert_chunked(self, session, model, columns, values, replace_tickers=None) -> int:
+        self.columns = [c.name for c in columns]
+        tickers = values[self.columns.index("ticker")]
+        batch = list(dict.fromkeys(tickers))
+        call = {"tickers": batch, "values": values, "replace": replace_tickers}
+        self.calls.append(call)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail & set(batch):
+            call["ok"] = False
+            raise RuntimeError("constraint violation")
+        call["ok"] = True
+        self.written.extend(batch)
+        return len(tickers)
+
+    async def invalidate_revised_history(self, session, model, tickers) -> None:
+        if tickers:
+            self.invalidated.append(list(tickers))
+
+    @contextlib.asynccontextmanager
+    async def get_session(self):
+        yield None
+
+    async def ensure_year_partitions(self, models, years, session=None) -> int:
+        return 0
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    s = get_settings()
+    for key, value in {
+        "PRICE_STREAM_QUEUE_SIZE": 2,
+        "PRICE_STREAM_TRANSFORM_WORKERS": 1,
+        "PRICE_STREAM_WRITERS": 1,
+        "PRICE_STREAM_BATCH_ROWS": 10_000,
+        "PROVIDER_CONCURRENCY": {**s.PROVIDER_CONCURRENCY, PROVIDER: 2},
+        "PROVIDER_RETRY_DEFER_SECONDS": 0.0,
+    }.items():
+        monkeypatch.setattr(s, key, value)
+    return s
+
+
+def _install(monkeypatch, db: FakeDB) -> FakeDB:
+    monkeypatch.setattr(price_stream, "upsert_chunked", db.upsert_chunked)
+    monkeypatch.setattr(price_stream, "get_session", db.get_session)
+    monkeypatch.setattr(price_stream, "ensure_year_partitions", db.ensure_year_partitions)
+    monkeypatch.setattr(price_stream, "invalidate_revised_history", db.invalidate_revised_history)
+    return db
+
+
+def _download(ticker: str) -> pd.DataFrame:
+    if ticker.startswith("DLFAIL"):
+        raise ValueError("upstream returned garbage")  # 不可重试: 直接交给流水线
+    return _frame(ticker)
+
+
+async def test_failures_and_per_ticker_fallback(monkeypatch, settings) -> None:
+    # 写库只在上游全部结束时才 flush: 全部 ticker 落在同一批, 批写失败后逐只重写
+    monkeypatch.setattr(price_stream, "_FLUSH_SECONDS", 60.0)
+    db = _install(monkeypatch, FakeDB(fail={"BAD"}))
+    good = ["AAA", "BBBB", "CC", "DDDDD"]
+    keys = ["AAA", "DLFAIL", "BBBB", "TXFAIL", "BAD", "SKIP", "FRESH", "CC", "DDDDD"]
+
+    def transform(ticker: str, raw: pd.DataFrame) -> PriceRows | None:
+        if ticker == "TXFAIL":
+            raise KeyError("Close")
+        if ticker == "SKIP":
+            return None
+        frame = raw.iloc[:0] if ticker == "FRESH" else raw
+        return PriceRows(ticker, frame, {"name": ticker.lower()}, replace=ticker == "CC")
+
+    stats = await stream_daily_prices(PROVIDER, _download, keys, StockDailyPriceUSDB, transform)
+
+    assert stats.failed == 3  # DLFAIL 下载, TXFAIL 转换, BAD 写库
+    assert stats.up_to_date == 1
+    assert stats.tickers_written == len(good)
+    assert stats.rows == stats.rows_written == len(good) * BARS
+    assert sorted(db.written) == sorted(good)
+
+    first, *retries = db.calls
+    assert not first["ok"] and sorted(first["tickers"]) == sorted([*good, "BAD"])
+    assert first["replace"] == ["CC"]
+    assert all(len(call["tickers"]) == 1 for call in retries)
+    assert sorted(t for call in retries for t in call["tickers"]) == sorted([*good, "BAD"])
+    assert [call["replace"] for call in retries if call["tickers"] == ["CC"]] == [["CC"]]
+    assert all(call["replace"] is None for call in retries if call["tickers"] != ["CC"])
+    # 派生数据在每个含替换 ticker 的写入事务中清除: 合并批 (已回滚) 与 CC 的单独重写各一次
+    assert db.invalidated == [["CC"], ["CC"]]
+
+
+async def test_rows_follow_transform_order(monkeypatch, settings) -> None:
+    monkeypatch.setattr(price_stream, "_FLUSH_SECONDS", 60.0)
+    db = _install(monkeypatch, FakeDB())
+    keys = [f"T{i:02d}" for i in range(12)]
+    seen: list[str] = []
+
+    def download(ticker: str) -> pd.DataFrame:
+        time.sleep(0.001 * (len(keys) - int(ticker[1:])))  # 完成顺序与提交顺序不同
+        return _frame(ticker)
+
+    def transform(ticker: str, raw: pd.DataFrame) -> PriceRows:
+        seen.append(ticker)
+        return PriceRows(ticker, raw, {"name": ticker})
+
+    stats = await stream_daily_prices(PROVIDER, download, keys, StockDailyPriceUSDB, transform)
+
+    assert stats.failed == 0 and sorted(seen) == keys
+    (call,) = db.calls
+    values = dict(zip(db.columns, call["values"], strict=True))
+    # 单个转换 / 写库工作者: 批内按转换顺序拼接, 每只 ticker 的行连续且按 trade_date 升序
+    assert values["ticker"] == [t for t in seen for _ in range(BARS)]
+    assert values["name"] == values["ticker"]
+    for i, ticker in enumerate(seen):
+        rows = slice(i * BARS, (i + 1) * BARS)
+        assert values["trade_date"][rows] == sorted(values["trade_date"][rows])
+        assert values["close"][rows] == _frame(ticker)["close"].tolist()
+
+
+async def test_split_batches_and_queue_bound(monkeypatch, settings) -> None:
+    monkeypatch.setattr(settings, "PRICE_STREAM_BATCH_ROWS", 1)  # 每只 ticker 单独写入
+    db = _install(monkeypatch, FakeDB(delay=0.01))  # 写库是瓶颈, 上游必须被背压挡住
+    chunks = [tuple(f"K{i:02d}{j}" for j in range(3)) for i in range(30)]
+    lock = threading.Lock()
+    pending = {"now": 0, "peak": 0}  # 已下载但尚未写入的 ticker 数
+
+    def download(chunk: tuple[str, ...]) -> dict[str, pd.DataFrame]:
+        with lock:
+            pending["now"] += len(chunk)
+            pending["peak"] = max(pending["peak"], pending["now"])
+        return {ticker: _frame(ticker) for ticker in chunk}
+
+    upsert = db.upsert_chunked
+
+    async def counting_upsert(*args, **kwargs) -> int:
+        written = await upsert(*args, **kwargs)
+        with lock:
+            pending["now"] -= len(db.calls[-1]["tickers"])
+        return written
+
+    monkeypatch.setattr(price_stream, "upsert_chunked", counting_upsert)
+
+    stats = await stream_daily_prices(
+        PROVIDER,
+        download,
+        chunks,
+        StockDailyPriceUSDB,
+        lambda ticker, raw: PriceRows(ticker, raw),
+        split=lambda key, frames: [(ticker, frames[ticker]) for ticker in key],
+    )
+
+    queue = settings.PRICE_STREAM_QUEUE_SIZE
+    assert stats.tickers_written == 90 and stats.failed == 0
+    assert [call["tickers"] for call in db.calls] == [[t] for t in db.written]
+    assert sorted(db.written) == sorted(t for chunk in chunks for t in chunk)
+    assert 0 < stats.raw_peak <= queue
+    assert stats.rows_peak == queue  # 写库慢: 待写入队列被填满, 但不超过容量
+    # 在途的 key 数: 下载窗口 (2 × 并发) + 下载 / 转换 / 写库各自手上的一份 + 两个队列, 与 key 总数无关
+    window = 2 * settings.PROVIDER_CONCURRENCY[PROVIDER]
+    bound = 3 * (window + 3 + 2 * queue)  # 每个 key 3 只 ticker
+    assert bound < stats.tickers_written
+    assert pending["peak"] <= bound
+    assert stats.as_dict()["queue_peak"] == {"raw": stats.raw_peak, "rows": stats.rows_peak, "capacity": queue}
@@ -0,0 +1,61 @@
+"""price_watermarks: 尾部重叠校验与水位线, 不连数据库."""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_agent.data_pipeline.price_watermarks import close_series, fetch_start, tail_changed, watermark
+
+DAYS = [date(2024, 6, d) for d in (24, 25, 26, 27, 28)]
+
+
+def _tail(closes: list[float], days: list[date] = DAYS) -> pd.Series:
+    return pd.Series(closes, index=days, dtype="float64")
+
+
+def test_fetch_start_and_watermark() -> None:
+    tail = _tail([10.0, 10.5, 11.0, 11.5, 12.0])
+
+    assert fetch_start(tail) == date(2024, 6, 24)
+    assert watermark(tail) == date(2024, 6, 28)
+    # 库中无数据: 按 period 全量下载
+    for empty in (None, _tail([], [])):
+        assert fetch_start(empty) is None
+        assert watermark(empty) is None
+
+
+def test_close_series_normalizes_dates_and_values() -> None:
+    fetched = close_series(pd.to_datetime(["2024-06-27", "2024-06-28"]), ["11.5", None])
+
+    assert list(fetched.index) == [date(2024, 6, 27), date(2024, 6, 28)]
+    assert fetched.iloc[0] == 11.5 and np.isnan(fetched.iloc[1])
+
+
+@pytest.mark.parametrize(
+    ("closes", "days", "changed"),
+    [
+        # 入库四舍五入到 4 位小数: 1e-4 以内视为一致; 新增交易日不参与比较
+        ([11.0, 11.50004, 12.00009, 12.7], DAYS[2:] + [date(2024, 7, 1)], False),
+        # 复权调整: 重叠区间收盘价整体缩放
+        ([9.9, 10.35, 10.8], DAYS[2:], True),
+        # 只有一根变化同样需要全量重下
+        ([11.0, 11.5, 12.01], DAYS[2:], True),
+        # 停牌等原因没有任何重叠交易日: 无法校验, 视为变化
+        ([12.5], [date(2024, 7, 1)], True),
+        # 上游没有返回数据: 不变化
+        ([], [], False),
+    ],
+)
+def test_tail_changed(closes: list[float], days: list[date], changed: bool) -> None:
+    tail = _tail([10.0, 10.5, 11.0, 11.5, 12.0])
+
+    assert tail_changed(tail, close_series(days, closes)) is changed
+
+
+def test_tail_changed_treats_matching_nan_as_equal() -> None:
+    tail = _tail([10.0, 10.5, np.nan, 11.5, 12.0])
+
+    assert not tail_changed(tail, close_series(DAYS, [10.0, 10.5, None, 11.5, 12.0]))
+    assert tail_changed(tail, close_series(DAYS, [10.0, 10.5, 11.0, 11.5, 12.0]))
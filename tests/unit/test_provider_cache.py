@@ -0,0 +1,94 @@
+"""provider_cache: 一次运行内的上游调用缓存 (single-flight, 异常不缓存), 不连上游."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from stock_agent.data_pipeline.provider_cache import ProviderCache, memoized, provider_run
+
+THREADS = 8
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+class Upstream:
+    """阻塞的上游替身: 记录调用次数, 在 gate 打开前不返回."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.calls = 0
+        self.gate = threading.Event()
+
+    def __call__(self, symbol: str, period: str = "5y") -> dict:
+        self.calls += 1
+        assert self.gate.wait(5.0)
+        if self.fail:
+            raise ConnectionError(f"{symbol} reset")
+        return {"symbol": symbol, "period": period}
+
+
+def test_concurrent_calls_share_one_upstream_request() -> None:
+    cache = ProviderCache()
+    upstream = Upstream()
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        futures = [pool.submit(cache.call, upstream, "600519", period="1y") for _ in range(THREADS)]
+        # 其余线程都在等待同一 key 的结果后才放行上游
+        _wait_until(lambda: cache.hits == THREADS - 1)
+        upstream.gate.set()
+        results = [f.result() for f in futures]
+
+    assert upstream.calls == 1 and cache.upstream_calls == 1
+    assert all(r is results[0] for r in results)  # 共享同一个结果对象
+    assert cache.call(upstream, "600519", period="1y") is results[0]
+    # 参数不同为不同的 key
+    assert cache.call(upstream, "000001", period="1y") == {"symbol": "000001", "period": "1y"}
+    assert upstream.calls == 2
+
+
+def test_exceptions_reach_waiters_and_are_not_cached() -> None:
+    cache = ProviderCache()
+    upstream = Upstream(fail=True)
+
+    with ThreadPoolExecutor(2) as pool:
+        owner = pool.submit(cache.call, upstream, "AAPL")
+        _wait_until(lambda: upstream.calls == 1)
+        waiter = pool.submit(cache.call, upstream, "AAPL")
+        _wait_until(lambda: cache.hits == 1)
+        upstream.gate.set()
+        for future in (owner, waiter):
+            with pytest.raises(ConnectionError, match="AAPL reset"):
+                future.result()
+
+    assert cache.upstream_calls == 0
+    upstream.fail = False
+    assert cache.call(upstream, "AAPL") == {"symbol": "AAPL", "period": "5y"}  # 重新请求上游
+    assert upstream.calls == 2 and cache.upstream_calls == 1
+
+
+def test_memoized_scope_is_the_outermost_run() -> None:
+    upstream = Upstream()
+    upstream.gate.set()
+
+    # 不在运行中: 直接调用, 不缓存
+    memoized(upstream, "MSFT")
+    memoized(upstream, "MSFT")
+    assert upstream.calls == 2
+
+    with provider_run() as outer:
+        memoized(upstream, "MSFT")
+        with provider_run() as inner:
+            assert inner is outer
+            memoized(upstream, "MSFT")
+    assert upstream.calls == 3 and outer.hits == 1
+
+    with provider_run():
+        memoized(upstream, "MSFT")  # 新的一次运行重新请求
+    assert upstream.calls == 4
@@ -0,0 +1,141 @@
+"""provider_limits / provider_calls: 令牌桶, 自适应并发, 错误分类与延后重试轮, 不连上游."""
+
+import asyncio
+import threading
+import types
+
+import pytest
+
+from stock_agent.config import get_settings
+from stock_agent.data_pipeline import provider_limits
+from stock_agent.data_pipeline.provider_calls import fetch_each
+from stock_agent.data_pipeline.provider_limits import AdaptiveLimiter, TokenBucket, is_retryable, is_throttled, rate_limit
+
+
+class FakeClock:
+    """替换 provider_limits.time: sleep 只推进时间."""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.slept: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(provider_limits, "time", types.SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.response = types.SimpleNamespace(status_code=status_code)
+
+
+class YFRateLimitError(Exception):
+    pass
+
+
+@pytest.mark.parametrize(
+    ("exc", "throttled", "retryable"),
+    [
+        (HTTPError(429), True, True),
+        (YFRateLimitError("Too Many Requests"), True, True),
+        (ConnectionResetError(), True, True),
+        (RuntimeError("RemoteDisconnected('Remote end closed connection')"), True, True),
+        (HTTPError(503), False, True),
+        (TimeoutError(), False, True),
+        (HTTPError(404), False, False),
+        (FileNotFoundError("cache.json"), False, False),
+        (KeyError("Close"), False, False),
+    ],
+)
+def test_error_classification(exc: BaseException, throttled: bool, retryable: bool) -> None:
+    assert is_throttled(exc) is throttled
+    assert is_retryable(exc) is retryable
+
+
+def test_token_bucket_burst_then_rate(clock: FakeClock) -> None:
+    bucket = TokenBucket(rate=4.0, burst=2)
+
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]  # 初始满桶
+    assert bucket.acquire() == pytest.approx(0.25)
+    assert bucket.acquire() == pytest.approx(0.25)
+
+    clock.now += 10.0  # 空闲期间补充的令牌不超过容量
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.25)
+
+
+def test_rate_limit_applies_provider_and_endpoint_buckets(monkeypatch, clock: FakeClock) -> None:
+    monkeypatch.setattr(get_settings(), "PROVIDER_RATE_LIMITS", {"fake": 10, "fake.info": 1})
+    monkeypatch.setattr(provider_limits, "_buckets", {})
+
+    assert rate_limit("fake", "info") == 0.0
+    assert rate_limit("fake", "info") == pytest.approx(1.0)  # 接口自己的 1 次/秒
+    assert rate_limit("fake", "daily") == 0.0  # 其余接口只受数据源的桶限制
+    assert rate_limit("other", "info") == 0.0  # 未配置: 不限
+
+
+async def test_adaptive_limiter_halves_once_per_round_and_recovers() -> None:
+    limiter = AdaptiveLimiter("fake", 4)
+    epochs = [await limiter.acquire() for _ in range(4)]
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(limiter.acquire(), 0.01)  # 名额已满
+
+    # 同一轮 (同一收缩代数) 的 4 次限流只减半一次
+    for epoch in epochs:
+        await limiter.release(epoch, ConnectionResetError())
+    assert limiter.limit == 2
+
+    # 非限流错误不影响上限
+    await limiter.release(await limiter.acquire(), KeyError("Close"))
+    assert limiter.limit == 2
+
+    # 每连续成功 limit 次加一, 不超过初始上限
+    for expected in (3, 4, 4):
+        for _ in range(limiter.limit):
+            await limiter.release(await limiter.acquire())
+        assert limiter.limit == expected
+
+
+async def test_fetch_each_defers_retryable_failures_to_one_more_round(monkeypatch) -> None:
+    settings = get_settings()
+    monkeypatch.setattr(settings, "MAX_RETRIES", 0)  # 不做即时退避, 只看延后重试轮
+    monkeypatch.setattr(settings, "PROVIDER_RETRY_DEFER_SECONDS", 0.0)
+    lock = threading.Lock()
+    calls: dict[str, int] = {}
+
+    def download(ticker: str) -> str:
+        with lock:
+            calls[ticker] = calls.get(ticker, 0) + 1
+            attempt = calls[ticker]
+        if ticker == "FLAKY" and attempt == 1:
+            raise ConnectionResetError("reset by peer")
+        if ticker == "DOWN":
+            raise TimeoutError("read timed out")
+        if ticker == "BAD":
+            raise KeyError("Close")  # 不可重试: 直接交给调用方
+        return ticker.lower()
+
+    keys = ["AAA", "FLAKY", "BAD", "DOWN", "BBB"]
+    order: list[str] = []
+    outcome: dict[str, object] = {}
+    async for ticker, future in fetch_each("fake-defer", download, keys, window=2):
+        order.append(ticker)
+        outcome[ticker] = future.exception() or future.result()
+
+    assert sorted(order[:3]) == ["AAA", "BAD", "BBB"]  # 延后的 key 在其余 key 全部完成后才产出
+    assert sorted(order[3:]) == ["DOWN", "FLAKY"]
+    assert outcome["FLAKY"] == "flaky"
+    assert isinstance(outcome["DOWN"], TimeoutError)  # 只重试一轮, 之后把失败交给调用方
+    assert isinstance(outcome["BAD"], KeyError)
+    assert calls == {"AAA": 1, "FLAKY": 2, "BAD": 1, "DOWN": 2, "BBB": 1}